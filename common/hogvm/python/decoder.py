@@ -0,0 +1,182 @@
+import marshal
+import pickle
+from functools import cache, lru_cache
+from typing import Any, Optional
+
+from common.hogvm.python.operation import Operation
+from common.hogvm.python.stl.bytecode import BYTECODE_STL
+from common.hogvm.python.utils import HogVMException
+
+DECODED_CHUNK_CACHE_SIZE = 1024
+
+# Decoded instructions are tuples of (operation, operand, ip of the next instruction). Operations with more than one
+# operand get a tuple of them, and jump offsets are resolved to the ip they jump to.
+Instruction = tuple[Any, Any, int]
+
+# Stands in for operations that aren't supported. The operand is the original symbol, for the error message.
+UNKNOWN_OPERATION = "__unknown__"
+# Stands in for instructions that can't be decoded, e.g. when the bytecode ends in the middle of one. The operand is
+# the exception to raise, which only happens if the instruction is executed, same as when reading token by token.
+INVALID_INSTRUCTION = "__invalid__"
+
+OPERAND_COUNTS: dict[Any, int] = {
+    None: 0,
+    Operation.GET_GLOBAL: 1,
+    Operation.CALL_GLOBAL: 2,
+    Operation.AND: 1,
+    Operation.OR: 1,
+    Operation.NOT: 0,
+    Operation.PLUS: 0,
+    Operation.MINUS: 0,
+    Operation.MULTIPLY: 0,
+    Operation.DIVIDE: 0,
+    Operation.MOD: 0,
+    Operation.EQ: 0,
+    Operation.NOT_EQ: 0,
+    Operation.GT: 0,
+    Operation.GT_EQ: 0,
+    Operation.LT: 0,
+    Operation.LT_EQ: 0,
+    Operation.LIKE: 0,
+    Operation.ILIKE: 0,
+    Operation.NOT_LIKE: 0,
+    Operation.NOT_ILIKE: 0,
+    Operation.IN: 0,
+    Operation.NOT_IN: 0,
+    Operation.REGEX: 0,
+    Operation.NOT_REGEX: 0,
+    Operation.IREGEX: 0,
+    Operation.NOT_IREGEX: 0,
+    Operation.TRUE: 0,
+    Operation.FALSE: 0,
+    Operation.NULL: 0,
+    Operation.STRING: 1,
+    Operation.INTEGER: 1,
+    Operation.FLOAT: 1,
+    Operation.POP: 0,
+    Operation.GET_LOCAL: 1,
+    Operation.SET_LOCAL: 1,
+    Operation.RETURN: 0,
+    Operation.JUMP: 1,
+    Operation.JUMP_IF_FALSE: 1,
+    Operation.DECLARE_FN: 3,
+    Operation.DICT: 1,
+    Operation.ARRAY: 1,
+    Operation.TUPLE: 1,
+    Operation.GET_PROPERTY: 0,
+    Operation.SET_PROPERTY: 0,
+    Operation.JUMP_IF_STACK_NOT_NULL: 1,
+    Operation.GET_PROPERTY_NULLISH: 0,
+    Operation.THROW: 0,
+    Operation.TRY: 1,
+    Operation.POP_TRY: 0,
+    Operation.CALLABLE: 4,
+    # The number of operands depends on the upvalue count, see `decode_instruction`
+    Operation.CLOSURE: 1,
+    Operation.CALL_LOCAL: 1,
+    Operation.GET_UPVALUE: 1,
+    Operation.SET_UPVALUE: 1,
+    Operation.CLOSE_UPVALUE: 0,
+}
+
+JUMP_OPERATIONS = (Operation.JUMP, Operation.JUMP_IF_FALSE, Operation.JUMP_IF_STACK_NOT_NULL)
+
+
+def decode_instruction(bytecode: list[Any] | tuple[Any, ...], ip: int) -> Instruction:
+    symbol = bytecode[ip]
+    try:
+        operand_count = OPERAND_COUNTS.get(symbol)
+    except TypeError:  # unhashable symbol
+        operand_count = None
+    if operand_count is None and symbol is not None:
+        return (UNKNOWN_OPERATION, symbol, ip + 1)
+
+    last_op = len(bytecode) - 1
+    if symbol == Operation.CLOSURE and ip < last_op and isinstance(bytecode[ip + 1], int):
+        operand_count += 2 * bytecode[ip + 1]
+    next_ip = ip + operand_count + 1
+    if next_ip - 1 > last_op:
+        return (INVALID_INSTRUCTION, HogVMException("Unexpected end of bytecode"), next_ip)
+
+    try:
+        if operand_count == 0:
+            operand = None
+        elif symbol in JUMP_OPERATIONS:
+            operand = next_ip + bytecode[ip + 1]
+        elif symbol == Operation.TRY:
+            # Unlike jumps, the catch offset is relative to the operand
+            operand = ip + 1 + bytecode[ip + 1]
+        elif symbol == Operation.DECLARE_FN:
+            name, arg_len, body_len = bytecode[ip + 1 : next_ip]
+            operand = (name, arg_len, next_ip, next_ip + body_len)
+        elif symbol == Operation.CALLABLE:
+            name, arg_count, upvalue_count, body_length = bytecode[ip + 1 : next_ip]
+            operand = (name, arg_count, upvalue_count, next_ip, next_ip + body_length)
+        elif symbol == Operation.CLOSURE:
+            pairs = bytecode[ip + 2 : next_ip]
+            operand = (bytecode[ip + 1], tuple(zip(pairs[::2], pairs[1::2])))
+        elif operand_count == 1:
+            operand = bytecode[ip + 1]
+        else:
+            operand = tuple(bytecode[ip + 1 : next_ip])
+    except Exception as e:
+        return (INVALID_INSTRUCTION, e, next_ip)
+    return (symbol, operand, next_ip)
+
+
+class DecodedChunk:
+    """
+    A chunk of bytecode decoded into instructions, indexed by the ip of the operation in the bytecode, so that ips
+    stored in callables and try blocks stay valid.
+    """
+
+    __slots__ = ("bytecode", "instructions")
+
+    def __init__(self, bytecode: list[Any] | tuple[Any, ...]):
+        self.bytecode = bytecode
+        self.instructions: list[Optional[Instruction]] = [None] * len(bytecode)
+        ip = 0
+        if bytecode and (bytecode[0] == "_H" or bytecode[0] == "_h"):
+            ip = 2 if bytecode[0] == "_H" else 1
+        # Function bodies are inlined, so decoding in order reaches every operation the compiler emits
+        while ip < len(bytecode):
+            instruction = decode_instruction(bytecode, ip)
+            self.instructions[ip] = instruction
+            if instruction[0] == UNKNOWN_OPERATION:
+                break  # the length of the operation isn't known
+            ip = instruction[2]
+
+    def instruction_at(self, ip: int) -> Instruction:
+        """Decodes the instruction at an ip that wasn't reached when decoding in order, e.g. after a header."""
+        instruction = self.instructions[ip]
+        if instruction is None:
+            instruction = decode_instruction(self.bytecode, ip)
+            self.instructions[ip] = instruction
+        return instruction
+
+
+@lru_cache(maxsize=DECODED_CHUNK_CACHE_SIZE)
+def _decode_serialized_chunk(serialized: bytes) -> DecodedChunk:
+    if serialized[:1] == b"m":
+        return DecodedChunk(marshal.loads(serialized[1:]))
+    return DecodedChunk(pickle.loads(serialized[1:]))
+
+
+def decode_chunk(bytecode: list[Any]) -> DecodedChunk:
+    """Returns the decoded chunk, cached by the contents of the bytecode."""
+    # Unlike a tuple, these tell apart 1, 1.0 and True
+    try:
+        # Version 2 doesn't use references, so equal bytecode is always serialized the same way
+        serialized = b"m" + marshal.dumps(bytecode, 2)
+    except ValueError:
+        try:
+            # Bytecode compiled in this process contains `Operation` members, which marshal doesn't support
+            serialized = b"p" + pickle.dumps(bytecode, pickle.HIGHEST_PROTOCOL)
+        except Exception:  # can't be serialized, so don't cache it
+            return DecodedChunk(bytecode)
+    return _decode_serialized_chunk(serialized)
+
+
+@cache
+def decode_stl_chunk(name: str) -> DecodedChunk:
+    return DecodedChunk(BYTECODE_STL[name][1])
@@ -6,6 +6,13 @@ from typing import Any, Optional, TYPE_CHECKING
 from collections.abc import Callable
 
 from common.hogvm.python.debugger import debugger, color_bytecode
+from common.hogvm.python.decoder import (
+    INVALID_INSTRUCTION,
+    UNKNOWN_OPERATION,
+    DecodedChunk,
+    decode_chunk,
+    decode_stl_chunk,
+)
 from common.hogvm.python.objects import (
     is_hog_error,
     new_hog_closure,
@@ -37,6 +44,8 @@ if TYPE_CHECKING:
 MAX_MEMORY = 64 * 1024 * 1024  # 64 MB
 MAX_FUNCTION_ARGS_LENGTH = 300
 CALLSTACK_LENGTH = 1000
+# Returned by an operation handler to stop executing and return the value on top of the stack
+STOP_EXECUTION = object()
 
 
 @dataclass
@@ -70,6 +79,14 @@ def execute_bytecode(
     upvalues: list[dict] = []
     upvalues_by_id: dict[int, dict] = {}
     mem_stack: list = []
+    # The mutation epoch at which each cost in `mem_stack` was calculated. A cost is only current if no object has
+    # been mutated since, so it can be reused when pushing the same value again.
+    cost_epochs: list[int] = []
+    mutation_epoch = 0
+    # Costs of stack values, recalculated after a mutation, keyed by stack index: (value, cost, mutation epoch)
+    recalculated_costs: dict[int, tuple[Any, int, int]] = {}
+    # Globals are copied before being pushed, so they're never mutated and their costs never change
+    global_costs: dict[int, tuple[Any, int]] = {}
     call_stack: list[CallFrame] = []
     throw_stack: list[ThrowFrame] = []
     declared_functions: dict[str, tuple[int, int]] = {}
@@ -103,20 +120,32 @@ def execute_bytecode(
     frame = call_stack[-1]
     chunk_bytecode: list[Any] = root_bytecode
     chunk_globals = globals
+    # Chunks are decoded once per execution and cached across executions, see `decode_chunk`
+    decoded_chunks: dict[str, DecodedChunk] = {"root": decode_chunk(root_bytecode)}
+    decoded_chunk = decoded_chunks["root"]
+    chunk_instructions: list = decoded_chunk.instructions
 
     def set_chunk_bytecode():
-        nonlocal chunk_bytecode, chunk_globals, last_op, debug_bytecode
-        if not frame.chunk or frame.chunk == "root":
+        nonlocal chunk_bytecode, chunk_globals, last_op, debug_bytecode, decoded_chunk, chunk_instructions
+        chunk_name = frame.chunk or "root"
+        if chunk_name == "root":
             chunk_bytecode = root_bytecode
             chunk_globals = globals
-        elif frame.chunk.startswith("stl/") and frame.chunk[4:] in BYTECODE_STL:
-            chunk_bytecode = BYTECODE_STL[frame.chunk[4:]][1]
+        elif chunk_name.startswith("stl/") and chunk_name[4:] in BYTECODE_STL:
+            chunk_bytecode = BYTECODE_STL[chunk_name[4:]][1]
             chunk_globals = {}
-        elif bytecodes.get(frame.chunk):
-            chunk_bytecode = bytecodes[frame.chunk].get("bytecode", [])
-            chunk_globals = bytecodes[frame.chunk].get("globals", {})
+        elif bytecodes.get(chunk_name):
+            chunk_bytecode = bytecodes[chunk_name].get("bytecode", [])
+            chunk_globals = bytecodes[chunk_name].get("globals", {})
         else:
             raise HogVMException(f"Unknown chunk: {frame.chunk}")
+        if chunk_name not in decoded_chunks:
+            if chunk_name.startswith("stl/") and chunk_name[4:] in BYTECODE_STL:
+                decoded_chunks[chunk_name] = decode_stl_chunk(chunk_name[4:])
+            else:
+                decoded_chunks[chunk_name] = decode_chunk(chunk_bytecode)
+        decoded_chunk = decoded_chunks[chunk_name]
+        chunk_instructions = decoded_chunk.instructions
         last_op = len(chunk_bytecode) - 1
         if debug:
             debug_bytecode = color_bytecode(chunk_bytecode)
@@ -127,7 +156,7 @@ def execute_bytecode(
     set_chunk_bytecode()
 
     def stack_keep_first_elements(count: int) -> list[Any]:
-        nonlocal stack, mem_stack, mem_used
+        nonlocal stack, mem_stack, cost_epochs, mem_used
         if count < 0 or len(stack) < count:
             raise HogVMException("Stack underflow")
         for upvalue in reversed(upvalues):
@@ -141,6 +170,7 @@ def execute_bytecode(
         stack = stack[0:count]
         mem_used -= sum(mem_stack[count:])
         mem_stack = mem_stack[0:count]
+        cost_epochs = cost_epochs[0:count]
         return removed
 
     def next_token():
@@ -155,11 +185,13 @@ def execute_bytecode(
             raise HogVMException("Stack underflow")
         nonlocal mem_used
         mem_used -= mem_stack.pop()
+        cost_epochs.pop()
         return stack.pop()
 
-    def push_stack(value):
+    def push_stack(value, cost: Optional[int] = None):
         stack.append(value)
-        mem_stack.append(calculate_cost(value))
+        mem_stack.append(calculate_cost(value) if cost is None else cost)
+        cost_epochs.append(mutation_epoch)
         nonlocal mem_used
         mem_used += mem_stack[-1]
         nonlocal max_mem_used
@@ -167,8 +199,63 @@ def execute_bytecode(
         if mem_used > MAX_MEMORY:
             raise HogVMMemoryExceededException(memory_limit=MAX_MEMORY, attempted_memory=mem_used)
 
+    def known_stack_cost(index: int, epoch: int) -> Optional[int]:
+        """Returns the cost of the value at `index` as of `epoch`, if it's known."""
+        if cost_epochs[index] == epoch:
+            return mem_stack[index]
+        recalculated = recalculated_costs.get(index)
+        if recalculated is not None and recalculated[0] is stack[index] and recalculated[2] == epoch:
+            return recalculated[1]
+        return None
+
+    def stack_cost(index: int) -> int:
+        """Returns the current cost of the value at `index`, without walking it again if nothing was mutated since."""
+        cost = known_stack_cost(index, mutation_epoch)
+        if cost is None:
+            cost = calculate_cost(stack[index])
+            recalculated_costs[index] = (stack[index], cost, mutation_epoch)
+        return cost
+
+    def global_cost(value: Any) -> int:
+        if not isinstance(value, dict | list | tuple):
+            return calculate_cost(value)
+        known = global_costs.get(id(value))
+        if known is None or known[0] is not value:
+            known = (value, calculate_cost(value))
+            global_costs[id(value)] = known
+        return known[1]
+
+    def set_property(obj: Any, field: Any, value: Any, value_cost: int) -> None:
+        """Sets the property and tracks the change in cost of the object, so that it doesn't need to be walked again."""
+        nonlocal mutation_epoch
+        delta: Optional[int] = None
+        # Only exact for scalars, as objects can contain references to each other
+        if not isinstance(value, dict | list | tuple):
+            if isinstance(obj, dict):
+                if field not in obj:
+                    delta = calculate_cost(field) + value_cost
+                elif not isinstance(obj[field], dict | list | tuple):
+                    delta = value_cost - calculate_cost(obj[field])
+            elif isinstance(obj, list) and isinstance(field, int) and 0 < field <= len(obj):
+                if not isinstance(obj[field - 1], dict | list | tuple):
+                    delta = value_cost - calculate_cost(obj[field - 1])
+
+        set_nested_value(obj, [field], value)
+
+        previous_epoch = mutation_epoch
+        mutation_epoch += 1
+        if delta is None:
+            return
+        for index in range(frame.stack_start, len(stack)):
+            if stack[index] is obj:
+                cost = known_stack_cost(index, previous_epoch)
+                if cost is not None:
+                    recalculated_costs[index] = (obj, cost + delta, mutation_epoch)
+
+    deadline = start_time + timeout.total_seconds()
+
     def check_timeout():
-        if time.time() - start_time > timeout.total_seconds() and not debug:
+        if time.time() > deadline and not debug:
             raise HogVMRuntimeExceededException(timeout_seconds=timeout.total_seconds(), ops_performed=ops)
 
     def capture_upvalue(index) -> dict:
@@ -190,7 +277,556 @@ def execute_bytecode(
         upvalues.sort(key=lambda x: x["location"])
         return created_upvalue
 
-    symbol: Any = None
+    # Each handler runs one operation, with frame.ip already pointing to the next one. Handlers that leave the loop
+    # return the result, or STOP_EXECUTION to return the value on top of the stack.
+    def op_stop(_):
+        return STOP_EXECUTION
+
+    def op_push_operand(operand):
+        push_stack(operand)
+
+    def op_true(_):
+        push_stack(True)
+
+    def op_false(_):
+        push_stack(False)
+
+    def op_null(_):
+        push_stack(None)
+
+    def op_not(_):
+        push_stack(not pop_stack())
+
+    def op_and(count):
+        push_stack(all([pop_stack() for _ in range(count)]))  # noqa: C419
+
+    def op_or(count):
+        push_stack(any([pop_stack() for _ in range(count)]))  # noqa: C419
+
+    def op_plus(_):
+        push_stack(pop_stack() + pop_stack())
+
+    def op_minus(_):
+        push_stack(pop_stack() - pop_stack())
+
+    def op_divide(_):
+        push_stack(pop_stack() / pop_stack())
+
+    def op_multiply(_):
+        push_stack(pop_stack() * pop_stack())
+
+    def op_mod(_):
+        push_stack(pop_stack() % pop_stack())
+
+    def op_eq(_):
+        var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
+        push_stack(var1 == var2)
+
+    def op_not_eq(_):
+        var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
+        push_stack(var1 != var2)
+
+    def op_gt(_):
+        var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
+        push_stack(var1 > var2)
+
+    def op_gt_eq(_):
+        var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
+        push_stack(var1 >= var2)
+
+    def op_lt(_):
+        var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
+        push_stack(var1 < var2)
+
+    def op_lt_eq(_):
+        var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
+        push_stack(var1 <= var2)
+
+    def op_like(_):
+        push_stack(like(pop_stack(), pop_stack()))
+
+    def op_ilike(_):
+        push_stack(like(pop_stack(), pop_stack(), re.IGNORECASE))
+
+    def op_not_like(_):
+        push_stack(not like(pop_stack(), pop_stack()))
+
+    def op_not_ilike(_):
+        push_stack(not like(pop_stack(), pop_stack(), re.IGNORECASE))
+
+    def op_in(_):
+        push_stack(pop_stack() in pop_stack())
+
+    def op_not_in(_):
+        push_stack(pop_stack() not in pop_stack())
+
+    def op_regex(_):
+        args = [pop_stack(), pop_stack()]
+        # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
+        push_stack(bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
+
+    def op_not_regex(_):
+        args = [pop_stack(), pop_stack()]
+        # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
+        push_stack(not bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
+
+    def op_iregex(_):
+        args = [pop_stack(), pop_stack()]
+        push_stack(
+            bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])) if args[0] and args[1] else False
+        )
+
+    def op_not_iregex(_):
+        args = [pop_stack(), pop_stack()]
+        push_stack(
+            not bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])) if args[0] and args[1] else False
+        )
+
+    def op_get_global(count):
+        chain = [pop_stack() for _ in range(count)]
+        if chunk_globals and chain[0] in chunk_globals:
+            global_value = get_nested_value(chunk_globals, chain, True)
+            push_stack(deepcopy(global_value), global_cost(global_value))
+        elif functions and chain[0] in functions:
+            push_stack(
+                new_hog_closure(
+                    new_hog_callable(
+                        type="stl",
+                        name=chain[0],
+                        arg_count=0,
+                        upvalue_count=0,
+                        ip=-1,
+                        chunk="stl",
+                    )
+                )
+            )
+        elif chain[0] in STL and len(chain) == 1:
+            push_stack(
+                new_hog_closure(
+                    new_hog_callable(
+                        type="stl",
+                        name=chain[0],
+                        arg_count=STL[chain[0]].maxArgs or 0,
+                        upvalue_count=0,
+                        ip=-1,
+                        chunk="stl",
+                    )
+                )
+            )
+        elif chain[0] in BYTECODE_STL and len(chain) == 1:
+            push_stack(
+                new_hog_closure(
+                    new_hog_callable(
+                        type="stl",
+                        name=chain[0],
+                        arg_count=len(BYTECODE_STL[chain[0]][0]),
+                        upvalue_count=0,
+                        ip=0,
+                        chunk=f"stl/{chain[0]}",
+                    )
+                )
+            )
+        else:
+            raise HogVMException(f"Global variable not found: {chain[0]}")
+
+    def op_pop(_):
+        pop_stack()
+
+    def op_close_upvalue(_):
+        stack_keep_first_elements(len(stack) - 1)
+
+    def op_return(_):
+        nonlocal frame
+        response = pop_stack()
+        last_call_frame = call_stack.pop()
+        if len(call_stack) == 0 or last_call_frame is None:
+            return BytecodeResult(result=response, stdout=stdout, bytecodes=bytecodes)
+        stack_keep_first_elements(last_call_frame.stack_start)
+        push_stack(response)
+        frame = call_stack[-1]
+        set_chunk_bytecode()
+
+    def op_get_local(offset):
+        stack_start = 0 if not call_stack else call_stack[-1].stack_start
+        index = offset + stack_start
+        push_stack(stack[index], stack_cost(index))
+
+    def op_set_local(offset):
+        nonlocal mem_used, max_mem_used
+        stack_start = 0 if not call_stack else call_stack[-1].stack_start
+        cost = stack_cost(len(stack) - 1) if stack else 0
+        value = pop_stack()
+        index = offset + stack_start
+        stack[index] = value
+        last_cost = mem_stack[index]
+        mem_stack[index] = cost
+        cost_epochs[index] = mutation_epoch
+        mem_used += mem_stack[index] - last_cost
+        max_mem_used = max(mem_used, max_mem_used)
+
+    def op_get_property(_):
+        property = pop_stack()
+        push_stack(get_nested_value(pop_stack(), [property]))
+
+    def op_get_property_nullish(_):
+        property = pop_stack()
+        push_stack(get_nested_value(pop_stack(), [property], nullish=True))
+
+    def op_set_property(_):
+        value_cost = stack_cost(len(stack) - 1) if stack else 0
+        value = pop_stack()
+        field = pop_stack()
+        set_property(pop_stack(), field, value, value_cost)
+
+    def pop_elements(count: int) -> list[Any]:
+        nonlocal stack, mem_stack, cost_epochs, mem_used
+        elems = stack[-count:]
+        stack = stack[:-count]
+        mem_used -= sum(mem_stack[-count:])
+        mem_stack = mem_stack[:-count]
+        cost_epochs = cost_epochs[:-count]
+        return elems
+
+    def op_dict(count):
+        if count > 0:
+            elems = pop_elements(count * 2)
+            push_stack({elems[i]: elems[i + 1] for i in range(0, len(elems), 2)})
+        else:
+            push_stack({})
+
+    def op_array(count):
+        if count > 0:
+            push_stack(pop_elements(count))
+        else:
+            push_stack([])
+
+    def op_tuple(count):
+        if count > 0:
+            push_stack(tuple(pop_elements(count)))
+        else:
+            push_stack(())
+
+    def op_jump(target):
+        frame.ip = target
+
+    def op_jump_if_false(target):
+        if not pop_stack():
+            frame.ip = target
+
+    def op_jump_if_stack_not_null(target):
+        if len(stack) > 0 and stack[-1] is not None:
+            frame.ip = target
+
+    def op_declare_fn(operands):
+        # DEPRECATED
+        name, arg_len, body_ip, end_ip = operands
+        declared_functions[name] = (body_ip, arg_len)
+        frame.ip = end_ip
+
+    def op_callable(operands):
+        # TODO: do we need the name? it could change as the variable is reassigned
+        name, arg_count, upvalue_count, body_ip, end_ip = operands
+        push_stack(
+            new_hog_callable(
+                type="local",
+                name=name,
+                chunk=frame.chunk,
+                arg_count=arg_count,
+                upvalue_count=upvalue_count,
+                ip=body_ip,
+            )
+        )
+        frame.ip = end_ip
+
+    def op_closure(operands):
+        upvalue_count, upvalue_pairs = operands
+        closure_callable = pop_stack()
+        closure = new_hog_closure(closure_callable)
+        stack_start = frame.stack_start
+        if upvalue_count != closure_callable["upvalueCount"]:
+            raise HogVMException(
+                f"Invalid upvalue count. Expected {closure_callable['upvalueCount']}, got {upvalue_count}"
+            )
+        for is_local, index in upvalue_pairs:
+            if is_local:
+                closure["upvalues"].append(capture_upvalue(stack_start + index)["id"])
+            else:
+                closure["upvalues"].append(frame.closure["upvalues"][index])
+        push_stack(closure)
+
+    def get_upvalue(index: int) -> dict:
+        closure = frame.closure
+        if index >= len(closure["upvalues"]):
+            raise HogVMException(f"Invalid upvalue index: {index}")
+        upvalue = upvalues_by_id[closure["upvalues"][index]]
+        if not is_hog_upvalue(upvalue):
+            raise HogVMException(f"Invalid upvalue: {upvalue}")
+        return upvalue
+
+    def op_get_upvalue(index):
+        upvalue = get_upvalue(index)
+        if upvalue["closed"]:
+            push_stack(upvalue["value"])
+        else:
+            push_stack(stack[upvalue["location"]])
+
+    def op_set_upvalue(index):
+        upvalue = get_upvalue(index)
+        if upvalue["closed"]:
+            upvalue["value"] = pop_stack()
+        else:
+            stack[upvalue["location"]] = pop_stack()
+            # The cost of the slot is left as it was, but it's no longer the cost of its value
+            cost_epochs[upvalue["location"]] = -1
+
+    def call_frame(new_frame: CallFrame):
+        nonlocal frame
+        frame = new_frame
+        set_chunk_bytecode()
+        call_stack.append(frame)
+
+    def op_call_global(operands):
+        nonlocal mutation_epoch
+        check_timeout()
+        name, arg_count = operands
+        # This is for backwards compatibility. We use a closure on the stack with local functions now.
+        if name in declared_functions:
+            func_ip, arg_len = declared_functions[name]
+            if arg_len > arg_count:
+                for _ in range(arg_len - arg_count):
+                    push_stack(None)
+            call_frame(
+                CallFrame(
+                    ip=func_ip,
+                    chunk=frame.chunk,
+                    stack_start=len(stack) - arg_len,
+                    arg_len=arg_len,
+                    closure=new_hog_closure(
+                        new_hog_callable(
+                            type="local",
+                            name=name,
+                            arg_count=arg_len,
+                            upvalue_count=0,
+                            ip=func_ip,
+                            chunk=frame.chunk,
+                        )
+                    ),
+                )
+            )
+        elif name == "import":
+            if arg_count != 1:
+                raise HogVMException("Function import requires exactly 1 argument")
+            module_name = pop_stack()
+            call_frame(
+                CallFrame(
+                    ip=0,
+                    chunk=module_name,
+                    stack_start=len(stack),
+                    arg_len=0,
+                    closure=new_hog_closure(
+                        new_hog_callable(
+                            type="local",
+                            name=module_name,
+                            arg_count=0,
+                            upvalue_count=0,
+                            ip=0,
+                            chunk=module_name,
+                        )
+                    ),
+                )
+            )
+        elif functions is not None and name in functions:
+            if version == 0:
+                args = [pop_stack() for _ in range(arg_count)]
+            else:
+                args = stack_keep_first_elements(len(stack) - arg_count)
+            result = functions[name](*args)
+            # Python functions might mutate their arguments
+            mutation_epoch += 1
+            push_stack(result)
+        elif name in STL:
+            if version == 0:
+                args = [pop_stack() for _ in range(arg_count)]
+            else:
+                args = stack_keep_first_elements(len(stack) - arg_count)
+            push_stack(STL[name].fn(args, team, stdout, timeout.total_seconds()))
+        elif name in BYTECODE_STL:
+            arg_names = BYTECODE_STL[name][0]
+            if len(arg_names) != arg_count:
+                raise HogVMException(f"Function {name} requires exactly {len(arg_names)} arguments")
+            call_frame(
+                CallFrame(
+                    ip=0,
+                    chunk=f"stl/{name}",
+                    stack_start=len(stack) - arg_count,
+                    arg_len=arg_count,
+                    closure=new_hog_closure(
+                        new_hog_callable(
+                            type="stl",
+                            name=name,
+                            arg_count=arg_count,
+                            upvalue_count=0,
+                            ip=0,
+                            chunk=f"stl/{name}",
+                        )
+                    ),
+                )
+            )
+        else:
+            raise HogVMException(f"Unsupported function call: {name}")
+
+    def op_call_local(args_length):
+        check_timeout()
+        closure = pop_stack()
+        if not isinstance(closure, dict) or closure.get("__hogClosure__") is None:
+            raise HogVMException(f"Invalid closure: {closure}")
+        callable = closure.get("callable")
+        if not isinstance(callable, dict) or callable.get("__hogCallable__") is None:
+            raise HogVMException(f"Invalid callable: {callable}")
+        if args_length > MAX_FUNCTION_ARGS_LENGTH:
+            raise HogVMException("Too many arguments")
+
+        if callable.get("__hogCallable__") == "local":
+            if callable["argCount"] > args_length:
+                # TODO: specify minimum required arguments somehow
+                for _ in range(callable["argCount"] - args_length):
+                    push_stack(None)
+            elif callable["argCount"] < args_length:
+                raise HogVMException(f"Too many arguments. Passed {args_length}, expected {callable['argCount']}")
+            call_frame(
+                CallFrame(
+                    ip=callable["ip"],
+                    chunk=callable["chunk"],
+                    stack_start=len(stack) - callable["argCount"],
+                    arg_len=callable["argCount"],
+                    closure=closure,
+                )
+            )
+
+        elif callable.get("__hogCallable__") == "stl":
+            if callable["name"] not in STL:
+                raise HogVMException(f"Unsupported function call: {callable['name']}")
+            stl_fn = STL[callable["name"]]
+            if stl_fn.minArgs is not None and args_length < stl_fn.minArgs:
+                raise HogVMException(f"Function {callable['name']} requires at least {stl_fn.minArgs} arguments")
+            if stl_fn.maxArgs is not None and args_length > stl_fn.maxArgs:
+                raise HogVMException(f"Function {callable['name']} requires at most {stl_fn.maxArgs} arguments")
+            if version == 0:
+                args = [pop_stack() for _ in range(args_length)]
+            else:
+                args = list(reversed([pop_stack() for _ in range(args_length)]))
+                if stl_fn.maxArgs is not None and len(args) < stl_fn.maxArgs:
+                    args = [*args, *([None] * (stl_fn.maxArgs - len(args)))]
+            push_stack(stl_fn.fn(args, team, stdout, timeout.total_seconds()))
+
+        elif callable.get("__hogCallable__") == "async":
+            raise HogVMException("Async functions are not supported")
+
+        else:
+            raise HogVMException("Invalid callable")
+
+    def op_try(catch_ip):
+        throw_stack.append(ThrowFrame(call_stack_len=len(call_stack), stack_len=len(stack), catch_ip=catch_ip))
+
+    def op_pop_try(_):
+        if throw_stack:
+            throw_stack.pop()
+        else:
+            raise HogVMException("Invalid operation POP_TRY: no try block to pop")
+
+    def op_throw(_):
+        nonlocal frame, call_stack
+        exception = pop_stack()
+        if not is_hog_error(exception):
+            raise HogVMException("Can not throw: value is not of type Error")
+        if throw_stack:
+            last_throw = throw_stack.pop()
+            call_stack_len, stack_len, catch_ip = (
+                last_throw.call_stack_len,
+                last_throw.stack_len,
+                last_throw.catch_ip,
+            )
+            stack_keep_first_elements(stack_len)
+            call_stack = call_stack[0:call_stack_len]
+            push_stack(exception)
+            frame = call_stack[-1]
+            set_chunk_bytecode()
+            frame.ip = catch_ip
+        else:
+            raise UncaughtHogVMException(
+                type=exception.get("type"),
+                message=exception.get("message"),
+                payload=exception.get("payload"),
+            )
+
+    def op_unknown(symbol):
+        raise HogVMException(f'Unexpected node while running bytecode in chunk "{frame.chunk}": {symbol}')
+
+    def op_invalid(exception):
+        # Raise a new instance, as the decoded instruction is shared between runs
+        raise type(exception)(*exception.args)
+
+    handlers: dict[Any, Callable[[Any], Any]] = {
+        None: op_stop,
+        Operation.STRING: op_push_operand,
+        Operation.INTEGER: op_push_operand,
+        Operation.FLOAT: op_push_operand,
+        Operation.TRUE: op_true,
+        Operation.FALSE: op_false,
+        Operation.NULL: op_null,
+        Operation.NOT: op_not,
+        Operation.AND: op_and,
+        Operation.OR: op_or,
+        Operation.PLUS: op_plus,
+        Operation.MINUS: op_minus,
+        Operation.DIVIDE: op_divide,
+        Operation.MULTIPLY: op_multiply,
+        Operation.MOD: op_mod,
+        Operation.EQ: op_eq,
+        Operation.NOT_EQ: op_not_eq,
+        Operation.GT: op_gt,
+        Operation.GT_EQ: op_gt_eq,
+        Operation.LT: op_lt,
+        Operation.LT_EQ: op_lt_eq,
+        Operation.LIKE: op_like,
+        Operation.ILIKE: op_ilike,
+        Operation.NOT_LIKE: op_not_like,
+        Operation.NOT_ILIKE: op_not_ilike,
+        Operation.IN: op_in,
+        Operation.NOT_IN: op_not_in,
+        Operation.REGEX: op_regex,
+        Operation.NOT_REGEX: op_not_regex,
+        Operation.IREGEX: op_iregex,
+        Operation.NOT_IREGEX: op_not_iregex,
+        Operation.GET_GLOBAL: op_get_global,
+        Operation.POP: op_pop,
+        Operation.CLOSE_UPVALUE: op_close_upvalue,
+        Operation.RETURN: op_return,
+        Operation.GET_LOCAL: op_get_local,
+        Operation.SET_LOCAL: op_set_local,
+        Operation.GET_PROPERTY: op_get_property,
+        Operation.GET_PROPERTY_NULLISH: op_get_property_nullish,
+        Operation.SET_PROPERTY: op_set_property,
+        Operation.DICT: op_dict,
+        Operation.ARRAY: op_array,
+        Operation.TUPLE: op_tuple,
+        Operation.JUMP: op_jump,
+        Operation.JUMP_IF_FALSE: op_jump_if_false,
+        Operation.JUMP_IF_STACK_NOT_NULL: op_jump_if_stack_not_null,
+        Operation.DECLARE_FN: op_declare_fn,
+        Operation.CALLABLE: op_callable,
+        Operation.CLOSURE: op_closure,
+        Operation.GET_UPVALUE: op_get_upvalue,
+        Operation.SET_UPVALUE: op_set_upvalue,
+        Operation.CALL_GLOBAL: op_call_global,
+        Operation.CALL_LOCAL: op_call_local,
+        Operation.TRY: op_try,
+        Operation.POP_TRY: op_pop_try,
+        Operation.THROW: op_throw,
+        UNKNOWN_OPERATION: op_unknown,
+        INVALID_INSTRUCTION: op_invalid,
+    }
+
     while True:
         # Return or jump back to the previous call frame if ran out of bytecode to execute in this one, and return null
         if frame.ip > last_op:
@@ -208,472 +844,17 @@ def execute_bytecode(
             set_chunk_bytecode()
 
         ops += 1
-        symbol = chunk_bytecode[frame.ip]
+        ip = frame.ip
+        symbol, operand, frame.ip = chunk_instructions[ip] or decoded_chunk.instruction_at(ip)
         if (ops & 127) == 0:  # every 128th operation
             check_timeout()
         elif debug:
-            debugger(symbol, chunk_bytecode, debug_bytecode, frame.ip, stack, call_stack, throw_stack)
-        match symbol:
-            case None:
+            debugger(chunk_bytecode[ip], chunk_bytecode, debug_bytecode, ip, stack, call_stack, throw_stack)
+        result = handlers[symbol](operand)
+        if result is not None:
+            if result is STOP_EXECUTION:
                 break
-            case Operation.STRING:
-                push_stack(next_token())
-            case Operation.INTEGER:
-                push_stack(next_token())
-            case Operation.FLOAT:
-                push_stack(next_token())
-            case Operation.TRUE:
-                push_stack(True)
-            case Operation.FALSE:
-                push_stack(False)
-            case Operation.NULL:
-                push_stack(None)
-            case Operation.NOT:
-                push_stack(not pop_stack())
-            case Operation.AND:
-                push_stack(all([pop_stack() for _ in range(next_token())]))  # noqa: C419
-            case Operation.OR:
-                push_stack(any([pop_stack() for _ in range(next_token())]))  # noqa: C419
-            case Operation.PLUS:
-                push_stack(pop_stack() + pop_stack())
-            case Operation.MINUS:
-                push_stack(pop_stack() - pop_stack())
-            case Operation.DIVIDE:
-                push_stack(pop_stack() / pop_stack())
-            case Operation.MULTIPLY:
-                push_stack(pop_stack() * pop_stack())
-            case Operation.MOD:
-                push_stack(pop_stack() % pop_stack())
-            case Operation.EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 == var2)
-            case Operation.NOT_EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 != var2)
-            case Operation.GT:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 > var2)
-            case Operation.GT_EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 >= var2)
-            case Operation.LT:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 < var2)
-            case Operation.LT_EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 <= var2)
-            case Operation.LIKE:
-                push_stack(like(pop_stack(), pop_stack()))
-            case Operation.ILIKE:
-                push_stack(like(pop_stack(), pop_stack(), re.IGNORECASE))
-            case Operation.NOT_LIKE:
-                push_stack(not like(pop_stack(), pop_stack()))
-            case Operation.NOT_ILIKE:
-                push_stack(not like(pop_stack(), pop_stack(), re.IGNORECASE))
-            case Operation.IN:
-                push_stack(pop_stack() in pop_stack())
-            case Operation.NOT_IN:
-                push_stack(pop_stack() not in pop_stack())
-            case Operation.REGEX:
-                args = [pop_stack(), pop_stack()]
-                # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
-                push_stack(bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
-            case Operation.NOT_REGEX:
-                args = [pop_stack(), pop_stack()]
-                # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
-                push_stack(not bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
-            case Operation.IREGEX:
-                args = [pop_stack(), pop_stack()]
-                push_stack(
-                    bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0]))
-                    if args[0] and args[1]
-                    else False
-                )
-            case Operation.NOT_IREGEX:
-                args = [pop_stack(), pop_stack()]
-                push_stack(
-                    not bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0]))
-                    if args[0] and args[1]
-                    else False
-                )
-            case Operation.GET_GLOBAL:
-                chain = [pop_stack() for _ in range(next_token())]
-                if chunk_globals and chain[0] in chunk_globals:
-                    push_stack(deepcopy(get_nested_value(chunk_globals, chain, True)))
-                elif functions and chain[0] in functions:
-                    push_stack(
-                        new_hog_closure(
-                            new_hog_callable(
-                                type="stl",
-                                name=chain[0],
-                                arg_count=0,
-                                upvalue_count=0,
-                                ip=-1,
-                                chunk="stl",
-                            )
-                        )
-                    )
-                elif chain[0] in STL and len(chain) == 1:
-                    push_stack(
-                        new_hog_closure(
-                            new_hog_callable(
-                                type="stl",
-                                name=chain[0],
-                                arg_count=STL[chain[0]].maxArgs or 0,
-                                upvalue_count=0,
-                                ip=-1,
-                                chunk="stl",
-                            )
-                        )
-                    )
-                elif chain[0] in BYTECODE_STL and len(chain) == 1:
-                    push_stack(
-                        new_hog_closure(
-                            new_hog_callable(
-                                type="stl",
-                                name=chain[0],
-                                arg_count=len(BYTECODE_STL[chain[0]][0]),
-                                upvalue_count=0,
-                                ip=0,
-                                chunk=f"stl/{chain[0]}",
-                            )
-                        )
-                    )
-                else:
-                    raise HogVMException(f"Global variable not found: {chain[0]}")
-            case Operation.POP:
-                pop_stack()
-            case Operation.CLOSE_UPVALUE:
-                stack_keep_first_elements(len(stack) - 1)
-            case Operation.RETURN:
-                response = pop_stack()
-                last_call_frame = call_stack.pop()
-                if len(call_stack) == 0 or last_call_frame is None:
-                    return BytecodeResult(result=response, stdout=stdout, bytecodes=bytecodes)
-                stack_start = last_call_frame.stack_start
-                stack_keep_first_elements(stack_start)
-                push_stack(response)
-                frame = call_stack[-1]
-                set_chunk_bytecode()
-                continue  # resume the loop without incrementing frame.ip
-
-            case Operation.GET_LOCAL:
-                stack_start = 0 if not call_stack else call_stack[-1].stack_start
-                push_stack(stack[next_token() + stack_start])
-            case Operation.SET_LOCAL:
-                stack_start = 0 if not call_stack else call_stack[-1].stack_start
-                value = pop_stack()
-                index = next_token() + stack_start
-                stack[index] = value
-                last_cost = mem_stack[index]
-                mem_stack[index] = calculate_cost(value)
-                mem_used += mem_stack[index] - last_cost
-                max_mem_used = max(mem_used, max_mem_used)
-            case Operation.GET_PROPERTY:
-                property = pop_stack()
-                push_stack(get_nested_value(pop_stack(), [property]))
-            case Operation.GET_PROPERTY_NULLISH:
-                property = pop_stack()
-                push_stack(get_nested_value(pop_stack(), [property], nullish=True))
-            case Operation.SET_PROPERTY:
-                value = pop_stack()
-                field = pop_stack()
-                set_nested_value(pop_stack(), [field], value)
-            case Operation.DICT:
-                count = next_token()
-                if count > 0:
-                    elems = stack[-(count * 2) :]
-                    stack = stack[: -(count * 2)]
-                    mem_used -= sum(mem_stack[-(count * 2) :])
-                    mem_stack = mem_stack[: -(count * 2)]
-                    push_stack({elems[i]: elems[i + 1] for i in range(0, len(elems), 2)})
-                else:
-                    push_stack({})
-            case Operation.ARRAY:
-                count = next_token()
-                if count > 0:
-                    elems = stack[-count:]
-                    stack = stack[:-count]
-                    mem_used -= sum(mem_stack[-count:])
-                    mem_stack = mem_stack[:-count]
-                    push_stack(elems)
-                else:
-                    push_stack([])
-            case Operation.TUPLE:
-                count = next_token()
-                if count > 0:
-                    elems = stack[-count:]
-                    stack = stack[:-count]
-                    mem_used -= sum(mem_stack[-count:])
-                    mem_stack = mem_stack[:-count]
-                    push_stack(tuple(elems))
-                else:
-                    push_stack(())
-            case Operation.JUMP:
-                count = next_token()
-                frame.ip += count
-            case Operation.JUMP_IF_FALSE:
-                count = next_token()
-                if not pop_stack():
-                    frame.ip += count
-            case Operation.JUMP_IF_STACK_NOT_NULL:
-                count = next_token()
-                if len(stack) > 0 and stack[-1] is not None:
-                    frame.ip += count
-            case Operation.DECLARE_FN:
-                # DEPRECATED
-                name = next_token()
-                arg_len = next_token()
-                body_len = next_token()
-                declared_functions[name] = (frame.ip + 1, arg_len)
-                frame.ip += body_len
-            case Operation.CALLABLE:
-                name = next_token()  # TODO: do we need it? it could change as the variable is reassigned
-                arg_count = next_token()
-                upvalue_count = next_token()
-                body_length = next_token()
-                push_stack(
-                    new_hog_callable(
-                        type="local",
-                        name=name,
-                        chunk=frame.chunk,
-                        arg_count=arg_count,
-                        upvalue_count=upvalue_count,
-                        ip=frame.ip + 1,
-                    )
-                )
-                frame.ip += body_length
-            case Operation.CLOSURE:
-                closure_callable = pop_stack()
-                closure = new_hog_closure(closure_callable)
-                stack_start = frame.stack_start
-                upvalue_count = next_token()
-                if upvalue_count != closure_callable["upvalueCount"]:
-                    raise HogVMException(
-                        f"Invalid upvalue count. Expected {closure_callable['upvalueCount']}, got {upvalue_count}"
-                    )
-                for _ in range(closure_callable["upvalueCount"]):
-                    is_local, index = next_token(), next_token()
-                    if is_local:
-                        closure["upvalues"].append(capture_upvalue(stack_start + index)["id"])
-                    else:
-                        closure["upvalues"].append(frame.closure["upvalues"][index])
-                push_stack(closure)
-            case Operation.GET_UPVALUE:
-                index = next_token()
-                closure = frame.closure
-                if index >= len(closure["upvalues"]):
-                    raise HogVMException(f"Invalid upvalue index: {index}")
-                upvalue = upvalues_by_id[closure["upvalues"][index]]
-                if not is_hog_upvalue(upvalue):
-                    raise HogVMException(f"Invalid upvalue: {upvalue}")
-                if upvalue["closed"]:
-                    push_stack(upvalue["value"])
-                else:
-                    push_stack(stack[upvalue["location"]])
-            case Operation.SET_UPVALUE:
-                index = next_token()
-                closure = frame.closure
-                if index >= len(closure["upvalues"]):
-                    raise HogVMException(f"Invalid upvalue index: {index}")
-                upvalue = upvalues_by_id[closure["upvalues"][index]]
-                if not is_hog_upvalue(upvalue):
-                    raise HogVMException(f"Invalid upvalue: {upvalue}")
-                if upvalue["closed"]:
-                    upvalue["value"] = pop_stack()
-                else:
-                    stack[upvalue["location"]] = pop_stack()
-            case Operation.CALL_GLOBAL:
-                check_timeout()
-                name = next_token()
-                arg_count = next_token()
-                # This is for backwards compatibility. We use a closure on the stack with local functions now.
-                if name in declared_functions:
-                    func_ip, arg_len = declared_functions[name]
-                    frame.ip += 1  # advance for when we return
-                    if arg_len > arg_count:
-                        for _ in range(arg_len - arg_count):
-                            push_stack(None)
-                    frame = CallFrame(
-                        ip=func_ip,
-                        chunk=frame.chunk,
-                        stack_start=len(stack) - arg_len,
-                        arg_len=arg_len,
-                        closure=new_hog_closure(
-                            new_hog_callable(
-                                type="local",
-                                name=name,
-                                arg_count=arg_len,
-                                upvalue_count=0,
-                                ip=func_ip,
-                                chunk=frame.chunk,
-                            )
-                        ),
-                    )
-                    set_chunk_bytecode()
-                    call_stack.append(frame)
-                    continue  # resume the loop without incrementing frame.ip
-                else:
-                    if name == "import":
-                        if arg_count != 1:
-                            raise HogVMException("Function import requires exactly 1 argument")
-                        module_name = pop_stack()
-                        frame.ip += 1  # advance for when we return
-                        frame = CallFrame(
-                            ip=0,
-                            chunk=module_name,
-                            stack_start=len(stack),
-                            arg_len=0,
-                            closure=new_hog_closure(
-                                new_hog_callable(
-                                    type="local",
-                                    name=module_name,
-                                    arg_count=0,
-                                    upvalue_count=0,
-                                    ip=0,
-                                    chunk=module_name,
-                                )
-                            ),
-                        )
-                        set_chunk_bytecode()
-                        call_stack.append(frame)
-                        continue
-                    elif functions is not None and name in functions:
-                        if version == 0:
-                            args = [pop_stack() for _ in range(arg_count)]
-                        else:
-                            args = stack_keep_first_elements(len(stack) - arg_count)
-                        push_stack(functions[name](*args))
-                    elif name in STL:
-                        if version == 0:
-                            args = [pop_stack() for _ in range(arg_count)]
-                        else:
-                            args = stack_keep_first_elements(len(stack) - arg_count)
-                        push_stack(STL[name].fn(args, team, stdout, timeout.total_seconds()))
-                    elif name in BYTECODE_STL:
-                        arg_names = BYTECODE_STL[name][0]
-                        if len(arg_names) != arg_count:
-                            raise HogVMException(f"Function {name} requires exactly {len(arg_names)} arguments")
-                        frame.ip += 1  # advance for when we return
-                        frame = CallFrame(
-                            ip=0,
-                            chunk=f"stl/{name}",
-                            stack_start=len(stack) - arg_count,
-                            arg_len=arg_count,
-                            closure=new_hog_closure(
-                                new_hog_callable(
-                                    type="stl",
-                                    name=name,
-                                    arg_count=arg_count,
-                                    upvalue_count=0,
-                                    ip=0,
-                                    chunk=f"stl/{name}",
-                                )
-                            ),
-                        )
-                        set_chunk_bytecode()
-                        call_stack.append(frame)
-                        continue  # resume the loop without incrementing frame.ip
-                    else:
-                        raise HogVMException(f"Unsupported function call: {name}")
-            case Operation.CALL_LOCAL:
-                check_timeout()
-                closure = pop_stack()
-                if not isinstance(closure, dict) or closure.get("__hogClosure__") is None:
-                    raise HogVMException(f"Invalid closure: {closure}")
-                callable = closure.get("callable")
-                if not isinstance(callable, dict) or callable.get("__hogCallable__") is None:
-                    raise HogVMException(f"Invalid callable: {callable}")
-                args_length = next_token()
-                if args_length > MAX_FUNCTION_ARGS_LENGTH:
-                    raise HogVMException("Too many arguments")
-
-                if callable.get("__hogCallable__") == "local":
-                    if callable["argCount"] > args_length:
-                        # TODO: specify minimum required arguments somehow
-                        for _ in range(callable["argCount"] - args_length):
-                            push_stack(None)
-                    elif callable["argCount"] < args_length:
-                        raise HogVMException(
-                            f"Too many arguments. Passed {args_length}, expected {callable['argCount']}"
-                        )
-                    frame.ip += 1  # advance for when we return
-                    frame = CallFrame(
-                        ip=callable["ip"],
-                        chunk=callable["chunk"],
-                        stack_start=len(stack) - callable["argCount"],
-                        arg_len=callable["argCount"],
-                        closure=closure,
-                    )
-                    set_chunk_bytecode()
-                    call_stack.append(frame)
-                    continue  # resume the loop without incrementing frame.ip
-
-                elif callable.get("__hogCallable__") == "stl":
-                    if callable["name"] not in STL:
-                        raise HogVMException(f"Unsupported function call: {callable['name']}")
-                    stl_fn = STL[callable["name"]]
-                    if stl_fn.minArgs is not None and args_length < stl_fn.minArgs:
-                        raise HogVMException(
-                            f"Function {callable['name']} requires at least {stl_fn.minArgs} arguments"
-                        )
-                    if stl_fn.maxArgs is not None and args_length > stl_fn.maxArgs:
-                        raise HogVMException(f"Function {callable['name']} requires at most {stl_fn.maxArgs} arguments")
-                    if version == 0:
-                        args = [pop_stack() for _ in range(args_length)]
-                    else:
-                        args = list(reversed([pop_stack() for _ in range(args_length)]))
-                        if stl_fn.maxArgs is not None and len(args) < stl_fn.maxArgs:
-                            args = [*args, *([None] * (stl_fn.maxArgs - len(args)))]
-                    push_stack(stl_fn.fn(args, team, stdout, timeout.total_seconds()))
-
-                elif callable.get("__hogCallable__") == "async":
-                    raise HogVMException("Async functions are not supported")
-
-                else:
-                    raise HogVMException("Invalid callable")
-
-            case Operation.TRY:
-                throw_stack.append(
-                    ThrowFrame(
-                        call_stack_len=len(call_stack), stack_len=len(stack), catch_ip=frame.ip + 1 + next_token()
-                    )
-                )
-            case Operation.POP_TRY:
-                if throw_stack:
-                    throw_stack.pop()
-                else:
-                    raise HogVMException("Invalid operation POP_TRY: no try block to pop")
-            case Operation.THROW:
-                exception = pop_stack()
-                if not is_hog_error(exception):
-                    raise HogVMException("Can not throw: value is not of type Error")
-                if throw_stack:
-                    last_throw = throw_stack.pop()
-                    call_stack_len, stack_len, catch_ip = (
-                        last_throw.call_stack_len,
-                        last_throw.stack_len,
-                        last_throw.catch_ip,
-                    )
-                    stack_keep_first_elements(stack_len)
-                    call_stack = call_stack[0:call_stack_len]
-                    push_stack(exception)
-                    frame = call_stack[-1]
-                    set_chunk_bytecode()
-                    frame.ip = catch_ip
-                    continue
-                else:
-                    raise UncaughtHogVMException(
-                        type=exception.get("type"),
-                        message=exception.get("message"),
-                        payload=exception.get("payload"),
-                    )
-            case _:
-                raise HogVMException(
-                    f'Unexpected node while running bytecode in chunk "{frame.chunk}": {chunk_bytecode[frame.ip]}'
-                )
-
-        frame.ip += 1
+            return result
 
     return BytecodeResult(result=pop_stack() if len(stack) > 0 else None, stdout=stdout, bytecodes=bytecodes)
 
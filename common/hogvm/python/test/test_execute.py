@@ -1,15 +1,17 @@
 import json
 from typing import Any, Optional
 from collections.abc import Callable
+from unittest.mock import patch
 
 
+from common.hogvm.python.decoder import decode_chunk
 from common.hogvm.python.execute import execute_bytecode, get_nested_value
 from common.hogvm.python.operation import (
     Operation as op,
     HOGQL_BYTECODE_IDENTIFIER as _H,
     HOGQL_BYTECODE_VERSION as VERSION,
 )
-from common.hogvm.python.utils import UncaughtHogVMException
+from common.hogvm.python.utils import UncaughtHogVMException, calculate_cost
 from posthog.hogql.compiler.bytecode import create_bytecode
 from posthog.hogql.parser import parse_expr, parse_program
 
@@ -834,6 +836,60 @@ class TestBytecodeExecute:
         assert globals["globalEvent"]["event"] == "$pageview"
         assert globals["globalEvent"]["properties"]["$browser"] == "Chrome"
 
+    def test_memory_cost_of_globals_is_calculated_once(self):
+        globals = {"event": {"properties": {f"key_{i}": f"value_{i}" for i in range(100)}}}
+        with patch("common.hogvm.python.execute.calculate_cost", wraps=calculate_cost) as mock_calculate_cost:
+            result = self._run_program(
+                """
+                let count := 0;
+                for (let i := 0; i < 10; i := i + 1) {
+                    count := count + length(keys(event.properties));
+                }
+                return count;
+            """,
+                globals=globals,
+            )
+
+        assert result == 1000
+        calls = [call for call in mock_calculate_cost.call_args_list if call.args[0] == globals["event"]["properties"]]
+        assert len(calls) == 1
+
+    def test_memory_cost_of_locals_follows_mutations(self):
+        # Mutating a local in place grows its cost, so reading it in a loop must still hit the memory limit
+        try:
+            self._run_program(
+                """
+                let obj := {'value': ''};
+                let chunk := 'banana';
+                for (let i := 0; i < 30; i := i + 1) {
+                    chunk := chunk || chunk;
+                    obj.value := chunk;
+                    let copy := obj;
+                }
+            """
+            )
+        except Exception as e:
+            assert "Memory limit of 67108864 bytes exceeded" in str(e)
+        else:
+            raise AssertionError("Expected Exception not raised")
+
+    def test_decoded_chunks_are_cached_by_contents(self):
+        bytecode = create_bytecode(parse_expr("1 + 2")).bytecode
+        assert decode_chunk(bytecode) is decode_chunk(list(bytecode))
+
+        # Equal values of different types don't share a decoded chunk
+        assert type(execute_bytecode([_H, VERSION, op.FLOAT, 1.0]).result) is float
+        assert type(execute_bytecode([_H, VERSION, op.FLOAT, 1]).result) is int
+
+    def test_incomplete_bytecode_fails_when_executed(self):
+        assert execute_bytecode([_H, VERSION, op.INTEGER, 1, op.RETURN, op.INTEGER]).result == 1
+        try:
+            execute_bytecode([_H, VERSION, op.INTEGER])
+        except Exception as e:
+            assert str(e) == "Unexpected end of bytecode"
+        else:
+            raise AssertionError("Expected Exception not raised")
+
     def test_bytecode_if_multiif_ternary(self):
         values = []
 
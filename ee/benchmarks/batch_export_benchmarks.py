@@ -0,0 +1,151 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import now  # noqa: F401
+import csv
+import datetime as dt
+import json
+
+import psycopg.postgres
+import pyarrow as pa
+
+from posthog.temporal.batch_exports.temporary_file import (
+    BatchExportTemporaryFile,
+    CSVBatchExportWriter,
+    JSONLBatchExportWriter,
+    PostgreSQLBinaryCopyBatchExportWriter,
+    read_postgres_binary_copy_segments,
+)
+
+NUM_ROWS = 10_000
+
+
+def _record_batch() -> pa.RecordBatch:
+    timestamp = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    return pa.RecordBatch.from_pydict(
+        {
+            "uuid": pa.array([f"0190f3b4-1c4c-7000-8000-{i:012d}" for i in range(NUM_ROWS)]),
+            "event": pa.array([f"event-{i % 20}" for i in range(NUM_ROWS)]),
+            "distinct_id": pa.array([f"user-{i % 1000}" for i in range(NUM_ROWS)]),
+            "properties": pa.array(
+                [
+                    {"$browser": "Chrome", "$current_url": f"https://posthog.com/{i}", "$screen_width": 1920}
+                    for i in range(NUM_ROWS)
+                ]
+            ),
+            "elements": pa.array([["div", "button"] for _ in range(NUM_ROWS)]),
+            "timestamp": pa.array([timestamp + dt.timedelta(seconds=i) for i in range(NUM_ROWS)]),
+        }
+    )
+
+
+class BatchExportWriterSuite:
+    """
+    Python-only benchmarks comparing the columnar encoding in the JSONL and CSV batch export writers with the
+    previous approach of building a dict for each record.
+    """
+
+    timeout = 600.0
+    version = "v001"
+
+    def setup(self):
+        self.record_batch = _record_batch()
+
+        self.jsonl_writer = JSONLBatchExportWriter(max_bytes=0, flush_callable=None)  # type: ignore
+        self.jsonl_writer._batch_export_file = BatchExportTemporaryFile()
+
+        self.csv_writer = CSVBatchExportWriter(
+            max_bytes=0,
+            flush_callable=None,  # type: ignore
+            field_names=self.record_batch.column_names,
+        )
+        self.csv_writer._batch_export_file = BatchExportTemporaryFile()
+
+    def teardown(self):
+        self.jsonl_writer.batch_export_file.close()
+        self.csv_writer.batch_export_file.close()
+
+    def time_jsonl_columnar(self):
+        self.jsonl_writer._write_record_batch(self.record_batch)
+
+    def time_jsonl_row_by_row(self):
+        for record_dict in self.record_batch.to_pylist():
+            self.jsonl_writer.write_dict(record_dict)
+
+    def time_csv_columnar(self):
+        self.csv_writer._write_record_batch(self.record_batch)
+
+    def time_csv_dict_writer(self):
+        writer = csv.DictWriter(
+            self.csv_writer.batch_export_file,
+            fieldnames=self.csv_writer.field_names,
+            extrasaction="ignore",
+            delimiter=",",
+            quotechar='"',
+            escapechar="\\",
+            quoting=csv.QUOTE_NONE,
+            lineterminator="\n",
+        )
+        writer.writerows(
+            {k: str(v).replace("[", "{").replace("]", "}") if isinstance(v, list) else v for k, v in record.items()}
+            for record in self.record_batch.to_pylist()
+        )
+
+
+class PostgreSQLCopySuite:
+    """
+    Python-only benchmarks comparing the encoding of record batches for the PostgreSQL batch export as TSV,
+    including the replacement of \\u0000 done while copying, with the encoding as binary COPY tuples.
+    """
+
+    timeout = 600.0
+    version = "v001"
+
+    def setup(self):
+        record_batch = _record_batch()
+        self.record_batch = record_batch.set_column(
+            record_batch.schema.get_field_index("properties"),
+            "properties",
+            pa.array([json.dumps(properties) for properties in record_batch.column("properties").to_pylist()]),
+        )
+
+        self.tsv_writer = CSVBatchExportWriter(
+            max_bytes=0,
+            flush_callable=None,  # type: ignore
+            field_names=self.record_batch.column_names,
+            delimiter="\t",
+            quoting=csv.QUOTE_MINIMAL,
+            escape_char=None,
+        )
+        self.tsv_writer._batch_export_file = BatchExportTemporaryFile()
+
+        pg_types = psycopg.postgres.types
+        self.binary_writer = PostgreSQLBinaryCopyBatchExportWriter(
+            max_bytes=0,
+            flush_callable=None,  # type: ignore
+            field_names=self.record_batch.column_names,
+            column_types={
+                "uuid": pg_types["varchar"].oid,
+                "event": pg_types["varchar"].oid,
+                "distinct_id": pg_types["varchar"].oid,
+                "properties": pg_types["jsonb"].oid,
+                "elements": pg_types["text"].array_oid,
+                "timestamp": pg_types["timestamptz"].oid,
+            },
+        )
+        self.binary_writer._batch_export_file = BatchExportTemporaryFile()
+
+    def teardown(self):
+        self.tsv_writer.batch_export_file.close()
+        self.binary_writer.batch_export_file.close()
+
+    def time_tsv(self):
+        self.tsv_writer.batch_export_file.reset()
+        self.tsv_writer._write_record_batch(self.record_batch)
+        self.tsv_writer.batch_export_file.seek(0)
+        self.tsv_writer.batch_export_file.read().replace(b"\\u0000", b"")
+
+    def time_binary(self):
+        self.binary_writer.batch_export_file.reset()
+        self.binary_writer._write_record_batch(self.record_batch)
+        self.binary_writer.batch_export_file.seek(0)
+        list(read_postgres_binary_copy_segments(self.binary_writer.batch_export_file))
@@ -0,0 +1,63 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import now  # noqa: F401
+import datetime as dt
+import decimal
+import time
+import uuid
+
+from posthog.temporal.data_imports.pipelines.pipeline.utils import ColumnTypeCache, table_from_py_list
+
+NUM_ROWS = 100_000
+
+
+def _rows() -> list[dict]:
+    created_at = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    return [
+        {
+            "id": i,
+            "uuid": uuid.UUID(int=i),
+            "email": f"user-{i}@posthog.com",
+            "amount": decimal.Decimal(i) / 100,
+            "score": float("NaN") if i % 10 == 0 else i / 3,
+            "is_active": i % 2 == 0,
+            "metadata": {"plan": "free", "seats": i % 5},
+            "deleted_at": None,
+            "created_at": created_at + dt.timedelta(seconds=i),
+        }
+        for i in range(NUM_ROWS)
+    ]
+
+
+class DataImportSuite:
+    """
+    Python-only benchmarks of turning rows from a source, like the results of a Postgres query, into an Arrow table.
+    """
+
+    timeout = 600.0
+    version = "v001"
+
+    def setup(self):
+        self.rows = _rows()
+        self.type_cache = ColumnTypeCache()
+        table_from_py_list(self.rows, type_cache=self.type_cache)
+
+    def time_table_from_py_list(self):
+        table_from_py_list(self.rows)
+
+    def time_table_from_py_list_with_type_cache(self):
+        table_from_py_list(self.rows, type_cache=self.type_cache)
+
+    def track_rows_per_second(self):
+        start = time.perf_counter()
+        table_from_py_list(self.rows)
+        return NUM_ROWS / (time.perf_counter() - start)
+
+    track_rows_per_second.unit = "rows/s"  # type: ignore
+
+    def track_rows_per_second_with_type_cache(self):
+        start = time.perf_counter()
+        table_from_py_list(self.rows, type_cache=self.type_cache)
+        return NUM_ROWS / (time.perf_counter() - start)
+
+    track_rows_per_second_with_type_cache.unit = "rows/s"  # type: ignore
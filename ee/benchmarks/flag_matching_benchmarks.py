@@ -0,0 +1,79 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import now  # noqa: F401
+from django.core.cache import cache
+
+from posthog.models import FeatureFlag, Organization, Person, Team
+from posthog.models.feature_flag.flag_matching import get_all_feature_flags, get_all_feature_flags_for_distinct_ids
+
+NUM_PERSONS = 2_000
+
+
+class FlagBatchEvaluationSuite:
+    """
+    Benchmarks evaluating flags for many distinct IDs at once against evaluating them one distinct ID at a time,
+    which makes a Postgres query per distinct ID.
+    """
+
+    timeout = 600.0
+    version = "v001"
+
+    team: Team
+
+    def setup(self):
+        organization = Organization.objects.create(name="Flag batch evaluation benchmark")
+        self.team = Team.objects.create(organization=organization, name="Flag batch evaluation benchmark")
+        Person.objects.bulk_create(
+            [
+                Person(
+                    team=self.team,
+                    properties={"email": f"user-{i}@{'posthog.com' if i % 3 else 'example.com'}", "plan": i % 4},
+                )
+                for i in range(NUM_PERSONS)
+            ]
+        )
+        self.distinct_ids = []
+        for person in Person.objects.filter(team=self.team):
+            person.add_distinct_id(f"user-{person.pk}")
+            self.distinct_ids.append(f"user-{person.pk}")
+
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="email-flag",
+            filters={
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "email", "value": "@posthog.com", "type": "person", "operator": "icontains"}
+                        ],
+                        "rollout_percentage": 50,
+                    }
+                ]
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="plan-flag",
+            filters={
+                "groups": [{"properties": [{"key": "plan", "value": 2, "type": "person", "operator": "gte"}]}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "control", "rollout_percentage": 50},
+                        {"key": "test", "rollout_percentage": 50},
+                    ]
+                },
+            },
+        )
+        cache.clear()
+
+    def teardown(self):
+        organization = self.team.organization
+        self.team.delete()
+        organization.delete()
+
+    def time_batch_evaluation(self):
+        get_all_feature_flags_for_distinct_ids(self.team, self.distinct_ids)
+
+    def time_evaluation_per_distinct_id(self):
+        for distinct_id in self.distinct_ids:
+            get_all_feature_flags(self.team, distinct_id)
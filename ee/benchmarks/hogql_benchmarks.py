@@ -0,0 +1,89 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import now  # noqa: F401
+from posthog.hogql import ast
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database import create_hogql_database
+from posthog.hogql.printer import prepare_ast_for_printing
+from posthog.hogql.visitor import clone_expr
+from posthog.hogql_queries.insights.funnels.funnels_query_runner import FunnelsQueryRunner
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.models import Organization, Team
+from posthog.schema import (
+    Breakdown,
+    BreakdownFilter,
+    DateRange,
+    EventPropertyFilter,
+    EventsNode,
+    FunnelsQuery,
+    PropertyOperator,
+    TrendsQuery,
+)
+
+DATE_RANGE = DateRange(date_from="2021-01-01", date_to="2021-10-01")
+
+BROWSER_FILTER = EventPropertyFilter(key="$browser", operator=PropertyOperator.EXACT, value=["Chrome", "Firefox"])
+
+
+class HogQLPrintingSuite:
+    """
+    Python-only benchmarks for the HogQL compilation passes (resolver, property swapper, lazy tables, printer).
+    These don't touch ClickHouse, so they measure time spent walking the AST.
+    """
+
+    timeout = 600.0
+    version = "v001"
+
+    team: Team
+    trends_query: ast.SelectSetQuery
+    funnel_query: ast.SelectQuery
+
+    def setup(self):
+        # :TRICKY: Data in benchmark servers has ID=2
+        team = Team.objects.filter(id=2).first()
+        if team is None:
+            organization = Organization.objects.create()
+            team = Team.objects.create(id=2, organization=organization, name="The Bakery")
+        self.team = team
+        self.database = create_hogql_database(team=team)
+
+        self.trends_query = TrendsQueryRunner(
+            query=TrendsQuery(
+                series=[
+                    EventsNode(event="$pageview", properties=[BROWSER_FILTER]),
+                    EventsNode(event="$pageleave"),
+                    EventsNode(event="$autocapture", math="dau"),
+                ],
+                dateRange=DATE_RANGE,
+                breakdownFilter=BreakdownFilter(
+                    breakdowns=[Breakdown(property="$browser"), Breakdown(property="$os")],
+                ),
+            ),
+            team=team,
+        ).to_query()
+
+        self.funnel_query = FunnelsQueryRunner(
+            query=FunnelsQuery(
+                series=[
+                    EventsNode(event="$pageview"),
+                    EventsNode(event="$autocapture", properties=[BROWSER_FILTER]),
+                    EventsNode(event="$pageleave"),
+                    EventsNode(event="signed_up"),
+                ],
+                dateRange=DATE_RANGE,
+            ),
+            team=team,
+        ).to_query()
+
+    def _prepare(self, node: ast.AST):
+        context = HogQLContext(team_id=self.team.pk, team=self.team, enable_select_queries=True, database=self.database)
+        prepare_ast_for_printing(node=clone_expr(node), context=context, dialect="clickhouse")
+
+    def time_prepare_trends_query_for_printing(self):
+        self._prepare(self.trends_query)
+
+    def time_prepare_funnel_query_for_printing(self):
+        self._prepare(self.funnel_query)
+
+    def time_clone_trends_query(self):
+        clone_expr(self.trends_query)
@@ -0,0 +1,109 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import now  # noqa: F401
+from common.hogvm.python.execute import execute_bytecode
+from posthog.hogql.compiler.bytecode import create_bytecode
+from posthog.hogql.parser import parse_expr, parse_program
+
+FILTER_EXPR = """
+event = '$pageview'
+and properties.$current_url like '%/pricing%'
+and properties.$browser in ('Chrome', 'Firefox', 'Safari')
+and person.properties.email ilike '%@posthog.com'
+and person.properties.plan != 'free'
+"""
+
+TRANSFORMATION_PROGRAM = """
+let payload := {
+    'event': event.event,
+    'distinct_id': event.distinct_id,
+    'properties': {},
+};
+for (let key, value in event.properties) {
+    if (not key like '$%') {
+        payload.properties[key] := value;
+    }
+}
+for (let key, value in person.properties) {
+    payload.properties[f'person_{key}'] := value;
+}
+return payload;
+"""
+
+
+def _properties() -> dict:
+    return {
+        "$current_url": "https://posthog.com/pricing?utm_source=newsletter",
+        "$browser": "Chrome",
+        "$os": "Mac OS X",
+        "$device_type": "Desktop",
+        "$screen_width": 1920,
+        "$screen_height": 1080,
+        "$lib": "web",
+        "$lib_version": "1.200.0",
+        "$referrer": "https://www.google.com/",
+        "$session_id": "0190f3b4-1c4c-7000-8000-000000000000",
+        "$active_feature_flags": [f"flag-{i}" for i in range(30)],
+        **{f"$feature/flag-{i}": i % 3 == 0 for i in range(30)},
+        **{f"custom_property_{i}": f"value {i}" * 5 for i in range(100)},
+    }
+
+
+def _person() -> dict:
+    return {
+        "id": "0190f3b4-1c4c-7000-8000-000000000002",
+        "properties": {
+            "email": "max@posthog.com",
+            "plan": "scale",
+            "$initial_referrer": "https://www.google.com/",
+            **{f"person_property_{i}": f"value {i}" for i in range(50)},
+        },
+    }
+
+
+def _filter_globals() -> dict:
+    """Same shape as the globals Hog function filters are evaluated with."""
+    return {
+        "event": "$pageview",
+        "elements_chain": 'a.nav-link:href="/pricing"nth-child="2";nav;div.container;body',
+        "timestamp": "2024-01-01T00:00:00Z",
+        "properties": _properties(),
+        "person": _person(),
+        "distinct_id": "user-1",
+    }
+
+
+def _invocation_globals() -> dict:
+    """Same shape as the globals Hog functions are invoked with."""
+    return {
+        "event": {
+            "uuid": "0190f3b4-1c4c-7000-8000-000000000001",
+            "event": "$pageview",
+            "distinct_id": "user-1",
+            "timestamp": "2024-01-01T00:00:00Z",
+            "properties": _properties(),
+        },
+        "person": _person(),
+    }
+
+
+class HogVMSuite:
+    """
+    Python-only benchmarks for evaluating Hog function filters and running Hog code on realistic event payloads.
+    """
+
+    timeout = 600.0
+    version = "v001"
+
+    def setup(self):
+        self.filter_globals = _filter_globals()
+        self.invocation_globals = _invocation_globals()
+        self.filter_bytecode = create_bytecode(parse_expr(FILTER_EXPR)).bytecode
+        self.transformation_bytecode = create_bytecode(parse_program(TRANSFORMATION_PROGRAM)).bytecode
+
+    def time_filter_evaluation(self):
+        for _ in range(100):
+            execute_bytecode(self.filter_bytecode, self.filter_globals)
+
+    def time_transformation(self):
+        execute_bytecode(self.transformation_bytecode, self.invocation_globals)
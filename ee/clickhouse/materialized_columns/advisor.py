@@ -0,0 +1,492 @@
+"""
+Advises which properties to materialize into columns, and which materialized columns to drop.
+
+The advisor reads the queries that ran over the analysis period from `system.query_log`, and finds the properties they
+read, both straight out of the JSON properties columns (`JSONExtract*(properties, 'name')`) and out of the property
+group map columns that HogQL reads from (`properties_group_custom['name']`). For each property it estimates:
+
+- the bytes that would not have been read over the analysis period if it had been materialized, which is the size of
+  the column it was read from minus the size of the materialized column, for every row the queries read;
+- the bytes the materialized column will take on disk;
+- the bytes the backfill will read and write, which rewrites every partition in the backfill period.
+
+Properties are ranked by the bytes saved net of both costs, and only those that come out ahead are planned. Materialized
+columns that no query referenced over the analysis period are planned to be dropped, largest first.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Optional, cast
+
+import structlog
+from django.utils.timezone import now
+
+from ee.clickhouse.materialized_columns.columns import (
+    SHORT_TABLE_COLUMN_NAME,
+    MaterializedColumn,
+    backfill_materialized_columns,
+    drop_column,
+    get_materialized_columns,
+    materialize,
+    tables,
+)
+from posthog.clickhouse.client import sync_execute
+from posthog.clickhouse.materialized_columns import TablesWithMaterializedColumns
+from posthog.clickhouse.property_groups import event_property_group_definitions
+from posthog.models.property import PropertyName, TableColumn, TableWithProperties
+from posthog.settings import CLICKHOUSE_CLUSTER, CLICKHOUSE_DATABASE
+
+logger = structlog.get_logger(__name__)
+
+# Rows of recent events that the size of the values of each property is estimated from
+VALUE_LENGTH_SAMPLE_ROWS = 100_000
+
+# Property names that the advisor can materialize, the same as the ones `_analyze` finds
+_PROPERTY_NAME_PATTERN = r"([a-zA-Z0-9_\-\.\$\/\ ]+)"
+
+# `JSONExtractRaw(properties, 'name')`, optionally qualified by a table alias
+JSON_ACCESS_PATTERN = (
+    r"JSONExtract[a-zA-Z0-9]*\((?:[a-zA-Z0-9`_-]+\.)?`?([a-z0-9_]+)`?, '" + _PROPERTY_NAME_PATTERN + r"'\)"
+)
+
+# The table column that each property group map column of the events table holds a subset of
+PROPERTY_GROUP_COLUMNS: dict[str, str] = {
+    group_definition.get_column_name(table_column, group_name): table_column
+    for table_column, group_definitions in event_property_group_definitions.items()
+    for group_name, group_definition in group_definitions.items()
+}
+
+# `events.properties_group_custom['name']`, which is how HogQL reads properties when property groups are enabled
+PROPERTY_GROUP_ACCESS_PATTERN = (
+    r"(?:[a-zA-Z0-9`_-]+\.)?`?("
+    + "|".join(sorted(PROPERTY_GROUP_COLUMNS))
+    + r")`?\['"
+    + _PROPERTY_NAME_PATTERN
+    + r"'\]"
+)
+
+_EXCEPTION_CODES = (
+    159,  # TIMEOUT EXCEEDED
+    160,  # TOO SLOW (estimated query execution time)
+)
+
+
+@dataclass(frozen=True)
+class PropertyAccess:
+    """How the queries over the analysis period read a property out of `column`."""
+
+    column: str
+    property_name: PropertyName
+    queries: int
+    failures: int
+    slow_queries: int
+    read_rows: int
+    read_bytes: int
+    teams: int
+    query_types: list[str]
+
+    @property
+    def table_column(self) -> TableColumn:
+        return cast(TableColumn, PROPERTY_GROUP_COLUMNS.get(self.column, self.column))
+
+    @property
+    def via_property_group(self) -> bool:
+        return self.column in PROPERTY_GROUP_COLUMNS
+
+
+@dataclass(frozen=True)
+class ColumnSize:
+    compressed_bytes: int
+    uncompressed_bytes: int
+
+    @property
+    def compression_ratio(self) -> float:
+        if self.uncompressed_bytes == 0:
+            return 1.0
+        return self.compressed_bytes / self.uncompressed_bytes
+
+
+@dataclass(frozen=True)
+class TableStats:
+    """The size of the columns of the data table and how many rows it has, counting every replica."""
+
+    column_sizes: dict[str, ColumnSize]
+    rows: int
+    backfill_rows: int
+
+    def bytes_per_row(self, column: str) -> float:
+        if self.rows == 0 or column not in self.column_sizes:
+            return 0.0
+        return self.column_sizes[column].compressed_bytes / self.rows
+
+
+@dataclass(frozen=True)
+class MaterializeCandidate:
+    table: TableWithProperties
+    table_column: TableColumn
+    property_name: PropertyName
+    via_property_group: bool
+    queries: int
+    failures: int
+    slow_queries: int
+    teams: int
+    query_types: list[str]
+    bytes_saved: int
+    storage_bytes: int
+    backfill_bytes: int
+
+    @property
+    def net_bytes_saved(self) -> int:
+        return self.bytes_saved - self.storage_bytes - self.backfill_bytes
+
+
+@dataclass(frozen=True)
+class DropCandidate:
+    table: TablesWithMaterializedColumns
+    column: MaterializedColumn
+    storage_bytes: int
+
+
+@dataclass(frozen=True)
+class MaterializedColumnsPlan:
+    materialize: list[MaterializeCandidate] = field(default_factory=list)
+    drop: list[DropCandidate] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [f"Materialize {len(self.materialize)} column(s):"]
+        for candidate in self.materialize:
+            lines.append(
+                f"  {candidate.table}.{candidate.table_column}.{candidate.property_name}:"
+                f" net={_format_bytes(candidate.net_bytes_saved)} saved={_format_bytes(candidate.bytes_saved)}"
+                f" storage={_format_bytes(candidate.storage_bytes)} backfill={_format_bytes(candidate.backfill_bytes)}"
+                f" queries={candidate.queries} failures={candidate.failures} slow={candidate.slow_queries}"
+                f" teams={candidate.teams} property_group={candidate.via_property_group}"
+                f" query_types={','.join(candidate.query_types) or '-'}"
+            )
+        lines.append(f"Drop {len(self.drop)} unused column(s):")
+        for candidate in self.drop:
+            details = candidate.column.details
+            lines.append(
+                f"  {candidate.table}.{candidate.column.name} ({details.table_column}.{details.property_name}):"
+                f" storage={_format_bytes(candidate.storage_bytes)}"
+            )
+        return "\n".join(lines)
+
+
+def _format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(value) < 1000:
+            return f"{value:.1f}{unit}"
+        value /= 1000
+    return f"{value:.1f}PB"
+
+
+def _initial_queries_filter(since_hours_ago: int) -> str:
+    return """
+        query_start_time > now() - toIntervalHour({since})
+        and type > 1
+        and is_initial_query
+    """.format(since=int(since_hours_ago))
+
+
+def _query_log_filter(since_hours_ago: int, team_id: Optional[int]) -> str:
+    return """
+        {initial_queries_filter}
+        and JSONExtractInt(log_comment, 'team_id') != 0
+        {team_id_filter}
+    """.format(
+        initial_queries_filter=_initial_queries_filter(since_hours_ago),
+        team_id_filter=f"and JSONExtractInt(log_comment, 'team_id') = {int(team_id)}" if team_id else "",
+    )
+
+
+def get_property_accesses(
+    since_hours_ago: int, min_query_time: int, team_id: Optional[int] = None
+) -> list[PropertyAccess]:
+    "Finds the properties read by queries over the analysis period, and how much those queries read"
+
+    rows = sync_execute(
+        """
+SELECT
+    access[1] as column,
+    access[2] as property_name,
+    count(),
+    countIf(exception_code IN {exception_codes}),
+    countIf(query_duration_ms > %(min_query_time)s),
+    sum(read_rows),
+    sum(read_bytes),
+    uniqExact(JSONExtractInt(log_comment, 'team_id')),
+    groupUniqArray(5)(JSONExtractString(log_comment, 'query_type'))
+FROM (
+    SELECT
+        *,
+        arrayDistinct(
+            arrayConcat(
+                extractAllGroupsVertical(query, %(json_access_pattern)s),
+                extractAllGroupsVertical(query, %(property_group_access_pattern)s)
+            )
+        ) as accesses
+    FROM clusterAllReplicas({cluster}, system, query_log)
+    WHERE {query_log_filter}
+)
+ARRAY JOIN accesses as access
+WHERE has(%(columns)s, column)
+GROUP BY column, property_name
+ORDER BY sum(read_bytes) DESC
+LIMIT 1000
+        """.format(
+            exception_codes=_EXCEPTION_CODES,
+            cluster=CLICKHOUSE_CLUSTER,
+            query_log_filter=_query_log_filter(since_hours_ago, team_id),
+        ),
+        {
+            "min_query_time": min_query_time,
+            "json_access_pattern": JSON_ACCESS_PATTERN,
+            "property_group_access_pattern": PROPERTY_GROUP_ACCESS_PATTERN,
+            "columns": [*SHORT_TABLE_COLUMN_NAME, *PROPERTY_GROUP_COLUMNS],
+        },
+    )
+
+    return [
+        PropertyAccess(
+            column=column,
+            property_name=property_name,
+            queries=queries,
+            failures=failures,
+            slow_queries=slow_queries,
+            read_rows=read_rows,
+            read_bytes=read_bytes,
+            teams=teams,
+            query_types=sorted(query_type for query_type in query_types if query_type),
+        )
+        for column, property_name, queries, failures, slow_queries, read_rows, read_bytes, teams, query_types in rows
+    ]
+
+
+def get_materialized_column_usage(column_names: list[str], since_hours_ago: int) -> dict[str, int]:
+    """
+    Counts the queries over the analysis period that reference each of the columns, including the ones without a
+    team in their log comment, as dropping a column would break those too
+    """
+
+    if not column_names:
+        return {}
+
+    rows = sync_execute(
+        """
+SELECT column, count()
+FROM clusterAllReplicas({cluster}, system, query_log)
+ARRAY JOIN arrayFilter(column -> position(query, column) > 0, %(column_names)s) as column
+WHERE {query_log_filter}
+GROUP BY column
+        """.format(cluster=CLICKHOUSE_CLUSTER, query_log_filter=_initial_queries_filter(since_hours_ago)),
+        {"column_names": column_names},
+    )
+    return dict(rows)
+
+
+def get_table_stats(table: TablesWithMaterializedColumns, backfill_period_days: int) -> TableStats:
+    "Measures the columns and rows of the data table of `table`, and the rows in the partitions a backfill rewrites"
+
+    data_table = tables[table].data_table
+    column_rows = sync_execute(
+        """
+SELECT name, sum(data_compressed_bytes), sum(data_uncompressed_bytes)
+FROM clusterAllReplicas({cluster}, system, columns)
+WHERE database = %(database)s AND table = %(table)s
+GROUP BY name
+        """.format(cluster=CLICKHOUSE_CLUSTER),
+        {"database": CLICKHOUSE_DATABASE, "table": data_table},
+    )
+
+    # Events are partitioned by month, and backfill mutations rewrite every partition that has rows in the period
+    cutoff_partition = (now() - timedelta(days=backfill_period_days)).strftime("%Y%m")
+    [(rows, backfill_rows)] = sync_execute(
+        """
+SELECT sum(rows), sumIf(rows, partition_id >= %(cutoff_partition)s)
+FROM clusterAllReplicas({cluster}, system, parts)
+WHERE database = %(database)s AND table = %(table)s AND active
+        """.format(cluster=CLICKHOUSE_CLUSTER),
+        {"database": CLICKHOUSE_DATABASE, "table": data_table, "cutoff_partition": cutoff_partition},
+    )
+
+    return TableStats(
+        column_sizes={name: ColumnSize(compressed, uncompressed) for name, compressed, uncompressed in column_rows},
+        rows=rows,
+        backfill_rows=backfill_rows if backfill_period_days > 0 else 0,
+    )
+
+
+def get_average_value_lengths(
+    properties: list[tuple[TableColumn, PropertyName]],
+) -> dict[tuple[TableColumn, PropertyName], float]:
+    "Estimates the uncompressed size of the values of each property from a sample of recent events"
+
+    if not properties:
+        return {}
+
+    for table_column, _ in properties:
+        if table_column not in SHORT_TABLE_COLUMN_NAME:
+            raise ValueError(f"Invalid table_column={table_column} for materialisation")
+
+    aggregates = ", ".join(
+        f"avg(length(JSONExtractRaw({table_column}, %(property_{index})s)))"
+        for index, (table_column, _) in enumerate(properties)
+    )
+    table_columns = ", ".join(sorted({table_column for table_column, _ in properties}))
+    [row] = sync_execute(
+        f"""
+SELECT {aggregates}
+FROM (
+    SELECT {table_columns}
+    FROM events
+    WHERE timestamp > now() - toIntervalDay(1)
+    LIMIT {VALUE_LENGTH_SAMPLE_ROWS}
+)
+        """,
+        {f"property_{index}": property_name for index, (_, property_name) in enumerate(properties)},
+    )
+    # An empty sample averages to nan, which would otherwise poison every estimate
+    return {prop: 0.0 if math.isnan(length) else length for prop, length in zip(properties, row)}
+
+
+def build_plan(
+    accesses: list[PropertyAccess],
+    stats: TableStats,
+    value_lengths: dict[tuple[TableColumn, PropertyName], float],
+    existing_columns: dict[tuple[PropertyName, TableColumn], MaterializedColumn],
+    column_usage: Optional[dict[str, int]],
+    maximum: int,
+    table: TablesWithMaterializedColumns = "events",
+) -> MaterializedColumnsPlan:
+    """
+    Ranks the properties that were read by the bytes materializing them saves net of the cost of storing and
+    backfilling them, and lists the materialized columns that weren't used. Unused columns aren't listed when
+    `column_usage` is None, which is the case when the analysis only covered some of the queries.
+    """
+
+    # A property can be read from the JSON column by some queries and from a property group by others
+    accesses_by_property: dict[tuple[TableColumn, PropertyName], list[PropertyAccess]] = defaultdict(list)
+    for access in accesses:
+        if (access.property_name, access.table_column) not in existing_columns:
+            accesses_by_property[(access.table_column, access.property_name)].append(access)
+
+    candidates = []
+    for (table_column, property_name), property_accesses in accesses_by_property.items():
+        source_size = stats.column_sizes.get(table_column, ColumnSize(0, 0))
+        column_bytes_per_row = value_lengths.get((table_column, property_name), 0.0) * source_size.compression_ratio
+        bytes_saved = sum(
+            access.read_rows * max(stats.bytes_per_row(access.column) - column_bytes_per_row, 0.0)
+            for access in property_accesses
+        )
+        backfill_bytes_per_row = stats.bytes_per_row(table_column) + column_bytes_per_row
+        candidates.append(
+            MaterializeCandidate(
+                table=table,
+                table_column=table_column,
+                property_name=property_name,
+                via_property_group=any(access.via_property_group for access in property_accesses),
+                queries=sum(access.queries for access in property_accesses),
+                failures=sum(access.failures for access in property_accesses),
+                slow_queries=sum(access.slow_queries for access in property_accesses),
+                teams=max(access.teams for access in property_accesses),
+                query_types=sorted({query_type for access in property_accesses for query_type in access.query_types}),
+                bytes_saved=int(bytes_saved),
+                storage_bytes=int(stats.rows * column_bytes_per_row),
+                backfill_bytes=int(stats.backfill_rows * backfill_bytes_per_row),
+            )
+        )
+
+    candidates = [candidate for candidate in candidates if candidate.net_bytes_saved > 0]
+    candidates.sort(key=lambda candidate: (-candidate.net_bytes_saved, candidate.table_column, candidate.property_name))
+
+    drops = []
+    if column_usage is not None:
+        for column in existing_columns.values():
+            if column_usage.get(column.name, 0) == 0:
+                size = stats.column_sizes.get(column.name, ColumnSize(0, 0))
+                drops.append(DropCandidate(table=table, column=column, storage_bytes=size.compressed_bytes))
+        drops.sort(key=lambda candidate: (-candidate.storage_bytes, candidate.column.name))
+
+    return MaterializedColumnsPlan(materialize=candidates[:maximum], drop=drops)
+
+
+def advise_materialized_columns(
+    since_hours_ago: int,
+    min_query_time: int,
+    backfill_period_days: int,
+    maximum: int,
+    team_id: Optional[int] = None,
+) -> MaterializedColumnsPlan:
+    "Plans which event properties to materialize and which materialized columns to drop"
+
+    table: TablesWithMaterializedColumns = "events"
+    existing_columns = get_materialized_columns(table)
+    accesses = get_property_accesses(since_hours_ago, min_query_time, team_id)
+    properties = sorted(
+        {
+            (access.table_column, access.property_name)
+            for access in accesses
+            if (access.property_name, access.table_column) not in existing_columns
+        }
+    )
+
+    # Queries of other teams may still use the columns that the ones of this team don't
+    column_usage = (
+        None
+        if team_id
+        else get_materialized_column_usage([column.name for column in existing_columns.values()], since_hours_ago)
+    )
+
+    return build_plan(
+        accesses,
+        get_table_stats(table, backfill_period_days),
+        get_average_value_lengths(properties),
+        existing_columns,
+        column_usage,
+        maximum,
+        table=table,
+    )
+
+
+def execute_plan(
+    plan: MaterializedColumnsPlan,
+    backfill_period_days: int,
+    drop_unused: bool = False,
+    dry_run: bool = False,
+    is_nullable: bool = False,
+) -> None:
+    "Materializes and backfills the planned columns, and drops the unused ones if `drop_unused` is set"
+
+    logger.info(f"Materialized columns plan:\n{plan.format()}")
+    if dry_run:
+        return
+
+    materialized_columns: dict[TableWithProperties, list[MaterializedColumn]] = defaultdict(list)
+    for candidate in plan.materialize:
+        logger.info(f"Materializing column. table={candidate.table}, property_name={candidate.property_name}")
+        materialized_columns[candidate.table].append(
+            materialize(
+                candidate.table,
+                candidate.property_name,
+                table_column=candidate.table_column,
+                is_nullable=is_nullable,
+            )
+        )
+
+    if backfill_period_days > 0:
+        logger.info(f"Starting backfill for new materialized columns. period_days={backfill_period_days}")
+        for table, columns in materialized_columns.items():
+            backfill_materialized_columns(table, columns, timedelta(days=backfill_period_days))
+
+    if drop_unused:
+        columns_to_drop: dict[TablesWithMaterializedColumns, list[str]] = defaultdict(list)
+        for drop in plan.drop:
+            columns_to_drop[drop.table].append(drop.column.name)
+        for table, column_names in columns_to_drop.items():
+            logger.info(f"Dropping unused materialized columns. table={table}, columns={column_names}")
+            drop_column(table, column_names)
@@ -0,0 +1,214 @@
+from unittest import TestCase
+from unittest.mock import call, patch
+
+from posthog.test.base import BaseTest, ClickhouseTestMixin
+from posthog.clickhouse.client import sync_execute
+from ee.clickhouse.materialized_columns.advisor import (
+    ColumnSize,
+    MaterializedColumnsPlan,
+    PropertyAccess,
+    TableStats,
+    build_plan,
+    execute_plan,
+    get_materialized_column_usage,
+    get_property_accesses,
+)
+from ee.clickhouse.materialized_columns.columns import MaterializedColumn, MaterializedColumnDetails
+
+GB = 1000 * 1000 * 1000
+
+STATS = TableStats(
+    column_sizes={
+        "properties": ColumnSize(100 * GB, 1000 * GB),
+        "properties_group_custom": ColumnSize(40 * GB, 400 * GB),
+        "mat_unused": ColumnSize(2 * GB, 10 * GB),
+        "mat_small_unused": ColumnSize(GB, 5 * GB),
+    },
+    rows=1000 * 1000 * 1000,
+    backfill_rows=100 * 1000 * 1000,
+)
+
+EXISTING_COLUMNS = {
+    (property_name, "properties"): MaterializedColumn(
+        f"mat_{property_name}", MaterializedColumnDetails("properties", property_name, is_disabled=False), False
+    )
+    for property_name in ("used", "unused", "small_unused")
+}
+
+
+def access(column: str, property_name: str, read_rows: int, query_types: list[str] | None = None) -> PropertyAccess:
+    return PropertyAccess(
+        column=column,
+        property_name=property_name,
+        queries=10,
+        failures=1,
+        slow_queries=2,
+        read_rows=read_rows,
+        read_bytes=0,
+        teams=1,
+        query_types=query_types or [],
+    )
+
+
+class TestBuildPlan(TestCase):
+    def test_ranks_properties_by_net_bytes_saved(self):
+        accesses = [
+            access("properties", "rarely_read", 1000 * 1000),
+            access("properties", "often_read", 10 * GB, ["TrendsQuery"]),
+            access("properties_group_custom", "often_read", 10 * GB, ["HogQLQuery"]),
+            access("properties", "sometimes_read", GB),
+            access("properties", "used", 10 * GB),
+        ]
+        value_lengths = {("properties", "often_read"): 10.0, ("properties", "sometimes_read"): 10.0}
+
+        plan = build_plan(accesses, STATS, value_lengths, EXISTING_COLUMNS, column_usage=None, maximum=10)
+
+        # Reading 1M rows doesn't make up for backfilling and storing the column, and `used` is already materialized
+        assert [candidate.property_name for candidate in plan.materialize] == ["often_read", "sometimes_read"]
+
+        often_read = plan.materialize[0]
+        assert often_read.table_column == "properties"
+        assert often_read.via_property_group
+        assert often_read.queries == 20
+        assert often_read.query_types == ["HogQLQuery", "TrendsQuery"]
+        # 100 bytes of properties and 40 bytes of the property group per row, against 1 byte of materialized column
+        assert often_read.bytes_saved == 10 * GB * 99 + 10 * GB * 39
+        assert often_read.storage_bytes == GB
+        assert often_read.backfill_bytes == 100 * 1000 * 1000 * 101
+        assert often_read.net_bytes_saved == (
+            often_read.bytes_saved - often_read.storage_bytes - often_read.backfill_bytes
+        )
+
+    def test_limits_columns_to_materialize(self):
+        accesses = [access("properties", f"property_{index}", (index + 1) * GB) for index in range(5)]
+
+        plan = build_plan(accesses, STATS, {}, {}, column_usage=None, maximum=2)
+
+        assert [candidate.property_name for candidate in plan.materialize] == ["property_4", "property_3"]
+
+    def test_drops_unused_columns_largest_first(self):
+        plan = build_plan([], STATS, {}, EXISTING_COLUMNS, column_usage={"mat_used": 3}, maximum=10)
+
+        assert [(candidate.column.name, candidate.storage_bytes) for candidate in plan.drop] == [
+            ("mat_unused", 2 * GB),
+            ("mat_small_unused", GB),
+        ]
+        assert plan.format().endswith(
+            "Drop 2 unused column(s):\n"
+            "  events.mat_unused (properties.unused): storage=2.0GB\n"
+            "  events.mat_small_unused (properties.small_unused): storage=1.0GB"
+        )
+
+    def test_does_not_drop_columns_without_usage(self):
+        plan = build_plan([], STATS, {}, EXISTING_COLUMNS, column_usage=None, maximum=10)
+
+        assert plan.drop == []
+
+
+class TestExecutePlan(TestCase):
+    def setUp(self):
+        self.plan = build_plan(
+            [access("properties", "often_read", 10 * GB)],
+            STATS,
+            {},
+            EXISTING_COLUMNS,
+            column_usage={"mat_used": 3},
+            maximum=10,
+        )
+
+    @patch("ee.clickhouse.materialized_columns.advisor.drop_column")
+    @patch("ee.clickhouse.materialized_columns.advisor.backfill_materialized_columns")
+    @patch("ee.clickhouse.materialized_columns.advisor.materialize")
+    def test_executes_plan(self, patch_materialize, patch_backfill, patch_drop_column):
+        execute_plan(self.plan, backfill_period_days=7, drop_unused=True)
+
+        patch_materialize.assert_called_once_with("events", "often_read", table_column="properties", is_nullable=False)
+        patch_backfill.assert_called_once()
+        patch_drop_column.assert_has_calls([call("events", ["mat_unused", "mat_small_unused"])])
+
+    @patch("ee.clickhouse.materialized_columns.advisor.drop_column")
+    @patch("ee.clickhouse.materialized_columns.advisor.backfill_materialized_columns")
+    @patch("ee.clickhouse.materialized_columns.advisor.materialize")
+    def test_dry_run_does_not_change_tables(self, patch_materialize, patch_backfill, patch_drop_column):
+        execute_plan(self.plan, backfill_period_days=7, drop_unused=True, dry_run=True)
+        execute_plan(MaterializedColumnsPlan(), backfill_period_days=0)
+
+        patch_materialize.assert_not_called()
+        patch_backfill.assert_not_called()
+        patch_drop_column.assert_not_called()
+
+
+class TestGetPropertyAccesses(ClickhouseTestMixin, BaseTest):
+    def test_finds_json_and_property_group_accesses(self):
+        sync_execute("SYSTEM FLUSH LOGS")
+        sync_execute("TRUNCATE TABLE system.query_log")
+
+        queries_to_insert = [
+            ("SELECT JSONExtractRaw(events.properties, \\'json_prop\\') FROM events", "TrendsQuery"),
+            ("SELECT JSONExtractRaw(properties, \\'json_prop\\') FROM events", "FunnelsQuery"),
+            (
+                "SELECT has(events.properties_group_custom, \\'group_prop\\') ? "
+                "events.properties_group_custom[\\'group_prop\\'] : null FROM events",
+                "HogQLQuery",
+            ),
+            ("SELECT events.person_properties_map_custom[\\'email\\'] FROM events", "HogQLQuery"),
+        ]
+
+        for query, query_type in queries_to_insert:
+            sync_execute(
+                """
+            INSERT INTO system.query_log (
+                query,
+                query_start_time,
+                type,
+                is_initial_query,
+                log_comment,
+                query_duration_ms,
+                read_bytes,
+                read_rows
+            ) VALUES (
+                '{query}',
+                now(),
+                2,
+                1,
+                '{log_comment}',
+                1000,
+                1000000,
+                1000
+            )
+            """.format(query=query, log_comment=f'{{"team_id": 2, "query_type": "{query_type}"}}')
+            )
+
+        accesses = {(access.column, access.property_name): access for access in get_property_accesses(24, 500)}
+
+        assert set(accesses) == {
+            ("properties", "json_prop"),
+            ("properties_group_custom", "group_prop"),
+            ("person_properties_map_custom", "email"),
+        }
+        assert accesses[("properties", "json_prop")].queries == 2
+        assert accesses[("properties", "json_prop")].slow_queries == 2
+        assert accesses[("properties", "json_prop")].read_rows == 2000
+        assert accesses[("properties", "json_prop")].query_types == ["FunnelsQuery", "TrendsQuery"]
+        assert accesses[("properties_group_custom", "group_prop")].table_column == "properties"
+        assert accesses[("person_properties_map_custom", "email")].table_column == "person_properties"
+
+    def test_counts_column_usage_of_queries_without_a_team(self):
+        sync_execute("SYSTEM FLUSH LOGS")
+        sync_execute("TRUNCATE TABLE system.query_log")
+
+        for query, log_comment in [
+            ("SELECT mat_used FROM events", '{"team_id": 2}'),
+            ("SELECT mat_used, mat_unused FROM events", ""),
+        ]:
+            sync_execute(
+                """
+            INSERT INTO system.query_log (query, query_start_time, type, is_initial_query, log_comment)
+            VALUES ('{query}', now(), 2, 1, '{log_comment}')
+            """.format(query=query, log_comment=log_comment)
+            )
+
+        assert get_materialized_column_usage(["mat_used", "mat_unused", "mat_small_unused"], 24) == {
+            "mat_used": 2,
+            "mat_unused": 1,
+        }
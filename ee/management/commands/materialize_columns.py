@@ -3,6 +3,7 @@ import logging
 
 from django.core.management.base import BaseCommand
 
+from ee.clickhouse.materialized_columns.advisor import advise_materialized_columns, execute_plan
 from ee.clickhouse.materialized_columns.analyze import (
     logger,
     materialize_properties_task,
@@ -70,6 +71,16 @@ class Command(BaseCommand):
             default=MATERIALIZE_COLUMNS_MAX_AT_ONCE,
             help="Max number of columns to materialize via single invocation. Same as MATERIALIZE_COLUMNS_MAX_AT_ONCE env variable.",
         )
+        parser.add_argument(
+            "--advise",
+            action="store_true",
+            help="Rank properties by the bytes materializing them saves net of storage and backfill costs, and plan to drop unused columns",
+        )
+        parser.add_argument(
+            "--drop-unused",
+            action="store_true",
+            help="With --advise, drop the materialized columns that no query used over the analysis period",
+        )
         parser.add_argument(
             "--nullable",
             action=argparse.BooleanOptionalAction,
@@ -99,6 +110,21 @@ class Command(BaseCommand):
                 dry_run=options["dry_run"],
                 is_nullable=is_nullable,
             )
+        elif options["advise"]:
+            plan = advise_materialized_columns(
+                since_hours_ago=options["analyze_period"],
+                min_query_time=options["min_query_time"],
+                backfill_period_days=options["backfill_period"],
+                maximum=options["max_columns"],
+                team_id=options["analyze_team_id"],
+            )
+            execute_plan(
+                plan,
+                backfill_period_days=options["backfill_period"],
+                drop_unused=options["drop_unused"],
+                dry_run=options["dry_run"],
+                is_nullable=is_nullable,
+            )
         else:
             materialize_properties_task(
                 time_to_analyze_hours=options["analyze_period"],
@@ -620,6 +620,10 @@ export interface EventsQueryResponse extends AnalyticsQueryResponseBase<any[][]>
     hasMore?: boolean
     limit?: integer
     offset?: integer
+    /** Cursor to pass as `cursor` to get the next page, if there are more results */
+    nextCursor?: string
+    /** Persons of the `person` columns when `personsSideTable` is set, each only once. Rows refer to them by `person_index` */
+    persons?: Record<string, any>[]
 }
 
 export type CachedEventsQueryResponse = CachedQueryResponse<EventsQueryResponse>
@@ -658,12 +662,18 @@ export interface EventsQuery extends DataNode<EventsQueryResponse> {
      * Number of rows to skip before returning rows
      */
     offset?: integer
+    /**
+     * Cursor returned as `nextCursor` by the previous page. Pages from after the row it points to, instead of using `offset`
+     */
+    cursor?: string
     /**
      * Show events matching a given action
      */
     actionId?: integer
     /** Show events for a given person */
     personId?: string
+    /** Return each person of the `person` columns once in `persons` of the response, instead of in every row */
+    personsSideTable?: boolean
     /** Only fetch events that happened before this timestamp */
     before?: string
     /** Only fetch events that happened after this timestamp */
@@ -1517,6 +1527,8 @@ export interface ActorsQueryResponse extends AnalyticsQueryResponseBase<any[][]>
     limit: integer
     offset: integer
     missing_actors_count?: integer
+    /** Cursor to pass as `cursor` to get the next page, if there are more results */
+    nextCursor?: string
 }
 
 export type CachedActorsQueryResponse = CachedQueryResponse<ActorsQueryResponse>
@@ -1533,6 +1545,8 @@ export interface ActorsQuery extends DataNode<ActorsQueryResponse> {
     orderBy?: string[]
     limit?: integer
     offset?: integer
+    /** Cursor returned as `nextCursor` by the previous page. Pages from after the row it points to, instead of using `offset` */
+    cursor?: string
 }
 
 export type CachedGroupsQueryResponse = CachedQueryResponse<GroupsQueryResponse>
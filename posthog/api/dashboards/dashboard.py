@@ -27,13 +27,14 @@ from posthog.api.utils import action
 from posthog.event_usage import report_user_action
 from posthog.helpers import create_dashboard_from_template
 from posthog.helpers.dashboard_templates import create_from_template
-from posthog.models import Dashboard, DashboardTile, Insight, Text
+from posthog.models import Dashboard, DashboardTile, Insight, Team, Text
 from posthog.models.dashboard_templates import DashboardTemplate
 from posthog.models.tagged_item import TaggedItem
 from posthog.models.user import User
 from posthog.user_permissions import UserPermissionsSerializerMixin
 from posthog.utils import filters_override_requested_by_client, variables_override_requested_by_client
 from posthog.clickhouse.client.async_task_chain import task_chain_context
+from posthog.hogql_queries.query_cache import batched_query_cache
 from contextlib import nullcontext
 import posthoganalytics
 
@@ -456,7 +457,10 @@ class DashboardSerializer(DashboardBasicSerializer):
             ),
         )
 
-        with task_chain_context() if chained_tile_refresh_enabled else nullcontext():
+        with (
+            task_chain_context() if chained_tile_refresh_enabled else nullcontext(),
+            batched_query_cache(self._tile_cache_keys(dashboard, sorted_tiles, team)),
+        ):
             for order, tile in enumerate(sorted_tiles):
                 self.context.update(
                     {
@@ -473,6 +477,26 @@ class DashboardSerializer(DashboardBasicSerializer):
 
         return serialized_tiles
 
+    def _tile_cache_keys(self, dashboard: Dashboard, tiles: list[DashboardTile], team: Team) -> list[Optional[str]]:
+        """Cache keys of all insight tiles, so their results can be fetched from Redis in one round trip."""
+        from posthog.caching.calculate_results import query_based_insight_cache_key
+
+        request = self.context.get("request")
+        filters_override = filters_override_requested_by_client(request) if request else None
+        variables_override = variables_override_requested_by_client(request) if request else None
+
+        return [
+            query_based_insight_cache_key(
+                tile.insight,
+                team=team,
+                dashboard=dashboard,
+                filters_override=filters_override,
+                variables_override=variables_override,
+            )
+            for tile in tiles
+            if tile.insight is not None and not tile.insight.deleted
+        ]
+
     def get_filters(self, dashboard: Dashboard) -> dict:
         request = self.context.get("request")
         if request:
@@ -14,7 +14,7 @@ from posthog.hogql.database.database import create_hogql_database, serialize_dat
 from posthog.hogql.autocomplete import get_hogql_autocomplete
 from posthog.hogql.metadata import get_hogql_metadata
 from posthog.hogql.modifiers import create_default_modifiers_for_team
-from posthog.hogql_queries.query_runner import CacheMissResponse, ExecutionMode, get_query_runner
+from posthog.hogql_queries.query_runner import CacheMissResponse, ExecutionMode, QueryRunner, get_query_runner
 from posthog.models import Team, User
 from posthog.schema import (
     DatabaseSchemaQueryResponse,
@@ -146,3 +146,61 @@ def process_query_model(
         )
 
     return result
+
+
+def get_query_runner_for_dict(
+    team: Team,
+    query_json: dict,
+    *,
+    dashboard_filters_json: Optional[dict] = None,
+    variables_override_json: Optional[dict] = None,
+    limit_context: Optional[LimitContext] = None,
+) -> Optional[QueryRunner]:
+    """
+    Returns the query runner `process_query_dict` would run this query with, with the dashboard filters and variable
+    overrides applied. Returns `None` for queries that don't run via a query runner.
+    """
+    query: BaseModel = QuerySchemaRoot.model_validate(query_json).root
+    while True:
+        try:
+            query_runner = get_query_runner(query, team, limit_context=limit_context)
+            break
+        except ValueError:
+            if hasattr(query, "source") and isinstance(query.source, BaseModel):
+                query = query.source
+            else:
+                return None
+
+    if dashboard_filters_json:
+        query_runner.apply_dashboard_filters(DashboardFilter.model_validate(dashboard_filters_json))
+    if variables_override_json:
+        query_runner.apply_variable_overrides(
+            [HogQLVariable.model_validate(n) for n in variables_override_json.values()]
+        )
+    return query_runner
+
+
+def get_query_cache_key(
+    team: Team,
+    query_json: dict,
+    *,
+    dashboard_filters_json: Optional[dict] = None,
+    variables_override_json: Optional[dict] = None,
+    limit_context: Optional[LimitContext] = None,
+) -> Optional[str]:
+    """
+    Returns the cache key `process_query_dict` would use for this query, without running it.
+    Returns `None` for queries that aren't cached by a query runner.
+    """
+    try:
+        query_runner = get_query_runner_for_dict(
+            team,
+            query_json,
+            dashboard_filters_json=dashboard_filters_json,
+            variables_override_json=variables_override_json,
+            limit_context=limit_context,
+        )
+        return query_runner.get_cache_key() if query_runner is not None else None
+    except Exception:
+        # Only used for prefetching, so the query itself will surface any error
+        return None
@@ -66,6 +66,9 @@ class PostHogConfig(AppConfig):
         else:
             setup_async_migrations()
 
+        # Registers the signal receivers that invalidate cached HogQL databases
+        import posthog.hogql.database.cache  # noqa: F401
+
         from posthog.tasks.hog_functions import queue_sync_hog_function_templates
 
         # Skip during tests since we handle this in conftest.py
@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, Optional, Union
 import structlog
 from pydantic import BaseModel
 
-from posthog.api.services.query import ExecutionMode, process_query_dict
+from posthog.api.services.query import ExecutionMode, get_query_cache_key, process_query_dict
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.hogql_queries.legacy_compatibility.flagged_conversion_manager import conversion_to_query_based
 from posthog.hogql_queries.query_runner import get_query_runner_or_none
@@ -45,6 +45,41 @@ def calculate_cache_key(target: Union[DashboardTile, Insight]) -> Optional[str]:
     return None
 
 
+def query_based_insight_cache_key(
+    insight: Insight,
+    *,
+    team: Team,
+    dashboard: Optional[Dashboard] = None,
+    filters_override: Optional[dict] = None,
+    variables_override: Optional[dict] = None,
+) -> Optional[str]:
+    """The cache key `calculate_for_query_based_insight` will look up for these arguments, without calculating."""
+    try:
+        with conversion_to_query_based(insight):
+            if not insight.query:
+                return None
+            return get_query_cache_key(
+                team,
+                insight.query,
+                dashboard_filters_json=(
+                    filters_override
+                    if filters_override is not None
+                    else dashboard.filters
+                    if dashboard is not None
+                    else None
+                ),
+                variables_override_json=(
+                    variables_override
+                    if variables_override is not None
+                    else dashboard.variables
+                    if dashboard is not None
+                    else None
+                ),
+            )
+    except Exception:
+        return None
+
+
 def calculate_for_query_based_insight(
     insight: Insight,
     *,
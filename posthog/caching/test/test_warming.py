@@ -1,4 +1,11 @@
-from posthog.caching.warming import insights_to_keep_fresh, schedule_warming_for_teams_task
+from celery.exceptions import Retry
+
+from posthog.caching.warming import (
+    insights_to_keep_fresh,
+    schedule_warming_for_teams_task,
+    warm_insight_cache_batch_task,
+)
+from posthog.errors import CHQueryErrorTooManySimultaneousQueries
 from posthog.models import Insight, DashboardTile, InsightViewed, Dashboard
 
 from datetime import datetime, timedelta, UTC
@@ -125,9 +132,9 @@ class TestScheduleWarmingForTeamsTask(APIBaseTest):
 
     @patch("posthog.caching.warming.largest_teams")
     @patch("posthog.caching.warming.insights_to_keep_fresh")
-    @patch("posthog.caching.warming.warm_insight_cache_task.si")
+    @patch("posthog.caching.warming.warm_insight_cache_batch_task.si")
     def test_schedule_warming_for_teams_task_with_empty_insight_tuples(
-        self, mock_warm_insight_cache_task_si, mock_insights_to_keep_fresh, mock_largest_teams
+        self, mock_warm_insight_cache_batch_task_si, mock_insights_to_keep_fresh, mock_largest_teams
     ):
         mock_largest_teams.return_value = [self.team1.pk, self.team2.pk]
         mock_insights_to_keep_fresh.return_value = iter([])
@@ -135,13 +142,13 @@ class TestScheduleWarmingForTeamsTask(APIBaseTest):
         schedule_warming_for_teams_task()
 
         mock_insights_to_keep_fresh.assert_called()
-        mock_warm_insight_cache_task_si.assert_not_called()
+        mock_warm_insight_cache_batch_task_si.assert_not_called()
 
     @patch("posthog.caching.warming.largest_teams")
     @patch("posthog.caching.warming.insights_to_keep_fresh")
-    @patch("posthog.caching.warming.warm_insight_cache_task.si")
+    @patch("posthog.caching.warming.warm_insight_cache_batch_task.si")
     def test_schedule_warming_for_teams_task_with_non_empty_insight_tuples(
-        self, mock_warm_insight_cache_task_si, mock_insights_to_keep_fresh, mock_largest_teams
+        self, mock_warm_insight_cache_batch_task_si, mock_insights_to_keep_fresh, mock_largest_teams
     ):
         mock_largest_teams.return_value = [self.team1.pk, self.team2.pk]
         mock_insights_to_keep_fresh.return_value = iter([("1234", "5678"), ("2345", None)])
@@ -149,7 +156,40 @@ class TestScheduleWarmingForTeamsTask(APIBaseTest):
         schedule_warming_for_teams_task()
 
         mock_insights_to_keep_fresh.assert_called()
-        self.assertEqual(mock_warm_insight_cache_task_si.call_count, 2)
-        self.assertEqual(mock_warm_insight_cache_task_si.call_args_list[0][0][0], "1234")
-        self.assertEqual(mock_warm_insight_cache_task_si.call_args_list[0][0][1], "5678")
-        self.assertEqual(mock_warm_insight_cache_task_si.call_args_list[1][0][0], "2345")
+        # Both insights fit into a single batch
+        self.assertEqual(mock_warm_insight_cache_batch_task_si.call_count, 1)
+        self.assertEqual(
+            mock_warm_insight_cache_batch_task_si.call_args_list[0][0][0], [("1234", "5678"), ("2345", None)]
+        )
+
+    @patch("posthog.caching.warming._warm_insight")
+    def test_warm_insight_cache_batch_task_only_retries_insights_not_yet_warmed(self, mock_warm_insight_cache):
+        error = CHQueryErrorTooManySimultaneousQueries("Too many simultaneous queries")
+        mock_warm_insight_cache.side_effect = [None, error]
+        insight_tuples = [(1234, 5678), (2345, None), (3456, 7890)]
+
+        with patch.object(warm_insight_cache_batch_task, "retry", side_effect=Retry()) as mock_retry:
+            with self.assertRaises(Retry):
+                warm_insight_cache_batch_task(insight_tuples)
+
+        self.assertEqual(mock_warm_insight_cache.call_count, 2)
+        mock_retry.assert_called_once_with(args=[[(2345, None), (3456, 7890)]], exc=error, countdown=2)
+
+    @patch("posthog.caching.warming.get_query_runner_for_dict")
+    def test_warm_insight_cache_batch_task_builds_each_query_runner_once(self, mock_get_query_runner_for_dict):
+        query_runner = mock_get_query_runner_for_dict.return_value
+        query_runner.get_cache_key.return_value = "cache_key"
+        Insight.objects.filter(pk__in=[1234, 2345]).update(query={"kind": "HogQLQuery", "query": "select 1"})
+        self.dashboard1.filters = {"date_from": "-7d"}
+        self.dashboard1.save()
+
+        # The insights with their teams, and their dashboards
+        with self.assertNumQueries(2):
+            warm_insight_cache_batch_task([(1234, 5678), (2345, None)])
+
+        self.assertEqual(mock_get_query_runner_for_dict.call_count, 2)
+        self.assertEqual(
+            mock_get_query_runner_for_dict.call_args_list[0].kwargs["dashboard_filters_json"], {"date_from": "-7d"}
+        )
+        self.assertEqual(query_runner.get_cache_key.call_count, 2)
+        self.assertEqual(query_runner.run.call_count, 2)
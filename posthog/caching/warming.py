@@ -10,15 +10,15 @@ from django.db.models import Q
 from prometheus_client import Counter, Gauge
 from posthog.exceptions_capture import capture_exception
 
-from posthog.api.services.query import process_query_dict
+from posthog.api.services.query import get_query_runner_for_dict, process_query_dict
 from posthog.caching.utils import largest_teams
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.errors import CHQueryErrorTooManySimultaneousQueries
 from posthog.hogql.constants import LimitContext
-from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_cache import QueryCacheManager, batched_query_cache
 from posthog.hogql_queries.legacy_compatibility.flagged_conversion_manager import conversion_to_query_based
-from posthog.hogql_queries.query_runner import ExecutionMode
-from posthog.models import Team, Insight, DashboardTile
+from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
+from posthog.models import Team, Insight, Dashboard, DashboardTile
 from posthog.tasks.utils import CeleryQueue
 from posthog.ph_client import ph_us_client
 import posthoganalytics
@@ -39,6 +39,8 @@ PRIORITY_INSIGHTS_COUNTER = Counter(
 
 LAST_VIEWED_THRESHOLD = timedelta(days=7)
 SHARED_INSIGHTS_LAST_VIEWED_THRESHOLD = timedelta(days=3)
+# Insights warmed per task, sharing one round trip to Redis for cache reads and one for writes
+WARMING_BATCH_SIZE = 10
 
 
 def teams_enabled_for_cache_warming() -> list[int]:
@@ -180,8 +182,10 @@ def schedule_warming_for_teams_task():
             # We chain the task execution to prevent queries *for a single team* running at the same time
             chain(
                 *(
-                    warm_insight_cache_task.si(*insight_tuple).set(expires=expire_after)
-                    for insight_tuple in insight_tuples
+                    warm_insight_cache_batch_task.si(insight_tuples[i : i + WARMING_BATCH_SIZE]).set(
+                        expires=expire_after
+                    )
+                    for i in range(0, len(insight_tuples), WARMING_BATCH_SIZE)
                 )
             )()
 
@@ -196,35 +200,117 @@ def schedule_warming_for_teams_task():
     max_retries=3,
 )
 def warm_insight_cache_task(insight_id: int, dashboard_id: Optional[int]):
+    _warm_insight_cache(insight_id, dashboard_id)
+
+
+@shared_task(
+    bind=True,
+    queue=CeleryQueue.ANALYTICS_LIMITED.value,  # Important! Prevents Clickhouse from being overwhelmed
+    ignore_result=True,
+    expires=60 * 60,
+    max_retries=3,
+)
+def warm_insight_cache_batch_task(self, insight_tuples: list[tuple[int, Optional[int]]]):
+    """
+    Warms several insights in sequence. The insights and their dashboards are loaded up front, their cached results
+    are read from Redis in one go, and fresh results are written back in one pipeline at the end. When ClickHouse is
+    too busy, only the insights that haven't been warmed yet are retried.
+    """
+    insights = (
+        Insight.objects.select_related("team")
+        .prefetch_related("dashboards")
+        .in_bulk([insight_id for insight_id, _ in insight_tuples])
+    )
+    query_runners = {
+        (insight_id, dashboard_id): _warming_query_runner(insights[int(insight_id)], dashboard_id)
+        for insight_id, dashboard_id in insight_tuples
+        if int(insight_id) in insights
+    }
+    cache_keys = [_cache_key(query_runner) for query_runner in query_runners.values() if query_runner is not None]
+
+    with batched_query_cache(cache_keys):
+        for index, (insight_id, dashboard_id) in enumerate(insight_tuples):
+            try:
+                insight = insights.get(int(insight_id))
+                if insight is None:
+                    logger.info(f"Warming insight cache failed 404 insight not found: {insight_id}")
+                    continue
+                _warm_insight(insight, dashboard_id, query_runners[(insight_id, dashboard_id)])
+            except CHQueryErrorTooManySimultaneousQueries as e:
+                # Same backoff as `warm_insight_cache_task`
+                countdown = min(2 * 2**self.request.retries, 3)
+                raise self.retry(args=[insight_tuples[index:]], exc=e, countdown=countdown)
+
+
+def _insight_dashboard(insight: Insight, dashboard_id: Optional[int]) -> Optional[Dashboard]:
+    if not dashboard_id:
+        return None
+    # Goes through the prefetched dashboards of the insight, if any
+    return next((dashboard for dashboard in insight.dashboards.all() if dashboard.pk == int(dashboard_id)), None)
+
+
+def _warming_query_runner(insight: Insight, dashboard_id: Optional[int]) -> Optional[QueryRunner]:
+    """The query runner that warms the insight, built once to get both its cache key and its results."""
+    dashboard = _insight_dashboard(insight, dashboard_id)
+    try:
+        with conversion_to_query_based(insight):
+            return get_query_runner_for_dict(
+                insight.team,
+                insight.query,
+                dashboard_filters_json=dashboard.filters if dashboard is not None else None,
+                limit_context=LimitContext.QUERY_ASYNC,
+            )
+    except Exception:
+        # Warming the insight surfaces the error
+        return None
+
+
+def _cache_key(query_runner: QueryRunner) -> Optional[str]:
     try:
-        insight = Insight.objects.get(pk=insight_id)
+        return query_runner.get_cache_key()
+    except Exception:
+        return None
+
+
+def _warm_insight_cache(insight_id: int, dashboard_id: Optional[int]) -> None:
+    try:
+        insight = Insight.objects.select_related("team").get(pk=insight_id)
     except Insight.DoesNotExist:
         logger.info(f"Warming insight cache failed 404 insight not found: {insight_id}")
         return
 
-    dashboard = None
+    _warm_insight(insight, dashboard_id, _warming_query_runner(insight, dashboard_id))
+
 
+def _warm_insight(insight: Insight, dashboard_id: Optional[int], query_runner: Optional[QueryRunner]) -> None:
     tag_queries(team_id=insight.team_id, insight_id=insight.pk, trigger="warmingV2")
     if dashboard_id:
         tag_queries(dashboard_id=dashboard_id)
-        dashboard = insight.dashboards.filter(pk=dashboard_id).first()
 
     with conversion_to_query_based(insight):
         logger.info(f"Warming insight cache: {insight.pk} for team {insight.team_id} and dashboard {dashboard_id}")
 
         try:
-            results = process_query_dict(
-                insight.team,
-                insight.query,
-                dashboard_filters_json=dashboard.filters if dashboard is not None else None,
-                # We need an execution mode with recent cache:
-                # - in case someone refreshed after this task was triggered
-                # - if insight + dashboard combinations have the same cache key, we prevent needless recalculations
-                limit_context=LimitContext.QUERY_ASYNC,
-                execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE,
-                insight_id=insight_id,
-                dashboard_id=dashboard_id,
-            )
+            # We need an execution mode with recent cache:
+            # - in case someone refreshed after this task was triggered
+            # - if insight + dashboard combinations have the same cache key, we prevent needless recalculations
+            execution_mode = ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+            if query_runner is not None:
+                tag_queries(query=insight.query)
+                results = query_runner.run(
+                    execution_mode=execution_mode, insight_id=insight.pk, dashboard_id=dashboard_id
+                )
+            else:
+                dashboard = _insight_dashboard(insight, dashboard_id)
+                results = process_query_dict(
+                    insight.team,
+                    insight.query,
+                    dashboard_filters_json=dashboard.filters if dashboard is not None else None,
+                    limit_context=LimitContext.QUERY_ASYNC,
+                    execution_mode=execution_mode,
+                    insight_id=insight.pk,
+                    dashboard_id=dashboard_id,
+                )
 
             is_cached = getattr(results, "is_cached", False)
 
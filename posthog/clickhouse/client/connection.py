@@ -1,10 +1,12 @@
 import logging
 import os
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
 from enum import Enum
 from functools import cache
 from collections.abc import Mapping
+from urllib.parse import urlparse
 
+import pyarrow as pa
 from clickhouse_connect import get_client
 from clickhouse_connect.driver import Client as HttpClient, httputil
 from clickhouse_driver import Client as SyncClient
@@ -104,6 +106,15 @@ class ProxyClient:
             return result.result_set, column_types_driver_format
         return result.result_set
 
+    def execute_arrow(self, query, params=None, settings=None, query_id=None) -> pa.Table:
+        """Runs the query with `FORMAT ArrowStream`, reading the record batches ClickHouse streams into a table."""
+        settings = {**(settings or {}), "output_format_arrow_string_as_string": "1"}
+        if query_id:
+            settings["query_id"] = query_id
+        stream = self._client.raw_stream(query=query, parameters=params, settings=settings, fmt="ArrowStream")
+        with closing(stream):
+            return pa.ipc.open_stream(stream).read_all()
+
     # Implement methods for session managment: https://peps.python.org/pep-0343/ so ProxyClient can be used in all places a clickhouse_driver.Client is.
     def __enter__(self):
         return self
@@ -229,6 +240,25 @@ def default_client(host=settings.CLICKHOUSE_HOST):
     )
 
 
+@contextmanager
+def get_client_for_host(host: str):
+    """
+    Returns a client of the default user that connects to a single host of the cluster, e.g. to kill a query that runs
+    on it. `host` is what `client_host` returns for a client of that host: a hostname, or a URL for HTTP clients.
+    """
+    if settings.CLICKHOUSE_USE_HTTP:
+        url = urlparse(host)
+        with get_http_client(host=url.hostname, port=url.port or 0, interface=url.scheme) as client:
+            yield client
+        return
+
+    client = default_client(host=host)
+    try:
+        yield client
+    finally:
+        client.disconnect()
+
+
 def _make_ch_pool(*, client_settings: Mapping[str, str] | None = None, **overrides) -> ChPool:
     kwargs = {
         "host": settings.CLICKHOUSE_HOST,
@@ -3,10 +3,11 @@ import threading
 import types
 from collections.abc import Sequence
 from contextlib import contextmanager, suppress
-from functools import lru_cache
-from time import perf_counter
+from functools import lru_cache, partial
+from time import perf_counter, sleep
 from typing import Any, Optional, Union
 
+import numpy as np
 import posthoganalytics
 import sqlparse
 from cachetools import cached, TTLCache
@@ -15,12 +16,24 @@ from django.conf import settings as app_settings
 from prometheus_client import Counter
 
 from posthog.clickhouse.client.connection import (
+    ProxyClient,
     Workload,
     get_client_from_pool,
     get_default_clickhouse_workload_type,
     ClickHouseUser,
 )
 from posthog.clickhouse.client.escape import substitute_params
+from posthog.clickhouse.client.resilience import (
+    QUERY_RETRY_COUNTER,
+    client_host,
+    hedge_delay_seconds,
+    is_read_query,
+    is_retryable_error,
+    kill_query,
+    retry_backoff_seconds,
+    run_hedged,
+    run_on_host,
+)
 from posthog.clickhouse.query_tagging import tag_queries, get_query_tag_value, get_query_tags
 from posthog.cloud_utils import is_cloud
 from posthog.errors import wrap_query_error, ch_error_type
@@ -64,6 +77,21 @@ CLICKHOUSE_SUPPORTED_JOIN_ALGORITHMS = [
 
 is_invalid_algorithm = lambda algo: algo not in CLICKHOUSE_SUPPORTED_JOIN_ALGORITHMS
 
+# NumPy types of the ClickHouse types that columnar results keep unboxed, every other column holds Python objects
+CLICKHOUSE_NUMPY_TYPES = {
+    "UInt8": np.uint8,
+    "UInt16": np.uint16,
+    "UInt32": np.uint32,
+    "UInt64": np.uint64,
+    "Int8": np.int8,
+    "Int16": np.int16,
+    "Int32": np.int32,
+    "Int64": np.int64,
+    "Float32": np.float32,
+    "Float64": np.float64,
+    "Bool": np.bool_,
+}
+
 
 @lru_cache(maxsize=1)
 def default_settings() -> dict:
@@ -121,7 +149,12 @@ def sync_execute(
     readonly=False,
     sync_client: Optional[SyncClient] = None,
     ch_user: ClickHouseUser = ClickHouseUser.DEFAULT,
+    columnar: bool = False,
 ):
+    """
+    Runs a query and returns the rows as tuples. With `columnar`, the results are one NumPy array per column instead,
+    so that large results can be post-processed without building a Python tuple per row.
+    """
     if TEST and flush:
         try:
             from posthog.test.base import flush_persons_and_events
@@ -172,6 +205,47 @@ def sync_execute(
             # process requests made to API from the PH app
             ch_user = ClickHouseUser.APP
 
+    def run(client, *, settings: dict, query_id: Optional[str]):
+        if columnar:
+            return _execute_columnar(
+                client,
+                prepared_sql,
+                params=prepared_args,
+                settings=settings,
+                with_column_types=with_column_types,
+                query_id=query_id,
+            )
+        return client.execute(
+            prepared_sql,
+            params=prepared_args,
+            settings=settings,
+            with_column_types=with_column_types,
+            query_id=query_id,
+        )
+
+    def run_attempt(*, settings: dict, query_id: Optional[str]):
+        with sync_client or get_client_from_pool(workload, team_id, readonly, ch_user) as client:
+            return run_on_host(client, partial(run, settings=settings, query_id=query_id), workload=workload.value)
+
+    # The host that each hedged attempt runs on, so that the one that loses is killed there. An empty host marks an
+    # attempt that lost before it started, which then doesn't run at all.
+    attempt_hosts: dict[str, str] = {}
+
+    def run_hedged_attempt(*, settings: dict, query_id: str):
+        with get_client_from_pool(workload, team_id, readonly, ch_user) as client:
+            host = client_host(client)
+            if attempt_hosts.setdefault(query_id, host) != host:
+                return None
+            return run_on_host(client, partial(run, settings=settings, query_id=query_id), workload=workload.value)
+
+    def kill_attempt(query_id: str) -> None:
+        host = attempt_hosts.setdefault(query_id, "")
+        if host:
+            kill_query(host, query_id)
+
+    # Only queries that read are sent again, after a connection error or to hedge a slow request
+    is_read = prepared_args is None and is_read_query(prepared_sql)
+    attempt = 0
     while True:
         settings = {
             **core_settings,
@@ -184,6 +258,17 @@ def sync_execute(
             # more variable latency and a higher likelihood of query failures - but offline workloads should be tolerant to
             # these disruptions
             settings["use_hedged_requests"] = "0"
+        if attempt > 0:
+            # The previous attempt may still be running on the server with the same query_id
+            settings["replace_running_query"] = "1"
+        hedge_delay = (
+            hedge_delay_seconds(workload.value)
+            if app_settings.CLICKHOUSE_HEDGED_READS_ENABLED
+            and workload == Workload.ONLINE
+            and is_read
+            and sync_client is None
+            else None
+        )
         start_time = perf_counter()
         try:
             QUERY_STARTED_COUNTER.labels(
@@ -191,15 +276,27 @@ def sync_execute(
                 access_method=tags.get("access_method", "other"),
                 chargeable=str(tags.get("chargeable", "0")),
             ).inc()
-            with sync_client or get_client_from_pool(workload, team_id, readonly, ch_user) as client:
-                result = client.execute(
-                    prepared_sql,
-                    params=prepared_args,
-                    settings=settings,
-                    with_column_types=with_column_types,
-                    query_id=query_id,
+            # Without a query id, the request that loses can't be killed
+            if hedge_delay is not None and query_id is not None:
+                attempt_hosts.clear()
+                hedge_query_id = f"{query_id}_hedge"
+                result = run_hedged(
+                    partial(run_hedged_attempt, settings=settings, query_id=query_id),
+                    partial(
+                        run_hedged_attempt, settings={**settings, "query_id": hedge_query_id}, query_id=hedge_query_id
+                    ),
+                    hedge_delay,
+                    kill_primary=partial(kill_attempt, query_id),
+                    kill_hedge=partial(kill_attempt, hedge_query_id),
                 )
+            else:
+                result = run_attempt(settings=settings, query_id=query_id)
         except Exception as e:
+            if is_read and attempt < app_settings.CLICKHOUSE_QUERY_MAX_RETRIES and is_retryable_error(e):
+                QUERY_RETRY_COUNTER.labels(exception_type=ch_error_type(e), workload=workload.value).inc()
+                sleep(retry_backoff_seconds(attempt))
+                attempt += 1
+                continue
             exception_type = ch_error_type(e)
             QUERY_ERROR_COUNTER.labels(
                 exception_type=exception_type, query_type=query_type, workload=workload.value, chargeable=chargeable
@@ -226,6 +323,35 @@ def sync_execute(
     return result
 
 
+def _execute_columnar(client, query, *, params, settings, with_column_types: bool, query_id: Optional[str]):
+    """
+    Over HTTP, ClickHouse streams the results as Arrow record batches, and the Arrow columns become NumPy arrays. The
+    native protocol already returns the results by column, which are copied into NumPy arrays.
+
+    Column types are ClickHouse types for the native protocol, and Arrow types over HTTP. Date times over HTTP are
+    naive UTC `datetime64` values, as Arrow doesn't keep the time zone of each value.
+    """
+    column_types: list[tuple[str, str]]
+    if isinstance(client, ProxyClient):
+        table = client.execute_arrow(query, params=params, settings=settings, query_id=query_id)
+        columns = [column.to_numpy(zero_copy_only=False) for column in table.columns]
+        column_types = [(field.name, str(field.type)) for field in table.schema]
+    else:
+        columns_data, column_types = client.execute(
+            query, params=params, settings=settings, with_column_types=True, columnar=True, query_id=query_id
+        )
+        # The columns of results without rows aren't returned at all
+        columns_data = columns_data or [() for _ in column_types]
+        columns = [
+            np.fromiter(values, dtype=CLICKHOUSE_NUMPY_TYPES.get(column_type, object), count=len(values))
+            for values, (_, column_type) in zip(columns_data, column_types)
+        ]
+
+    if with_column_types:
+        return columns, column_types
+    return columns
+
+
 def query_with_columns(
     query: str,
     args: Optional[QueryArgs] = None,
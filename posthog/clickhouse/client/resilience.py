@@ -0,0 +1,335 @@
+import random
+import re
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from time import monotonic, perf_counter
+from typing import Optional, TypeVar
+
+import numpy as np
+import structlog
+from clickhouse_connect.driver.exceptions import OperationalError as HttpOperationalError
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+
+from posthog.clickhouse.client.connection import ProxyClient, get_client_for_host
+from posthog.clickhouse.client.escape import substitute_params
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# Errors that are about the connection or the replica rather than the query, so the same query can succeed when it's
+# sent again
+RETRYABLE_ERROR_CODES = {
+    3,  # UNEXPECTED_END_OF_FILE
+    32,  # ATTEMPT_TO_READ_AFTER_EOF
+    101,  # UNEXPECTED_PACKET_FROM_CLIENT
+    102,  # UNEXPECTED_PACKET_FROM_SERVER
+    203,  # NO_FREE_CONNECTION
+    209,  # SOCKET_TIMEOUT
+    210,  # NETWORK_ERROR
+    279,  # ALL_CONNECTION_TRIES_FAILED
+    369,  # ALL_REPLICAS_ARE_STALE
+}
+
+# Queries that only read, which are safe to send again
+READ_QUERY_REGEX = re.compile(
+    r"^\s*(/\*.*?\*/\s*)*(SELECT|WITH|EXPLAIN|SHOW|DESCRIBE|DESC)\b", re.IGNORECASE | re.DOTALL
+)
+
+ERROR_CODE_REGEX = re.compile(r"Code: (\d+)")
+
+QUERY_RETRY_COUNTER = Counter(
+    "posthog_clickhouse_query_retry",
+    "Queries sent to ClickHouse again after a retryable error",
+    labelnames=["exception_type", "workload"],
+)
+
+QUERY_HEDGE_COUNTER = Counter(
+    "posthog_clickhouse_query_hedge",
+    "Hedged reads sent because a query was slower than usual, by which request returned first",
+    labelnames=["winner"],
+)
+
+CIRCUIT_BREAKER_OPENED_COUNTER = Counter(
+    "posthog_clickhouse_circuit_breaker_opened",
+    "Times that queries to a ClickHouse host were stopped after repeated connection errors",
+    labelnames=["host"],
+)
+
+CIRCUIT_BREAKER_REJECTED_COUNTER = Counter(
+    "posthog_clickhouse_circuit_breaker_rejected",
+    "Queries that weren't sent because the circuit breaker of their ClickHouse host was open",
+    labelnames=["host"],
+)
+
+QUERY_LATENCY_HISTOGRAM = Histogram(
+    "posthog_clickhouse_query_latency_seconds",
+    "Time ClickHouse hosts took to return the results of queries",
+    labelnames=["host", "workload", "result"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float("inf")),
+)
+
+
+class ClickHouseHostUnavailable(Exception):
+    def __init__(self, host: str):
+        super().__init__(f"ClickHouse host {host} is failing, queries to it are paused for a moment")
+        self.host = host
+
+
+def error_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    match = ERROR_CODE_REGEX.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    code = error_code(error)
+    if code is not None:
+        return code in RETRYABLE_ERROR_CODES
+    # Errors without a ClickHouse code come from the connection itself
+    return isinstance(error, ConnectionError | TimeoutError | EOFError | HttpOperationalError)
+
+
+def is_read_query(query: str) -> bool:
+    return READ_QUERY_REGEX.match(query) is not None
+
+
+def retry_backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with full jitter, so that retries of many queries don't arrive at once."""
+    return random.uniform(0, settings.CLICKHOUSE_QUERY_RETRY_BACKOFF_SECONDS * (2**attempt))
+
+
+def client_host(client) -> str:
+    if isinstance(client, ProxyClient):
+        return client._client.url
+    hosts = getattr(getattr(client, "connection", None), "hosts", None)
+    return str(hosts[0][0]) if hosts else "unknown"
+
+
+class CircuitBreaker:
+    """
+    Stops sending queries to a host after consecutive connection errors. After `reset_seconds`, a single query is let
+    through, and the breaker closes again if it succeeds.
+    """
+
+    def __init__(self, host: str, *, failure_threshold: int, reset_seconds: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_progress or monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.trial_in_progress = True
+            return True
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.opened_at is not None:
+                # The trial query failed, so wait again
+                self.opened_at = monotonic()
+            elif self.failures >= self.failure_threshold:
+                self.opened_at = monotonic()
+                CIRCUIT_BREAKER_OPENED_COUNTER.labels(host=self.host).inc()
+                logger.warning("clickhouse_circuit_breaker_opened", host=self.host, failures=self.failures)
+
+
+_circuit_breakers_lock = threading.Lock()
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(host)
+        if breaker is None:
+            breaker = _circuit_breakers[host] = CircuitBreaker(
+                host,
+                failure_threshold=settings.CLICKHOUSE_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                reset_seconds=settings.CLICKHOUSE_CIRCUIT_BREAKER_RESET_SECONDS,
+            )
+        return breaker
+
+
+def reset_circuit_breakers() -> None:
+    with _circuit_breakers_lock:
+        _circuit_breakers.clear()
+
+
+class LatencyWindow:
+    """The latencies of the most recent successful queries, to tell when a query is slower than usual."""
+
+    def __init__(self, size: int):
+        self.latencies: deque[float] = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self.lock:
+            self.latencies.append(latency)
+
+    def percentile(self, percentile: float, min_samples: int) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < min_samples:
+                return None
+            latencies = list(self.latencies)
+        return float(np.percentile(latencies, percentile))
+
+
+_latency_windows_lock = threading.Lock()
+_latency_windows: dict[str, LatencyWindow] = {}
+
+
+def get_latency_window(workload: str) -> LatencyWindow:
+    with _latency_windows_lock:
+        window = _latency_windows.get(workload)
+        if window is None:
+            window = _latency_windows[workload] = LatencyWindow(settings.CLICKHOUSE_HEDGED_READS_WINDOW_SIZE)
+        return window
+
+
+def run_on_host(client, run: Callable[..., T], *, workload: str) -> T:
+    """Runs a query on the host of the client, unless its circuit breaker is open, and records how it went."""
+    host = client_host(client)
+    breaker = get_circuit_breaker(host) if settings.CLICKHOUSE_CIRCUIT_BREAKER_ENABLED else None
+    if breaker is not None and not breaker.allow():
+        CIRCUIT_BREAKER_REJECTED_COUNTER.labels(host=host).inc()
+        raise ClickHouseHostUnavailable(host)
+
+    start_time = perf_counter()
+    try:
+        result = run(client)
+    except Exception as e:
+        QUERY_LATENCY_HISTOGRAM.labels(host=host, workload=workload, result="error").observe(
+            perf_counter() - start_time
+        )
+        if breaker is not None:
+            # Errors in the query itself say nothing about the host
+            if is_retryable_error(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        raise
+
+    latency = perf_counter() - start_time
+    QUERY_LATENCY_HISTOGRAM.labels(host=host, workload=workload, result="success").observe(latency)
+    get_latency_window(workload).record(latency)
+    if breaker is not None:
+        breaker.record_success()
+    return result
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+# Hedged queries that can run at once, each of which takes up to two threads of the executor
+_hedge_slots: Optional[threading.BoundedSemaphore] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _hedge_executor, _hedge_slots
+    with _hedge_executor_lock:
+        if _hedge_executor is None or _hedge_slots is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=settings.CLICKHOUSE_HEDGED_READS_MAX_WORKERS, thread_name_prefix="clickhouse-hedge"
+            )
+            _hedge_slots = threading.BoundedSemaphore(max(settings.CLICKHOUSE_HEDGED_READS_MAX_WORKERS // 2, 1))
+        return _hedge_executor, _hedge_slots
+
+
+def hedge_delay_seconds(workload: str) -> Optional[float]:
+    """How long to wait for a query before hedging it, or None if there aren't enough recent queries to tell."""
+    return get_latency_window(workload).percentile(
+        settings.CLICKHOUSE_HEDGED_READS_PERCENTILE, settings.CLICKHOUSE_HEDGED_READS_MIN_SAMPLES
+    )
+
+
+def kill_query(host: str, query_id: str) -> None:
+    """
+    Asks the host that runs a query to stop it, without waiting for it to stop. It still ends on its own if this fails.
+    The default user sends it, as the user of the query can be readonly.
+    """
+    try:
+        with get_client_for_host(host) as client:
+            client.execute(substitute_params("KILL QUERY WHERE query_id = %(query_id)s ASYNC", {"query_id": query_id}))
+    except Exception as e:
+        logger.warning("clickhouse_kill_query_failed", host=host, query_id=query_id, error=str(e))
+
+
+def run_hedged(
+    primary: Callable[[], T],
+    hedge: Callable[[], T],
+    delay: float,
+    *,
+    kill_primary: Callable[[], None],
+    kill_hedge: Callable[[], None],
+) -> T:
+    """
+    Runs `primary` in the hedge executor, and if it hasn't returned after `delay` seconds, runs `hedge` there too.
+    Returns as soon as either returns without an error, and kills the other one in the background, so that the request
+    that lost doesn't keep using the cluster. Runs `primary` in the calling thread if the executor is busy.
+    """
+    executor, slots = _get_hedge_executor()
+    if not slots.acquire(blocking=False):
+        return primary()
+
+    primary_future = executor.submit(copy_context().run, primary)
+    futures: list[Future] = [primary_future]
+    try:
+        done, _ = wait(futures, timeout=delay)
+        if done:
+            return primary_future.result()
+
+        hedge_future = executor.submit(copy_context().run, hedge)
+        futures.append(hedge_future)
+        kills = {primary_future: kill_primary, hedge_future: kill_hedge}
+        winners = {primary_future: "primary", hedge_future: "hedge"}
+        pending: set[Future] = {primary_future, hedge_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # The primary request wins a tie
+            for future in (primary_future, hedge_future):
+                if future in done and future.exception() is None:
+                    for loser in pending:
+                        executor.submit(kills[loser])
+                    QUERY_HEDGE_COUNTER.labels(winner=winners[future]).inc()
+                    return future.result()
+
+        # Raise the error of the primary request if both fail, as the hedge might have failed only because of it
+        return primary_future.result()
+    finally:
+        _release_when_done(futures, slots)
+
+
+def _release_when_done(futures: list[Future], slots: threading.BoundedSemaphore) -> None:
+    """Frees the slot of a hedged query once the requests that lost stop too."""
+    remaining = len(futures)
+    lock = threading.Lock()
+
+    def release(_: Future) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining == 0:
+                slots.release()
+
+    for future in futures:
+        future.add_done_callback(release)
@@ -0,0 +1,56 @@
+import io
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import numpy as np
+import pyarrow as pa
+
+from posthog.clickhouse.client.connection import ProxyClient
+from posthog.clickhouse.client.execute import _execute_columnar
+
+
+def test_columnar_results_from_native_client():
+    client = MagicMock()
+    uuid = UUID("01234567-89ab-cdef-0123-456789abcdef")
+    client.execute.return_value = (
+        [(1, 2), ("a", "b"), ([1], [2, 3]), (uuid, None)],
+        [("count", "UInt64"), ("name", "String"), ("values", "Array(UInt8)"), ("id", "Nullable(UUID)")],
+    )
+
+    columns, column_types = _execute_columnar(
+        client, "SELECT 1", params=None, settings={}, with_column_types=True, query_id="query_id"
+    )
+
+    assert client.execute.call_args.kwargs["columnar"] is True
+    assert [column.dtype for column in columns] == [np.uint64, object, object, object]
+    assert columns[0].tolist() == [1, 2]
+    assert columns[2].tolist() == [[1], [2, 3]]
+    assert columns[3].tolist() == [uuid, None]
+    assert column_types[0] == ("count", "UInt64")
+
+
+def test_columnar_results_without_rows_have_empty_columns():
+    client = MagicMock()
+    client.execute.return_value = ([], [("count", "UInt64"), ("name", "String")])
+
+    columns = _execute_columnar(client, "SELECT 1", params=None, settings={}, with_column_types=False, query_id=None)
+
+    assert [(len(column), column.dtype) for column in columns] == [(0, np.uint64), (0, object)]
+
+
+def test_columnar_results_over_http_read_arrow_stream():
+    table = pa.table({"count": pa.array([1, 2], pa.uint64()), "name": ["a", "b"]})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    http_client = MagicMock()
+    http_client.raw_stream.return_value = io.BytesIO(sink.getvalue())
+
+    columns, column_types = _execute_columnar(
+        ProxyClient(http_client), "SELECT 1", params=None, settings={}, with_column_types=True, query_id="query_id"
+    )
+
+    assert http_client.raw_stream.call_args.kwargs["fmt"] == "ArrowStream"
+    assert http_client.raw_stream.call_args.kwargs["settings"]["query_id"] == "query_id"
+    assert [column.tolist() for column in columns] == [[1, 2], ["a", "b"]]
+    assert column_types == [("count", "uint64"), ("name", "string")]
@@ -0,0 +1,160 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from clickhouse_driver.errors import NetworkError, ServerException
+
+from posthog.clickhouse.client.resilience import (
+    CircuitBreaker,
+    ClickHouseHostUnavailable,
+    is_read_query,
+    is_retryable_error,
+    kill_query,
+    reset_circuit_breakers,
+    run_hedged,
+    run_on_host,
+)
+
+
+def test_retryable_errors():
+    assert is_retryable_error(NetworkError("Connection reset by peer"))
+    assert is_retryable_error(ServerException("Code: 279. All connection tries failed", code=279))
+    assert is_retryable_error(ConnectionResetError())
+    assert not is_retryable_error(ServerException("Code: 62. Syntax error", code=62))
+    assert not is_retryable_error(ValueError("something else"))
+
+
+def test_read_queries():
+    assert is_read_query("SELECT 1")
+    assert is_read_query("  with x AS (SELECT 1) SELECT * FROM x")
+    assert is_read_query("/* user_id:1 */ SELECT 1")
+    assert not is_read_query("INSERT INTO events SELECT * FROM events")
+    assert not is_read_query("ALTER TABLE events DELETE WHERE 1")
+
+
+def test_circuit_breaker_opens_and_lets_a_trial_through():
+    breaker = CircuitBreaker("host", failure_threshold=2, reset_seconds=0.05)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one query is let through while the trial is running
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+
+
+@patch("posthog.clickhouse.client.resilience.settings")
+def test_run_on_host_fails_fast_once_the_breaker_is_open(settings):
+    settings.CLICKHOUSE_CIRCUIT_BREAKER_ENABLED = True
+    settings.CLICKHOUSE_CIRCUIT_BREAKER_FAILURE_THRESHOLD = 2
+    settings.CLICKHOUSE_CIRCUIT_BREAKER_RESET_SECONDS = 60
+    settings.CLICKHOUSE_HEDGED_READS_WINDOW_SIZE = 10
+    reset_circuit_breakers()
+    client = MagicMock()
+    client.connection.hosts = [("failing-host", 9000)]
+    run = MagicMock(side_effect=NetworkError("Connection refused"))
+
+    try:
+        for _ in range(2):
+            with pytest.raises(NetworkError):
+                run_on_host(client, run, workload="ONLINE")
+        with pytest.raises(ClickHouseHostUnavailable):
+            run_on_host(client, run, workload="ONLINE")
+        assert run.call_count == 2
+    finally:
+        reset_circuit_breakers()
+
+
+def test_run_hedged_returns_the_first_result_and_kills_the_other_request():
+    killed = threading.Event()
+
+    def slow():
+        # Stands in for a query that fails once it's killed
+        if killed.wait(5):
+            raise ServerException("Code: 394. Query was cancelled", code=394)
+        return "primary"
+
+    kill_hedge = MagicMock()
+    start = time.monotonic()
+    assert run_hedged(slow, lambda: "hedge", 0.01, kill_primary=killed.set, kill_hedge=kill_hedge) == "hedge"
+    assert time.monotonic() - start < 1
+    assert killed.wait(1)
+    kill_hedge.assert_not_called()
+
+
+def test_run_hedged_returns_the_primary_without_waiting_for_a_slower_hedge():
+    hedge_started = threading.Event()
+    hedge_killed = threading.Event()
+
+    def primary():
+        hedge_started.wait(5)
+        return "primary"
+
+    def hedge():
+        hedge_started.set()
+        hedge_killed.wait(5)
+        return "hedge"
+
+    kill_primary = MagicMock()
+    start = time.monotonic()
+    assert run_hedged(primary, hedge, 0.01, kill_primary=kill_primary, kill_hedge=hedge_killed.set) == "primary"
+    assert time.monotonic() - start < 1
+    assert hedge_killed.wait(1)
+    kill_primary.assert_not_called()
+
+
+def test_run_hedged_does_not_start_the_hedge_of_fast_requests():
+    hedge, kill_primary, kill_hedge = MagicMock(), MagicMock(), MagicMock()
+
+    assert run_hedged(lambda: "primary", hedge, 0.5, kill_primary=kill_primary, kill_hedge=kill_hedge) == "primary"
+
+    time.sleep(0.6)
+    hedge.assert_not_called()
+    kill_primary.assert_not_called()
+    kill_hedge.assert_not_called()
+
+
+def test_run_hedged_raises_the_primary_error_when_both_fail():
+    def primary():
+        time.sleep(0.05)
+        raise NetworkError("primary")
+
+    def hedge():
+        raise NetworkError("hedge")
+
+    with pytest.raises(NetworkError, match="primary"):
+        run_hedged(primary, hedge, 0.01, kill_primary=MagicMock(), kill_hedge=MagicMock())
+
+
+def test_run_hedged_runs_the_primary_in_the_calling_thread_when_the_executor_is_busy():
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    hedge = MagicMock()
+
+    with patch(
+        "posthog.clickhouse.client.resilience._get_hedge_executor", return_value=(MagicMock(), slots)
+    ) as get_executor:
+        result = run_hedged(threading.current_thread, hedge, 0.01, kill_primary=MagicMock(), kill_hedge=MagicMock())
+
+    assert result is threading.current_thread()
+    get_executor.return_value[0].submit.assert_not_called()
+    hedge.assert_not_called()
+
+
+def test_kill_query_is_sent_to_the_host_of_the_query_without_raising():
+    client = MagicMock()
+    client.execute.side_effect = NetworkError("Connection refused")
+
+    with patch("posthog.clickhouse.client.resilience.get_client_for_host") as get_client_for_host:
+        get_client_for_host.return_value.__enter__.return_value = client
+        kill_query("ch-replica-2", "1_abc_hedge")
+
+    get_client_for_host.assert_called_once_with("ch-replica-2")
+    query = client.execute.call_args.args[0]
+    assert query == "KILL QUERY WHERE query_id = '1_abc_hedge' ASYNC"
@@ -1,7 +1,7 @@
 import re
 from dataclasses import dataclass, field
 
-from typing import TYPE_CHECKING, Literal, Optional, TypeVar
+from typing import TYPE_CHECKING, ClassVar, Literal, Optional, TypeVar
 
 from posthog.hogql.constants import ConstantDataType
 from posthog.hogql.errors import NotImplementedError
@@ -12,27 +12,53 @@ if TYPE_CHECKING:
 # Given a string like "CorrectHorseBS", match the "H" and "B", so that we can convert this to "correct_horse_bs"
 camel_case_pattern = re.compile(r"(?<!^)(?<![A-Z])(?=[A-Z])")
 
+# NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
+visit_method_name_replacements = {
+    "hog_qlxtag": "hogqlx_tag",
+    "hog_qlxattribute": "hogqlx_attribute",
+    "uuidtype": "uuid_type",
+}
+
+# (AST class, visitor class) -> name of the visitor method that handles the node, filled in on first visit
+_visitor_dispatch: dict[tuple[type, type], str] = {}
+
+
+def visit_method_name(cls: type) -> str:
+    name = camel_case_pattern.sub("_", cls.__name__).lower()
+    for old, new in visit_method_name_replacements.items():
+        name = name.replace(old, new)
+    return f"visit_{name}"
+
+
+def _resolve_visit_method(node_class: type["AST"], visitor_class: type) -> str:
+    method_name = node_class._visit_method_name
+    if hasattr(visitor_class, method_name):
+        return method_name
+    if hasattr(visitor_class, "visit_unknown"):
+        return "visit_unknown"
+    raise NotImplementedError(f"{visitor_class.__name__} has no method {method_name}")
+
 
 @dataclass(kw_only=True)
 class AST:
     start: Optional[int] = field(default=None)
     end: Optional[int] = field(default=None)
 
+    # Computed once per class in `__init_subclass__`, instead of on every visit
+    _visit_method_name: ClassVar[str] = "visit_ast"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visit_method_name = visit_method_name(cls)
+
     # This is part of the visitor pattern from visitor.py.
     def accept(self, visitor):
-        name = camel_case_pattern.sub("_", self.__class__.__name__).lower()
-
-        # NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
-        replacements = {"hog_qlxtag": "hogqlx_tag", "hog_qlxattribute": "hogqlx_attribute", "uuidtype": "uuid_type"}
-        for old, new in replacements.items():
-            name = name.replace(old, new)
-        method_name = f"visit_{name}"
-        if hasattr(visitor, method_name):
-            visit = getattr(visitor, method_name)
-            return visit(self)
-        if hasattr(visitor, "visit_unknown"):
-            return visitor.visit_unknown(self)
-        raise NotImplementedError(f"{visitor.__class__.__name__} has no method {method_name}")
+        dispatch_key = (self.__class__, visitor.__class__)
+        method_name = _visitor_dispatch.get(dispatch_key)
+        if method_name is None:
+            method_name = _resolve_visit_method(self.__class__, visitor.__class__)
+            _visitor_dispatch[dispatch_key] = method_name
+        return getattr(visitor, method_name)(self)
 
     def to_hogql(self):
         from posthog.hogql.printer import print_prepared_ast
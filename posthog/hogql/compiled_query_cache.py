@@ -0,0 +1,241 @@
+import dataclasses
+import hashlib
+from typing import TYPE_CHECKING, Any, Optional
+
+import posthoganalytics
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter
+
+from posthog.hogql import ast
+from posthog.hogql.database.cache import get_database_version, modifiers_fingerprint
+from posthog.hogql.escape_sql import escape_hogql_string
+from posthog.hogql.visitor import CloningVisitor
+
+if TYPE_CHECKING:
+    from posthog.hogql.query import HogQLQueryExecutor
+    from posthog.models import Team
+
+COMPILED_QUERY_CACHE_KEY_PREFIX = "hogql_compiled_query"
+
+SLOT_PREFIX = "__hogql_slot_"
+
+HOGQL_COMPILED_QUERY_CACHE_COUNTER = Counter(
+    "posthog_hogql_compiled_query_cache",
+    "Whether the ClickHouse SQL for a HogQL query was served from the compiled query cache",
+    labelnames=["result"],
+)
+
+
+def _slot_value(index: int) -> str:
+    return f"{SLOT_PREFIX}{index}__"
+
+
+class StringConstantSlotter(CloningVisitor):
+    """
+    Clones the AST, replacing string constants with numbered slots. Only strings that are compared with an expression
+    are replaced, as the ClickHouse printer passes those as query parameters without looking at their value. Other
+    strings, like function arguments and property keys, can change the printed SQL, so they stay part of the shape.
+    Empty strings are kept too, as comparing property group values with them prints differently.
+    """
+
+    def __init__(self):
+        super().__init__(clear_types=True, clear_locations=True)
+        self.params: list[str] = []
+
+    def visit_compare_operation(self, node: ast.CompareOperation):
+        if node.op in (ast.CompareOperationOp.InCohort, ast.CompareOperationOp.NotInCohort):
+            return super().visit_compare_operation(node)
+        return ast.CompareOperation(
+            left=self._visit_operand(node.left, node.right),
+            right=self._visit_operand(node.right, node.left),
+            op=node.op,
+        )
+
+    def _visit_operand(self, node: ast.Expr, other: ast.Expr):
+        # Comparisons of two constants are printed as their result
+        if isinstance(other, ast.Constant):
+            return self.visit(node)
+        if isinstance(node, ast.Constant):
+            return self._slot(node)
+        if isinstance(node, ast.Tuple | ast.Array):
+            return type(node)(
+                exprs=[self._slot(expr) if isinstance(expr, ast.Constant) else self.visit(expr) for expr in node.exprs]
+            )
+        return self.visit(node)
+
+    def _slot(self, node: ast.Constant):
+        if not isinstance(node.value, str) or node.value == "":
+            return self.visit(node)
+        self.params.append(node.value)
+        return ast.Constant(value=_slot_value(len(self.params) - 1))
+
+
+@dataclasses.dataclass
+class CompiledQuery:
+    clickhouse_sql: str
+    hogql: str
+    print_columns: list[str]
+    # Values that are the same for every run of the query
+    static_values: dict[str, Any]
+    # Value key -> index of the string constant in the query that fills it
+    value_slots: dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+# Stored under the template key when a query can't be parametrized, so we don't attempt to do it on every miss
+NOT_PARAMETRIZABLE = "not_parametrizable"
+
+
+def is_compiled_query_cache_enabled(team: "Team") -> bool:
+    if not settings.HOGQL_COMPILED_QUERY_CACHE_ENABLED:
+        return False
+    # Per-team kill switch
+    return not posthoganalytics.feature_enabled(
+        "disable-hogql-compiled-query-cache",
+        str(team.uuid),
+        groups={"organization": str(team.organization_id)},
+        only_evaluate_locally=True,
+        send_feature_flag_events=False,
+    )
+
+
+class CompiledQueryCache:
+    """
+    Caches the result of compiling a HogQL query to ClickHouse SQL. Queries are fingerprinted with their string
+    constants replaced by slots, so that runs which only differ in e.g. the date range share one entry. The printed SQL
+    is stored with the parameters that were filled from those constants, and is re-filled on a hit.
+    """
+
+    def __init__(self, executor: "HogQLQueryExecutor", select_query: ast.SelectQuery | ast.SelectSetQuery):
+        self.executor = executor
+        self.version = get_database_version(executor.team.pk)
+
+        slotter = StringConstantSlotter()
+        self.probe_query = slotter.visit(select_query)
+        self.params = slotter.params
+
+        shape = repr(self.probe_query)
+        context = executor.context
+        environment = repr(
+            (
+                executor.team.pk,
+                self.version,
+                modifiers_fingerprint(executor.query_modifiers),
+                "clickhouse",
+                executor.settings.model_dump_json() if executor.settings else None,
+                executor.limit_context,
+                executor.pretty,
+                context.within_non_hogql_query,
+                context.enable_select_queries,
+                context.limit_top_select,
+                context.output_format,
+            )
+        )
+        self.template_key = self._key(environment, shape)
+        self.exact_key = self._key(environment, shape, repr(self.params))
+        self.known_not_parametrizable = False
+
+    @staticmethod
+    def _key(*parts: str) -> str:
+        digest = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+        return f"{COMPILED_QUERY_CACHE_KEY_PREFIX}:{digest}"
+
+    @property
+    def usable(self) -> bool:
+        # A different starting value count would shift the parameter names
+        return (
+            self.version is not None
+            and not self.executor.context.values
+            and self.executor.context.database is None
+            and self.executor.context.globals is None
+            and not any(param.startswith(SLOT_PREFIX) for param in self.params)
+        )
+
+    def get(self) -> Optional[tuple[CompiledQuery, dict[str, Any]]]:
+        """Returns the compiled query and the values to run it with."""
+        entries = cache.get_many([self.template_key, self.exact_key])
+        template = entries.get(self.template_key)
+        if isinstance(template, CompiledQuery):
+            HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="hit").inc()
+            return self._fill(template), self._fill_values(template)
+
+        exact = entries.get(self.exact_key)
+        if isinstance(exact, CompiledQuery):
+            HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="hit").inc()
+            return exact, dict(exact.static_values)
+
+        HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="miss").inc()
+        self.known_not_parametrizable = template == NOT_PARAMETRIZABLE
+        return None
+
+    @property
+    def parametrizable(self) -> bool:
+        return bool(self.params) and not self.known_not_parametrizable
+
+    def compile(self) -> Optional[tuple[CompiledQuery, dict[str, Any]]]:
+        """
+        Compiles the query with its strings replaced by slots, and stores it as the template of every query with the
+        same shape. Returns the template filled with the strings of this query, or None if the query can't be
+        parametrized and has to be compiled as is.
+        """
+        ttl = settings.HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS
+        try:
+            probe = self.executor.compile_probe(self.probe_query)
+        except Exception:
+            # e.g. strings that are looked up while compiling, which fail with a slot in their place
+            probe = None
+        template = self._template(*probe) if probe is not None else None
+        if template is None:
+            cache.set(self.template_key, NOT_PARAMETRIZABLE, timeout=ttl)
+            return None
+
+        cache.set(self.template_key, template, timeout=ttl)
+        return self._fill(template), self._fill_values(template)
+
+    def set(self, compiled: CompiledQuery, values: dict[str, Any]) -> None:
+        """Stores a query compiled as is, for runs with exactly the same strings."""
+        cache.set(
+            self.exact_key,
+            dataclasses.replace(compiled, static_values=dict(values)),
+            timeout=settings.HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS,
+        )
+
+    def _template(self, probe: CompiledQuery, probe_values: dict[str, Any]) -> Optional[CompiledQuery]:
+        """
+        Turns the compiled slotted query into a template. Every parameter must either be filled from exactly one slot
+        or not contain a slot at all, and slots can only be printed into the HogQL where they get filled.
+        """
+        slot_by_value = {_slot_value(index): index for index in range(len(self.params))}
+        static_values: dict[str, Any] = {}
+        value_slots: dict[str, int] = {}
+        for key, probe_value in probe_values.items():
+            if isinstance(probe_value, str) and probe_value in slot_by_value:
+                value_slots[key] = slot_by_value[probe_value]
+            elif SLOT_PREFIX in repr(probe_value):
+                return None
+            else:
+                static_values[key] = probe_value
+
+        template = dataclasses.replace(probe, static_values=static_values, value_slots=value_slots)
+        filled = self._fill(template)
+        if any(SLOT_PREFIX in printed for printed in (filled.clickhouse_sql, filled.hogql, *filled.print_columns)):
+            return None
+        return template
+
+    def _fill_string(self, printed: str) -> str:
+        for index, param in enumerate(self.params):
+            printed = printed.replace(escape_hogql_string(_slot_value(index)), escape_hogql_string(param))
+        return printed
+
+    def _fill(self, template: CompiledQuery) -> CompiledQuery:
+        return dataclasses.replace(
+            template,
+            hogql=self._fill_string(template.hogql),
+            print_columns=[self._fill_string(column) for column in template.print_columns],
+        )
+
+    def _fill_values(self, template: CompiledQuery) -> dict[str, Any]:
+        values = dict(template.static_values)
+        for key, index in template.value_slots.items():
+            values[key] = self.params[index]
+        return values
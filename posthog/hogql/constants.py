@@ -44,6 +44,7 @@ MAX_BYTES_BEFORE_EXTERNAL_GROUP_BY = 22 * 1024 * 1024 * 1024
 CSV_EXPORT_LIMIT = MAX_SELECT_RETURNED_ROWS
 CSV_EXPORT_BREAKDOWN_LIMIT_INITIAL = 512
 CSV_EXPORT_BREAKDOWN_LIMIT_LOW = 64  # The lowest limit we want to go to
+CSV_EXPORT_PAGE_SIZE = 10000  # Rows fetched at once for queries that can be paginated
 
 BREAKDOWN_VALUES_LIMIT = 25
 BREAKDOWN_VALUES_LIMIT_FOR_COUNTRIES = 300
@@ -55,6 +55,8 @@ class HogQLContext:
     modifiers: HogQLQueryModifiers = field(default_factory=HogQLQueryModifiers)
     # Enables more verbose output for debugging
     debug: bool = False
+    # Set when cohorts or actions were looked up while printing, which makes the SQL depend on their current state
+    resolved_cohorts_or_actions: bool = False
 
     property_swapper: Optional["PropertySwapper"] = None
 
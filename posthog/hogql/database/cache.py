@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Optional
+
+import structlog
+from cachetools import TTLCache
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from prometheus_client import Counter
+
+from posthog.redis import get_client
+from posthog.schema import HogQLQueryModifiers
+
+if TYPE_CHECKING:
+    from posthog.hogql.database.database import Database
+
+logger = structlog.get_logger(__name__)
+
+DATABASE_CACHE_VERSION_KEY_PREFIX = "@posthog/hogql/database_version"
+
+HOGQL_DATABASE_CACHE_COUNTER = Counter(
+    "posthog_hogql_database_cache",
+    "Whether a HogQL database was served from the process-local cache or rebuilt",
+    labelnames=["result"],
+)
+
+_cache_lock = threading.Lock()
+_database_cache: TTLCache[tuple[int, int, str], "Database"] = TTLCache(
+    maxsize=settings.HOGQL_DATABASE_CACHE_MAX_SIZE, ttl=settings.HOGQL_DATABASE_CACHE_TTL_SECONDS
+)
+
+
+def _version_key(team_id: int) -> str:
+    return f"{DATABASE_CACHE_VERSION_KEY_PREFIX}/{team_id}"
+
+
+def modifiers_fingerprint(modifiers: HogQLQueryModifiers) -> str:
+    return hashlib.sha256(modifiers.model_dump_json(exclude_none=True).encode("utf-8")).hexdigest()
+
+
+def get_database_version(team_id: int) -> Optional[int]:
+    """Returns the current schema version for the team, or None if Redis can't be reached."""
+    try:
+        version = get_client().get(_version_key(team_id))
+    except Exception as e:
+        logger.warning("hogql_database_cache_version_read_failed", team_id=team_id, error=str(e))
+        return None
+    return int(version) if version is not None else 0
+
+
+def invalidate_database_cache(team_id: int) -> None:
+    """Bumps the team's version so every process rebuilds the database on the next query."""
+    try:
+        get_client().incr(_version_key(team_id))
+    except Exception as e:
+        logger.warning("hogql_database_cache_invalidation_failed", team_id=team_id, error=str(e))
+    with _cache_lock:
+        for key in [key for key in _database_cache.keys() if key[0] == team_id]:
+            _database_cache.pop(key, None)
+
+
+def get_cached_database(team_id: int, version: int, fingerprint: str) -> Optional["Database"]:
+    with _cache_lock:
+        database = _database_cache.get((team_id, version, fingerprint))
+    HOGQL_DATABASE_CACHE_COUNTER.labels(result="hit" if database is not None else "miss").inc()
+    if database is None:
+        return None
+    return database.copy_on_write()
+
+
+def set_cached_database(team_id: int, version: int, fingerprint: str, database: "Database") -> None:
+    with _cache_lock:
+        _database_cache[(team_id, version, fingerprint)] = database.copy_on_write()
+
+
+def clear_database_cache() -> None:
+    with _cache_lock:
+        _database_cache.clear()
+
+
+def _invalidate_project(project_id: int) -> None:
+    from posthog.models.team import Team
+
+    for team_id in Team.objects.filter(project_id=project_id).values_list("id", flat=True):
+        invalidate_database_cache(team_id)
+
+
+@receiver([post_save, post_delete], sender="posthog.Team")
+def team_saved(sender, instance, **kwargs):
+    invalidate_database_cache(instance.pk)
+
+
+@receiver([post_save, post_delete], sender="posthog.GroupTypeMapping")
+def group_type_mapping_saved(sender, instance, **kwargs):
+    _invalidate_project(instance.project_id)
+
+
+@receiver([post_save, post_delete], sender="posthog.TeamRevenueAnalyticsConfig")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseSavedQuery")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseTable")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseJoin")
+@receiver([post_save, post_delete], sender="posthog.ExternalDataSource")
+@receiver([post_save, post_delete], sender="posthog.ExternalDataSchema")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseCredential")
+def warehouse_model_saved(sender, instance, **kwargs):
+    invalidate_database_cache(instance.team_id)
@@ -3,12 +3,19 @@ from collections.abc import Callable
 from typing import TYPE_CHECKING, Any, ClassVar, Literal, Optional, TypeAlias, Union, cast
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from django.conf import settings
 from django.db.models import Prefetch, Q
 from pydantic import BaseModel, ConfigDict
 
 from posthog.exceptions_capture import capture_exception
 from posthog.hogql import ast
 from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.cache import (
+    get_cached_database,
+    get_database_version,
+    modifiers_fingerprint,
+    set_cached_database,
+)
 from posthog.hogql.database.models import (
     BooleanDatabaseField,
     DatabaseField,
@@ -174,6 +181,17 @@ class Database(BaseModel):
             raise ValueError(f"Unknown timezone: '{str(timezone)}'")
         self._week_start_day = week_start_day
 
+    def copy_on_write(self) -> "Database":
+        """
+        Cheap copy for handing out cached databases. Table definitions are shared with the original, but adding
+        or replacing tables on the copy never leaks back into it.
+        """
+        database = self.model_copy()
+        database._warehouse_table_names = [*self._warehouse_table_names]
+        database._warehouse_self_managed_table_names = [*self._warehouse_self_managed_table_names]
+        database._view_table_names = [*self._view_table_names]
+        return database
+
     def get_timezone(self) -> str:
         return self._timezone or "UTC"
 
@@ -348,13 +366,8 @@ def create_hogql_database(
     modifiers: Optional[HogQLQueryModifiers] = None,
     timings: Optional[HogQLTimings] = None,
 ) -> Database:
-    from posthog.hogql.database.s3_table import S3Table
     from posthog.hogql.query import create_default_modifiers_for_team
     from posthog.models import Team
-    from posthog.warehouse.models import (
-        DataWarehouseJoin,
-        DataWarehouseSavedQuery,
-    )
 
     if timings is None:
         timings = HogQLTimings()
@@ -374,6 +387,34 @@ def create_hogql_database(
 
     with timings.measure("modifiers"):
         modifiers = create_default_modifiers_for_team(team, modifiers)
+
+    if not settings.HOGQL_DATABASE_CACHE_ENABLED:
+        return _build_hogql_database(team, modifiers, timings)
+
+    with timings.measure("database_cache"):
+        version = get_database_version(team.pk)
+        fingerprint = modifiers_fingerprint(modifiers)
+        cached_database = get_cached_database(team.pk, version, fingerprint) if version is not None else None
+
+    if cached_database is not None:
+        with timings.measure("database_cache_hit"):
+            return cached_database
+
+    with timings.measure("database_cache_miss"):
+        database = _build_hogql_database(team, modifiers, timings)
+        if version is not None:
+            set_cached_database(team.pk, version, fingerprint, database)
+    return database
+
+
+def _build_hogql_database(team: "Team", modifiers: HogQLQueryModifiers, timings: HogQLTimings) -> Database:
+    from posthog.hogql.database.s3_table import S3Table
+    from posthog.warehouse.models import (
+        DataWarehouseJoin,
+        DataWarehouseSavedQuery,
+    )
+
+    with timings.measure("persons_on_events_mode"):
         database = Database(timezone=team.timezone, week_start_day=team.week_start_day)
 
         if modifiers.personsOnEventsMode == PersonsOnEventsMode.DISABLED:
@@ -716,13 +757,13 @@ def create_hogql_database(
                         for chain in person_field.chain:
                             if isinstance(table_or_field, ast.LazyJoin):
                                 table_or_field = table_or_field.resolve_table(
-                                    HogQLContext(team_id=team_id, database=database)
+                                    HogQLContext(team_id=team.pk, database=database)
                                 )
                                 if table_or_field.has_field(chain):
                                     table_or_field = table_or_field.get_field(chain)
                                     if isinstance(table_or_field, ast.LazyJoin):
                                         table_or_field = table_or_field.resolve_table(
-                                            HogQLContext(team_id=team_id, database=database)
+                                            HogQLContext(team_id=team.pk, database=database)
                                         )
                             elif isinstance(table_or_field, ast.Table):
                                 table_or_field = table_or_field.get_field(chain)
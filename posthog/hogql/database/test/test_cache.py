@@ -0,0 +1,77 @@
+from django.test import override_settings
+
+from posthog.hogql.database.cache import clear_database_cache
+from posthog.hogql.database.database import create_hogql_database
+from posthog.hogql.database.models import FieldTraverser
+from posthog.hogql.timings import HogQLTimings
+from posthog.models.group_type_mapping import GroupTypeMapping
+from posthog.schema import HogQLQueryModifiers, PersonsOnEventsMode
+from posthog.test.base import BaseTest
+from posthog.warehouse.models import DataWarehouseCredential, DataWarehouseTable
+
+
+@override_settings(HOGQL_DATABASE_CACHE_ENABLED=True)
+class TestDatabaseCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_database_cache()
+
+    def _timing_keys(self, timings: HogQLTimings) -> list[str]:
+        return list(timings.to_dict().keys())
+
+    def test_second_call_is_served_from_cache(self):
+        first_timings = HogQLTimings()
+        create_hogql_database(team=self.team, timings=first_timings)
+        assert "./database_cache_miss" in self._timing_keys(first_timings)
+
+        second_timings = HogQLTimings()
+        create_hogql_database(team=self.team, timings=second_timings)
+        assert "./database_cache_hit" in self._timing_keys(second_timings)
+
+    def test_different_modifiers_are_cached_separately(self):
+        create_hogql_database(team=self.team)
+
+        timings = HogQLTimings()
+        database = create_hogql_database(
+            team=self.team,
+            modifiers=HogQLQueryModifiers(personsOnEventsMode=PersonsOnEventsMode.DISABLED),
+            timings=timings,
+        )
+
+        assert "./database_cache_miss" in self._timing_keys(timings)
+        assert database.events.fields["person"] == FieldTraverser(chain=["pdi", "person"])
+
+    def test_saving_a_warehouse_table_invalidates_the_cache(self):
+        database = create_hogql_database(team=self.team)
+        assert not database.has_table("table_1")
+
+        credential = DataWarehouseCredential.objects.create(access_key="blah", access_secret="blah", team=self.team)
+        DataWarehouseTable.objects.create(
+            name="table_1",
+            format="Parquet",
+            team=self.team,
+            credential=credential,
+            url_pattern="https://bucket.s3/data/*",
+            columns={"id": {"hogql": "StringDatabaseField", "clickhouse": "Nullable(String)", "schema_valid": True}},
+        )
+
+        database = create_hogql_database(team=self.team)
+        assert database.has_table("table_1")
+
+    def test_saving_a_group_type_mapping_invalidates_the_cache(self):
+        create_hogql_database(team=self.team)
+
+        GroupTypeMapping.objects.create(
+            team=self.team, project_id=self.team.project_id, group_type="organization", group_type_index=0
+        )
+
+        database = create_hogql_database(team=self.team)
+        assert database.events.fields["organization"] == FieldTraverser(chain=["group_0"])
+
+    def test_adding_tables_to_a_cached_database_does_not_leak(self):
+        database = create_hogql_database(team=self.team)
+        database.add_views(my_view=database.numbers)
+
+        database = create_hogql_database(team=self.team)
+        assert not database.has_table("my_view")
+        assert "my_view" not in database.get_views()
@@ -14,6 +14,7 @@ def matches_action(node: ast.Expr, args: list[ast.Expr], context: HogQLContext,
     from posthog.models import Action
     from posthog.hogql.property import action_to_expr
 
+    context.resolved_cohorts_or_actions = True
     if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
         actions = Action.objects.filter(id=int(arg.value), team__project_id=context.project_id).all()
         if len(actions) == 1:
@@ -30,6 +30,7 @@ def cohort(node: ast.Expr, args: list[ast.Expr], context: HogQLContext) -> ast.E
 
     from posthog.models import Cohort
 
+    context.resolved_cohorts_or_actions = True
     if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
         cohorts1 = Cohort.objects.filter(id=int(arg.value), team__project_id=context.project_id).values_list(
             "id", "is_static", "version", "name"
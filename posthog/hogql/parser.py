@@ -1,9 +1,11 @@
-from typing import Literal, Optional, cast
+import threading
+from typing import Any, Literal, Optional, cast
 from collections.abc import Callable
 
 from antlr4 import CommonTokenStream, InputStream, ParseTreeVisitor, ParserRuleContext
 from antlr4.error.ErrorListener import ErrorListener
-from prometheus_client import Histogram
+from cachetools import LRUCache
+from prometheus_client import Counter, Histogram
 
 from posthog.hogql import ast
 from posthog.hogql.ast import SelectSetNode
@@ -15,6 +17,7 @@ from posthog.hogql.grammar.HogQLParser import HogQLParser
 from posthog.hogql.parse_string import parse_string_literal_text, parse_string_literal_ctx, parse_string_text_ctx
 from posthog.hogql.placeholders import replace_placeholders
 from posthog.hogql.timings import HogQLTimings
+from posthog.hogql.visitor import clone_expr
 from hogql_parser import (
     parse_expr as _parse_expr_cpp,
     parse_order_expr as _parse_order_expr_cpp,
@@ -69,6 +72,55 @@ RULE_TO_HISTOGRAM: dict[Literal["expr", "order_expr", "select", "full_template_s
 }
 
 
+PARSE_CACHE_COUNTER = Counter(
+    "parse_cache",
+    "Whether a parsed HogQL AST was served from the parse cache",
+    labelnames=["rule", "backend", "result"],
+)
+
+# Parsed ASTs are cached per (rule, string, backend, start). Only templates are worth caching, so very long strings
+# (usually ad-hoc queries from the SQL editor) skip the cache altogether.
+PARSE_CACHE_SIZE = 4096
+PARSE_CACHE_MAX_STRING_LENGTH = 20_000
+
+_parse_cache: LRUCache[tuple[str, str, Literal["python", "cpp"], Optional[int]], AST] = LRUCache(
+    maxsize=PARSE_CACHE_SIZE
+)
+_parse_cache_lock = threading.Lock()
+
+
+def _parse_with_cache(
+    rule: Literal["expr", "order_expr", "select", "full_template_string"],
+    string: str,
+    backend: Literal["python", "cpp"],
+    *args,
+) -> Any:
+    """Parses the string with the given rule, returning a fresh clone of a cached AST if we've seen it before."""
+    if len(string) > PARSE_CACHE_MAX_STRING_LENGTH:
+        with RULE_TO_HISTOGRAM[rule].labels(backend=backend).time():
+            return RULE_TO_PARSE_FUNCTION[backend][rule](string, *args)
+
+    key = (rule, string, backend, args[0] if args else None)
+    with _parse_cache_lock:
+        node = _parse_cache.get(key)
+    if node is not None:
+        PARSE_CACHE_COUNTER.labels(rule=rule, backend=backend, result="hit").inc()
+        # Callers are free to mutate what they get back, so never hand out the cached tree itself
+        return clone_expr(node, clear_types=False)
+
+    PARSE_CACHE_COUNTER.labels(rule=rule, backend=backend, result="miss").inc()
+    with RULE_TO_HISTOGRAM[rule].labels(backend=backend).time():
+        node = RULE_TO_PARSE_FUNCTION[backend][rule](string, *args)
+    with _parse_cache_lock:
+        _parse_cache[key] = clone_expr(node, clear_types=False)
+    return node
+
+
+def clear_parse_cache() -> None:
+    with _parse_cache_lock:
+        _parse_cache.clear()
+
+
 def parse_string_template(
     string: str,
     placeholders: Optional[dict[str, ast.Expr]] = None,
@@ -80,8 +132,7 @@ def parse_string_template(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_full_template_string_{backend}"):
-        with RULE_TO_HISTOGRAM["full_template_string"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["full_template_string"]("F'" + string)
+        node = _parse_with_cache("full_template_string", "F'" + string, backend)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -101,8 +152,7 @@ def parse_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["expr"](expr, start)
+        node = _parse_with_cache("expr", expr, backend, start)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -119,8 +169,7 @@ def parse_order_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_order_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["order_expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["order_expr"](order_expr)
+        node = _parse_with_cache("order_expr", order_expr, backend)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -137,8 +186,7 @@ def parse_select(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_select_{backend}"):
-        with RULE_TO_HISTOGRAM["select"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["select"](statement)
+        node = _parse_with_cache("select", statement, backend)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -4,6 +4,7 @@ from typing import Optional, Union, cast, ClassVar
 from posthog.clickhouse.client.connection import Workload
 from posthog.errors import ExposedCHQueryError
 from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import CompiledQuery, CompiledQueryCache, is_compiled_query_cache_enabled
 from posthog.hogql.constants import HogQLGlobalSettings, LimitContext, get_default_limit_for_context
 from posthog.hogql.errors import ExposedHogQLError
 from posthog.hogql.hogql import HogQLContext
@@ -52,6 +53,8 @@ class HogQLQueryExecutor:
     pretty: Optional[bool] = True
     context: HogQLContext = dataclasses.field(default_factory=lambda: HogQLQueryExecutor.__uninitialized_context)
     hogql_context: Optional[HogQLContext] = None
+    # Return the results as a NumPy array per column, see `sync_execute`
+    columnar: bool = False
 
     __uninitialized_context: ClassVar[HogQLContext] = HogQLContext()
 
@@ -229,6 +232,7 @@ class HogQLQueryExecutor:
                     workload=self.workload,
                     team_id=self.team.pk,
                     readonly=True,
+                    columnar=self.columnar,
                 )
             except Exception as e:
                 if self.debug:
@@ -258,15 +262,94 @@ class HogQLQueryExecutor:
                     HogQLMetadata(language=HogLanguage.HOG_QL, query=self.hogql, debug=True), self.team
                 )
 
+    def _get_compiled_query_cache(self) -> Optional[CompiledQueryCache]:
+        if self.debug or not is_compiled_query_cache_enabled(self.team):
+            return None
+        compiled_query_cache = CompiledQueryCache(self, self.select_query)
+        return compiled_query_cache if compiled_query_cache.usable else None
+
+    def _compiled_query(self) -> CompiledQuery:
+        return CompiledQuery(
+            clickhouse_sql=self.clickhouse_sql,
+            hogql=self.hogql,
+            print_columns=self.print_columns,
+            static_values={},
+        )
+
+    def _apply_compiled_query(self, compiled_query: CompiledQuery, values: dict) -> None:
+        self.hogql = compiled_query.hogql
+        self.print_columns = compiled_query.print_columns
+        self.clickhouse_sql = compiled_query.clickhouse_sql
+        self.clickhouse_context = dataclasses.replace(
+            self.context,
+            team_id=self.team.pk,
+            team=self.team,
+            enable_select_queries=True,
+            timings=self.timings,
+            modifiers=self.query_modifiers,
+            values=values,
+        )
+
+    def _is_cacheable(self) -> bool:
+        # Cohort versions and action definitions are printed into the SQL, which would go stale in the cache
+        return (
+            self.error is None
+            and not (self.hogql_context and self.hogql_context.resolved_cohorts_or_actions)
+            and not self.clickhouse_context.resolved_cohorts_or_actions
+        )
+
+    def compile_probe(self, select_query: ast.SelectQuery | ast.SelectSetQuery) -> Optional[tuple[CompiledQuery, dict]]:
+        """
+        Compiles a variant of this query in isolation, without touching the state of this executor. Returns None if
+        the variant can't be cached.
+        """
+        probe = dataclasses.replace(
+            self,
+            query=select_query,
+            placeholders=None,
+            variables=None,
+            filters=None,
+            settings=self.settings.model_copy() if self.settings else None,
+            timings=HogQLTimings(),
+            context=dataclasses.replace(self.context, values={}, warnings=[], notices=[], errors=[]),
+        )
+        probe.select_query = select_query
+        probe._generate_hogql()
+        probe._generate_clickhouse_sql()
+        if not probe._is_cacheable():
+            return None
+        return probe._compiled_query(), probe.clickhouse_context.values
+
     def generate_clickhouse_sql(self) -> tuple[str, HogQLContext]:
         self._parse_query()
         self._process_variables()
         self._process_placeholders()
         self._apply_limit()
+
+        with self.timings.measure("compiled_query_cache"):
+            compiled_query_cache = self._get_compiled_query_cache()
+            cached = compiled_query_cache.get() if compiled_query_cache is not None else None
+        if cached is not None:
+            with self.timings.measure("compiled_query_cache_hit"):
+                self._apply_compiled_query(*cached)
+            return self.clickhouse_sql, self.clickhouse_context
+
+        if compiled_query_cache is not None and compiled_query_cache.parametrizable:
+            # The query is compiled only once, with slots for its strings, which then get filled
+            with self.timings.measure("compiled_query_cache_miss"):
+                compiled = compiled_query_cache.compile()
+            if compiled is not None:
+                self._apply_compiled_query(*compiled)
+                return self.clickhouse_sql, self.clickhouse_context
+
         with self.timings.measure("_generate_hogql"):
             self._generate_hogql()
         with self.timings.measure("_generate_clickhouse_sql"):
             self._generate_clickhouse_sql()
+
+        if compiled_query_cache is not None and self._is_cacheable():
+            with self.timings.measure("compiled_query_cache_miss"):
+                compiled_query_cache.set(self._compiled_query(), self.clickhouse_context.values)
         return self.clickhouse_sql, self.clickhouse_context
 
     def execute(self) -> HogQLQueryResponse:
@@ -0,0 +1,149 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import StringConstantSlotter
+from posthog.hogql.errors import QueryError
+from posthog.hogql.parser import parse_select
+from posthog.hogql.query import HogQLQueryExecutor
+from posthog.models import Cohort
+from posthog.test.base import BaseTest
+
+
+@override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=True)
+class TestCompiledQueryCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def _compile(self, distinct_id: str, event: str = "$pageview") -> HogQLQueryExecutor:
+        query = parse_select(
+            "SELECT count() FROM events WHERE event = {event} AND distinct_id IN ({distinct_id}, 'anonymous')",
+            placeholders={"event": ast.Constant(value=event), "distinct_id": ast.Constant(value=distinct_id)},
+        )
+        executor = HogQLQueryExecutor(query=query, team=self.team)
+        executor.generate_clickhouse_sql()
+        return executor
+
+    def _timing_keys(self, executor: HogQLQueryExecutor) -> list[str]:
+        return list(executor.timings.to_dict().keys())
+
+    def test_slotter_replaces_compared_string_constants(self):
+        slotter = StringConstantSlotter()
+        query = slotter.visit(
+            parse_select("SELECT 'a', 1 FROM events WHERE event = 'b' AND distinct_id IN ('c', 'd') AND 'e' = 'f'")
+        )
+
+        assert slotter.params == ["b", "c", "d"]
+        assert isinstance(query, ast.SelectQuery)
+        assert query.select[0] == ast.Constant(value="a")
+        assert isinstance(query.where, ast.And)
+        assert query.where.exprs[0] == ast.CompareOperation(
+            left=ast.Field(chain=["event"]), right=ast.Constant(value="__hogql_slot_0__"), op=ast.CompareOperationOp.Eq
+        )
+
+    def test_slotter_keeps_strings_that_change_the_printed_sql(self):
+        slotter = StringConstantSlotter()
+        slotter.visit(
+            parse_select(
+                "SELECT properties['$browser'] FROM events "
+                "WHERE properties.$os = '' AND timestamp >= toDateTime('2024-01-01') AND person_id IN COHORT 'Paying'"
+            )
+        )
+
+        assert slotter.params == []
+
+    def test_queries_differing_only_in_strings_share_an_entry(self):
+        first = self._compile("user_1")
+        assert "./compiled_query_cache_miss" in self._timing_keys(first)
+
+        second = self._compile("user_2", event="$pageleave")
+        assert "./compiled_query_cache_hit" in self._timing_keys(second)
+
+        assert second.clickhouse_sql == first.clickhouse_sql
+        assert "user_2" in second.clickhouse_context.values.values()
+        assert "$pageleave" in second.clickhouse_context.values.values()
+        assert "user_1" not in second.clickhouse_context.values.values()
+        assert "user_2" in second.hogql
+        assert "$pageleave" in second.hogql
+
+    def test_cached_query_matches_a_fresh_compile(self):
+        first = self._compile("user_1")
+        cached = self._compile("user_3", event="signed_up")
+        assert "./compiled_query_cache_hit" in self._timing_keys(cached)
+
+        with override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=False):
+            fresh = self._compile("user_3", event="signed_up")
+            first_fresh = self._compile("user_1")
+
+        assert first.clickhouse_sql == first_fresh.clickhouse_sql
+        assert first.clickhouse_context.values == first_fresh.clickhouse_context.values
+
+        assert cached.clickhouse_sql == fresh.clickhouse_sql
+        assert cached.clickhouse_context.values == fresh.clickhouse_context.values
+        assert cached.hogql == fresh.hogql
+        assert cached.print_columns == fresh.print_columns
+
+    def test_miss_compiles_the_query_once(self):
+        generate_clickhouse_sql = HogQLQueryExecutor._generate_clickhouse_sql
+        with patch.object(
+            HogQLQueryExecutor, "_generate_clickhouse_sql", autospec=True, side_effect=generate_clickhouse_sql
+        ) as patched:
+            executor = self._compile("user_1")
+
+        assert "./compiled_query_cache_miss" in self._timing_keys(executor)
+        assert patched.call_count == 1
+
+    def test_comparison_with_an_empty_string_is_a_miss(self):
+        self._compile("user_1")
+        executor = self._compile("")
+
+        assert "./compiled_query_cache_miss" in self._timing_keys(executor)
+        assert "" in executor.clickhouse_context.values.values()
+
+    def test_different_structure_is_a_miss(self):
+        self._compile("user_1")
+
+        query = parse_select("SELECT count() FROM events WHERE event = '$pageview'")
+        executor = HogQLQueryExecutor(query=query, team=self.team)
+        executor.generate_clickhouse_sql()
+
+        assert "./compiled_query_cache_miss" in self._timing_keys(executor)
+
+    def test_disabled_cache_is_skipped(self):
+        with override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=False):
+            self._compile("user_1")
+            executor = self._compile("user_1")
+
+        assert "./compiled_query_cache_hit" not in self._timing_keys(executor)
+        assert "./compiled_query_cache_miss" not in self._timing_keys(executor)
+
+    def test_queries_resolving_cohorts_are_not_cached(self):
+        Cohort.objects.create(
+            team=self.team,
+            name="Paying users",
+            groups=[{"properties": [{"key": "plan", "value": "paid", "type": "person"}]}],
+        )
+
+        for _ in range(2):
+            executor = HogQLQueryExecutor(
+                query="SELECT count() FROM events WHERE person_id IN COHORT 'Paying users'", team=self.team
+            )
+            executor.generate_clickhouse_sql()
+
+            assert "./compiled_query_cache_hit" not in self._timing_keys(executor)
+            assert "./compiled_query_cache_miss" not in self._timing_keys(executor)
+
+    def test_failing_probe_stores_an_exact_entry(self):
+        with patch.object(HogQLQueryExecutor, "compile_probe", side_effect=QueryError("Could not resolve")):
+            first = self._compile("user_1")
+            assert "./compiled_query_cache_miss" in self._timing_keys(first)
+
+            same = self._compile("user_1")
+            assert "./compiled_query_cache_hit" in self._timing_keys(same)
+            assert same.clickhouse_sql == first.clickhouse_sql
+
+            different = self._compile("user_2")
+            assert "./compiled_query_cache_miss" in self._timing_keys(different)
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+from posthog.hogql import ast
+from posthog.hogql.parser import RULE_TO_PARSE_FUNCTION, clear_parse_cache, parse_expr, parse_select
+from posthog.test.base import BaseTest
+
+
+class TestParseCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_parse_cache()
+
+    def test_repeated_parses_are_served_from_cache(self):
+        first = parse_select("SELECT event FROM events WHERE timestamp > {date_from}")
+
+        with patch.dict(RULE_TO_PARSE_FUNCTION["cpp"], {"select": lambda string: self.fail("parsed again")}):
+            second = parse_select("SELECT event FROM events WHERE timestamp > {date_from}")
+
+        assert first == second
+        assert first is not second
+
+    def test_cached_trees_are_not_shared_with_callers(self):
+        node = parse_select("SELECT event FROM events WHERE timestamp > {date_from}")
+        assert isinstance(node, ast.SelectQuery)
+        node.select.append(ast.Field(chain=["uuid"]))
+
+        fresh = parse_select("SELECT event FROM events WHERE timestamp > {date_from}")
+        assert isinstance(fresh, ast.SelectQuery)
+        assert len(fresh.select) == 1
+
+    def test_placeholders_are_replaced_after_the_cache(self):
+        first = parse_expr("event = {event}", placeholders={"event": ast.Constant(value="$pageview")})
+        second = parse_expr("event = {event}", placeholders={"event": ast.Constant(value="$pageleave")})
+
+        assert isinstance(first, ast.CompareOperation) and isinstance(second, ast.CompareOperation)
+        assert first.right == ast.Constant(value="$pageview")
+        assert second.right == ast.Constant(value="$pageleave")
+
+    def test_cache_is_keyed_on_backend_and_start(self):
+        parse_expr("1 + 2", backend="cpp")
+
+        calls = []
+        parse_python_expr = RULE_TO_PARSE_FUNCTION["python"]["expr"]
+
+        def counting_parse(string, start):
+            calls.append(start)
+            return parse_python_expr(string, start)
+
+        with patch.dict(RULE_TO_PARSE_FUNCTION["python"], {"expr": counting_parse}):
+            parse_expr("1 + 2", backend="python")
+            parse_expr("1 + 2", start=None, backend="python")
+            parse_expr("1 + 2", start=None, backend="python")
+
+        assert calls == [0, None]
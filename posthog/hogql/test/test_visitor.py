@@ -158,3 +158,24 @@ class TestVisitor(BaseTest):
     def test_visit_interval_type(self):
         # Just ensure ``IntervalType`` can be visited without throwing ``NotImplementedError``
         TraversingVisitor().visit(ast.IntervalType())
+
+    def test_visit_method_names_are_precomputed(self):
+        assert ast.Constant._visit_method_name == "visit_constant"
+        assert ast.ArithmeticOperation._visit_method_name == "visit_arithmetic_operation"
+        assert UUIDType._visit_method_name == "visit_uuid_type"
+        assert HogQLXTag._visit_method_name == "visit_hogqlx_tag"
+
+    def test_dispatch_is_per_visitor_class(self):
+        class UnknownVisitor(Visitor):
+            def visit_unknown(self, node):
+                return "unknown"
+
+        class ConstantOnlyVisitor(UnknownVisitor):
+            def visit_constant(self, node):
+                return "constant"
+
+        node = ast.Constant(value=1)
+        assert UnknownVisitor().visit(node) == "unknown"
+        assert ConstantOnlyVisitor().visit(node) == "constant"
+        assert UnknownVisitor().visit(ast.Field(chain=["a"])) == "unknown"
+        assert ConstantOnlyVisitor().visit(ast.Field(chain=["a"])) == "unknown"
@@ -86,6 +86,7 @@ class MultipleInCohortResolver(TraversingVisitor):
     ) -> list[tuple[int, StaticOrDynamic, int]]:
         from posthog.models import Cohort
 
+        self.context.resolved_cohorts_or_actions = True
         cohorts: list[tuple[int, StaticOrDynamic, int]] = []
 
         for node in compare_operations:
@@ -287,6 +288,7 @@ class InCohortResolver(TraversingVisitor):
 
             from posthog.models import Cohort
 
+            self.context.resolved_cohorts_or_actions = True
             if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
                 cohorts = Cohort.objects.filter(
                     id=int(arg.value), team__project_id=self.context.project_id
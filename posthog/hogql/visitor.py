@@ -660,15 +660,32 @@ class CloningVisitor(Visitor[Any]):
         )
 
     def visit_join_constraint(self, node: ast.JoinConstraint) -> ast.JoinConstraint:
-        return ast.JoinConstraint(expr=self.visit(node.expr), constraint_type=node.constraint_type)
+        return ast.JoinConstraint(
+            start=None if self.clear_locations else node.start,
+            end=None if self.clear_locations else node.end,
+            expr=self.visit(node.expr),
+            constraint_type=node.constraint_type,
+        )
 
     def visit_hogqlx_tag(self, node: ast.HogQLXTag):
-        return ast.HogQLXTag(kind=node.kind, attributes=[self.visit(a) for a in node.attributes])
+        return ast.HogQLXTag(
+            start=None if self.clear_locations else node.start,
+            end=None if self.clear_locations else node.end,
+            kind=node.kind,
+            attributes=[self.visit(a) for a in node.attributes],
+        )
 
     def visit_hogqlx_attribute(self, node: ast.HogQLXAttribute):
         if isinstance(node.value, list):
-            return ast.HogQLXAttribute(name=node.name, value=[self.visit(v) for v in node.value])
-        return ast.HogQLXAttribute(name=node.name, value=self.visit(node.value))
+            value = [self.visit(v) for v in node.value]
+        else:
+            value = self.visit(node.value)
+        return ast.HogQLXAttribute(
+            start=None if self.clear_locations else node.start,
+            end=None if self.clear_locations else node.end,
+            name=node.name,
+            value=value,
+        )
 
     def visit_program(self, node: ast.Program):
         return ast.Program(
@@ -1,8 +1,10 @@
 import itertools
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 from collections.abc import Sequence, Iterator
 import re
 
+from rest_framework.exceptions import ValidationError
+
 from posthog.hogql import ast
 from posthog.hogql.constants import HogQLGlobalSettings, HogQLQuerySettings
 from posthog.hogql.context import HogQLContext
@@ -13,7 +15,7 @@ from posthog.hogql.resolver_utils import extract_select_queries
 from posthog.hogql_queries.actor_strategies import ActorStrategy, PersonStrategy, GroupStrategy
 from posthog.hogql_queries.insights.funnels.funnels_query_runner import FunnelsQueryRunner
 from posthog.hogql_queries.insights.insight_actors_query_runner import InsightActorsQueryRunner
-from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
+from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator, get_keyset_order
 from posthog.hogql_queries.query_runner import QueryRunner, get_query_runner
 from posthog.schema import (
     ActorsQuery,
@@ -34,8 +36,13 @@ class ActorsQueryRunner(QueryRunner):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.paginator = HogQLHasMorePaginator.from_limit_context(
-            limit_context=self.limit_context, limit=self.query.limit, offset=self.query.offset
+            limit_context=self.limit_context,
+            limit=self.query.limit,
+            offset=self.query.offset,
+            cursor=self.query.cursor,
         )
+        # Set when the query is ordered in a way that the next page can be pointed at with a cursor
+        self.keyset_order: Optional[Literal["ASC", "DESC"]] = None
         self.source_query_runner: Optional[QueryRunner] = None
 
         if self.query.source:
@@ -126,6 +133,8 @@ class ActorsQueryRunner(QueryRunner):
             settings=settings,
         )
         input_columns = self.input_columns()
+        if self.keyset_order is not None:
+            self.paginator.set_next_cursor(self.keyset_order, self.cursor_rows(input_columns, self.paginator.results))
         missing_actors_count = None
         results: Sequence[list] | Iterator[list] = self.paginator.results
 
@@ -196,6 +205,17 @@ class ActorsQueryRunner(QueryRunner):
 
         return self.strategy.input_columns()
 
+    def cursor_rows(self, input_columns: list[str], results: list[Any]) -> list[tuple[Any, Any]]:
+        """Returns the created_at and id of each row to point the next page's cursor at, if they are selected."""
+        if "created_at" not in input_columns:
+            return []
+        id_column = next((column for column in ("id", "person", "actor") if column in input_columns), None)
+        if id_column is None:
+            return []
+        created_at_idx = input_columns.index("created_at")
+        id_idx = input_columns.index(id_column)
+        return [(row[created_at_idx], row[id_idx]) for row in results]
+
     # TODO: Figure out a more sure way of getting the actor id than using the alias or chain name
     def source_id_column(self, source_query: ast.SelectQuery | ast.SelectSetQuery) -> list[int | str]:
         # Figure out the id column of the source query, first column that has id in the name
@@ -326,6 +346,25 @@ class ActorsQueryRunner(QueryRunner):
             else:
                 order_by = []
 
+        with self.timings.measure("cursor"):
+            # Only persons by themselves can be paged with a cursor, as they have a unique id to break ties with
+            self.keyset_order = (
+                get_keyset_order(order_by, "created_at")
+                if not self.query.source and isinstance(self.strategy, PersonStrategy) and not has_any_aggregation
+                else None
+            )
+            if self.keyset_order is not None:
+                # Breaks ties between persons created at the same time, so that a cursor points at a single row
+                order_by = [*order_by, ast.OrderExpr(expr=ast.Field(chain=["id"]), order=self.keyset_order)]
+            if self.paginator.cursor is not None:
+                if self.keyset_order is None or self.keyset_order != self.paginator.cursor.order:
+                    raise ValidationError(
+                        "Cursors can only be used for persons ordered by created_at, in the order of the query that "
+                        "returned the cursor"
+                    )
+                cursor_expr = self.paginator.cursor.where_expr(ast.Field(chain=["created_at"]), ast.Field(chain=["id"]))
+                where = ast.And(exprs=[where, cursor_expr]) if where is not None else cursor_expr
+
         with self.timings.measure("select"):
             select_query = ast.SelectQuery(
                 select=columns,
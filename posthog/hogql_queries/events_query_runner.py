@@ -1,11 +1,11 @@
 from datetime import timedelta
 from functools import cached_property
-from typing import Optional, cast
+from typing import Any, Literal, Optional, cast
 import re
 
-from django.db.models import Prefetch
 from django.utils.timezone import now
 import orjson
+from rest_framework.exceptions import ValidationError
 
 from posthog.api.element import ElementSerializer
 from posthog.api.utils import get_pk_or_uuid
@@ -14,12 +14,12 @@ from posthog.hogql.ast import Alias
 from posthog.hogql.parser import parse_expr, parse_order_expr, parse_select
 from posthog.hogql.property import action_to_expr, has_aggregation, property_to_expr
 from posthog.hogql_queries.insights.insight_actors_query_runner import InsightActorsQueryRunner
-from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
+from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator, get_keyset_order
 from posthog.hogql_queries.query_runner import QueryRunner, get_query_runner
+from posthog.hogql_queries.utils.person_hydration import get_persons_for_distinct_ids
 from posthog.models import Action, Person
 from posthog.models.element import chain_to_elements
 from posthog.models.person.person import READ_DB_FOR_PERSONS, get_distinct_ids_for_subquery
-from posthog.models.person.util import get_persons_by_distinct_ids
 from posthog.schema import DashboardFilter, EventsQuery, EventsQueryResponse, CachedEventsQueryResponse
 from posthog.utils import relative_date_parse
 from posthog.api.person import PERSON_DEFAULT_DISPLAY_NAME_PROPERTIES
@@ -45,8 +45,13 @@ class EventsQueryRunner(QueryRunner):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.paginator = HogQLHasMorePaginator.from_limit_context(
-            limit_context=self.limit_context, limit=self.query.limit, offset=self.query.offset
+            limit_context=self.limit_context,
+            limit=self.query.limit,
+            offset=self.query.offset,
+            cursor=self.query.cursor,
         )
+        # Set when the query is ordered in a way that the next page can be pointed at with a cursor
+        self.keyset_order: Optional[Literal["ASC", "DESC"]] = None
 
     @cached_property
     def source_runner(self) -> InsightActorsQueryRunner:
@@ -196,6 +201,23 @@ class EventsQueryRunner(QueryRunner):
                 else:
                     order_by = []
 
+            with self.timings.measure("cursor"):
+                self.keyset_order = None if has_any_aggregation else get_keyset_order(order_by, "timestamp")
+                if self.keyset_order is not None:
+                    # Breaks ties between events with the same timestamp, so that a cursor points at a single row
+                    order_by = [*order_by, ast.OrderExpr(expr=ast.Field(chain=["uuid"]), order=self.keyset_order)]
+                    select = [*select, *(ast.Field(chain=[column]) for column in self.cursor_columns())]
+                if self.paginator.cursor is not None:
+                    if self.keyset_order is None or self.keyset_order != self.paginator.cursor.order:
+                        raise ValidationError(
+                            "Cursors can only be used for events ordered by timestamp, in the order of the query that "
+                            "returned the cursor"
+                        )
+                    cursor_expr = self.paginator.cursor.where_expr(
+                        ast.Field(chain=["timestamp"]), ast.Field(chain=["uuid"])
+                    )
+                    where = ast.And(exprs=[where, cursor_expr]) if where is not None else cursor_expr
+
             with self.timings.measure("select"):
                 if self.query.source is not None:
                     # Kludge: If the events_query has logic in select that the where clauses depends on, this will potentially error.
@@ -226,16 +248,7 @@ class EventsQueryRunner(QueryRunner):
                 )
 
                 # sorting a large amount of columns is expensive, so we filter by a presorted table if possible
-                if (
-                    self.modifiers.usePresortedEventsTable
-                    and (
-                        order_by is not None
-                        and len(order_by) == 1
-                        and isinstance(order_by[0].expr, ast.Field)
-                        and order_by[0].expr.chain == ["timestamp"]
-                    )
-                    and not has_any_aggregation
-                ):
+                if self.modifiers.usePresortedEventsTable and self.keyset_order is not None:
                     inner_query = parse_select(
                         "SELECT timestamp, event, cityHash64(distinct_id), cityHash64(uuid) FROM events"
                     )
@@ -267,77 +280,86 @@ class EventsQueryRunner(QueryRunner):
             limit_context=self.limit_context,
         )
 
-        # Convert star field from tuple to dict in each result
-        if "*" in self.select_input_raw():
-            with self.timings.measure("expand_asterisk"):
-                star_idx = self.select_input_raw().index("*")
-                for index, result in enumerate(self.paginator.results):
-                    self.paginator.results[index] = list(result)
-                    select = result[star_idx]
-                    new_result = dict(zip(SELECT_STAR_FROM_EVENTS_FIELDS, select))
-                    new_result["properties"] = orjson.loads(new_result["properties"])
-                    if new_result["elements_chain"]:
-                        new_result["elements"] = ElementSerializer(
-                            chain_to_elements(new_result["elements_chain"]), many=True
-                        ).data
-                    self.paginator.results[index][star_idx] = new_result
+        if self.keyset_order is not None:
+            self.paginator.set_next_cursor(self.keyset_order, self.cursor_rows(self.paginator.results))
+        cursor_columns = self.cursor_columns()
+        if cursor_columns:
+            self.paginator.results = [row[: -len(cursor_columns)] for row in self.paginator.results]
 
-        person_indices: list[int] = []
-        for column_index, col in enumerate(self.select_input_raw()):
-            if col.split("--")[0].strip() == "person":
-                person_indices.append(column_index)
-            # convert tuple that gets returned into a dict
-            if col.split("--")[0].strip() == "person_display_name":
-                for index, result in enumerate(self.paginator.results):
-                    row = list(self.paginator.results[index])
-                    row[column_index] = {
-                        "display_name": result[column_index][0],
-                        "id": str(result[column_index][1]),
-                    }
-                    self.paginator.results[index] = row
+        select_input_raw = self.select_input_raw()
+        star_idx = select_input_raw.index("*") if "*" in select_input_raw else None
+        column_names = [col.split("--")[0].strip() for col in select_input_raw]
+        person_indices = [index for index, name in enumerate(column_names) if name == "person"]
+        display_name_indices = [index for index, name in enumerate(column_names) if name == "person_display_name"]
 
         # TODO: get rid of this logic once we don't use `person` columns anywhere
+        persons: dict[str, dict[str, Any]] = {}
         if len(person_indices) > 0 and len(self.paginator.results) > 0:
             with self.timings.measure("person_column_extra_query"):
-                # Make a query into postgres to fetch person
-                person_idx = person_indices[0]
-                distinct_ids = list({event[person_idx] for event in self.paginator.results})
-                persons = get_persons_by_distinct_ids(self.team.pk, distinct_ids)
-                persons = persons.prefetch_related(Prefetch("persondistinctid_set", to_attr="distinct_ids_cache"))
-                distinct_to_person: dict[str, Person] = {}
-                for person in persons:
-                    if person:
-                        for person_distinct_id in person.distinct_ids:
-                            distinct_to_person[person_distinct_id] = person
-
-                # Loop over all columns in case there is more than one "person" column
-                for column_index in person_indices:
-                    for index, result in enumerate(self.paginator.results):
-                        distinct_id: str = result[column_index]
-                        self.paginator.results[index] = list(result)
-                        if distinct_to_person.get(distinct_id):
-                            person = distinct_to_person[distinct_id]
-                            self.paginator.results[index][column_index] = {
-                                "uuid": person.uuid,
-                                "created_at": person.created_at,
-                                "properties": person.properties or {},
-                                "distinct_id": distinct_id,
-                            }
-                        else:
-                            self.paginator.results[index][column_index] = {
-                                "distinct_id": distinct_id,
-                            }
+                # All person columns select distinct_id, so the first one has every distinct_id to look up
+                persons = get_persons_for_distinct_ids(
+                    self.team.pk, {row[person_indices[0]] for row in self.paginator.results}
+                )
+
+        # Person column values are built once per distinct_id and shared by the rows
+        person_columns: dict[str, dict[str, Any]] = {}
+        persons_side_table: Optional[list[dict[str, Any]]] = [] if self.query.personsSideTable else None
+        person_side_table_indices: dict[Any, int] = {}
+
+        def person_column(distinct_id: str) -> dict[str, Any]:
+            column = person_columns.get(distinct_id)
+            if column is not None:
+                return column
+            person = persons.get(distinct_id)
+            if person is None:
+                column = {"distinct_id": distinct_id}
+            elif persons_side_table is not None:
+                person_index = person_side_table_indices.get(person["uuid"])
+                if person_index is None:
+                    person_index = person_side_table_indices[person["uuid"]] = len(persons_side_table)
+                    persons_side_table.append(person)
+                column = {"distinct_id": distinct_id, "person_index": person_index}
+            else:
+                column = {**person, "distinct_id": distinct_id}
+            person_columns[distinct_id] = column
+            return column
+
+        # Expand the columns that aren't returned as they are, transforming each row only once
+        if star_idx is not None or len(person_indices) > 0 or len(display_name_indices) > 0:
+            with self.timings.measure("transform_rows"):
+                for index, result in enumerate(self.paginator.results):
+                    row = list(result)
+                    if star_idx is not None:
+                        row[star_idx] = self.expand_asterisk(result[star_idx])
+                    # convert tuple that gets returned into a dict
+                    for column_index in display_name_indices:
+                        row[column_index] = {
+                            "display_name": result[column_index][0],
+                            "id": str(result[column_index][1]),
+                        }
+                    for column_index in person_indices:
+                        row[column_index] = person_column(result[column_index])
+                    self.paginator.results[index] = row
 
         return EventsQueryResponse(
             results=self.paginator.results,
             columns=self.columns(query_result.columns),
-            types=[t for _, t in query_result.types] if query_result.types else [],
+            types=[t for _, t in query_result.types[: len(select_input_raw)]] if query_result.types else [],
             timings=self.timings.to_list(),
             hogql=query_result.hogql,
             modifiers=self.modifiers,
+            persons=persons_side_table,
             **self.paginator.response_params(),
         )
 
+    def expand_asterisk(self, star: tuple) -> dict[str, Any]:
+        """Converts the tuple that "*" is selected as into a dict."""
+        expanded = dict(zip(SELECT_STAR_FROM_EVENTS_FIELDS, star))
+        expanded["properties"] = orjson.loads(expanded["properties"])
+        if expanded["elements_chain"]:
+            expanded["elements"] = ElementSerializer(chain_to_elements(expanded["elements_chain"]), many=True).data
+        return expanded
+
     def apply_dashboard_filters(self, dashboard_filter: DashboardFilter):
         if dashboard_filter.date_to or dashboard_filter.date_from:
             self.query.before = dashboard_filter.date_to
@@ -354,5 +376,25 @@ class EventsQueryRunner(QueryRunner):
             for idx, col in enumerate(self.select_input_raw())
         ]
 
+    def cursor_columns(self) -> list[str]:
+        """Columns that are selected after the requested ones, only to point the next page's cursor at."""
+        select_input_raw = self.select_input_raw()
+        if self.keyset_order is None or "*" in select_input_raw:
+            return []
+        return [column for column in ("timestamp", "uuid") if column not in select_input_raw]
+
+    def cursor_rows(self, results: list[Any]) -> list[tuple[Any, Any]]:
+        """Returns the timestamp and uuid of each row to point the next page's cursor at."""
+        select_input_raw = self.select_input_raw()
+        if "*" in select_input_raw:
+            star_idx = select_input_raw.index("*")
+            timestamp_idx = SELECT_STAR_FROM_EVENTS_FIELDS.index("timestamp")
+            uuid_idx = SELECT_STAR_FROM_EVENTS_FIELDS.index("uuid")
+            return [(row[star_idx][timestamp_idx], row[star_idx][uuid_idx]) for row in results]
+        columns = [*select_input_raw, *self.cursor_columns()]
+        timestamp_idx = columns.index("timestamp")
+        uuid_idx = columns.index("uuid")
+        return [(row[timestamp_idx], row[uuid_idx]) for row in results]
+
     def select_input_raw(self) -> list[str]:
         return ["*"] if len(self.query.select) == 0 else self.query.select
@@ -0,0 +1,119 @@
+"""
+Shared computations for the Bayesian experiment statistics.
+
+Every function here takes the posterior parameters of the variants, which only depend on their sufficient statistics
+(success and failure counts, event counts and exposures, means and exposures), and memoizes its results on them, so
+refreshing the results of an experiment whose data didn't change doesn't compute anything again.
+
+Win probabilities are integrated numerically instead of sampled. Expected losses are still sampled, but all variants
+are sampled at once with a generator seeded from the parameters, so the same data always gives the same numbers.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Literal
+
+import numpy as np
+from scipy import stats
+
+SAMPLE_SIZE = 10000
+
+# Number of control quantiles that the win probabilities are integrated over
+INTEGRATION_POINTS = 2000
+
+CACHE_MAX_SIZE = 4096
+
+# - "beta": Beta(alpha, beta) posterior of a conversion rate, parameters (alpha, beta)
+# - "beta_binomial": Beta-Binomial posterior predictive of a conversion rate, parameters (n, alpha, beta)
+# - "gamma": Gamma(alpha, rate=beta) posterior of an event rate, parameters (alpha, beta)
+# - "log_t": Student's t posterior of a log-transformed mean, parameters (df, loc, scale)
+PosteriorKind = Literal["beta", "beta_binomial", "gamma", "log_t"]
+
+PosteriorParams = tuple[float, ...]
+
+_QUANTILES = (np.arange(INTEGRATION_POINTS) + 0.5) / INTEGRATION_POINTS
+
+
+def _cdf(kind: PosteriorKind, x: np.ndarray, params: np.ndarray) -> np.ndarray:
+    """The CDF of every posterior in `params` at every point of `x`, as a variants x points matrix."""
+    columns = [params[:, i, None] for i in range(params.shape[1])]
+    if kind == "beta":
+        return stats.beta.cdf(x, *columns)
+    if kind == "gamma":
+        alpha, beta = columns
+        return stats.gamma.cdf(x, alpha, scale=1 / beta)
+    if kind == "log_t":
+        df, loc, scale = columns
+        return stats.t.cdf(x, df, loc=loc, scale=scale)
+    raise ValueError(f"Can't integrate {kind} posteriors")
+
+
+def _ppf(kind: PosteriorKind, q: np.ndarray, params: PosteriorParams) -> np.ndarray:
+    if kind == "beta":
+        alpha, beta = params
+        return stats.beta.ppf(q, alpha, beta)
+    if kind == "gamma":
+        alpha, beta = params
+        return stats.gamma.ppf(q, alpha, scale=1 / beta)
+    if kind == "log_t":
+        df, loc, scale = params
+        return stats.t.ppf(q, df, loc=loc, scale=scale)
+    raise ValueError(f"Can't integrate {kind} posteriors")
+
+
+def _rng(*parts) -> np.random.Generator:
+    seed = int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed)
+
+
+def _sample(kind: PosteriorKind, params: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Samples every posterior in `params` at once, as a variants x SAMPLE_SIZE matrix on the scale of the metric."""
+    size = (params.shape[0], SAMPLE_SIZE)
+    if kind == "beta":
+        return rng.beta(params[:, 0, None], params[:, 1, None], size=size)
+    if kind == "beta_binomial":
+        n = params[:, 0, None]
+        return rng.binomial(n.astype(np.int64), rng.beta(params[:, 1, None], params[:, 2, None], size=size)) / n
+    if kind == "gamma":
+        return rng.gamma(params[:, 0, None], 1 / params[:, 1, None], size=size)
+    if kind == "log_t":
+        return np.exp(params[:, 1, None] + params[:, 2, None] * rng.standard_t(params[:, 0, None], size=size))
+    raise ValueError(f"Can't sample {kind} posteriors")
+
+
+@lru_cache(maxsize=CACHE_MAX_SIZE)
+def win_probabilities(
+    kind: PosteriorKind, control: PosteriorParams, tests: tuple[PosteriorParams, ...]
+) -> tuple[float, ...]:
+    """
+    The probability that the control beats every test variant, followed by the probability that each test variant
+    beats the control.
+
+    Both are expectations over the control posterior, P(control > all tests) = E[prod_i F_i(control)] and
+    P(test_i > control) = 1 - E[F_i(control)], which are integrated with the midpoint rule over the quantiles of the
+    control, instead of comparing random samples.
+    """
+    x = _ppf(kind, _QUANTILES, control)
+    test_cdfs = _cdf(kind, x, np.array(tests, dtype=float))
+    control_wins = float(np.mean(np.prod(test_cdfs, axis=0)))
+    return (control_wins, *(float(p) for p in 1 - np.mean(test_cdfs, axis=1)))
+
+
+@lru_cache(maxsize=CACHE_MAX_SIZE)
+def expected_loss(kind: PosteriorKind, target: PosteriorParams, others: tuple[PosteriorParams, ...]) -> float:
+    """The expected amount by which the best of `others` beats `target`, or 0 when `target` is better."""
+    samples = _sample(kind, np.array([target, *others], dtype=float), _rng(kind, target, others))
+    return float(np.mean(np.maximum(0, samples[1:].max(axis=0) - samples[0])))
+
+
+@lru_cache(maxsize=CACHE_MAX_SIZE)
+def credible_interval(kind: PosteriorKind, params: PosteriorParams, lower: float, upper: float) -> tuple[float, float]:
+    """The `lower` and `upper` quantiles of the posterior, on the scale it's defined on."""
+    lower_value, upper_value = _ppf(kind, np.array([lower, upper]), params)
+    return float(lower_value), float(upper_value)
+
+
+def clear_statistics_cache() -> None:
+    win_probabilities.cache_clear()
+    expected_loss.cache_clear()
+    credible_interval.cache_clear()
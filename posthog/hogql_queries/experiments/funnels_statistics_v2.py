@@ -1,16 +1,19 @@
 import numpy as np
-from scipy import stats
 from posthog.schema import ExperimentVariantFunnelsBaseStats, ExperimentSignificanceCode
 from posthog.hogql_queries.experiments import (
     FF_DISTRIBUTION_THRESHOLD,
     MIN_PROBABILITY_FOR_SIGNIFICANCE,
     EXPECTED_LOSS_SIGNIFICANCE_LEVEL,
 )
-from scipy.stats import betabinom
+from posthog.hogql_queries.experiments.bayesian_statistics import credible_interval, expected_loss, win_probabilities
 
 ALPHA_PRIOR = 1
 BETA_PRIOR = 1
-SAMPLE_SIZE = 10000
+
+
+def _beta_posterior(variant: ExperimentVariantFunnelsBaseStats) -> tuple[float, float]:
+    # Add prior to both successes and failures for Bayesian prior
+    return float(ALPHA_PRIOR + variant.success_count), float(BETA_PRIOR + variant.failure_count)
 
 
 def calculate_probabilities_v2(
@@ -45,8 +48,8 @@ def calculate_probabilities_v2(
     ------
     - Uses a Bayesian approach with Beta distributions as conjugate prior for binomial data
     - Uses Beta(1,1) as minimally informative prior (uniform over [0,1])
-    - Draws SAMPLE_SIZE (10,000) samples from each variant's posterior distribution
-    - Calculates win probability as frequency of samples where variant is maximum
+    - Integrates the win probabilities numerically over the control's posterior instead of sampling, so the same
+      counts always give the same probabilities
 
     Example:
     --------
@@ -57,36 +60,7 @@ def calculate_probabilities_v2(
     >>> calculate_probabilities_v2(control, [test])
     >>> # Returns: [0.001, 0.999] indicating the test variant is very likely to be best
     """
-    all_variants = [control, *variants]
-
-    # Use Beta distribution for conversion rates
-    samples: list[np.ndarray] = []
-    for variant in all_variants:
-        # Add prior to both successes and failures for Bayesian prior
-        alpha = ALPHA_PRIOR + variant.success_count
-        beta = BETA_PRIOR + variant.failure_count
-        # Generate samples from Beta distribution
-        variant_samples = np.random.beta(alpha, beta, SAMPLE_SIZE)
-        samples.append(variant_samples)
-
-    samples_array = np.array(samples)
-    probabilities = []
-    control_samples = samples_array[0]  # Control is always first variant
-
-    # Find the best test variant at each sample point
-    test_variants_samples = samples_array[1:]
-    best_variant_samples = np.max(test_variants_samples, axis=0)
-
-    # Control's probability is of being better than the best test variant
-    control_prob = np.mean(control_samples >= best_variant_samples)
-    probabilities.append(float(control_prob))
-
-    # For each test variant, calculate probability of beating control
-    for i in range(1, len(all_variants)):
-        probability = np.mean(samples_array[i] > control_samples)
-        probabilities.append(float(probability))
-
-    return probabilities
+    return list(win_probabilities("beta", _beta_posterior(control), tuple(_beta_posterior(v) for v in variants)))
 
 
 def calculate_expected_loss_v2(
@@ -110,29 +84,16 @@ def calculate_expected_loss_v2(
     float
         Expected loss in conversion rate if choosing the target variant
     """
-    # Calculate posterior parameters for target variant
-    target_alpha = int(ALPHA_PRIOR + target_variant.success_count)
-    target_beta = int(BETA_PRIOR + target_variant.failure_count)
-    target_n = int(target_variant.success_count + target_variant.failure_count)
-
-    # Get samples from target variant's Beta-Binomial
-    target_samples = betabinom.rvs(target_n, target_alpha, target_beta, size=SAMPLE_SIZE) / target_n
 
-    # Get samples from each comparison variant
-    variant_samples = []
-    for variant in variants:
-        n = int(variant.success_count + variant.failure_count)
-        alpha = int(ALPHA_PRIOR + variant.success_count)
-        beta = int(BETA_PRIOR + variant.failure_count)
-        samples = betabinom.rvs(n, alpha, beta, size=SAMPLE_SIZE) / n
-        variant_samples.append(samples)
-
-    # Calculate loss
-    variant_max = np.maximum.reduce(variant_samples)
-    losses = np.maximum(0, variant_max - target_samples)
-    expected_loss = float(np.mean(losses))
+    def beta_binomial_posterior(variant: ExperimentVariantFunnelsBaseStats) -> tuple[float, float, float]:
+        return float(variant.success_count + variant.failure_count), *_beta_posterior(variant)
 
-    return expected_loss
+    # Samples are drawn with a seed derived from the counts, so the loss doesn't change between refreshes
+    return expected_loss(
+        "beta_binomial",
+        beta_binomial_posterior(target_variant),
+        tuple(beta_binomial_posterior(variant) for variant in variants),
+    )
 
 
 def are_results_significant_v2(
@@ -240,13 +201,9 @@ def calculate_credible_intervals_v2(variants: list[ExperimentVariantFunnelsBaseS
     intervals = {}
 
     for variant in variants:
-        # Add 1 to both successes and failures for Bayesian prior
-        alpha = ALPHA_PRIOR + variant.success_count
-        beta = BETA_PRIOR + variant.failure_count
-
         # Calculate 95% credible interval
-        lower, upper = stats.beta.ppf([0.025, 0.975], alpha, beta)
+        lower, upper = credible_interval("beta", _beta_posterior(variant), 0.025, 0.975)
 
-        intervals[variant.key] = [float(lower), float(upper)]
+        intervals[variant.key] = [lower, upper]
 
     return intervals
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import numpy as np
+
+from posthog.hogql_queries.experiments.bayesian_statistics import (
+    clear_statistics_cache,
+    credible_interval,
+    expected_loss,
+    win_probabilities,
+)
+
+
+class TestBayesianStatistics(TestCase):
+    def setUp(self):
+        clear_statistics_cache()
+
+    def test_win_probabilities_match_sampling(self):
+        control, tests = (101.0, 901.0), ((116.0, 886.0), (96.0, 906.0))
+
+        probabilities = win_probabilities("beta", control, tests)
+
+        rng = np.random.default_rng(0)
+        samples = rng.beta([[101], [116], [96]], [[901], [886], [906]], size=(3, 200_000))
+        self.assertAlmostEqual(probabilities[0], np.mean(samples[0] > samples[1:].max(axis=0)), delta=0.005)
+        self.assertAlmostEqual(probabilities[1], np.mean(samples[1] > samples[0]), delta=0.005)
+        self.assertAlmostEqual(probabilities[2], np.mean(samples[2] > samples[0]), delta=0.005)
+
+    def test_identical_variants_are_even(self):
+        probabilities = win_probabilities("gamma", (101.0, 1001.0), ((101.0, 1001.0),))
+
+        self.assertAlmostEqual(probabilities[0], 0.5, places=6)
+        self.assertAlmostEqual(probabilities[1], 0.5, places=6)
+
+    def test_expected_loss_is_the_same_for_the_same_data(self):
+        target, others = (1000.0, 151.0, 851.0), ((1000.0, 141.0, 861.0), (1000.0, 131.0, 871.0))
+
+        loss = expected_loss("beta_binomial", target, others)
+        clear_statistics_cache()
+
+        self.assertEqual(expected_loss("beta_binomial", target, others), loss)
+        self.assertGreater(loss, 0)
+        self.assertLess(loss, 0.01)
+
+    def test_results_are_memoized(self):
+        credible_interval("log_t", (1001.0, 3.9, 0.03), 0.025, 0.975)
+        credible_interval("log_t", (1001.0, 3.9, 0.03), 0.025, 0.975)
+
+        self.assertEqual(credible_interval.cache_info().hits, 1)
+        self.assertEqual(credible_interval.cache_info().misses, 1)
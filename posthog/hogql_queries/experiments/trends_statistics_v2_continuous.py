@@ -5,8 +5,8 @@ from posthog.hogql_queries.experiments import (
     MIN_PROBABILITY_FOR_SIGNIFICANCE,
     EXPECTED_LOSS_SIGNIFICANCE_LEVEL,
 )
+from posthog.hogql_queries.experiments.bayesian_statistics import credible_interval, expected_loss, win_probabilities
 from posthog.schema import ExperimentSignificanceCode, ExperimentVariantTrendsBaseStats
-from scipy.stats import t
 import numpy as np
 
 # Prior parameters (minimal prior knowledge)
@@ -17,10 +17,24 @@ BETA_0 = 1.0  # Prior scale for variance
 
 LOG_VARIANCE = 0.75
 
-SAMPLE_SIZE = 10000
 EPSILON = 1e-10  # Small epsilon value to handle zeros
 
 
+def _log_t_posterior(variant: ExperimentVariantTrendsBaseStats) -> tuple[float, float, float]:
+    """The degrees of freedom, location and scale of the Student's t posterior of the log of the variant's mean."""
+    # Log-transform the mean value, adding epsilon to handle zeros
+    mean_value = variant.count / variant.absolute_exposure
+    log_mean = np.log(mean_value + EPSILON)
+
+    # Calculate posterior parameters using absolute_exposure
+    kappa_n = KAPPA_0 + variant.absolute_exposure
+    mu_n = (KAPPA_0 * MU_0 + variant.absolute_exposure * log_mean) / kappa_n
+    alpha_n = ALPHA_0 + variant.absolute_exposure / 2
+    beta_n = BETA_0 + 0.5 * variant.absolute_exposure * LOG_VARIANCE
+
+    return float(2 * alpha_n), float(mu_n), float(np.sqrt(beta_n / (kappa_n * alpha_n)))
+
+
 def calculate_probabilities_v2_continuous(
     control_variant: ExperimentVariantTrendsBaseStats, test_variants: list[ExperimentVariantTrendsBaseStats]
 ) -> list[float]:
@@ -80,53 +94,12 @@ def calculate_probabilities_v2_continuous(
     if len(test_variants) < 1:
         raise ValidationError("Can't calculate experiment results for less than 2 variants", code="no_data")
 
-    mean_value_control = control_variant.count / control_variant.absolute_exposure
-
-    # Calculate posterior parameters for control
-    log_control_mean = np.log(mean_value_control + EPSILON)
-
-    # Update parameters for control
-    kappa_n_control = KAPPA_0 + control_variant.absolute_exposure
-    mu_n_control = (KAPPA_0 * MU_0 + control_variant.absolute_exposure * log_control_mean) / kappa_n_control
-    alpha_n_control = ALPHA_0 + control_variant.absolute_exposure / 2
-    beta_n_control = BETA_0 + 0.5 * control_variant.absolute_exposure * LOG_VARIANCE
-
-    # Draw samples from control posterior
-    control_posterior = t(
-        df=2 * alpha_n_control, loc=mu_n_control, scale=np.sqrt(beta_n_control / (kappa_n_control * alpha_n_control))
-    )
-    samples_control = control_posterior.rvs(SAMPLE_SIZE)
-
-    # Draw samples for each test variant
-    test_samples = []
-    for test in test_variants:
-        mean_value_test = test.count / test.absolute_exposure
-        log_test_mean = np.log(mean_value_test + EPSILON)
-
-        kappa_n_test = KAPPA_0 + test.absolute_exposure
-        mu_n_test = (KAPPA_0 * MU_0 + test.absolute_exposure * log_test_mean) / kappa_n_test
-        alpha_n_test = ALPHA_0 + test.absolute_exposure / 2
-        beta_n_test = BETA_0 + 0.5 * test.absolute_exposure * LOG_VARIANCE
-
-        test_posterior = t(
-            df=2 * alpha_n_test, loc=mu_n_test, scale=np.sqrt(beta_n_test / (kappa_n_test * alpha_n_test))
+    # The log transform preserves the order of the means, so the probabilities are computed in log space
+    return list(
+        win_probabilities(
+            "log_t", _log_t_posterior(control_variant), tuple(_log_t_posterior(test) for test in test_variants)
         )
-        test_samples.append(test_posterior.rvs(SAMPLE_SIZE))
-
-    # Calculate probabilities
-    probabilities = []
-
-    # Probability control wins (beats the best test variant)
-    best_test_samples = np.max(test_samples, axis=0)  # Get best test variant at each sample point
-    control_wins = samples_control > best_test_samples
-    probabilities.append(float(np.mean(control_wins)))
-
-    # Probability each test variant wins (beats control only)
-    for test_sample in test_samples:
-        variant_wins = test_sample > samples_control
-        probabilities.append(float(np.mean(variant_wins)))
-
-    return probabilities
+    )
 
 
 def are_results_significant_v2_continuous(
@@ -249,26 +222,16 @@ def calculate_credible_intervals_v2_continuous(variants, lower_bound=0.025, uppe
 
     for variant in variants:
         try:
-            # Log-transform the mean value, adding epsilon to handle zeros
-            mean_value = variant.count / variant.absolute_exposure
-            log_mean = np.log(mean_value + EPSILON)
-
-            # Calculate posterior parameters using absolute_exposure
-            kappa_n = KAPPA_0 + variant.absolute_exposure
-            mu_n = (KAPPA_0 * MU_0 + variant.absolute_exposure * log_mean) / kappa_n
-            alpha_n = ALPHA_0 + variant.absolute_exposure / 2
-            beta_n = BETA_0 + 0.5 * variant.absolute_exposure * LOG_VARIANCE
-
-            # Create posterior distribution
-            posterior = t(df=2 * alpha_n, loc=mu_n, scale=np.sqrt(beta_n / (kappa_n * alpha_n)))
-
-            # Calculate credible intervals
-            credible_interval = posterior.interval(upper_bound - lower_bound)
+            # Calculate the central credible interval of the posterior
+            mass = upper_bound - lower_bound
+            credible_interval_log = credible_interval(
+                "log_t", _log_t_posterior(variant), (1 - mass) / 2, (1 + mass) / 2
+            )
 
             # Transform back from log space and subtract epsilon
             intervals[variant.key] = (
-                float(max(0, np.exp(credible_interval[0]) - EPSILON)),  # Ensure non-negative
-                float(max(0, np.exp(credible_interval[1]) - EPSILON)),  # Ensure non-negative
+                float(max(0, np.exp(credible_interval_log[0]) - EPSILON)),  # Ensure non-negative
+                float(max(0, np.exp(credible_interval_log[1]) - EPSILON)),  # Ensure non-negative
             )
         except Exception as e:
             capture_exception(
@@ -302,43 +265,8 @@ def calculate_expected_loss_v2_continuous(
     float
         Expected loss in mean value if choosing the target variant
     """
-    # Calculate posterior parameters for target variant
-    target_mean = target_variant.count / target_variant.absolute_exposure
-    log_target_mean = np.log(target_mean + EPSILON)
-
-    # Update parameters for target variant
-    kappa_n_target = KAPPA_0 + target_variant.absolute_exposure
-    mu_n_target = (KAPPA_0 * MU_0 + target_variant.absolute_exposure * log_target_mean) / kappa_n_target
-    alpha_n_target = ALPHA_0 + target_variant.absolute_exposure / 2
-    beta_n_target = BETA_0 + 0.5 * target_variant.absolute_exposure * LOG_VARIANCE
-
-    # Draw samples from target variant's posterior
-    target_posterior = t(
-        df=2 * alpha_n_target, loc=mu_n_target, scale=np.sqrt(beta_n_target / (kappa_n_target * alpha_n_target))
+    # Samples are drawn with a seed derived from the means and exposures, so the loss doesn't change between
+    # refreshes. They're compared after transforming them back from log space.
+    return expected_loss(
+        "log_t", _log_t_posterior(target_variant), tuple(_log_t_posterior(variant) for variant in variants)
     )
-    target_samples = target_posterior.rvs(SAMPLE_SIZE)
-
-    # Draw samples from each comparison variant's posterior
-    variant_samples = []
-    for variant in variants:
-        variant_mean = variant.count / variant.absolute_exposure
-        log_variant_mean = np.log(variant_mean + EPSILON)
-
-        kappa_n = KAPPA_0 + variant.absolute_exposure
-        mu_n = (KAPPA_0 * MU_0 + variant.absolute_exposure * log_variant_mean) / kappa_n
-        alpha_n = ALPHA_0 + variant.absolute_exposure / 2
-        beta_n = BETA_0 + 0.5 * variant.absolute_exposure * LOG_VARIANCE
-
-        variant_posterior = t(df=2 * alpha_n, loc=mu_n, scale=np.sqrt(beta_n / (kappa_n * alpha_n)))
-        variant_samples.append(variant_posterior.rvs(SAMPLE_SIZE))
-
-    # Transform samples back from log space
-    target_samples = np.exp(target_samples) - EPSILON
-    variant_samples = [np.exp(samples) - EPSILON for samples in variant_samples]
-
-    # Calculate loss
-    variant_max = np.maximum.reduce(variant_samples)
-    losses = np.maximum(0, variant_max - target_samples)
-    expected_loss = float(np.mean(losses))
-
-    return expected_loss
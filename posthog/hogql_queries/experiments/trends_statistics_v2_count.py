@@ -6,14 +6,17 @@ from posthog.hogql_queries.experiments import (
     MIN_PROBABILITY_FOR_SIGNIFICANCE,
 )
 from posthog.hogql_queries.experiments.funnels_statistics import Probability
+from posthog.hogql_queries.experiments.bayesian_statistics import credible_interval, expected_loss, win_probabilities
 from posthog.schema import ExperimentSignificanceCode, ExperimentVariantTrendsBaseStats
-from scipy.stats import gamma
 import numpy as np
 
 # Prior parameters (minimal prior knowledge)
 ALPHA_0 = 1
 BETA_0 = 1
-SAMPLE_SIZE = 10000
+
+
+def _gamma_posterior(variant: ExperimentVariantTrendsBaseStats) -> tuple[float, float]:
+    return float(ALPHA_0 + variant.count), float(BETA_0 + variant.absolute_exposure)
 
 
 def calculate_probabilities_v2_count(
@@ -44,7 +47,7 @@ def calculate_probabilities_v2_count(
     ------
     - Uses a Bayesian approach with a Gamma distribution as the posterior
     - Assumes a minimally informative Gamma prior (alpha=1, beta=1)
-    - Draws samples from the posterior to estimate win probabilities
+    - Integrates the win probabilities numerically over the control's posterior instead of sampling
     - Suitable for count/rate data following a Poisson distribution
 
     Example:
@@ -61,34 +64,11 @@ def calculate_probabilities_v2_count(
     if len(test_variants) < 1:
         raise ValidationError("Can't calculate experiment results for less than 2 variants", code="no_data")
 
-    # Calculate posterior parameters for control
-    alpha_control = ALPHA_0 + control_variant.count
-    beta_control = BETA_0 + control_variant.absolute_exposure
-
-    # Draw samples from control posterior
-    samples_control = gamma.rvs(alpha_control, scale=1 / beta_control, size=SAMPLE_SIZE)
-
-    # Draw samples for each test variant
-    test_samples = []
-    for test in test_variants:
-        alpha_test = ALPHA_0 + test.count
-        beta_test = BETA_0 + test.absolute_exposure
-        test_samples.append(gamma.rvs(alpha_test, scale=1 / beta_test, size=SAMPLE_SIZE))
-
-    # Calculate probabilities
-    probabilities = []
-
-    # Probability control wins (beats the best test variant)
-    best_test_samples = np.max(test_samples, axis=0)
-    control_wins = samples_control > best_test_samples
-    probabilities.append(float(np.mean(control_wins)))
-
-    # Probability each test variant wins (beats control only)
-    for test_sample in test_samples:
-        variant_wins = test_sample > samples_control
-        probabilities.append(float(np.mean(variant_wins)))
-
-    return probabilities
+    return list(
+        win_probabilities(
+            "gamma", _gamma_posterior(control_variant), tuple(_gamma_posterior(test) for test in test_variants)
+        )
+    )
 
 
 def are_results_significant_v2_count(
@@ -206,14 +186,8 @@ def calculate_credible_intervals_v2_count(variants, lower_bound=0.025, upper_bou
 
     for variant in variants:
         try:
-            # Calculate posterior parameters using absolute_exposure
-            alpha_posterior = ALPHA_0 + variant.count
-            beta_posterior = BETA_0 + variant.absolute_exposure
-
             # Calculate credible intervals using the posterior distribution
-            credible_interval = gamma.ppf([lower_bound, upper_bound], alpha_posterior, scale=1 / beta_posterior)
-
-            intervals[variant.key] = (float(credible_interval[0]), float(credible_interval[1]))
+            intervals[variant.key] = credible_interval("gamma", _gamma_posterior(variant), lower_bound, upper_bound)
         except Exception as e:
             capture_exception(
                 Exception(f"Error calculating credible interval for variant {variant.key}"),
@@ -261,27 +235,10 @@ def calculate_expected_loss_v2_count(
     ------
     - Uses minimally informative prior: Gamma(1,1)
     - Posterior parameters: alpha = prior_alpha + count, beta = prior_beta + exposure
-    - Samples are drawn from posterior distributions to estimate expected loss
+    - Samples are drawn from posterior distributions to estimate expected loss, with a seed derived from the counts
+      and exposures so that the loss doesn't change between refreshes
     - Loss is calculated as max(0, best_alternative - target) for each sample
     """
-    # Calculate posterior parameters for target variant
-    target_alpha = ALPHA_0 + target_variant.count
-    target_beta = BETA_0 + target_variant.absolute_exposure
-
-    # Draw samples from target variant's Gamma posterior
-    target_samples = gamma.rvs(target_alpha, scale=1 / target_beta, size=SAMPLE_SIZE)
-
-    # Draw samples from each comparison variant's Gamma posterior
-    variant_samples = []
-    for variant in variants:
-        alpha = ALPHA_0 + variant.count
-        beta = BETA_0 + variant.absolute_exposure
-        samples = gamma.rvs(alpha, scale=1 / beta, size=SAMPLE_SIZE)
-        variant_samples.append(samples)
-
-    # Calculate loss
-    variant_max = np.maximum.reduce(variant_samples)
-    losses = np.maximum(0, variant_max - target_samples)
-    expected_loss = float(np.mean(losses))
-
-    return expected_loss
+    return expected_loss(
+        "gamma", _gamma_posterior(target_variant), tuple(_gamma_posterior(variant) for variant in variants)
+    )
@@ -1,4 +1,11 @@
-from typing import Any, Optional, Union, cast
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Literal, Optional, Union, cast
+from uuid import UUID
+
+from rest_framework.exceptions import ValidationError
 
 from posthog.hogql import ast
 from posthog.hogql.constants import (
@@ -11,6 +18,80 @@ from posthog.hogql.query import execute_hogql_query
 from posthog.schema import HogQLQueryResponse
 
 
+def get_keyset_order(order_by: list[ast.OrderExpr], field: str) -> Optional[Literal["ASC", "DESC"]]:
+    """Returns the direction if the query is ordered by nothing but the given field, which is what cursors support."""
+    if len(order_by) == 1 and isinstance(order_by[0].expr, ast.Field) and order_by[0].expr.chain == [field]:
+        return order_by[0].order
+    return None
+
+
+class KeysetCursor:
+    """
+    Points at the last row of a page by its sort value and its unique key. Queries paged with a cursor are ordered by
+    the key after the sort value, so that the next page starts right after the row, even if rows share the value.
+    """
+
+    def __init__(self, *, value: Any, key: Any, order: Literal["ASC", "DESC"]):
+        self.value = value
+        self.key = key
+        self.order = order
+
+    @staticmethod
+    def _encode_value(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return {"datetime": value.isoformat()}
+        if isinstance(value, UUID):
+            return {"uuid": str(value)}
+        return value
+
+    @staticmethod
+    def _decode_value(value: Any) -> Any:
+        if isinstance(value, dict):
+            if "datetime" in value:
+                return datetime.fromisoformat(value["datetime"])
+            if "uuid" in value:
+                return UUID(value["uuid"])
+            raise ValueError("Unknown cursor value")
+        return value
+
+    def encode(self) -> str:
+        data = {
+            "value": self._encode_value(self.value),
+            "key": self._encode_value(self.key),
+            "order": self.order,
+        }
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "KeysetCursor":
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            order = data["order"]
+            if order not in ("ASC", "DESC") or data["key"] is None:
+                raise ValueError("Invalid cursor")
+            return cls(value=cls._decode_value(data["value"]), key=cls._decode_value(data["key"]), order=order)
+        except (ValueError, TypeError, KeyError, binascii.Error):
+            raise ValidationError("Invalid cursor, pass the `nextCursor` of the previous page")
+
+    def where_expr(self, field: ast.Expr, key_field: ast.Expr) -> ast.Expr:
+        """Rows after the cursor's row, in the (sort value, key) order of the query."""
+        return ast.And(
+            exprs=[
+                # Same as the tuple comparison, but the sort value alone can be used to skip the data before it
+                ast.CompareOperation(
+                    op=ast.CompareOperationOp.LtEq if self.order == "DESC" else ast.CompareOperationOp.GtEq,
+                    left=field,
+                    right=ast.Constant(value=self.value),
+                ),
+                ast.CompareOperation(
+                    op=ast.CompareOperationOp.Lt if self.order == "DESC" else ast.CompareOperationOp.Gt,
+                    left=ast.Tuple(exprs=[field, key_field]),
+                    right=ast.Tuple(exprs=[ast.Constant(value=self.value), ast.Constant(value=self.key)]),
+                ),
+            ]
+        )
+
+
 class HogQLHasMorePaginator:
     """
     Paginator that fetches one more result than requested to determine if there are more results.
@@ -18,22 +99,35 @@ class HogQLHasMorePaginator:
     """
 
     def __init__(
-        self, *, limit: Optional[int] = None, offset: Optional[int] = None, limit_context: Optional[LimitContext] = None
+        self,
+        *,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        limit_context: Optional[LimitContext] = None,
+        cursor: Optional[str] = None,
     ):
         self.response: Optional[HogQLQueryResponse] = None
         self.results: list[Any] = []
         self.limit = limit if limit and limit > 0 else DEFAULT_RETURNED_ROWS
-        self.offset = offset if offset and offset > 0 else 0
+        self.cursor = KeysetCursor.decode(cursor) if cursor else None
+        # A cursor already points at where the page starts
+        self.offset = offset if offset and offset > 0 and self.cursor is None else 0
         self.limit_context = limit_context
+        self.next_cursor: Optional[str] = None
 
     @classmethod
     def from_limit_context(
-        cls, *, limit_context: LimitContext, limit: Optional[int] = None, offset: Optional[int] = None
+        cls,
+        *,
+        limit_context: LimitContext,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> "HogQLHasMorePaginator":
         max_rows = get_max_limit_for_context(limit_context)
         default_rows = get_default_limit_for_context(limit_context)
         limit = min(max_rows, default_rows if (limit is None or limit <= 0) else limit)
-        return cls(limit=limit, offset=offset, limit_context=limit_context)
+        return cls(limit=limit, offset=offset, limit_context=limit_context, cursor=cursor)
 
     def paginate(self, query: Union[ast.SelectQuery, ast.SelectSetQuery]) -> Union[ast.SelectQuery, ast.SelectSetQuery]:
         if isinstance(query, ast.SelectQuery):
@@ -83,9 +177,18 @@ class HogQLHasMorePaginator:
         self.results = self.trim_results()
         return self.response
 
+    def set_next_cursor(self, order: Literal["ASC", "DESC"], rows: list[tuple[Any, Any]]) -> None:
+        """Sets the cursor of the next page from the (sort value, unique key) of each returned row."""
+        if not self.has_more() or not rows:
+            return
+        value, key = rows[-1]
+        self.next_cursor = KeysetCursor(value=value, key=key, order=order).encode()
+
     def response_params(self):
         return {
             "hasMore": self.has_more(),
             "limit": self.limit,
             "offset": self.offset,
+            # Only the queries that support cursors have the field in their response
+            **({"nextCursor": self.next_cursor} if self.next_cursor is not None else {}),
         }
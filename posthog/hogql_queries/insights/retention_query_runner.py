@@ -3,6 +3,7 @@ from posthog.hogql.property import property_to_expr
 from posthog.hogql.parser import parse_expr, parse_select
 from posthog.hogql.constants import HogQLGlobalSettings, MAX_BYTES_BEFORE_EXTERNAL_GROUP_BY
 from math import ceil
+import numpy as np
 from typing import Any, cast, Optional
 
 from posthog.caching.insights_api import BASE_MINIMUM_INSIGHT_REFRESH_INTERVAL, REDUCED_MINIMUM_INSIGHT_REFRESH_INTERVAL
@@ -548,16 +549,31 @@ class RetentionQueryRunner(QueryRunner):
             modifiers=self.modifiers,
             limit_context=self.limit_context,
             settings=HogQLGlobalSettings(max_bytes_before_external_group_by=MAX_BYTES_BEFORE_EXTERNAL_GROUP_BY),
+            columnar=True,
         )
 
         if self.breakdowns_in_query:
+            # The results are columns, so that rows are aggregated with NumPy instead of one by one
+            start_intervals, intervals_from_base, breakdown_values, counts = (
+                [np.asarray(column) for column in response.results] if response.results else [np.array([])] * 4
+            )
+            codes: dict[str, int] = {}
+            breakdown_codes = np.fromiter(
+                (codes.setdefault(value, len(codes)) for value in breakdown_values),
+                dtype=np.int64,
+                count=len(breakdown_values),
+            )
+            breakdown_values_by_code = list(codes)
+
             # Step 1: Calculate total cohort size for each breakdown value (size at intervals_from_base = 0)
-            breakdown_totals: dict[str, int] = {}
-            original_results = response.results or []
-            for row in original_results:
-                start_interval, intervals_from_base, breakdown_value, count = row
-                if intervals_from_base == 0:
-                    breakdown_totals[breakdown_value] = breakdown_totals.get(breakdown_value, 0) + count
+            is_cohort_start = intervals_from_base == 0
+            cohort_start_codes = breakdown_codes[is_cohort_start]
+            cohort_sizes = np.bincount(
+                cohort_start_codes, weights=counts[is_cohort_start], minlength=len(breakdown_values_by_code)
+            )
+            breakdown_totals: dict[str, int] = {
+                breakdown_values_by_code[code]: int(cohort_sizes[code]) for code in np.unique(cohort_start_codes)
+            }
 
             # Step 2: Rank breakdowns and determine top N and 'Other'
             breakdown_limit = (
@@ -569,43 +585,63 @@ class RetentionQueryRunner(QueryRunner):
             sorted_breakdowns = sorted(breakdown_totals.items(), key=lambda item: (-item[1], item[0]), reverse=False)
             other_values = {item[0] for item in sorted_breakdowns[breakdown_limit:]}
 
-            # Step 3: Aggregate results, grouping less frequent breakdowns into 'Other'
-            aggregated_data: dict[str, dict[int, dict[int, float]]] = {}
-            for row in original_results:
-                start_interval, intervals_from_base, breakdown_value, count = row
-
-                target_breakdown = breakdown_value
-                if breakdown_value in other_values:
-                    target_breakdown = BREAKDOWN_OTHER_STRING_LABEL
-
-                # Apply sampling correction when aggregating into the final structure
-                corrected_count = correct_result_for_sampling(count, self.query.samplingFactor)
-                aggregated_data[target_breakdown] = aggregated_data.get(target_breakdown, {})
-                breakdown_data = aggregated_data[target_breakdown]
-
-                breakdown_data[start_interval] = breakdown_data.get(start_interval, {})
-                interval_data = breakdown_data[start_interval]
-                interval_data[intervals_from_base] = interval_data.get(intervals_from_base, 0.0) + corrected_count
-
-            # Step 4: Format final output
-            final_results: list[dict[str, Any]] = []
             # Keep track of the order based on the ranking
             ordered_breakdown_keys = [item[0] for item in sorted_breakdowns[:breakdown_limit]]
             if other_values:
                 ordered_breakdown_keys.append(BREAKDOWN_OTHER_STRING_LABEL)
 
+            # Step 3: Aggregate results, grouping less frequent breakdowns into 'Other'. Breakdowns without a cohort
+            # aren't returned, so their rows are left out.
+            target_indices = {breakdown_value: index for index, breakdown_value in enumerate(ordered_breakdown_keys)}
+            target_index_by_code = np.array(
+                [
+                    target_indices.get(
+                        BREAKDOWN_OTHER_STRING_LABEL if breakdown_value in other_values else breakdown_value, -1
+                    )
+                    for breakdown_value in breakdown_values_by_code
+                ],
+                dtype=np.int64,
+            )
+            row_targets = target_index_by_code[breakdown_codes] if len(breakdown_codes) else breakdown_codes
+
+            # Apply sampling correction when aggregating into the final structure
+            corrected_counts = counts.astype(np.float64)
+            if self.query.samplingFactor:
+                corrected_counts = np.round(corrected_counts * (1 / self.query.samplingFactor))
+
+            intervals_between = self.query_date_range.intervals_between
+            lookahead = self.query_date_range.lookahead
+            in_range = (
+                (row_targets >= 0)
+                & (start_intervals >= 0)
+                & (start_intervals < intervals_between)
+                & (intervals_from_base >= 0)
+                & (intervals_from_base < lookahead)
+            )
+            aggregated_counts = np.zeros((len(ordered_breakdown_keys), intervals_between, lookahead))
+            np.add.at(
+                aggregated_counts,
+                (
+                    row_targets[in_range],
+                    start_intervals[in_range].astype(np.int64),
+                    intervals_from_base[in_range].astype(np.int64),
+                ),
+                corrected_counts[in_range],
+            )
+
+            # Step 4: Format final output
+            final_results: list[dict[str, Any]] = []
             for breakdown_value in ordered_breakdown_keys:
-                intervals_data: dict[int, dict[int, float]] = aggregated_data.get(breakdown_value, {})
+                breakdown_counts = aggregated_counts[target_indices[breakdown_value]].tolist()
 
                 breakdown_results = []
-                for start_interval in range(self.query_date_range.intervals_between):
-                    result_dict: dict[int, float] = intervals_data.get(start_interval, {})
+                for start_interval in range(intervals_between):
                     values = [
                         {
-                            "count": result_dict.get(return_interval, 0.0),
+                            "count": breakdown_counts[start_interval][return_interval],
                             "label": f"{self.query_date_range.interval_name.title()} {return_interval}",
                         }
-                        for return_interval in range(self.query_date_range.lookahead)
+                        for return_interval in range(lookahead)
                     ]
 
                     breakdown_results.append(
@@ -626,7 +662,9 @@ class RetentionQueryRunner(QueryRunner):
                 (start_event_matching_interval, intervals_from_base): {
                     "count": correct_result_for_sampling(count, self.query.samplingFactor)
                 }
-                for (start_event_matching_interval, intervals_from_base, count) in response.results
+                for (start_event_matching_interval, intervals_from_base, count) in zip(
+                    *(column.tolist() for column in response.results)
+                )
             }
             results = [
                 {
@@ -1,6 +1,8 @@
 from typing import cast
 from unittest.mock import MagicMock, patch
 
+from rest_framework.exceptions import ValidationError
+
 from posthog.hogql.ast import SelectQuery
 from posthog.hogql.constants import (
     LimitContext,
@@ -9,7 +11,7 @@ from posthog.hogql.constants import (
     MAX_SELECT_RETURNED_ROWS,
 )
 from posthog.hogql.parser import parse_select
-from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
+from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator, KeysetCursor
 from posthog.hogql_queries.actors_query_runner import ActorsQueryRunner
 from posthog.models.utils import UUIDT
 from posthog.schema import (
@@ -221,3 +223,44 @@ class TestHogQLHasMorePaginator(ClickhouseTestMixin, APIBaseTest):
         )
         mock_execute_hogql_query.assert_called_once()
         self.assertEqual(mock_execute_hogql_query.call_args.kwargs["limit_context"], limit_context)
+
+    def test_cursor_pages_through_all_persons(self):
+        emails: list[str] = []
+        cursor = None
+        for _ in range(10):
+            runner = self._create_runner(
+                ActorsQuery(select=["id", "created_at", "properties.email"], limit=3, cursor=cursor)
+            )
+            response = runner.calculate()
+            self.assertEqual(response.offset, 0)
+            emails.extend(row[2] for row in response.results)
+            if not response.hasMore:
+                self.assertIsNone(response.nextCursor)
+                break
+            self.assertIsNotNone(response.nextCursor)
+            cursor = response.nextCursor
+
+        self.assertEqual(sorted(emails), sorted(f"jacob{index}@{self.random_uuid}.posthog.com" for index in range(10)))
+
+    def test_cursor_requires_created_at_order(self):
+        response = self._create_runner(ActorsQuery(select=["id", "created_at"], limit=3)).calculate()
+        assert response.nextCursor is not None
+
+        with self.assertRaises(ValidationError):
+            self._create_runner(
+                ActorsQuery(
+                    select=["id", "created_at"], orderBy=["properties.email DESC"], limit=3, cursor=response.nextCursor
+                )
+            ).calculate()
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValidationError):
+            HogQLHasMorePaginator(limit=5, cursor="not a cursor")
+
+        cursor = KeysetCursor(value=5, key="a", order="ASC").encode()
+        paginator = HogQLHasMorePaginator(limit=5, offset=10, cursor=cursor)
+        self.assertEqual(paginator.offset, 0)
+        assert paginator.cursor is not None
+        self.assertEqual(paginator.cursor.value, 5)
+        self.assertEqual(paginator.cursor.key, "a")
+        self.assertEqual(paginator.cursor.order, "ASC")
@@ -1,3 +1,8 @@
+import zstd
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime, UTC
 from typing import Optional
 
@@ -8,6 +13,104 @@ from posthog import redis
 from posthog.cache_utils import OrjsonJsonSerializer
 from posthog.utils import get_safe_cache
 
+# Compressed entries start with this byte. Plain entries are orjson-serialized objects, so they always start with "{".
+ZSTD_HEADER = b"\x01"
+# Responses smaller than this are stored as plain JSON
+COMPRESSION_THRESHOLD_BYTES = 16 * 1024
+# Above this size we favour compression speed over ratio
+LARGE_RESPONSE_BYTES = 4 * 1024 * 1024
+
+
+def _compression_level(size: int) -> int:
+    if size >= LARGE_RESPONSE_BYTES:
+        return 1
+    return 3
+
+
+def encode_cache_data(response: dict) -> bytes:
+    serialized = OrjsonJsonSerializer({}).dumps(response)
+    if len(serialized) < COMPRESSION_THRESHOLD_BYTES:
+        return serialized
+    return ZSTD_HEADER + zstd.compress(serialized, _compression_level(len(serialized)))
+
+
+def decode_cache_data(data: Optional[bytes]) -> Optional[dict]:
+    if not data:
+        return None
+    if data[:1] == ZSTD_HEADER:
+        data = zstd.decompress(data[1:])
+    return OrjsonJsonSerializer({}).loads(data)
+
+
+@dataclass
+class CacheWrite:
+    team_id: int
+    cache_key: str
+    response: dict
+    target_age: Optional[datetime]
+    insight_id: Optional[int] = None
+    dashboard_id: Optional[int] = None
+
+    @property
+    def identifier(self) -> str:
+        return f"{self.insight_id}:{self.dashboard_id or ''}"
+
+
+@dataclass
+class _QueryCacheBatch:
+    # Raw cache values by key, `None` for keys known to be missing
+    prefetched: dict[str, Optional[bytes]] = field(default_factory=dict)
+    pending_writes: list[CacheWrite] = field(default_factory=list)
+
+
+_query_cache_batch: ContextVar[Optional[_QueryCacheBatch]] = ContextVar("query_cache_batch", default=None)
+
+
+def _get_many_raw(cache_keys: list[str]) -> dict[str, Optional[bytes]]:
+    try:
+        found = cache.get_many(cache_keys)  # a single MGET
+    except Exception:
+        # Same tolerance as `get_safe_cache`: one corrupted entry shouldn't fail the whole batch
+        found = {cache_key: get_safe_cache(cache_key) for cache_key in cache_keys}
+    return {cache_key: found.get(cache_key) for cache_key in cache_keys}
+
+
+@contextmanager
+def batched_query_cache(cache_keys: Iterable[Optional[str]] = ()) -> Iterator[None]:
+    """
+    Within this context, the given cache keys are fetched from Redis with a single round trip up front, and cache
+    writes of any `QueryCacheManager` are buffered and written in one pipeline on exit.
+    Used where many queries are run in sequence, e.g. when loading a dashboard or warming insights.
+    """
+    outer_batch = _query_cache_batch.get()
+    if outer_batch is not None:
+        # Nested batches share the outermost one, which also flushes the writes
+        missing_keys = list({key for key in cache_keys if key and key not in outer_batch.prefetched})
+        if missing_keys:
+            outer_batch.prefetched.update(_get_many_raw(missing_keys))
+        yield
+        return
+
+    batch = _QueryCacheBatch()
+    keys = list({key for key in cache_keys if key})
+    if keys:
+        batch.prefetched.update(_get_many_raw(keys))
+    token = _query_cache_batch.set(batch)
+    try:
+        yield
+    finally:
+        _query_cache_batch.reset(token)
+        if batch.pending_writes:
+            QueryCacheManager.set_many_cache_data(batch.pending_writes)
+
+
+def flush_batched_query_cache_writes() -> None:
+    """Writes the cache writes buffered by `batched_query_cache` right away."""
+    batch = _query_cache_batch.get()
+    if batch is not None and batch.pending_writes:
+        writes, batch.pending_writes = batch.pending_writes, []
+        QueryCacheManager.set_many_cache_data(writes)
+
 
 class QueryCacheManager:
     """
@@ -93,17 +196,73 @@ class QueryCacheManager:
         self.redis_client.zrem(f"cache_timestamps:{self.team_id}", self.identifier)
 
     def set_cache_data(self, *, response: dict, target_age: Optional[datetime]) -> None:
-        fresh_response_serialized = OrjsonJsonSerializer({}).dumps(response)
-        cache.set(self.cache_key, fresh_response_serialized, settings.CACHED_RESULTS_TTL)
+        write = CacheWrite(
+            team_id=self.team_id,
+            cache_key=self.cache_key,
+            response=response,
+            target_age=target_age,
+            insight_id=self.insight_id,
+            dashboard_id=self.dashboard_id,
+        )
+
+        batch = _query_cache_batch.get()
+        if batch is not None:
+            batch.pending_writes.append(write)
+            batch.prefetched[self.cache_key] = encode_cache_data(response)
+            return
+
+        cache.set(self.cache_key, encode_cache_data(response), settings.CACHED_RESULTS_TTL)
 
         if target_age:
             self.update_target_age(target_age)
         else:
             self.remove_last_refresh()
 
-    def get_cache_data(self) -> Optional[dict]:
+    def get_cache_data(self, *, skip_prefetched: bool = False) -> Optional[dict]:
+        """
+        Within `batched_query_cache`, the prefetched response is returned, unless `skip_prefetched` is set to read one
+        that another caller may have written since.
+        """
+        batch = _query_cache_batch.get()
+        if batch is not None and self.cache_key in batch.prefetched and not skip_prefetched:
+            return decode_cache_data(batch.prefetched[self.cache_key])
+
         cached_response_bytes: Optional[bytes] = get_safe_cache(self.cache_key)
-        if not cached_response_bytes:
-            return None
+        if batch is not None and cached_response_bytes is not None:
+            batch.prefetched[self.cache_key] = cached_response_bytes
+        return decode_cache_data(cached_response_bytes)
+
+    @staticmethod
+    def get_many_cache_data(cache_keys: list[str]) -> dict[str, Optional[dict]]:
+        """
+        Fetches the cached responses for many cache keys in one round trip. Missing keys map to `None`.
+        """
+        if not cache_keys:
+            return {}
+        return {cache_key: decode_cache_data(data) for cache_key, data in _get_many_raw(list(cache_keys)).items()}
+
+    @staticmethod
+    def set_many_cache_data(writes: list[CacheWrite]) -> None:
+        """
+        Stores many responses at once. The values are written with a single pipelined MSET-like call, and all
+        target age updates go out in one Redis pipeline.
+        """
+        if not writes:
+            return
+
+        cache.set_many(
+            {write.cache_key: encode_cache_data(write.response) for write in writes},
+            settings.CACHED_RESULTS_TTL,
+        )
+
+        writes_with_insight = [write for write in writes if write.insight_id]
+        if not writes_with_insight:
+            return
 
-        return OrjsonJsonSerializer({}).loads(cached_response_bytes)
+        pipeline = redis.get_client().pipeline(transaction=False)
+        for write in writes_with_insight:
+            if write.target_age:
+                pipeline.zadd(f"cache_timestamps:{write.team_id}", {write.identifier: write.target_age.timestamp()})
+            else:
+                pipeline.zrem(f"cache_timestamps:{write.team_id}", write.identifier)
+        pipeline.execute()
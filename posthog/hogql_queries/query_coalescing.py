@@ -0,0 +1,200 @@
+import datetime
+import time
+import uuid
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, Optional
+
+import posthoganalytics
+import structlog
+from django.conf import settings
+from prometheus_client import Counter
+from rest_framework.exceptions import APIException
+
+from posthog import redis
+from posthog.clickhouse.client.execute_async import QueryNotFoundError, QueryStatusManager
+from posthog.errors import ExposedCHQueryError
+from posthog.hogql.errors import ExposedHogQLError
+from posthog.schema import QueryStatus
+
+if TYPE_CHECKING:
+    from posthog.models import Team
+
+logger = structlog.get_logger(__name__)
+
+QUERY_COALESCING_COUNTER = Counter(
+    "posthog_query_coalescing",
+    "Outcome of the single-flight check before calculating a query. "
+    "'waited' and 'stale' are ClickHouse queries that were suppressed as duplicates.",
+    labelnames=["result"],
+)
+
+LEASE_KEY_PREFIX = "query_lease"
+
+
+def is_query_coalescing_enabled(team: "Team") -> bool:
+    if not settings.QUERY_COALESCING_ENABLED:
+        return False
+    # Per-team kill switch
+    return not posthoganalytics.feature_enabled(
+        "disable-query-coalescing",
+        str(team.uuid),
+        groups={"organization": str(team.organization_id)},
+        only_evaluate_locally=True,
+        send_feature_flag_events=False,
+    )
+
+
+class QueryCoalescer:
+    """
+    Single-flight for query calculations, keyed by cache key.
+    The first caller takes a lease in Redis and calculates. Others can wait for the lease holder to publish that it's
+    done, after which the result is in the query cache, or return the stale result with a query status to poll.
+    The lease expires on its own, so a crashed holder only blocks others for the wait timeout.
+    """
+
+    def __init__(
+        self, *, team_id: int, cache_key: str, insight_id: Optional[int] = None, dashboard_id: Optional[int] = None
+    ):
+        self.redis_client = redis.get_client()
+        self.team_id = team_id
+        self.cache_key = cache_key
+        self.insight_id = insight_id
+        self.dashboard_id = dashboard_id
+        self.token = uuid.uuid4().hex
+        self.is_leader = False
+
+    @property
+    def lease_key(self) -> str:
+        return f"{LEASE_KEY_PREFIX}:{self.team_id}:{self.cache_key}"
+
+    @property
+    def channel(self) -> str:
+        return f"{self.lease_key}:done"
+
+    @property
+    def status_manager(self) -> QueryStatusManager:
+        # Separate from the query status of async calculations, which use the cache key as the query ID
+        return QueryStatusManager(f"coalesced_{self.cache_key}", self.team_id)
+
+    def acquire(self) -> bool:
+        """Returns whether this caller should calculate. Fails open if Redis is unavailable."""
+        try:
+            self.is_leader = bool(
+                self.redis_client.set(
+                    self.lease_key, self.token, nx=True, ex=settings.QUERY_COALESCING_LEASE_TTL_SECONDS
+                )
+            )
+        except Exception as e:
+            logger.warning("query_coalescing_acquire_failed", error=str(e))
+            QUERY_COALESCING_COUNTER.labels(result="unavailable").inc()
+            return True
+
+        QUERY_COALESCING_COUNTER.labels(result="leader" if self.is_leader else "follower").inc()
+        return self.is_leader
+
+    def is_running(self) -> bool:
+        try:
+            return self.redis_client.exists(self.lease_key) == 1
+        except Exception:
+            return False
+
+    def lease_seconds_left(self) -> float:
+        try:
+            return max(self.redis_client.ttl(self.lease_key), 0)
+        except Exception:
+            return 0
+
+    def wait(self, timeout: float) -> bool:
+        """Waits for the lease holder to finish. Returns False on timeout."""
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+            # Subscribed before checking, so a release in between can't be missed
+            if not self.is_running():
+                return True
+
+            deadline = time.monotonic() + timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                if pubsub.get_message(timeout=min(remaining, 1.0)) is not None:
+                    return True
+                # The holder might have died without publishing, in which case the lease expires
+                if not self.is_running():
+                    return True
+            return False
+        except Exception as e:
+            logger.warning("query_coalescing_wait_failed", error=str(e))
+            return False
+        finally:
+            pubsub.close()
+
+    def register_stale_reader(self) -> Optional[QueryStatus]:
+        """
+        Creates the query status that the lease holder completes with its results, and returns it.
+        Returns None if the holder already finished, in which case the result is in the cache.
+        """
+        manager = self.status_manager
+        try:
+            try:
+                query_status = manager.get_query_status()
+            except QueryNotFoundError:
+                query_status = None
+
+            if query_status is None or query_status.complete:
+                now = datetime.datetime.now(datetime.UTC)
+                query_status = QueryStatus(
+                    id=manager.query_id,
+                    team_id=self.team_id,
+                    insight_id=self.insight_id,
+                    dashboard_id=self.dashboard_id,
+                    start_time=now,
+                    pickup_time=now,
+                )
+                manager.store_query_status(query_status)
+
+            # Checked after storing the status: if the lease is still held, its holder will see the status on release
+            if not self.is_running():
+                return None
+            return query_status
+        except Exception as e:
+            logger.warning("query_coalescing_register_failed", error=str(e))
+            return None
+
+    def release(
+        self, *, get_results: Optional[Callable[[], dict[str, Any]]] = None, error: Optional[Exception] = None
+    ) -> None:
+        """
+        Releases the lease, wakes up waiting callers, and completes the query status of stale readers. The results are
+        only serialized with `get_results` if a stale reader is waiting for them.
+        """
+        if not self.is_leader:
+            return
+        self.is_leader = False
+
+        try:
+            with self.redis_client.pipeline() as pipeline:
+                pipeline.watch(self.lease_key)
+                if pipeline.get(self.lease_key) == self.token.encode():
+                    pipeline.multi()
+                    pipeline.delete(self.lease_key)
+                    pipeline.publish(self.channel, b"1")
+                    pipeline.execute()
+                else:
+                    pipeline.unwatch()
+
+            manager = self.status_manager
+            if not manager.has_results():
+                return
+            query_status = manager.get_query_status()
+            if query_status.complete:
+                return
+            query_status.complete = True
+            query_status.end_time = datetime.datetime.now(datetime.UTC)
+            query_status.error = error is not None
+            if isinstance(error, APIException | ExposedHogQLError | ExposedCHQueryError):
+                # Only known safe errors are exposed, same as for async queries
+                query_status.error_message = str(error)
+            query_status.results = get_results() if get_results is not None and error is None else None
+            manager.store_query_status(query_status)
+        except Exception as e:
+            # Waiting callers fall back to the lease expiring, or to their own timeout
+            logger.warning("query_coalescing_release_failed", error=str(e))
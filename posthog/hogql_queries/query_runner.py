@@ -23,7 +23,12 @@ from posthog.hogql.modifiers import create_default_modifiers_for_user
 from posthog.hogql.printer import print_ast
 from posthog.hogql.query import create_default_modifiers_for_team
 from posthog.hogql.timings import HogQLTimings
-from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_cache import QueryCacheManager, flush_batched_query_cache_writes
+from posthog.hogql_queries.query_coalescing import (
+    QUERY_COALESCING_COUNTER,
+    QueryCoalescer,
+    is_query_coalescing_enabled,
+)
 from posthog.metrics import LABEL_TEAM_ID
 from posthog.models import Team, User
 from posthog.schema import (
@@ -817,7 +822,6 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             set_tag("dashboard_id", str(dashboard_id))
 
         self.query_id = query_id or self.query_id
-        CachedResponse: type[CR] = self.cached_response_type
         cache_manager = QueryCacheManager(
             team_id=self.team.pk,
             cache_key=cache_key,
@@ -840,6 +844,98 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             if results:
                 return results
 
+        coalescer: Optional[QueryCoalescer] = None
+        if execution_mode != ExecutionMode.CALCULATE_BLOCKING_ALWAYS and is_query_coalescing_enabled(self.team):
+            coalescer = QueryCoalescer(
+                team_id=self.team.pk, cache_key=cache_key, insight_id=insight_id, dashboard_id=dashboard_id
+            )
+            if not coalescer.acquire():
+                # The same query is being calculated somewhere else right now
+                results = self.handle_concurrent_calculation(coalescer=coalescer, cache_manager=cache_manager)
+                if results:
+                    return results
+
+        try:
+            fresh_response = self.calculate_and_cache(cache_key=cache_key, cache_manager=cache_manager, user=user)
+        except Exception as e:
+            if coalescer:
+                coalescer.release(error=e)
+            raise
+
+        if coalescer:
+            # Waiting callers read the result from the cache, so it can't sit in a batch until later
+            flush_batched_query_cache_writes()
+            coalescer.release(get_results=lambda: fresh_response.model_dump(by_alias=True))
+        return fresh_response
+
+    def handle_concurrent_calculation(
+        self, *, coalescer: QueryCoalescer, cache_manager: QueryCacheManager
+    ) -> Optional[CR]:
+        """
+        Avoids running a query that's already being calculated by another caller.
+        If there's a stale result, it's returned along with a query status that will have the fresh result. Otherwise
+        we wait for the other calculation to finish. Returns None if we should calculate after all.
+        """
+        cached_response = self._get_cached_response(cache_manager)
+        if cached_response is not None and not self._is_stale(
+            last_refresh=last_refresh_from_cached_result(cached_response)
+        ):
+            # The other calculation finished in the meantime
+            QUERY_COALESCING_COUNTER.labels(result="waited").inc()
+            return cached_response
+
+        if cached_response is not None:
+            query_status = coalescer.register_stale_reader()
+            if query_status is not None:
+                QUERY_COALESCING_COUNTER.labels(result="stale").inc()
+                cached_response.query_status = query_status
+                return cached_response
+
+        finished = coalescer.wait(timeout=settings.QUERY_COALESCING_WAIT_TIMEOUT_SECONDS)
+        # The other caller wrote its result after any prefetch of `batched_query_cache`
+        cached_response = self._get_cached_response(cache_manager, skip_prefetched=True)
+        if cached_response is not None and not self._is_stale(
+            last_refresh=last_refresh_from_cached_result(cached_response)
+        ):
+            QUERY_COALESCING_COUNTER.labels(result="waited").inc()
+            return cached_response
+
+        if not finished:
+            if cached_response is not None:
+                query_status = coalescer.register_stale_reader()
+                if query_status is not None:
+                    QUERY_COALESCING_COUNTER.labels(result="stale").inc()
+                    cached_response.query_status = query_status
+                    return cached_response
+
+            # The other calculation is slow, and running it a second time would only add to the load. Its lease
+            # expires on its own, so this is bounded too.
+            if coalescer.wait(timeout=coalescer.lease_seconds_left()):
+                cached_response = self._get_cached_response(cache_manager, skip_prefetched=True)
+                if cached_response is not None and not self._is_stale(
+                    last_refresh=last_refresh_from_cached_result(cached_response)
+                ):
+                    QUERY_COALESCING_COUNTER.labels(result="waited").inc()
+                    return cached_response
+
+        # The other calculation failed, or its holder died
+        QUERY_COALESCING_COUNTER.labels(result="timeout").inc()
+        return None
+
+    def _get_cached_response(self, cache_manager: QueryCacheManager, skip_prefetched: bool = False) -> Optional[CR]:
+        cached_response_candidate = cache_manager.get_cache_data(skip_prefetched=skip_prefetched)
+        if not self.is_cached_response(cached_response_candidate):
+            return None
+        cached_response_candidate["is_cached"] = True
+        try:
+            return self.cached_response_type(**cached_response_candidate)
+        except Exception:
+            return None
+
+    def calculate_and_cache(
+        self, *, cache_key: str, cache_manager: QueryCacheManager, user: Optional[User] = None
+    ) -> CR:
+        CachedResponse: type[CR] = self.cached_response_type
         last_refresh = datetime.now(UTC)
         target_age = self.cache_target_age(last_refresh=last_refresh)
 
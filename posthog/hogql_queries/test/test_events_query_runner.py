@@ -1,12 +1,16 @@
 from typing import Any, cast
+from unittest.mock import patch
 
+from django.test import override_settings
 from freezegun import freeze_time
 from datetime import datetime
 from posthog.hogql import ast
 from posthog.hogql.ast import CompareOperationOp
 from posthog.hogql_queries.events_query_runner import EventsQueryRunner
+from posthog.hogql_queries.utils.person_hydration import clear_person_hydration_cache
 from posthog.models import Person, Team, Element
 from posthog.models.organization import Organization
+from posthog.models.person.util import get_persons_by_distinct_ids
 from posthog.schema import (
     CachedEventsQueryResponse,
     EventMetadataPropertyFilter,
@@ -505,6 +509,86 @@ class TestEventsQueryRunner(ClickhouseTestMixin, APIBaseTest):
 
         assert response_regular.results == response_presorted.results
 
+    @freeze_time("2021-01-21")
+    def test_cursor_pagination(self):
+        # Events that share a timestamp end up on both sides of a page boundary
+        self._create_events(
+            data=[
+                ("p1", "2020-01-20T12:00:01Z", {"index": 0}),
+                ("p1", "2020-01-20T12:00:02Z", {"index": 1}),
+                ("p1", "2020-01-20T12:00:02Z", {"index": 2}),
+                ("p1", "2020-01-20T12:00:02Z", {"index": 3}),
+                ("p1", "2020-01-20T12:00:03Z", {"index": 4}),
+            ]
+        )
+        flush_persons_and_events()
+
+        for use_presorted_events_table in (False, True):
+            for order in ("DESC", "ASC"):
+                with self.subTest(use_presorted_events_table=use_presorted_events_table, order=order):
+                    indexes: list[int] = []
+                    cursor = None
+                    for _ in range(5):
+                        runner = EventsQueryRunner(
+                            query=EventsQuery(
+                                after="-7d",
+                                kind="EventsQuery",
+                                select=["*"],
+                                orderBy=[f"timestamp {order}"],
+                                limit=2,
+                                cursor=cursor,
+                            ),
+                            team=self.team,
+                            modifiers=HogQLQueryModifiers(usePresortedEventsTable=use_presorted_events_table),
+                        )
+                        response = runner.calculate()
+                        indexes.extend(row[0]["properties"]["index"] for row in response.results)
+                        if not response.hasMore:
+                            self.assertIsNone(response.nextCursor)
+                            break
+                        cursor = response.nextCursor
+
+                    self.assertEqual(sorted(indexes), [0, 1, 2, 3, 4])
+                    self.assertEqual(indexes[0], 4 if order == "DESC" else 0)
+                    self.assertEqual(indexes[-1], 0 if order == "DESC" else 4)
+
+    @freeze_time("2021-01-21")
+    def test_cursor_pagination_without_selecting_timestamp_and_uuid(self):
+        self._create_events(
+            data=[
+                ("p1", "2020-01-20T12:00:01Z", {"index": 0}),
+                ("p1", "2020-01-20T12:00:02Z", {"index": 1}),
+                ("p1", "2020-01-20T12:00:02Z", {"index": 2}),
+            ]
+        )
+        flush_persons_and_events()
+
+        indexes: list[int] = []
+        cursor = None
+        for _ in range(3):
+            response = EventsQueryRunner(
+                query=EventsQuery(
+                    after="-7d",
+                    kind="EventsQuery",
+                    select=["properties.index"],
+                    orderBy=["timestamp DESC"],
+                    limit=2,
+                    cursor=cursor,
+                ),
+                team=self.team,
+            ).calculate()
+            # The columns the cursor is read from aren't returned
+            self.assertEqual(response.columns, ["properties.index"])
+            self.assertTrue(all(len(row) == 1 for row in response.results))
+            indexes.extend(int(row[0]) for row in response.results)
+            if not response.hasMore:
+                break
+            self.assertIsNotNone(response.nextCursor)
+            cursor = response.nextCursor
+
+        self.assertEqual(sorted(indexes), [0, 1, 2])
+        self.assertEqual(indexes[-1], 0)
+
     def test_select_person_column(self):
         self._create_events(
             [
@@ -531,6 +615,63 @@ class TestEventsQueryRunner(ClickhouseTestMixin, APIBaseTest):
             assert "uuid" in person
             assert "created_at" in person
 
+    def _create_events_for_person_columns(self):
+        _create_person(team_id=self.team.pk, distinct_ids=["id1", "id2"], properties={"name": "p1"})
+        for distinct_id, timestamp in [
+            ("id1", "2020-01-11T12:00:01Z"),
+            ("id2", "2020-01-11T12:00:02Z"),
+            ("anonymous", "2020-01-11T12:00:03Z"),
+            ("id1", "2020-01-11T12:00:04Z"),
+        ]:
+            _create_event(team=self.team, event="$pageview", distinct_id=distinct_id, timestamp=timestamp)
+        flush_persons_and_events()
+
+    @freeze_time("2020-01-11T13:00:00Z")
+    def test_select_person_column_with_persons_side_table(self):
+        self._create_events_for_person_columns()
+
+        query = EventsQuery(kind="EventsQuery", select=["person", "event"], orderBy=["timestamp ASC"])
+        response = EventsQueryRunner(query=query, team=self.team).calculate()
+        self.assertIsNone(response.persons)
+        self.assertEqual([row[0]["distinct_id"] for row in response.results], ["id1", "id2", "anonymous", "id1"])
+        self.assertEqual(response.results[1][0]["properties"], {"name": "p1"})
+        self.assertNotIn("uuid", response.results[2][0])
+
+        query.personsSideTable = True
+        response = EventsQueryRunner(query=query, team=self.team).calculate()
+        assert response.persons is not None
+        self.assertEqual(len(response.persons), 1)
+        self.assertEqual(response.persons[0]["properties"], {"name": "p1"})
+        self.assertEqual(
+            [row[0] for row in response.results],
+            [
+                {"distinct_id": "id1", "person_index": 0},
+                {"distinct_id": "id2", "person_index": 0},
+                {"distinct_id": "anonymous"},
+                {"distinct_id": "id1", "person_index": 0},
+            ],
+        )
+
+    @freeze_time("2020-01-11T13:00:00Z")
+    @override_settings(EVENTS_QUERY_PERSON_CACHE_ENABLED=True)
+    def test_select_person_column_uses_person_cache(self):
+        clear_person_hydration_cache()
+        self._create_events_for_person_columns()
+
+        query = EventsQuery(kind="EventsQuery", select=["person"], orderBy=["timestamp ASC"])
+        with patch(
+            "posthog.hogql_queries.utils.person_hydration.get_persons_by_distinct_ids",
+            wraps=get_persons_by_distinct_ids,
+        ) as mock_get_persons:
+            first_response = EventsQueryRunner(query=query, team=self.team).calculate()
+            second_response = EventsQueryRunner(query=query, team=self.team).calculate()
+
+        self.assertEqual(first_response.results, second_response.results)
+        # Only the distinct_id without a person is looked up again
+        self.assertEqual(mock_get_persons.call_count, 2)
+        self.assertEqual(mock_get_persons.call_args.args[1], ["anonymous"])
+        clear_person_hydration_cache()
+
     def test_person_display_name_field(self):
         # Default: no custom display name properties
         _create_person(
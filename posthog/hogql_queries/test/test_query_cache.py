@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, UTC
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+from posthog import redis
+from posthog.cache_utils import OrjsonJsonSerializer
+from posthog.hogql_queries.query_cache import (
+    COMPRESSION_THRESHOLD_BYTES,
+    ZSTD_HEADER,
+    CacheWrite,
+    QueryCacheManager,
+    batched_query_cache,
+    decode_cache_data,
+    encode_cache_data,
+)
+from posthog.test.base import BaseTest
+
+
+class TestQueryCacheManager(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        redis.get_client().delete(f"cache_timestamps:{self.team.pk}")
+
+    def _manager(self, cache_key: str, insight_id: int | None = None) -> QueryCacheManager:
+        return QueryCacheManager(team_id=self.team.pk, cache_key=cache_key, insight_id=insight_id)
+
+    def test_small_responses_are_stored_as_plain_json(self):
+        encoded = encode_cache_data({"results": [1, 2, 3]})
+
+        assert not encoded.startswith(ZSTD_HEADER)
+        assert decode_cache_data(encoded) == {"results": [1, 2, 3]}
+
+    def test_large_responses_are_compressed(self):
+        response = {"results": ["x" * 100] * (COMPRESSION_THRESHOLD_BYTES // 50)}
+        encoded = encode_cache_data(response)
+
+        assert encoded.startswith(ZSTD_HEADER)
+        assert len(encoded) < COMPRESSION_THRESHOLD_BYTES
+        assert decode_cache_data(encoded) == response
+
+    def test_legacy_entries_still_decode(self):
+        cache.set("legacy_key", OrjsonJsonSerializer({}).dumps({"results": [42]}))
+
+        assert self._manager("legacy_key").get_cache_data() == {"results": [42]}
+
+    def test_get_many_and_set_many(self):
+        target_age = datetime.now(UTC) + timedelta(hours=1)
+        QueryCacheManager.set_many_cache_data(
+            [
+                CacheWrite(
+                    team_id=self.team.pk, cache_key="key_a", response={"a": 1}, target_age=target_age, insight_id=1
+                ),
+                CacheWrite(team_id=self.team.pk, cache_key="key_b", response={"b": 2}, target_age=None, insight_id=2),
+            ]
+        )
+
+        assert QueryCacheManager.get_many_cache_data(["key_a", "key_b", "key_c"]) == {
+            "key_a": {"a": 1},
+            "key_b": {"b": 2},
+            "key_c": None,
+        }
+        timestamps = redis.get_client().zrange(f"cache_timestamps:{self.team.pk}", 0, -1)
+        assert timestamps == [b"1:"]
+
+    def test_batched_reads_are_prefetched(self):
+        self._manager("key_a").set_cache_data(response={"a": 1}, target_age=None)
+
+        with batched_query_cache(["key_a", "key_b"]):
+            with patch("posthog.hogql_queries.query_cache.get_safe_cache") as get_safe_cache:
+                assert self._manager("key_a").get_cache_data() == {"a": 1}
+                assert self._manager("key_b").get_cache_data() is None
+                get_safe_cache.assert_not_called()
+
+    def test_batched_writes_are_flushed_on_exit(self):
+        target_age = datetime.now(UTC) + timedelta(hours=1)
+
+        with batched_query_cache():
+            self._manager("key_a", insight_id=1).set_cache_data(response={"a": 1}, target_age=target_age)
+            assert cache.get("key_a") is None
+            # Reads within the batch see the buffered write
+            assert self._manager("key_a").get_cache_data() == {"a": 1}
+
+        assert self._manager("key_a").get_cache_data() == {"a": 1}
+        assert redis.get_client().zscore(f"cache_timestamps:{self.team.pk}", "1:") == target_age.timestamp()
@@ -0,0 +1,80 @@
+import threading
+from unittest.mock import MagicMock
+
+from posthog.hogql_queries.query_coalescing import QueryCoalescer
+from posthog.test.base import BaseTest
+
+
+class TestQueryCoalescer(BaseTest):
+    def _coalescer(self) -> QueryCoalescer:
+        return QueryCoalescer(team_id=self.team.pk, cache_key="cache_abc")
+
+    def tearDown(self):
+        super().tearDown()
+        coalescer = self._coalescer()
+        coalescer.redis_client.delete(coalescer.lease_key, coalescer.status_manager.results_key)
+
+    def test_only_one_caller_gets_the_lease(self):
+        leader, follower = self._coalescer(), self._coalescer()
+
+        assert leader.acquire()
+        assert not follower.acquire()
+
+        leader.release()
+        assert follower.acquire()
+
+    def test_release_by_another_caller_does_not_drop_the_lease(self):
+        leader, follower = self._coalescer(), self._coalescer()
+        leader.acquire()
+        follower.acquire()
+
+        follower.release()
+        assert leader.is_running()
+
+    def test_wait_returns_once_released(self):
+        leader, follower = self._coalescer(), self._coalescer()
+        leader.acquire()
+
+        timer = threading.Timer(0.2, leader.release)
+        timer.start()
+        try:
+            assert follower.wait(timeout=5)
+        finally:
+            timer.cancel()
+
+    def test_wait_times_out(self):
+        leader, follower = self._coalescer(), self._coalescer()
+        leader.acquire()
+
+        assert not follower.wait(timeout=0.1)
+
+    def test_stale_readers_get_the_results_through_the_query_status(self):
+        leader, follower = self._coalescer(), self._coalescer()
+        leader.acquire()
+
+        query_status = follower.register_stale_reader()
+        assert query_status is not None
+        assert not query_status.complete
+
+        leader.release(get_results=lambda: {"results": [1]})
+
+        query_status = follower.status_manager.get_query_status()
+        assert query_status.complete
+        assert not query_status.error
+        assert query_status.results == {"results": [1]}
+
+    def test_results_are_not_serialized_without_stale_readers(self):
+        leader = self._coalescer()
+        leader.acquire()
+        get_results = MagicMock(return_value={"results": [1]})
+
+        leader.release(get_results=get_results)
+
+        get_results.assert_not_called()
+
+    def test_registering_after_release_returns_nothing(self):
+        leader, follower = self._coalescer(), self._coalescer()
+        leader.acquire()
+        leader.release()
+
+        assert follower.register_stale_reader() is None
@@ -4,9 +4,12 @@ from unittest import mock
 from zoneinfo import ZoneInfo
 
 from django.core.cache import cache
+from django.test import override_settings
 from freezegun import freeze_time
 from pydantic import BaseModel
 
+from posthog.hogql_queries.query_cache import batched_query_cache
+from posthog.hogql_queries.query_coalescing import QueryCoalescer
 from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
 from posthog.models.team.team import Team
 from posthog.schema import (
@@ -248,6 +251,110 @@ class TestQueryRunner(BaseTest):
             self.assertEqual(response.last_refresh.isoformat(), "2023-02-04T13:37:42+00:00")
             mock_on_commit.assert_called_once()
 
+    @override_settings(QUERY_COALESCING_ENABLED=True)
+    def test_concurrent_calculation_returns_stale_result_with_query_status(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37 + 11, 42)):
+            leader = QueryCoalescer(team_id=self.team.pk, cache_key=runner.get_cache_key())
+            assert leader.acquire()
+
+            with mock.patch.object(TestQueryRunner, "calculate") as calculate:
+                response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+                calculate.assert_not_called()
+
+            self.assertIsInstance(response, TestCachedBasicQueryResponse)
+            self.assertEqual(response.is_cached, True)
+            self.assertEqual(response.last_refresh.isoformat(), "2023-02-04T13:37:42+00:00")
+            assert response.query_status is not None
+            self.assertEqual(response.query_status.complete, False)
+
+            leader.release(get_results=lambda: {"results": []})
+            self.assertEqual(leader.status_manager.get_query_status().complete, True)
+
+    @override_settings(QUERY_COALESCING_ENABLED=True)
+    def test_concurrent_calculation_is_computed_after_waiting_in_vain(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+
+        leader = QueryCoalescer(team_id=self.team.pk, cache_key=runner.get_cache_key())
+        assert leader.acquire()
+
+        with mock.patch.object(QueryCoalescer, "wait", return_value=False) as wait:
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        # Waited for the timeout, and then for the rest of the lease
+        self.assertEqual(wait.call_count, 2)
+        self.assertGreater(wait.call_args_list[1].kwargs["timeout"], 0)
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, False)
+        assert leader.is_running()
+
+    @override_settings(QUERY_COALESCING_ENABLED=True)
+    def test_concurrent_calculation_keeps_waiting_for_a_slow_leader(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_key = runner.get_cache_key()
+
+        # The result the other caller is going to write
+        runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        other_result = cache.get(cache_key)
+        cache.delete(cache_key)
+
+        def finish_other_calculation_after_the_timeout(timeout):
+            if wait.call_count == 1:
+                return False
+            cache.set(cache_key, other_result)
+            return True
+
+        leader = QueryCoalescer(team_id=self.team.pk, cache_key=cache_key)
+        assert leader.acquire()
+
+        with (
+            mock.patch.object(QueryCoalescer, "wait", side_effect=finish_other_calculation_after_the_timeout) as wait,
+            mock.patch.object(TestQueryRunner, "calculate") as calculate,
+        ):
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertEqual(wait.call_count, 2)
+        calculate.assert_not_called()
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+
+    @override_settings(QUERY_COALESCING_ENABLED=True)
+    def test_concurrent_calculation_reads_result_past_batch_prefetch(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_key = runner.get_cache_key()
+
+        # The result the other caller is going to write
+        runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        other_result = cache.get(cache_key)
+        cache.delete(cache_key)
+
+        def finish_other_calculation(timeout):
+            cache.set(cache_key, other_result)
+            return True
+
+        with batched_query_cache([cache_key]):
+            leader = QueryCoalescer(team_id=self.team.pk, cache_key=cache_key)
+            assert leader.acquire()
+
+            with (
+                mock.patch.object(QueryCoalescer, "wait", side_effect=finish_other_calculation) as wait,
+                mock.patch.object(TestQueryRunner, "calculate") as calculate,
+            ):
+                response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        wait.assert_called_once()
+        calculate.assert_not_called()
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+
     def test_modifier_passthrough(self):
         try:
             from ee.clickhouse.materialized_columns.analyze import materialize
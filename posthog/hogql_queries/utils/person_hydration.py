@@ -0,0 +1,67 @@
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.db.models import Prefetch
+from prometheus_client import Counter
+
+from posthog.models.person.util import get_persons_by_distinct_ids
+
+PERSON_HYDRATION_CACHE_COUNTER = Counter(
+    "posthog_events_query_person_hydration_cache",
+    "Whether the person of a distinct_id in an events query was served from the process-local cache or Postgres",
+    labelnames=["result"],
+)
+
+_cache_lock = threading.Lock()
+# Persons change, so entries only live for a few seconds. That's enough for paging and refreshing the same events.
+_person_cache: TTLCache[tuple[int, str], dict[str, Any]] = TTLCache(
+    maxsize=settings.EVENTS_QUERY_PERSON_CACHE_MAX_SIZE, ttl=settings.EVENTS_QUERY_PERSON_CACHE_TTL_SECONDS
+)
+
+
+def get_persons_for_distinct_ids(team_id: int, distinct_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """
+    Returns the uuid, created_at and properties of the person of each distinct_id that has one. The returned dicts are
+    shared with the cache, so they must not be changed.
+    """
+    distinct_ids = set(distinct_ids)
+    persons: dict[str, dict[str, Any]] = {}
+
+    if settings.EVENTS_QUERY_PERSON_CACHE_ENABLED:
+        with _cache_lock:
+            for distinct_id in distinct_ids:
+                person = _person_cache.get((team_id, distinct_id))
+                if person is not None:
+                    persons[distinct_id] = person
+        PERSON_HYDRATION_CACHE_COUNTER.labels(result="hit").inc(len(persons))
+        PERSON_HYDRATION_CACHE_COUNTER.labels(result="miss").inc(len(distinct_ids) - len(persons))
+
+    missing_distinct_ids = {distinct_id for distinct_id in distinct_ids if distinct_id not in persons}
+    if not missing_distinct_ids:
+        return persons
+
+    fetched: dict[str, dict[str, Any]] = {}
+    queryset = get_persons_by_distinct_ids(team_id, list(missing_distinct_ids)).prefetch_related(
+        Prefetch("persondistinctid_set", to_attr="distinct_ids_cache")
+    )
+    for person in queryset:
+        hydrated = {"uuid": person.uuid, "created_at": person.created_at, "properties": person.properties or {}}
+        for distinct_id in person.distinct_ids:
+            if distinct_id in missing_distinct_ids:
+                fetched[distinct_id] = hydrated
+
+    if settings.EVENTS_QUERY_PERSON_CACHE_ENABLED:
+        with _cache_lock:
+            for distinct_id, hydrated in fetched.items():
+                _person_cache[(team_id, distinct_id)] = hydrated
+
+    persons.update(fetched)
+    return persons
+
+
+def clear_person_hydration_cache() -> None:
+    with _cache_lock:
+        _person_cache.clear()
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.18 on 2025-05-12 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posthog", "0733_file_system_shortcut"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datawarehousesavedquery",
+            name="materialization_config",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="datawarehousesavedquery",
+            name="materialization_mode",
+            field=models.CharField(
+                choices=[("full", "full"), ("incremental", "incremental")], default="full", max_length=128
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
+import gzip
 import secrets
 from datetime import timedelta
-from typing import Optional
+from typing import IO, Optional, Union
 
 import structlog
 from django.conf import settings
@@ -23,6 +24,7 @@ logger = structlog.get_logger(__name__)
 
 PUBLIC_ACCESS_TOKEN_EXP_DAYS = 365
 MAX_AGE_CONTENT = 86400  # 1 day
+GZIP_MAGIC_BYTES = b"\x1f\x8b"
 
 
 def get_default_access_token() -> str:
@@ -138,6 +140,9 @@ def get_content_response(asset: ExportedAsset, download: bool = False):
     content = asset.content
     if not content and asset.content_location:
         content = object_storage.read_bytes(asset.content_location)
+        # Large tabular exports are kept compressed in object storage
+        if content and content.startswith(GZIP_MAGIC_BYTES):
+            content = gzip.decompress(content)
 
     if not content:
         # Don't modify the asset here as the task might still be running concurrently
@@ -153,12 +158,18 @@ def get_content_response(asset: ExportedAsset, download: bool = False):
     return res
 
 
-def save_content(exported_asset: ExportedAsset, content: bytes) -> None:
+def save_content(
+    exported_asset: ExportedAsset, content: Union[bytes, IO[bytes]], content_encoding: Optional[str] = None
+) -> None:
+    """
+    Content can be a file, which is uploaded to object storage in parts. Content encoded with gzip is only kept
+    compressed in object storage, and decompressed when it's saved on the asset.
+    """
     try:
         if settings.OBJECT_STORAGE_ENABLED:
-            save_content_to_object_storage(exported_asset, content)
+            save_content_to_object_storage(exported_asset, content, content_encoding)
         else:
-            save_content_to_exported_asset(exported_asset, content)
+            save_content_to_exported_asset(exported_asset, _read_content(content, content_encoding))
     except ObjectStorageError as ose:
         capture_exception(ose)
         logger.error(
@@ -167,7 +178,14 @@ def save_content(exported_asset: ExportedAsset, content: bytes) -> None:
             exception=ose,
             exc_info=True,
         )
-        save_content_to_exported_asset(exported_asset, content)
+        save_content_to_exported_asset(exported_asset, _read_content(content, content_encoding))
+
+
+def _read_content(content: Union[bytes, IO[bytes]], content_encoding: Optional[str]) -> bytes:
+    if not isinstance(content, bytes):
+        content.seek(0)
+        content = content.read()
+    return gzip.decompress(content) if content_encoding == "gzip" else content
 
 
 def save_content_to_exported_asset(exported_asset: ExportedAsset, content: bytes) -> None:
@@ -175,7 +193,9 @@ def save_content_to_exported_asset(exported_asset: ExportedAsset, content: bytes
     exported_asset.save(update_fields=["content"])
 
 
-def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes) -> None:
+def save_content_to_object_storage(
+    exported_asset: ExportedAsset, content: Union[bytes, IO[bytes]], content_encoding: Optional[str] = None
+) -> None:
     path_parts: list[str] = [
         settings.OBJECT_STORAGE_EXPORTS_FOLDER,
         exported_asset.export_format.split("/")[1],
@@ -184,6 +204,7 @@ def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes
         str(UUIDT()),
     ]
     object_path = "/".join(path_parts)
-    object_storage.write(object_path, content)
+    extras = {"ContentEncoding": content_encoding} if content_encoding else None
+    object_storage.write(object_path, content, extras=extras)
     exported_asset.content_location = object_path
     exported_asset.save(update_fields=["content_location"])
@@ -0,0 +1,219 @@
+import threading
+from typing import Any, Optional
+
+import structlog
+from cachetools import TTLCache
+from django.conf import settings
+from prometheus_client import Counter
+
+from posthog.models.filters import Filter
+from posthog.models.property import GroupTypeIndex
+from posthog.models.property.property import Property
+from posthog.redis import get_client
+
+from .feature_flag import FeatureFlag
+
+logger = structlog.get_logger(__name__)
+
+COMPILED_FLAGS_VERSION_KEY_PREFIX = "@posthog/feature_flags/compiled_version"
+
+COMPILED_FLAGS_CACHE_COUNTER = Counter(
+    "posthog_compiled_feature_flags_cache",
+    "Whether a project's compiled flags were served from the process-local cache or compiled again",
+    labelnames=["result"],
+)
+
+_cache_lock = threading.Lock()
+_compiled_flags_cache: TTLCache[tuple[int, int], "CompiledFlagSet"] = TTLCache(
+    maxsize=settings.DECIDE_COMPILED_FLAGS_CACHE_MAX_SIZE, ttl=settings.DECIDE_COMPILED_FLAGS_CACHE_TTL_SECONDS
+)
+
+
+def check_pure_is_not_operator_condition(condition: dict) -> bool:
+    properties = condition.get("properties", [])
+    if properties and all(prop.get("operator") in ("is_not_set", "is_not") for prop in properties):
+        return True
+    return False
+
+
+class CompiledCondition:
+    """
+    A release condition with its properties parsed, and the key its result has in the query conditions, so that
+    matching doesn't parse the flag filters again.
+    """
+
+    __slots__ = (
+        "condition",
+        "index",
+        "query_key",
+        "has_properties",
+        "rollout_percentage",
+        "variant",
+        "match_if_entity_doesnt_exist",
+        "property_keys",
+        "_properties",
+    )
+
+    def __init__(self, condition: dict, index: int, query_key: str):
+        self.condition = condition
+        self.index = index
+        self.query_key = query_key
+        self.has_properties = bool(condition.get("properties"))
+        self.rollout_percentage = condition.get("rollout_percentage")
+        self.variant = condition.get("variant")
+        self.match_if_entity_doesnt_exist = check_pure_is_not_operator_condition(condition)
+        self._properties: Optional[list[Property]] = None
+        # Keys that overrides need to have to match the condition without the database, None if that isn't possible
+        self.property_keys: Optional[frozenset[str]] = None
+        try:
+            self._properties = Filter(data=condition).property_groups.flat
+        except Exception:
+            return
+        if not any(property.type == "cohort" for property in self._properties):
+            self.property_keys = frozenset(property.key for property in self._properties)
+
+    @property
+    def properties(self) -> list[Property]:
+        if self._properties is None:
+            # Invalid filters are parsed again, so that they only fail the flag they belong to when it's evaluated
+            return Filter(data=self.condition).property_groups.flat
+        return self._properties
+
+
+class CompiledFeatureFlag:
+    """Everything about a flag that doesn't depend on who it's evaluated for."""
+
+    __slots__ = (
+        "feature_flag",
+        "aggregation_group_type_index",
+        "conditions",
+        "sorted_conditions",
+        "super_condition",
+        "super_condition_is_set",
+        "_variant_keys",
+        "hash_prefix",
+        "uses_cohorts",
+        "_variant_lookup_table",
+    )
+
+    def __init__(self, feature_flag: FeatureFlag):
+        self.feature_flag = feature_flag
+        self.aggregation_group_type_index: Optional[GroupTypeIndex] = feature_flag.aggregation_group_type_index
+        self.hash_prefix = f"{feature_flag.key}."
+        self.conditions = [
+            CompiledCondition(condition, index, f"flag_{feature_flag.pk}_condition_{index}")
+            for index, condition in enumerate(feature_flag.conditions)
+        ]
+        # Conditions with variant overrides go first, so that the override applies to the first matching condition
+        self.sorted_conditions = sorted(self.conditions, key=lambda condition: 0 if condition.variant else 1)
+
+        self.super_condition: Optional[CompiledCondition] = None
+        self.super_condition_is_set: Optional[CompiledCondition] = None
+        if feature_flag.super_conditions:
+            condition = feature_flag.super_conditions[0]
+            self.super_condition = CompiledCondition(condition, 0, f"flag_{feature_flag.pk}_super_condition")
+            prop_key = (condition.get("properties") or [{}])[0].get("key")
+            if prop_key:
+                self.super_condition_is_set = CompiledCondition(
+                    {"properties": [{"key": prop_key, "operator": "is_set"}]},
+                    0,
+                    f"flag_{feature_flag.pk}_super_condition_is_set",
+                )
+
+        self.uses_cohorts = feature_flag.uses_cohorts
+        self._variant_keys: Optional[tuple[Any, ...]] = None
+        self._variant_lookup_table: Optional[list[dict[str, Any]]] = None
+        try:
+            self._variant_lookup_table = self.build_variant_lookup_table()
+            self._variant_keys = tuple(variant["key"] for variant in self._variant_lookup_table)
+        except Exception:
+            pass
+
+    # Define contiguous sub-domains within [0, 1].
+    # By looking up a random hash value, you can find the associated variant key.
+    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
+    # and the second will have value_min: 0.5 and value_max: 1.0
+    def build_variant_lookup_table(self) -> list[dict[str, Any]]:
+        lookup_table = []
+        value_min = 0
+        for variant in self.feature_flag.variants:
+            value_max = value_min + variant["rollout_percentage"] / 100
+            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
+            value_min = value_max
+        return lookup_table
+
+    @property
+    def variant_lookup_table(self) -> list[dict[str, Any]]:
+        if self._variant_lookup_table is None:
+            # Same as for conditions, invalid variants only fail the flag when it's evaluated
+            return self.build_variant_lookup_table()
+        return self._variant_lookup_table
+
+    @property
+    def variant_keys(self) -> tuple[Any, ...]:
+        if self._variant_keys is None:
+            return tuple(variant["key"] for variant in self.feature_flag.variants)
+        return self._variant_keys
+
+
+class CompiledFlagSet:
+    """The flags of a project, compiled once and shared by every evaluation until the flags change."""
+
+    def __init__(self, feature_flags: list[FeatureFlag], compiled: Optional[dict[int, CompiledFeatureFlag]] = None):
+        self.feature_flags = feature_flags
+        # Keyed by the identity of the flag, since flags that aren't saved yet don't have a pk
+        if compiled is None:
+            compiled = {}
+            for feature_flag in feature_flags:
+                try:
+                    compiled[id(feature_flag)] = CompiledFeatureFlag(feature_flag)
+                except Exception:
+                    # Compiled again when it's evaluated, to fail only this flag
+                    continue
+        self.compiled = compiled
+
+    def with_keys(self, flag_keys: list[str]) -> "CompiledFlagSet":
+        flag_keys_set = set(flag_keys)
+        return CompiledFlagSet([ff for ff in self.feature_flags if ff.key in flag_keys_set], self.compiled)
+
+
+def _version_key(project_id: int) -> str:
+    return f"{COMPILED_FLAGS_VERSION_KEY_PREFIX}/{project_id}"
+
+
+def get_compiled_flags_version(project_id: int) -> Optional[int]:
+    """Returns the current version of the project's flags, or None if Redis can't be reached."""
+    try:
+        version = get_client().get(_version_key(project_id))
+    except Exception as e:
+        logger.warning("compiled_flags_cache_version_read_failed", project_id=project_id, error=str(e))
+        return None
+    return int(version) if version is not None else 0
+
+
+def invalidate_compiled_flags(project_id: int) -> None:
+    """Bumps the project's version so every process compiles the flags again on the next evaluation."""
+    try:
+        get_client().incr(_version_key(project_id))
+    except Exception as e:
+        logger.warning("compiled_flags_cache_invalidation_failed", project_id=project_id, error=str(e))
+    with _cache_lock:
+        for key in [key for key in _compiled_flags_cache.keys() if key[0] == project_id]:
+            _compiled_flags_cache.pop(key, None)
+
+
+def get_cached_compiled_flags(project_id: int, version: int) -> Optional[CompiledFlagSet]:
+    with _cache_lock:
+        flag_set = _compiled_flags_cache.get((project_id, version))
+    COMPILED_FLAGS_CACHE_COUNTER.labels(result="hit" if flag_set is not None else "miss").inc()
+    return flag_set
+
+
+def set_cached_compiled_flags(project_id: int, version: int, flag_set: CompiledFlagSet) -> None:
+    with _cache_lock:
+        _compiled_flags_cache[(project_id, version)] = flag_set
+
+
+def clear_compiled_flags_cache() -> None:
+    with _cache_lock:
+        _compiled_flags_cache.clear()
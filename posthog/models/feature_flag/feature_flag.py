@@ -400,7 +400,11 @@ class FeatureFlag(FileSystemSyncMixin, ModelActivityMixin, RootTeamMixin, models
 
 @mutable_receiver([post_save, post_delete], sender=FeatureFlag)
 def refresh_flag_cache_on_updates(sender, instance, **kwargs):
+    from posthog.models.feature_flag.compiled_flags import invalidate_compiled_flags
+
     set_feature_flags_for_team_in_cache(instance.team.project_id)
+    # After writing the flags, so that processes compiling them for the new version read the new flags
+    invalidate_compiled_flags(instance.team.project_id)
 
 
 class FeatureFlagHashKeyOverride(models.Model):
@@ -35,6 +35,14 @@ from posthog.database_healthcheck import (
 from posthog.utils import label_for_team_id_to_track
 from posthog.helpers.encrypted_flag_payloads import get_decrypted_flag_payload
 
+from .compiled_flags import (
+    CompiledCondition,
+    CompiledFeatureFlag,
+    CompiledFlagSet,
+    get_cached_compiled_flags,
+    get_compiled_flags_version,
+    set_cached_compiled_flags,
+)
 from .feature_flag import (
     FeatureFlag,
     FeatureFlagHashKeyOverride,
@@ -47,6 +55,9 @@ logger = structlog.get_logger(__name__)
 __LONG_SCALE__ = float(0xFFFFFFFFFFFFFFF)
 
 FLAG_MATCHING_QUERY_TIMEOUT_MS = 500  # 500 ms. Any longer and we'll just error out.
+# Evaluating flags for many distinct IDs at once is for backfills and server-side SDKs, not /decide
+FLAG_BATCH_EVALUATION_CHUNK_SIZE = 1000
+FLAG_BATCH_QUERY_TIMEOUT_MS = 10_000
 
 FLAG_EVALUATION_ERROR_COUNTER = Counter(
     "flag_evaluation_error_total",
@@ -172,6 +183,8 @@ class FeatureFlagMatcher:
         group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
         skip_database_flags: bool = False,
         cohorts_cache: Optional[dict[int, CohortOrEmpty]] = None,
+        prefetched_query_conditions: Optional[dict[str, bool]] = None,
+        compiled_flags: Optional[dict[int, CompiledFeatureFlag]] = None,
     ):
         if group_property_value_overrides is None:
             group_property_value_overrides = {}
@@ -191,12 +204,24 @@ class FeatureFlagMatcher:
         self.property_value_overrides = property_value_overrides
         self.group_property_value_overrides = group_property_value_overrides
         self.skip_database_flags = skip_database_flags
+        # Set when evaluating many distinct IDs at once, see `get_all_feature_flags_for_distinct_ids`
+        self.prefetched_query_conditions = prefetched_query_conditions
+        # Shared with other evaluations, so flags that aren't in it are compiled into a dict of this matcher
+        self.compiled_flags = compiled_flags or {}
+        self.locally_compiled_flags: dict[int, CompiledFeatureFlag] = {}
 
         if cohorts_cache is None:
             self.cohorts_cache = {}
         else:
             self.cohorts_cache = cohorts_cache
 
+    def compiled(self, feature_flag: FeatureFlag) -> CompiledFeatureFlag:
+        compiled = self.compiled_flags.get(id(feature_flag)) or self.locally_compiled_flags.get(id(feature_flag))
+        if compiled is None:
+            compiled = CompiledFeatureFlag(feature_flag)
+            self.locally_compiled_flags[id(feature_flag)] = compiled
+        return compiled
+
     def get_match(self, feature_flag: FeatureFlag) -> FeatureFlagMatch:
         # If aggregating flag by groups and relevant group type is not passed - flag is off!
         if self.hashed_identifier(feature_flag) is None:
@@ -247,18 +272,15 @@ class FeatureFlagMatcher:
                     payload=payload,
                 )
 
-        # Stable sort conditions with variant overrides to the top. This ensures that if overrides are present, they are
+        # Conditions with variant overrides are sorted to the top. This ensures that if overrides are present, they are
         # evaluated first, and the variant override is applied to the first matching condition.
-        # :TRICKY: We need to include the enumeration index before the sort so the flag evaluation reason gets the right condition index.
-        sorted_flag_conditions = sorted(
-            enumerate(feature_flag.conditions),
-            key=lambda condition_tuple: 0 if condition_tuple[1].get("variant") else 1,
-        )
-        for index, condition in sorted_flag_conditions:
-            is_match, evaluation_reason = self.is_condition_match(feature_flag, condition, index)
+        compiled = self.compiled(feature_flag)
+        for condition in compiled.sorted_conditions:
+            index = condition.index
+            is_match, evaluation_reason = self.is_condition_match(feature_flag, condition)
             if is_match:
-                variant_override = condition.get("variant")
-                if variant_override in [variant["key"] for variant in feature_flag.variants]:
+                variant_override = condition.variant
+                if variant_override in compiled.variant_keys:
                     variant = variant_override
                 else:
                     variant = self.get_matching_variant(feature_flag)
@@ -342,7 +364,7 @@ class FeatureFlagMatcher:
     def get_matching_variant(self, feature_flag: FeatureFlag) -> Optional[str]:
         # Calculate hash once outside the loop since it's the same for all variants
         variant_hash = self.get_hash(feature_flag, salt="variant")
-        for variant in self.variant_lookup_table(feature_flag):
+        for variant in self.compiled(feature_flag).variant_lookup_table:
             if variant_hash >= variant["value_min"] and variant_hash < variant["value_max"]:
                 return variant["key"]
         return None
@@ -406,11 +428,10 @@ class FeatureFlagMatcher:
             )
 
         # Evaluate if properties are empty
-        if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
-            condition = feature_flag.super_conditions[0]
-
-            if not condition.get("properties"):
-                is_match, evaluation_reason = self.is_condition_match(feature_flag, condition, 0)
+        condition = self.compiled(feature_flag).super_condition
+        if condition is not None:
+            if not condition.has_properties:
+                is_match, evaluation_reason = self.is_condition_match(feature_flag, condition)
                 return (
                     True,
                     is_match,
@@ -424,12 +445,14 @@ class FeatureFlagMatcher:
         return False, False, FeatureFlagMatchReason.NO_CONDITION_MATCH
 
     def is_condition_match(
-        self, feature_flag: FeatureFlag, condition: dict, condition_index: int
+        self, feature_flag: FeatureFlag, condition: CompiledCondition
     ) -> tuple[bool, FeatureFlagMatchReason]:
-        rollout_percentage = condition.get("rollout_percentage")
-        if len(condition.get("properties", [])) > 0:
-            properties = Filter(data=condition).property_groups.flat
-            if self.can_compute_locally(properties, feature_flag.aggregation_group_type_index):
+        rollout_percentage = condition.rollout_percentage
+        if condition.has_properties:
+            properties = condition.properties
+            if self.can_compute_locally(
+                properties, feature_flag.aggregation_group_type_index, property_keys=condition.property_keys
+            ):
                 # :TRICKY: If overrides are enough to determine if a condition is a match,
                 # we can skip checking the query.
                 # This ensures match even if the person hasn't been ingested yet.
@@ -441,11 +464,9 @@ class FeatureFlagMatcher:
                     )
                 condition_match = all(match_property(property, target_properties) for property in properties)
             else:
-                match_if_entity_doesnt_exist = check_pure_is_not_operator_condition(condition)
-                condition_match = self._condition_matches(
-                    feature_flag,
-                    condition_index,
-                    match_if_entity_doesnt_exist,
+                condition_match = self._get_query_condition(
+                    condition.query_key,
+                    condition.match_if_entity_doesnt_exist,
                     feature_flag.aggregation_group_type_index,
                 )
 
@@ -465,17 +486,6 @@ class FeatureFlagMatcher:
     def _super_condition_is_set(self, feature_flag: FeatureFlag) -> Optional[bool]:
         return self._get_query_condition(f"flag_{feature_flag.pk}_super_condition_is_set")
 
-    def _condition_matches(
-        self,
-        feature_flag: FeatureFlag,
-        condition_index: int,
-        match_if_entity_doesnt_exist: bool = False,
-        group_type_index: Optional[GroupTypeIndex] = None,
-    ) -> bool:
-        return self._get_query_condition(
-            f"flag_{feature_flag.pk}_condition_{condition_index}", match_if_entity_doesnt_exist, group_type_index
-        )
-
     def _get_query_condition(
         self, key: str, match_if_entity_doesnt_exist: bool = False, group_type_index: Optional[GroupTypeIndex] = None
     ) -> bool:
@@ -495,21 +505,10 @@ class FeatureFlagMatcher:
 
         return self.query_conditions.get(key, False)
 
-    # Define contiguous sub-domains within [0, 1].
-    # By looking up a random hash value, you can find the associated variant key.
-    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
-    # and the second will have value_min: 0.5 and value_max: 1.0
-    def variant_lookup_table(self, feature_flag: FeatureFlag):
-        lookup_table = []
-        value_min = 0
-        for variant in feature_flag.variants:
-            value_max = value_min + variant["rollout_percentage"] / 100
-            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
-            value_min = value_max
-        return lookup_table
-
     @cached_property
     def query_conditions(self) -> dict[str, bool]:
+        if self.prefetched_query_conditions is not None:
+            return self.prefetched_query_conditions
         try:
             # Some extra wiggle room here for timeouts because this depends on the number of flags as well,
             # and not just the database query.
@@ -520,163 +519,16 @@ class FeatureFlagMatcher:
                     persondistinctid__distinct_id=self.distinct_id,
                     persondistinctid__team_id=self.team_id,
                 )
-                basic_group_query: QuerySet = Group.objects.db_manager(DATABASE_FOR_FLAG_MATCHING).filter(
-                    team_id=self.team_id
-                )
-                group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]] = {}
-                # :TRICKY: Create a queryset for each group type that uniquely identifies a group, based on the groups passed in.
-                # If no groups for a group type are passed in, we can skip querying for that group type,
-                # since the result will always be `false`.
-                for group_type, group_key in self.groups.items():
-                    group_type_index = self.cache.group_types_to_indexes.get(group_type)
-                    if group_type_index is not None:
-                        # a tuple of querySet and field names
-                        group_query_per_group_type_mapping[group_type_index] = (
-                            basic_group_query.filter(group_type_index=group_type_index, group_key=group_key),
-                            [],
-                        )
+                group_query_per_group_type_mapping = self.group_queries()
 
-                person_fields: list[str] = []
+                if PERSON_KEY in self.has_pure_is_not_conditions:
+                    person_exists = person_query.exists()
+                    all_conditions[f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}"] = person_exists
+                all_conditions.update(self.group_exists_conditions(group_query_per_group_type_mapping))
 
-                for existence_condition_key in self.has_pure_is_not_conditions:
-                    if existence_condition_key == PERSON_KEY:
-                        person_exists = person_query.exists()
-                        all_conditions[f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}"] = person_exists
-                    else:
-                        if existence_condition_key not in group_query_per_group_type_mapping:
-                            continue
-
-                        group_query, _ = group_query_per_group_type_mapping[
-                            cast(GroupTypeIndex, existence_condition_key)
-                        ]
-                        group_exists = group_query.exists()
-                        all_conditions[f"{ENTITY_EXISTS_PREFIX}{existence_condition_key}"] = group_exists
-
-                def condition_eval(key, condition):
-                    expr = None
-                    annotate_query = True
-                    nonlocal person_query
-
-                    property_list = Filter(data=condition).property_groups.flat
-                    properties_with_math_operators = get_all_properties_with_math_operators(
-                        property_list, self.cohorts_cache, self.project_id
-                    )
-
-                    if len(condition.get("properties", {})) > 0:
-                        # Feature Flags don't support OR filtering yet
-                        target_properties = self.property_value_overrides
-                        if feature_flag.aggregation_group_type_index is not None:
-                            if feature_flag.aggregation_group_type_index not in self.cache.group_type_index_to_name:
-                                target_properties = {}
-                            else:
-                                target_properties = self.group_property_value_overrides.get(
-                                    self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
-                                    {},
-                                )
-
-                        expr = properties_to_Q(
-                            self.project_id,
-                            property_list,
-                            override_property_values=target_properties,
-                            cohorts_cache=self.cohorts_cache,
-                            using_database=DATABASE_FOR_FLAG_MATCHING,
-                        )
-
-                        # TRICKY: Due to property overrides for cohorts, we sometimes shortcircuit the condition check.
-                        # In that case, the expression is either an explicit True or explicit False, or multiple conditions.
-                        # We can skip going to the database in explicit True|False conditions. This is important
-                        # as it allows resolving flags correctly for non-ingested persons.
-                        # However, this doesn't work for the multiple condition case (when expr has multiple Q objects),
-                        # but it's better than nothing.
-                        # TODO: A proper fix would be to handle cohorts with property overrides before we get to this point.
-                        # Unskip test test_complex_cohort_filter_with_override_properties when we fix this.
-                        if expr == Q(pk__isnull=False):
-                            all_conditions[key] = True
-                            annotate_query = False
-                        elif expr == Q(pk__isnull=True):
-                            all_conditions[key] = False
-                            annotate_query = False
-
-                    if annotate_query:
-                        if feature_flag.aggregation_group_type_index is None:
-                            # :TRICKY: Flag matching depends on type of property when doing >, <, >=, <= comparisons.
-                            # This requires a generated field to query in Q objects, which sadly don't allow inlining fields,
-                            # hence we need to annotate the query here, even though these annotations are used much deeper,
-                            # in properties_to_q, in empty_or_null_with_value_q
-                            # These need to come in before the expr so they're available to use inside the expr.
-                            # Same holds for the group queries below.
-                            type_property_annotations = _get_property_type_annotations(properties_with_math_operators)
-                            person_query = person_query.annotate(
-                                **type_property_annotations,
-                                **{
-                                    key: ExpressionWrapper(
-                                        cast(Expression, expr if expr else RawSQL("true", [])),
-                                        output_field=BooleanField(),
-                                    ),
-                                },
-                            )
-                            person_fields.append(key)
-                        else:
-                            if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
-                                # ignore flags that didn't have the right groups passed in
-                                return
-                            (
-                                group_query,
-                                group_fields,
-                            ) = group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index]
-                            type_property_annotations = _get_property_type_annotations(properties_with_math_operators)
-                            group_query = group_query.annotate(
-                                **type_property_annotations,
-                                **{
-                                    key: ExpressionWrapper(
-                                        cast(Expression, expr if expr else RawSQL("true", [])),
-                                        output_field=BooleanField(),
-                                    ),
-                                },
-                            )
-                            group_fields.append(key)
-                            group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
-                                group_query,
-                                group_fields,
-                            )
-
-                # only fetch all cohorts if not passed in any cached cohorts
-                if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
-                    all_cohorts = {
-                        cohort.pk: cohort
-                        for cohort in Cohort.objects.db_manager(DATABASE_FOR_FLAG_MATCHING).filter(
-                            team__project_id=self.project_id, deleted=False
-                        )
-                    }
-                    self.cohorts_cache.update(all_cohorts)
-                # release conditions
-                for feature_flag in self.feature_flags:
-                    # super release conditions
-                    if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
-                        condition = feature_flag.super_conditions[0]
-                        prop_key = (condition.get("properties") or [{}])[0].get("key")
-                        if prop_key:
-                            key = f"flag_{feature_flag.pk}_super_condition"
-                            condition_eval(key, condition)
-
-                            is_set_key = f"flag_{feature_flag.pk}_super_condition_is_set"
-                            is_set_condition = {
-                                "properties": [
-                                    {
-                                        "key": prop_key,
-                                        "operator": "is_set",
-                                    }
-                                ]
-                            }
-                            condition_eval(is_set_key, is_set_condition)
-
-                    with start_span(
-                        op="parse_feature_flag_conditions",
-                        description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
-                    ):
-                        for index, condition in enumerate(feature_flag.conditions):
-                            key = f"flag_{feature_flag.pk}_condition_{index}"
-                            condition_eval(key, condition)
+                person_query, person_fields = self.annotate_condition_queries(
+                    person_query, group_query_per_group_type_mapping, all_conditions
+                )
 
                 if len(person_fields) > 0:
                     with start_span(op="execute_person_query"):
@@ -685,22 +537,7 @@ class FeatureFlagMatcher:
                             if len(person_query) > 0:
                                 all_conditions = {**all_conditions, **person_query[0]}
 
-                if len(group_query_per_group_type_mapping) > 0:
-                    with execute_with_timeout(FLAG_MATCHING_QUERY_TIMEOUT_MS * 2, DATABASE_FOR_FLAG_MATCHING):
-                        for (
-                            group_query,
-                            group_fields,
-                        ) in group_query_per_group_type_mapping.values():
-                            # Only query the group if there's a field to query
-                            if len(group_fields) > 0:
-                                with start_span(op="execute_group_query"):
-                                    group_query = group_query.values(*group_fields)
-                                    if len(group_query) > 0:
-                                        assert (
-                                            len(group_query) == 1
-                                        ), f"Expected 1 group query result, got {len(group_query)}"
-                                        all_conditions = {**all_conditions, **group_query[0]}
-                return all_conditions
+                return {**all_conditions, **self.fetch_group_conditions(group_query_per_group_type_mapping)}
         except DatabaseError as e:
             logger.exception("query_conditions database error", error=str(e), exc_info=True)
             self.failed_to_fetch_conditions = True
@@ -711,6 +548,184 @@ class FeatureFlagMatcher:
             # Covers all cases like invalid JSON, invalid operator, invalid property name, invalid group input format, etc.
             raise
 
+    def group_queries(self) -> dict[GroupTypeIndex, tuple[QuerySet, list[str]]]:
+        basic_group_query: QuerySet = Group.objects.db_manager(DATABASE_FOR_FLAG_MATCHING).filter(team_id=self.team_id)
+        group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]] = {}
+        # :TRICKY: Create a queryset for each group type that uniquely identifies a group, based on the groups passed in.
+        # If no groups for a group type are passed in, we can skip querying for that group type,
+        # since the result will always be `false`.
+        for group_type, group_key in self.groups.items():
+            group_type_index = self.cache.group_types_to_indexes.get(group_type)
+            if group_type_index is not None:
+                # a tuple of querySet and field names
+                group_query_per_group_type_mapping[group_type_index] = (
+                    basic_group_query.filter(group_type_index=group_type_index, group_key=group_key),
+                    [],
+                )
+        return group_query_per_group_type_mapping
+
+    def group_exists_conditions(
+        self, group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]]
+    ) -> dict[str, bool]:
+        """Checks whether groups with pure is not conditions exist. Must be called before annotating the queries."""
+        conditions: dict[str, bool] = {}
+        for existence_condition_key in self.has_pure_is_not_conditions:
+            if existence_condition_key == PERSON_KEY:
+                continue
+            if existence_condition_key not in group_query_per_group_type_mapping:
+                continue
+
+            group_query, _ = group_query_per_group_type_mapping[cast(GroupTypeIndex, existence_condition_key)]
+            group_exists = group_query.exists()
+            conditions[f"{ENTITY_EXISTS_PREFIX}{existence_condition_key}"] = group_exists
+        return conditions
+
+    def annotate_condition_queries(
+        self,
+        person_query: QuerySet,
+        group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]],
+        all_conditions: dict,
+    ) -> tuple[QuerySet, list[str]]:
+        """
+        Annotates the person query and the group queries with a field per flag condition that needs the database.
+        Conditions that the overrides already decide are added to `all_conditions` instead.
+        """
+        person_fields: list[str] = []
+
+        def condition_eval(condition: CompiledCondition):
+            key = condition.query_key
+            expr = None
+            annotate_query = True
+            nonlocal person_query
+
+            property_list = condition.properties
+            properties_with_math_operators = get_all_properties_with_math_operators(
+                property_list, self.cohorts_cache, self.project_id
+            )
+
+            if condition.has_properties:
+                # Feature Flags don't support OR filtering yet
+                target_properties = self.property_value_overrides
+                if feature_flag.aggregation_group_type_index is not None:
+                    if feature_flag.aggregation_group_type_index not in self.cache.group_type_index_to_name:
+                        target_properties = {}
+                    else:
+                        target_properties = self.group_property_value_overrides.get(
+                            self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
+                            {},
+                        )
+
+                expr = properties_to_Q(
+                    self.project_id,
+                    property_list,
+                    override_property_values=target_properties,
+                    cohorts_cache=self.cohorts_cache,
+                    using_database=DATABASE_FOR_FLAG_MATCHING,
+                )
+
+                # TRICKY: Due to property overrides for cohorts, we sometimes shortcircuit the condition check.
+                # In that case, the expression is either an explicit True or explicit False, or multiple conditions.
+                # We can skip going to the database in explicit True|False conditions. This is important
+                # as it allows resolving flags correctly for non-ingested persons.
+                # However, this doesn't work for the multiple condition case (when expr has multiple Q objects),
+                # but it's better than nothing.
+                # TODO: A proper fix would be to handle cohorts with property overrides before we get to this point.
+                # Unskip test test_complex_cohort_filter_with_override_properties when we fix this.
+                if expr == Q(pk__isnull=False):
+                    all_conditions[key] = True
+                    annotate_query = False
+                elif expr == Q(pk__isnull=True):
+                    all_conditions[key] = False
+                    annotate_query = False
+
+            if annotate_query:
+                if feature_flag.aggregation_group_type_index is None:
+                    # :TRICKY: Flag matching depends on type of property when doing >, <, >=, <= comparisons.
+                    # This requires a generated field to query in Q objects, which sadly don't allow inlining fields,
+                    # hence we need to annotate the query here, even though these annotations are used much deeper,
+                    # in properties_to_q, in empty_or_null_with_value_q
+                    # These need to come in before the expr so they're available to use inside the expr.
+                    # Same holds for the group queries below.
+                    type_property_annotations = _get_property_type_annotations(properties_with_math_operators)
+                    person_query = person_query.annotate(
+                        **type_property_annotations,
+                        **{
+                            key: ExpressionWrapper(
+                                cast(Expression, expr if expr else RawSQL("true", [])),
+                                output_field=BooleanField(),
+                            ),
+                        },
+                    )
+                    person_fields.append(key)
+                else:
+                    if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
+                        # ignore flags that didn't have the right groups passed in
+                        return
+                    (
+                        group_query,
+                        group_fields,
+                    ) = group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index]
+                    type_property_annotations = _get_property_type_annotations(properties_with_math_operators)
+                    group_query = group_query.annotate(
+                        **type_property_annotations,
+                        **{
+                            key: ExpressionWrapper(
+                                cast(Expression, expr if expr else RawSQL("true", [])),
+                                output_field=BooleanField(),
+                            ),
+                        },
+                    )
+                    group_fields.append(key)
+                    group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
+                        group_query,
+                        group_fields,
+                    )
+
+        # only fetch all cohorts if not passed in any cached cohorts
+        if not self.cohorts_cache and any(self.compiled(flag).uses_cohorts for flag in self.feature_flags):
+            all_cohorts = {
+                cohort.pk: cohort
+                for cohort in Cohort.objects.db_manager(DATABASE_FOR_FLAG_MATCHING).filter(
+                    team__project_id=self.project_id, deleted=False
+                )
+            }
+            self.cohorts_cache.update(all_cohorts)
+        # release conditions
+        for feature_flag in self.feature_flags:
+            compiled = self.compiled(feature_flag)
+            # super release conditions, only set when the super condition has a property
+            if compiled.super_condition is not None and compiled.super_condition_is_set is not None:
+                condition_eval(compiled.super_condition)
+                condition_eval(compiled.super_condition_is_set)
+
+            with start_span(
+                op="parse_feature_flag_conditions",
+                description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
+            ):
+                for condition in compiled.conditions:
+                    condition_eval(condition)
+
+        return person_query, person_fields
+
+    def fetch_group_conditions(
+        self, group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]]
+    ) -> dict[str, bool]:
+        conditions: dict[str, bool] = {}
+        if len(group_query_per_group_type_mapping) > 0:
+            with execute_with_timeout(FLAG_MATCHING_QUERY_TIMEOUT_MS * 2, DATABASE_FOR_FLAG_MATCHING):
+                for (
+                    group_query,
+                    group_fields,
+                ) in group_query_per_group_type_mapping.values():
+                    # Only query the group if there's a field to query
+                    if len(group_fields) > 0:
+                        with start_span(op="execute_group_query"):
+                            group_query = group_query.values(*group_fields)
+                            if len(group_query) > 0:
+                                assert len(group_query) == 1, f"Expected 1 group query result, got {len(group_query)}"
+                                conditions = {**conditions, **group_query[0]}
+        return conditions
+
     def hashed_identifier(self, feature_flag: FeatureFlag) -> Optional[str]:
         """
         If aggregating by people, returns distinct_id.
@@ -739,7 +754,7 @@ class FeatureFlagMatcher:
     # uniformly distributed between 0 and 1, so if we want to show this feature to 20% of traffic
     # we can do _hash(key, identifier) < 0.2
     def get_hash(self, feature_flag: FeatureFlag, salt="") -> float:
-        return self.calculate_hash(f"{feature_flag.key}.", self.hashed_identifier(feature_flag), salt)
+        return self.calculate_hash(self.compiled(feature_flag).hash_prefix, self.hashed_identifier(feature_flag), salt)
 
     # This function takes a identifier and a feature flag and returns a float between 0 and 1.
     # Given the same identifier and key, it'll always return the same float. These floats are
@@ -763,12 +778,16 @@ class FeatureFlagMatcher:
         self,
         properties: list[Property],
         group_type_index: Optional[GroupTypeIndex] = None,
+        property_keys: Optional[frozenset[str]] = None,
     ) -> bool:
         target_properties = self.property_value_overrides
         if group_type_index is not None:
             target_properties = self.group_property_value_overrides.get(
                 self.cache.group_type_index_to_name[group_type_index], {}
             )
+        if property_keys is not None:
+            # Compiled conditions know their keys up front, and that they don't have cohorts
+            return property_keys.issubset(target_properties)
         for property in properties:
             # can't locally compute if property is a cohort
             # need to atleast fetch the cohort
@@ -794,8 +813,8 @@ class FeatureFlagMatcher:
     def has_pure_is_not_conditions(self) -> set[Literal["person"] | GroupTypeIndex]:
         entity_to_condition_check: set[Literal["person"] | GroupTypeIndex] = set()
         for feature_flag in self.feature_flags:
-            for condition in feature_flag.conditions:
-                if check_pure_is_not_operator_condition(condition):
+            for condition in self.compiled(feature_flag).conditions:
+                if condition.match_if_entity_doesnt_exist:
                     if feature_flag.aggregation_group_type_index is not None:
                         entity_to_condition_check.add(feature_flag.aggregation_group_type_index)
                     else:
@@ -849,6 +868,7 @@ def _get_all_feature_flags(
     property_value_overrides: Optional[dict[str, Union[str, int]]] = None,
     group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
     skip_database_flags: bool = False,
+    compiled_flags: Optional[dict[int, CompiledFeatureFlag]] = None,
 ) -> tuple[
     dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool, Optional[dict[str, FeatureFlagDetails]]
 ]:
@@ -872,11 +892,35 @@ def _get_all_feature_flags(
             property_value_overrides,
             group_property_value_overrides,
             skip_database_flags,
+            compiled_flags=compiled_flags,
         ).get_matches_with_details()
 
     return {}, {}, {}, False, None
 
 
+def _get_feature_flags_to_evaluate(team: Team, flag_keys: Optional[list[str]] = None) -> CompiledFlagSet:
+    version = get_compiled_flags_version(team.project_id) if settings.DECIDE_COMPILED_FLAGS_CACHE_ENABLED else None
+    flag_set = get_cached_compiled_flags(team.project_id, version) if version is not None else None
+    cache_hit = True
+
+    if flag_set is None:
+        all_feature_flags = get_feature_flags_for_team_in_cache(team.project_id)
+        if all_feature_flags is None:
+            cache_hit = False
+            all_feature_flags = set_feature_flags_for_team_in_cache(team.project_id)
+        flag_set = CompiledFlagSet(all_feature_flags)
+        # The version is read before the flags, and bumped after they're written, so this never caches stale flags
+        if version is not None:
+            set_cached_compiled_flags(team.project_id, version, flag_set)
+
+    # Filter flags by keys if provided
+    if flag_keys is not None:
+        flag_set = flag_set.with_keys(flag_keys)
+
+    FLAG_CACHE_HIT_COUNTER.labels(team_id=label_for_team_id_to_track(team.id), cache_hit=cache_hit).inc()
+    return flag_set
+
+
 # Return feature flags
 def get_all_feature_flags(
     team: Team,
@@ -919,19 +963,8 @@ def get_all_feature_flags_with_details(
     property_value_overrides, group_property_value_overrides = add_local_person_and_group_properties(
         distinct_id, groups, property_value_overrides, group_property_value_overrides
     )
-    all_feature_flags = get_feature_flags_for_team_in_cache(team.project_id)
-    cache_hit = True
-
-    if all_feature_flags is None:
-        cache_hit = False
-        all_feature_flags = set_feature_flags_for_team_in_cache(team.project_id)
-
-    # Filter flags by keys if provided
-    if flag_keys is not None:
-        flag_keys_set = set(flag_keys)
-        all_feature_flags = [ff for ff in all_feature_flags if ff.key in flag_keys_set]
-
-    FLAG_CACHE_HIT_COUNTER.labels(team_id=label_for_team_id_to_track(team.id), cache_hit=cache_hit).inc()
+    flag_set = _get_feature_flags_to_evaluate(team, flag_keys)
+    all_feature_flags = flag_set.feature_flags
 
     flags_have_experience_continuity_enabled = any(
         feature_flag.ensure_experience_continuity for feature_flag in all_feature_flags
@@ -949,6 +982,7 @@ def get_all_feature_flags_with_details(
                 property_value_overrides=property_value_overrides,
                 group_property_value_overrides=group_property_value_overrides,
                 skip_database_flags=not is_database_alive,
+                compiled_flags=flag_set.compiled,
             )
 
     with start_span(op="with_experience_continuity_write_path"):
@@ -1057,6 +1091,7 @@ def get_all_feature_flags_with_details(
                 property_value_overrides=property_value_overrides,
                 group_property_value_overrides=group_property_value_overrides,
                 skip_database_flags=True,
+                compiled_flags=flag_set.compiled,
             )
 
     return _get_all_feature_flags(
@@ -1068,7 +1103,205 @@ def get_all_feature_flags_with_details(
         groups=groups,
         property_value_overrides=property_value_overrides,
         group_property_value_overrides=group_property_value_overrides,
+        compiled_flags=flag_set.compiled,
+    )
+
+
+def get_all_feature_flags_for_distinct_ids(
+    team: Team,
+    distinct_ids: list[str],
+    groups: Optional[dict[GroupTypeName, str]] = None,
+    property_value_overrides: Optional[dict[str, Union[str, int]]] = None,
+    group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
+    flag_keys: Optional[list[str]] = None,
+    chunk_size: int = FLAG_BATCH_EVALUATION_CHUNK_SIZE,
+) -> dict[str, tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]]:
+    """
+    Evaluates flags for many distinct IDs at once, e.g. to find out which users see a flag, with the same results as
+    `get_all_feature_flags` for each of them. Persons and their hash key overrides are fetched per chunk of distinct
+    IDs, and groups once, since the groups and overrides apply to all distinct IDs. Hash key overrides are only read.
+    """
+    if groups is None:
+        groups = {}
+    flag_set = _get_feature_flags_to_evaluate(team, flag_keys)
+    all_feature_flags = flag_set.feature_flags
+    if not all_feature_flags:
+        return {distinct_id: ({}, {}, {}, False) for distinct_id in distinct_ids}
+
+    cache = FlagsMatcherCache(team.project_id)
+    cohorts_cache: dict[int, CohortOrEmpty] = {}
+
+    def evaluate(
+        distinct_id: str, query_conditions: Optional[dict[str, bool]] = None, **kwargs
+    ) -> tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]:
+        person_property_values, group_property_values = add_local_person_and_group_properties(
+            distinct_id, groups, property_value_overrides, group_property_value_overrides or {}
+        )
+        matcher = FeatureFlagMatcher(
+            team.id,
+            team.project_id,
+            all_feature_flags,
+            distinct_id,
+            groups,
+            cache,
+            property_value_overrides=person_property_values,
+            group_property_value_overrides=group_property_values,
+            cohorts_cache=cohorts_cache,
+            prefetched_query_conditions=query_conditions,
+            compiled_flags=flag_set.compiled,
+            **kwargs,
+        )
+        if query_conditions is None:
+            # Conditions that can't be computed locally error, same as when the query fails for a single distinct ID
+            matcher.failed_to_fetch_conditions = True
+        flags, reasons, payloads, errors, _ = matcher.get_matches_with_details()
+        return flags, reasons, payloads, errors
+
+    if settings.DECIDE_SKIP_POSTGRES_FLAGS:
+        return {distinct_id: evaluate(distinct_id, skip_database_flags=True) for distinct_id in distinct_ids}
+
+    # Checked before building any queries, which would be wasted
+    try:
+        references_distinct_id = (
+            property_value_overrides is None or "distinct_id" not in property_value_overrides
+        ) and _conditions_reference_person_property(all_feature_flags, "distinct_id", cohorts_cache, team.project_id)
+    except Exception as e:
+        handle_feature_flag_exception(e, "[Feature Flags] Error loading cohorts of batch flag conditions")
+        references_distinct_id = True
+    if references_distinct_id:
+        # The distinct ID is an override that's different for each of them, so the queries can't be shared
+        return {
+            distinct_id: get_all_feature_flags(
+                team,
+                distinct_id,
+                groups,
+                property_value_overrides=property_value_overrides,
+                group_property_value_overrides=group_property_value_overrides,
+                flag_keys=flag_keys,
+            )
+            for distinct_id in distinct_ids
+        }
+
+    # Builds the queries for all distinct IDs, with the overrides that are the same for all of them
+    _, shared_group_property_values = add_local_person_and_group_properties(
+        None, groups, None, group_property_value_overrides or {}
+    )
+    query_matcher = FeatureFlagMatcher(
+        team.id,
+        team.project_id,
+        all_feature_flags,
+        "",
+        groups,
+        cache,
+        property_value_overrides=dict(property_value_overrides or {}),
+        group_property_value_overrides=shared_group_property_values,
+        cohorts_cache=cohorts_cache,
+        compiled_flags=flag_set.compiled,
     )
+    try:
+        with start_span(op="batch_query_conditions"):
+            shared_conditions: dict[str, bool] = {}
+            group_query_per_group_type_mapping = query_matcher.group_queries()
+            shared_conditions.update(query_matcher.group_exists_conditions(group_query_per_group_type_mapping))
+            person_query, person_fields = query_matcher.annotate_condition_queries(
+                Person.objects.db_manager(DATABASE_FOR_PERSONS).filter(team_id=team.id),
+                group_query_per_group_type_mapping,
+                shared_conditions,
+            )
+            shared_conditions.update(query_matcher.fetch_group_conditions(group_query_per_group_type_mapping))
+    except Exception as e:
+        handle_feature_flag_exception(e, "[Feature Flags] Error building batch flag conditions")
+        return {distinct_id: evaluate(distinct_id) for distinct_id in distinct_ids}
+
+    check_person_exists = PERSON_KEY in query_matcher.has_pure_is_not_conditions
+    flags_have_experience_continuity_enabled = any(
+        feature_flag.ensure_experience_continuity for feature_flag in all_feature_flags
+    )
+    results: dict[str, tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]] = {}
+    for chunk_start in range(0, len(distinct_ids), chunk_size):
+        chunk = distinct_ids[chunk_start : chunk_start + chunk_size]
+        try:
+            with start_span(op="execute_batch_person_query"):
+                with execute_with_timeout(FLAG_BATCH_QUERY_TIMEOUT_MS, DATABASE_FOR_PERSONS):
+                    person_rows = list(
+                        person_query.filter(
+                            persondistinctid__distinct_id__in=chunk,
+                            persondistinctid__team_id=team.id,
+                        ).values("id", "persondistinctid__distinct_id", *person_fields)
+                    )
+        except Exception as e:
+            handle_feature_flag_exception(e, "[Feature Flags] Error fetching batch flag conditions")
+            results.update({distinct_id: evaluate(distinct_id) for distinct_id in chunk})
+            continue
+
+        person_ids: dict[str, int] = {}
+        conditions: dict[str, dict[str, bool]] = {}
+        for row in person_rows:
+            distinct_id = row.pop("persondistinctid__distinct_id")
+            person_ids[distinct_id] = row.pop("id")
+            conditions[distinct_id] = {**shared_conditions, **row}
+
+        hash_key_overrides: Optional[dict[int, dict[str, str]]] = {}
+        if flags_have_experience_continuity_enabled and person_ids:
+            try:
+                with execute_with_timeout(FLAG_BATCH_QUERY_TIMEOUT_MS, DATABASE_FOR_FLAG_MATCHING):
+                    for person_id, feature_flag_key, hash_key in (
+                        FeatureFlagHashKeyOverride.objects.db_manager(DATABASE_FOR_FLAG_MATCHING)
+                        .filter(person_id__in=set(person_ids.values()), team_id=team.id)
+                        .values_list("person_id", "feature_flag_key", "hash_key")
+                    ):
+                        hash_key_overrides.setdefault(person_id, {})[feature_flag_key] = hash_key
+            except Exception as e:
+                handle_feature_flag_exception(e, "[Feature Flags] Error fetching batch hash key overrides")
+                # Same as for a single distinct ID, experience continuity flags can't be handled at all
+                hash_key_overrides = None
+
+        for distinct_id in chunk:
+            if hash_key_overrides is None:
+                results[distinct_id] = evaluate(distinct_id, skip_database_flags=True)
+                continue
+            query_conditions = conditions.get(distinct_id, shared_conditions)
+            if check_person_exists:
+                query_conditions = {
+                    **query_conditions,
+                    f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}": distinct_id in person_ids,
+                }
+            results[distinct_id] = evaluate(
+                distinct_id,
+                query_conditions,
+                hash_key_overrides=hash_key_overrides.get(person_ids.get(distinct_id, -1), {}),
+            )
+
+    return results
+
+
+def _conditions_reference_person_property(
+    feature_flags: list[FeatureFlag], key: str, cohorts_cache: dict[int, CohortOrEmpty], project_id: int
+) -> bool:
+    def references_key(properties: list[Property]) -> bool:
+        for property in properties:
+            if property.type == "cohort":
+                cohort_id = int(cast(Union[str, int], property.value))
+                if cohorts_cache.get(cohort_id) is None:
+                    cohorts_cache[cohort_id] = (
+                        Cohort.objects.db_manager(DATABASE_FOR_FLAG_MATCHING)
+                        .filter(pk=cohort_id, team__project_id=project_id, deleted=False)
+                        .first()
+                    ) or ""
+                cohort = cohorts_cache[cohort_id]
+                if cohort and references_key(cohort.properties.flat):
+                    return True
+            elif property.key == key:
+                return True
+        return False
+
+    for feature_flag in feature_flags:
+        if feature_flag.aggregation_group_type_index is not None:
+            continue
+        for condition in [*feature_flag.super_conditions, *feature_flag.conditions]:
+            if references_key(Filter(data=condition).property_groups.flat):
+                return True
+    return False
 
 
 def set_feature_flag_hash_key_overrides(team: Team, distinct_ids: list[str], hash_key_override: str) -> bool:
@@ -1221,13 +1454,6 @@ def add_local_person_and_group_properties(distinct_id, groups, person_properties
     return all_person_properties, all_group_properties
 
 
-def check_pure_is_not_operator_condition(condition: dict) -> bool:
-    properties = condition.get("properties", [])
-    if properties and all(prop.get("operator") in ("is_not_set", "is_not") for prop in properties):
-        return True
-    return False
-
-
 def check_flag_evaluation_query_is_ok(feature_flag: FeatureFlag, project_id: int) -> bool:
     # TRICKY: There are some cases where the regex is valid re2 syntax, but postgresql doesn't like it.
     # This function tries to validate such cases. See `test_cant_create_flag_with_data_that_fails_to_query` for an example.
@@ -3678,6 +3678,9 @@ class ActorsQueryResponse(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: int
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
@@ -4202,6 +4205,9 @@ class CachedActorsQueryResponse(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     next_allowed_client_refresh: datetime
     offset: int
     query_status: Optional[QueryStatus] = Field(
@@ -4299,8 +4305,18 @@ class CachedEventsQueryResponse(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     next_allowed_client_refresh: datetime
     offset: Optional[int] = None
+    persons: Optional[list[dict[str, Any]]] = Field(
+        default=None,
+        description=(
+            "Persons of the `person` columns when `personsSideTable` is set, each only once. Rows refer to them by"
+            " `person_index`"
+        ),
+    )
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
     )
@@ -5116,7 +5132,17 @@ class Response(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: Optional[int] = None
+    persons: Optional[list[dict[str, Any]]] = Field(
+        default=None,
+        description=(
+            "Persons of the `person` columns when `personsSideTable` is set, each only once. Rows refer to them by"
+            " `person_index`"
+        ),
+    )
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
     )
@@ -5143,6 +5169,9 @@ class Response1(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: int
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
@@ -5613,7 +5642,17 @@ class EventsQueryResponse(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: Optional[int] = None
+    persons: Optional[list[dict[str, Any]]] = Field(
+        default=None,
+        description=(
+            "Persons of the `person` columns when `personsSideTable` is set, each only once. Rows refer to them by"
+            " `person_index`"
+        ),
+    )
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
     )
@@ -5910,7 +5949,17 @@ class QueryResponseAlternative1(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: Optional[int] = None
+    persons: Optional[list[dict[str, Any]]] = Field(
+        default=None,
+        description=(
+            "Persons of the `person` columns when `personsSideTable` is set, each only once. Rows refer to them by"
+            " `person_index`"
+        ),
+    )
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
     )
@@ -5937,6 +5986,9 @@ class QueryResponseAlternative2(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: int
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
@@ -6267,7 +6319,17 @@ class QueryResponseAlternative28(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: Optional[int] = None
+    persons: Optional[list[dict[str, Any]]] = Field(
+        default=None,
+        description=(
+            "Persons of the `person` columns when `personsSideTable` is set, each only once. Rows refer to them by"
+            " `person_index`"
+        ),
+    )
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
     )
@@ -6294,6 +6356,9 @@ class QueryResponseAlternative29(BaseModel):
     modifiers: Optional[HogQLQueryModifiers] = Field(
         default=None, description="Modifiers used when performing the query"
     )
+    nextCursor: Optional[str] = Field(
+        default=None, description="Cursor to pass as `cursor` to get the next page, if there are more results"
+    )
     offset: int
     query_status: Optional[QueryStatus] = Field(
         default=None, description="Query status indicates whether next to the provided data, a query is still running."
@@ -9982,6 +10047,13 @@ class ActorsQuery(BaseModel):
     model_config = ConfigDict(
         extra="forbid",
     )
+    cursor: Optional[str] = Field(
+        default=None,
+        description=(
+            "Cursor returned as `nextCursor` by the previous page. Pages from after the row it points to, instead of"
+            " using `offset`"
+        ),
+    )
     fixedProperties: Optional[
         list[Union[PersonPropertyFilter, CohortPropertyFilter, HogQLPropertyFilter, EmptyPropertyFilter]]
     ] = Field(
@@ -10025,6 +10097,13 @@ class EventsQuery(BaseModel):
     actionId: Optional[int] = Field(default=None, description="Show events matching a given action")
     after: Optional[str] = Field(default=None, description="Only fetch events that happened after this timestamp")
     before: Optional[str] = Field(default=None, description="Only fetch events that happened before this timestamp")
+    cursor: Optional[str] = Field(
+        default=None,
+        description=(
+            "Cursor returned as `nextCursor` by the previous page. Pages from after the row it points to, instead of"
+            " using `offset`"
+        ),
+    )
     event: Optional[str] = Field(default=None, description="Limit to events matching this string")
     filterTestAccounts: Optional[bool] = Field(default=None, description="Filter test accounts")
     fixedProperties: Optional[
@@ -10064,6 +10143,12 @@ class EventsQuery(BaseModel):
     offset: Optional[int] = Field(default=None, description="Number of rows to skip before returning rows")
     orderBy: Optional[list[str]] = Field(default=None, description="Columns to order by")
     personId: Optional[str] = Field(default=None, description="Show events for a given person")
+    personsSideTable: Optional[bool] = Field(
+        default=None,
+        description=(
+            "Return each person of the `person` columns once in `persons` of the response, instead of in every row"
+        ),
+    )
     properties: Optional[
         list[
             Union[
@@ -60,7 +60,7 @@ from posthog.session_recordings.realtime_snapshots import (
     get_realtime_snapshots,
     publish_subscription,
 )
-from posthog.storage import object_storage, session_recording_v2_object_storage
+from posthog.storage import object_storage
 from posthog.session_recordings.ai_data.ai_regex_schema import AiRegexSchema
 from posthog.session_recordings.ai_data.ai_regex_prompts import AI_REGEX_PROMPTS
 from posthog.settings.session_replay import SESSION_REPLAY_AI_REGEX_MODEL
@@ -71,7 +71,11 @@ from openai.types.chat import (
     ChatCompletionAssistantMessageParam,
 )
 from posthog.session_recordings.utils import clean_prompt_whitespace
-from posthog.session_recordings.session_recording_v2_service import list_blocks
+from posthog.session_recordings.session_recording_v2_service import (
+    fetch_block,
+    list_blocks_cached,
+    prefetch_blocks,
+)
 from posthog.storage.session_recording_v2_object_storage import BlockFetchError
 from posthog.exceptions_capture import capture_exception
 
@@ -710,7 +714,8 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
         blob_prefix = ""
 
         if is_v2_enabled:
-            blocks = list_blocks(recording)
+            # The client requests blocks by index next, so refresh the cached list they will be looked up in
+            blocks = list_blocks_cached(recording, refresh=True)
             for i, block in enumerate(blocks):
                 sources.append(
                     {
@@ -927,7 +932,11 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
         )
 
         with STREAM_RESPONSE_TO_CLIENT_HISTOGRAM.time():
-            blocks = list_blocks(recording)
+            blocks = list_blocks_cached(recording)
+            if block_index >= len(blocks):
+                # The cached list might be outdated
+                blocks = list_blocks_cached(recording, refresh=True)
+
             if not blocks:
                 raise exceptions.NotFound("Session recording not found")
 
@@ -935,8 +944,9 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
                 raise exceptions.NotFound("Block index out of range")
 
             block = blocks[block_index]
+            prefetch_blocks(blocks, block_index)
             try:
-                decompressed_block = session_recording_v2_object_storage.client().fetch_block(block["url"])
+                decompressed_block = fetch_block(block)
             except BlockFetchError:
                 logger.exception(
                     "Failed to fetch block",
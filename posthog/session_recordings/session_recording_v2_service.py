@@ -1,12 +1,32 @@
-from datetime import datetime
-from typing import TypedDict
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from typing import Optional, TypedDict
+
 import structlog
+from cachetools import LRUCache
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter
 
 from posthog.session_recordings.models.session_recording import SessionRecording
 from posthog.session_recordings.queries.session_replay_events import SessionReplayEvents
+from posthog.storage import session_recording_v2_object_storage
+from posthog.storage.session_recording_v2_object_storage import BlockFetchError
 
 logger = structlog.get_logger(__name__)
 
+SESSION_RECORDING_V2_CACHE_COUNTER = Counter(
+    "posthog_session_recording_v2_cache",
+    "Whether recording block lists and prefetched blocks were served from cache",
+    labelnames=["cache", "result"],
+)
+
+# Same proxy for a live session as in the recordings list: data received in the last five minutes
+ONGOING_RECORDING_WINDOW = timedelta(minutes=5)
+
+PREFETCH_WORKERS = 4
+
 
 class RecordingBlock(TypedDict):
     start_time: datetime
@@ -59,3 +79,105 @@ def list_blocks(recording: SessionRecording) -> list[RecordingBlock]:
         return []
 
     return blocks
+
+
+def _block_list_cache_key(recording: SessionRecording) -> str:
+    return f"@posthog/replay/v2-blocks/team-{recording.team.id}/{recording.session_id}"
+
+
+def _is_ongoing(blocks: list[RecordingBlock]) -> bool:
+    if not blocks:
+        return True
+    last_end_time = max(block["end_time"] for block in blocks)
+    if last_end_time.tzinfo is None:
+        last_end_time = last_end_time.replace(tzinfo=UTC)
+    return last_end_time >= datetime.now(UTC) - ONGOING_RECORDING_WINDOW
+
+
+def list_blocks_cached(recording: SessionRecording, *, refresh: bool = False) -> list[RecordingBlock]:
+    """
+    Same as `list_blocks`, cached for a short while, as the blocks of a recording are loaded one request at a time.
+    Ongoing recordings aren't cached, as new blocks can still show up. Pass `refresh` to skip the cached value.
+    """
+    cache_key = _block_list_cache_key(recording)
+    if not refresh:
+        blocks: Optional[list[RecordingBlock]] = cache.get(cache_key)
+        if blocks is not None:
+            SESSION_RECORDING_V2_CACHE_COUNTER.labels(cache="block_list", result="hit").inc()
+            return blocks
+        SESSION_RECORDING_V2_CACHE_COUNTER.labels(cache="block_list", result="miss").inc()
+
+    blocks = list_blocks(recording)
+    if _is_ongoing(blocks):
+        cache.delete(cache_key)
+    else:
+        cache.set(cache_key, blocks, timeout=settings.SESSION_RECORDING_V2_BLOCK_LIST_CACHE_TTL_SECONDS)
+    return blocks
+
+
+# Blocks fetched ahead of time, by URL. Bounded by (decompressed) size, and only local to this process.
+_block_cache: LRUCache[str, str] = LRUCache(maxsize=settings.SESSION_RECORDING_V2_BLOCK_CACHE_MAX_BYTES, getsizeof=len)
+_prefetching: dict[str, Future[str]] = {}
+_block_cache_lock = threading.Lock()
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="replay-prefetch")
+    return _prefetch_executor
+
+
+def _prefetch_block(block_url: str) -> str:
+    try:
+        decompressed_block = session_recording_v2_object_storage.client().fetch_block(block_url)
+        with _block_cache_lock:
+            if len(decompressed_block) <= _block_cache.maxsize:
+                _block_cache[block_url] = decompressed_block
+        return decompressed_block
+    finally:
+        with _block_cache_lock:
+            _prefetching.pop(block_url, None)
+
+
+def prefetch_blocks(blocks: list[RecordingBlock], block_index: int) -> None:
+    """Starts fetching the blocks following `block_index` in the background, if prefetching is turned on."""
+    count = settings.SESSION_RECORDING_V2_BLOCK_PREFETCH_COUNT
+    if count <= 0:
+        return
+
+    for block in blocks[block_index + 1 : block_index + 1 + count]:
+        block_url = block["url"]
+        with _block_cache_lock:
+            if block_url in _block_cache or block_url in _prefetching:
+                continue
+            _prefetching[block_url] = _get_prefetch_executor().submit(_prefetch_block, block_url)
+
+
+def fetch_block(block: RecordingBlock) -> str:
+    """Returns the decompressed block, from the prefetched blocks if it's there."""
+    block_url = block["url"]
+    with _block_cache_lock:
+        decompressed_block = _block_cache.get(block_url)
+        in_flight = _prefetching.get(block_url)
+
+    if decompressed_block is not None:
+        SESSION_RECORDING_V2_CACHE_COUNTER.labels(cache="block", result="hit").inc()
+        return decompressed_block
+
+    if in_flight is not None:
+        try:
+            decompressed_block = in_flight.result()
+            SESSION_RECORDING_V2_CACHE_COUNTER.labels(cache="block", result="in_flight").inc()
+            return decompressed_block
+        except BlockFetchError:
+            pass  # Let's try again, raising if it still fails
+
+    SESSION_RECORDING_V2_CACHE_COUNTER.labels(cache="block", result="miss").inc()
+    return session_recording_v2_object_storage.client().fetch_block(block_url)
+
+
+def clear_block_cache() -> None:
+    with _block_cache_lock:
+        _block_cache.clear()
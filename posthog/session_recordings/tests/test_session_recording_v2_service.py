@@ -1,11 +1,19 @@
 from datetime import datetime
 from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from freezegun import freeze_time
 
 from posthog.session_recordings.models.session_recording import SessionRecording
-from posthog.session_recordings.session_recording_v2_service import list_blocks
+from posthog.session_recordings.session_recording_v2_service import (
+    clear_block_cache,
+    fetch_block,
+    list_blocks,
+    list_blocks_cached,
+    prefetch_blocks,
+    RecordingBlock,
+)
 
 
 class TestSessionRecordingV2Service(TestCase):
@@ -102,3 +110,66 @@ class TestSessionRecordingV2Service(TestCase):
         self.assertEqual(blocks[0]["url"], "s3://bucket/key1")
         self.assertEqual(blocks[1]["url"], "s3://bucket/key3")
         self.assertEqual(blocks[2]["url"], "s3://bucket/key2")
+
+
+FINISHED_RECORDING_METADATA = {
+    "block_first_timestamps": [datetime(2024, 1, 1, 12, 0), datetime(2024, 1, 1, 12, 1)],
+    "block_last_timestamps": [datetime(2024, 1, 1, 12, 1), datetime(2024, 1, 1, 12, 2)],
+    "block_urls": ["s3://bucket/key1", "s3://bucket/key2"],
+    "start_time": datetime(2024, 1, 1, 12, 0),
+}
+
+
+class TestSessionRecordingV2BlockCaching(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_block_cache()
+        self.team = Mock(id=1)
+        self.recording = Mock(spec=SessionRecording)
+        self.recording.session_id = "test_id"
+        self.recording.team = self.team
+
+    @freeze_time("2024-01-01T13:00:00Z")
+    @patch("posthog.session_recordings.session_recording_v2_service.SessionReplayEvents")
+    def test_block_list_of_finished_recording_is_cached(self, mock_replay_events):
+        mock_replay_events.return_value.get_metadata.return_value = FINISHED_RECORDING_METADATA
+
+        first = list_blocks_cached(self.recording)
+        second = list_blocks_cached(self.recording)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(mock_replay_events.return_value.get_metadata.call_count, 1)
+
+        list_blocks_cached(self.recording, refresh=True)
+        self.assertEqual(mock_replay_events.return_value.get_metadata.call_count, 2)
+
+    @freeze_time("2024-01-01T12:03:00Z")
+    @patch("posthog.session_recordings.session_recording_v2_service.SessionReplayEvents")
+    def test_block_list_of_ongoing_recording_is_not_cached(self, mock_replay_events):
+        mock_replay_events.return_value.get_metadata.return_value = FINISHED_RECORDING_METADATA
+
+        list_blocks_cached(self.recording)
+        list_blocks_cached(self.recording)
+
+        self.assertEqual(mock_replay_events.return_value.get_metadata.call_count, 2)
+
+    @override_settings(SESSION_RECORDING_V2_BLOCK_PREFETCH_COUNT=1)
+    @patch("posthog.session_recordings.session_recording_v2_service.session_recording_v2_object_storage")
+    def test_prefetched_blocks_are_served_from_memory(self, mock_storage):
+        mock_storage.client.return_value.fetch_block.side_effect = lambda url: f"content of {url}"
+        blocks: list[RecordingBlock] = [
+            {"start_time": start, "end_time": end, "url": url}
+            for start, end, url in zip(
+                FINISHED_RECORDING_METADATA["block_first_timestamps"],
+                FINISHED_RECORDING_METADATA["block_last_timestamps"],
+                FINISHED_RECORDING_METADATA["block_urls"],
+            )
+        ]
+
+        prefetch_blocks(blocks, 0)
+        self.assertEqual(fetch_block(blocks[1]), "content of s3://bucket/key2")
+        mock_storage.client.return_value.fetch_block.reset_mock()
+
+        self.assertEqual(fetch_block(blocks[1]), "content of s3://bucket/key2")
+        mock_storage.client.return_value.fetch_block.assert_not_called()
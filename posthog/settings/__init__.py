@@ -111,6 +111,30 @@ PROM_PUSHGATEWAY_ADDRESS: str | None = os.getenv("PROM_PUSHGATEWAY_ADDRESS", Non
 
 HOGQL_INCREASED_MAX_EXECUTION_TIME: int = get_from_env("HOGQL_INCREASED_MAX_EXECUTION_TIME", 600, type_cast=int)
 
+# Per-team cache of built HogQL `Database` objects, invalidated through a version counter in Redis
+HOGQL_DATABASE_CACHE_ENABLED: bool = get_from_env("HOGQL_DATABASE_CACHE_ENABLED", not TEST, type_cast=str_to_bool)
+HOGQL_DATABASE_CACHE_MAX_SIZE: int = get_from_env("HOGQL_DATABASE_CACHE_MAX_SIZE", 256, type_cast=int)
+HOGQL_DATABASE_CACHE_TTL_SECONDS: int = get_from_env("HOGQL_DATABASE_CACHE_TTL_SECONDS", 300, type_cast=int)
+
+# Cache of HogQL queries compiled to ClickHouse SQL. Can be turned off per team with the
+# `disable-hogql-compiled-query-cache` feature flag.
+HOGQL_COMPILED_QUERY_CACHE_ENABLED: bool = get_from_env(
+    "HOGQL_COMPILED_QUERY_CACHE_ENABLED", not TEST, type_cast=str_to_bool
+)
+HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS: int = get_from_env("HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS", 600, type_cast=int)
+
+# Short-lived per-team cache of the persons that `person` columns of events queries are filled in with
+EVENTS_QUERY_PERSON_CACHE_ENABLED: bool = get_from_env(
+    "EVENTS_QUERY_PERSON_CACHE_ENABLED", not TEST, type_cast=str_to_bool
+)
+EVENTS_QUERY_PERSON_CACHE_MAX_SIZE: int = get_from_env("EVENTS_QUERY_PERSON_CACHE_MAX_SIZE", 50_000, type_cast=int)
+EVENTS_QUERY_PERSON_CACHE_TTL_SECONDS: int = get_from_env("EVENTS_QUERY_PERSON_CACHE_TTL_SECONDS", 30, type_cast=int)
+
+# Single-flight for query runner calculations: concurrent runs of the same query wait for the first one
+QUERY_COALESCING_ENABLED: bool = get_from_env("QUERY_COALESCING_ENABLED", not TEST, type_cast=str_to_bool)
+QUERY_COALESCING_LEASE_TTL_SECONDS: int = get_from_env("QUERY_COALESCING_LEASE_TTL_SECONDS", 600, type_cast=int)
+QUERY_COALESCING_WAIT_TIMEOUT_SECONDS: int = get_from_env("QUERY_COALESCING_WAIT_TIMEOUT_SECONDS", 30, type_cast=int)
+
 # Extend and override these settings with EE's ones
 if "ee.apps.EnterpriseConfig" in INSTALLED_APPS:
     from ee.settings import *  # noqa: F401, F403
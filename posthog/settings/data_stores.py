@@ -189,6 +189,27 @@ QUERYSERVICE_VERIFY: bool = get_from_env("QUERYSERVICE_VERIFY", CLICKHOUSE_VERIF
 CLICKHOUSE_CONN_POOL_MIN: int = get_from_env("CLICKHOUSE_CONN_POOL_MIN", 20, type_cast=int)
 CLICKHOUSE_CONN_POOL_MAX: int = get_from_env("CLICKHOUSE_CONN_POOL_MAX", 1000, type_cast=int)
 
+# Client side resilience of ClickHouse queries, see posthog/clickhouse/client/resilience.py
+CLICKHOUSE_QUERY_MAX_RETRIES: int = get_from_env("CLICKHOUSE_QUERY_MAX_RETRIES", 0 if TEST else 2, type_cast=int)
+CLICKHOUSE_QUERY_RETRY_BACKOFF_SECONDS: float = get_from_env(
+    "CLICKHOUSE_QUERY_RETRY_BACKOFF_SECONDS", 0.2, type_cast=float
+)
+CLICKHOUSE_CIRCUIT_BREAKER_ENABLED: bool = get_from_env(
+    "CLICKHOUSE_CIRCUIT_BREAKER_ENABLED", not TEST, type_cast=str_to_bool
+)
+CLICKHOUSE_CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = get_from_env(
+    "CLICKHOUSE_CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5, type_cast=int
+)
+CLICKHOUSE_CIRCUIT_BREAKER_RESET_SECONDS: float = get_from_env(
+    "CLICKHOUSE_CIRCUIT_BREAKER_RESET_SECONDS", 30, type_cast=float
+)
+# Hedged reads send ONLINE queries again when they take longer than this percentile of recent queries
+CLICKHOUSE_HEDGED_READS_ENABLED: bool = get_from_env("CLICKHOUSE_HEDGED_READS_ENABLED", False, type_cast=str_to_bool)
+CLICKHOUSE_HEDGED_READS_PERCENTILE: float = get_from_env("CLICKHOUSE_HEDGED_READS_PERCENTILE", 95, type_cast=float)
+CLICKHOUSE_HEDGED_READS_MIN_SAMPLES: int = get_from_env("CLICKHOUSE_HEDGED_READS_MIN_SAMPLES", 100, type_cast=int)
+CLICKHOUSE_HEDGED_READS_WINDOW_SIZE: int = get_from_env("CLICKHOUSE_HEDGED_READS_WINDOW_SIZE", 1000, type_cast=int)
+CLICKHOUSE_HEDGED_READS_MAX_WORKERS: int = get_from_env("CLICKHOUSE_HEDGED_READS_MAX_WORKERS", 32, type_cast=int)
+
 CLICKHOUSE_STABLE_HOST: str = get_from_env("CLICKHOUSE_STABLE_HOST", CLICKHOUSE_HOST)
 # If enabled, some queries will use system.cluster table to query each shard
 CLICKHOUSE_ALLOW_PER_SHARD_EXECUTION: bool = get_from_env(
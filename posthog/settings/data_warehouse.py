@@ -14,6 +14,34 @@ BUCKET = "test-pipeline"
 
 PYARROW_DEBUG_LOGGING = get_from_env("PYARROW_DEBUG_LOGGING", False, type_cast=str_to_bool)
 
+# Read from the source in a separate thread while writing the previous chunks to Delta
+DATA_IMPORT_PIPELINED_WRITES = get_from_env("DATA_IMPORT_PIPELINED_WRITES", False, type_cast=str_to_bool)
+# Size of the tables read ahead of the Delta writes
+DATA_IMPORT_PIPELINE_QUEUE_MAX_BYTES = get_from_env(
+    "DATA_IMPORT_PIPELINE_QUEUE_MAX_BYTES", 256 * 1024 * 1024, type_cast=int
+)
+# Garbage is only collected between chunks once the Arrow memory pool has at least this much allocated
+DATA_IMPORT_GC_THRESHOLD_BYTES = get_from_env("DATA_IMPORT_GC_THRESHOLD_BYTES", 1024 * 1024 * 1024, type_cast=int)
+
+# Materialize data modeling saved queries by streaming Arrow record batches from ClickHouse straight into Delta,
+# instead of loading all rows in memory and running them through dlt
+DATA_MODELING_STREAMING_MATERIALIZATION = get_from_env(
+    "DATA_MODELING_STREAMING_MATERIALIZATION", False, type_cast=str_to_bool
+)
+# Incrementally materialized saved queries are rebuilt from scratch when their last full rebuild is this old
+DATA_MODELING_FULL_REBUILD_INTERVAL_HOURS = get_from_env(
+    "DATA_MODELING_FULL_REBUILD_INTERVAL_HOURS", 7 * 24, type_cast=int
+)
+# Number of models of a team's DAG that are materialized at the same time, overridden per team with "team_id:count"
+DATA_MODELING_MAX_CONCURRENT_MODELS = get_from_env("DATA_MODELING_MAX_CONCURRENT_MODELS", 4, type_cast=int)
+DATA_MODELING_MAX_CONCURRENT_MODELS_OVERRIDES: dict[int, int] = dict(
+    [map(int, o.split(":")) for o in os.getenv("DATA_MODELING_MAX_CONCURRENT_MODELS_OVERRIDES", "").split(",") if o]  # type: ignore
+)
+# ClickHouse max_memory_usage of each materialization query, 4x the /query endpoint async workers
+DATA_MODELING_MAX_MEMORY_USAGE = get_from_env("DATA_MODELING_MAX_MEMORY_USAGE", 180 * 1000 * 1000 * 1000, type_cast=int)
+# Total ClickHouse memory that the models of a DAG running at the same time can use
+DATA_MODELING_MEMORY_BUDGET = get_from_env("DATA_MODELING_MEMORY_BUDGET", 4 * 180 * 1000 * 1000 * 1000, type_cast=int)
+
 # Temporary, using it to maintain existing teams in old  bigquery source.
 # After further testing this will be removed and all teams moved to new source.
 OLD_BIGQUERY_SOURCE_TEAM_IDS: list[str] = get_list(os.getenv("OLD_BIGQUERY_SOURCE_TEAM_IDS", ""))
@@ -28,3 +28,14 @@ SESSION_RECORDING_V2_S3_REGION = os.getenv("SESSION_RECORDING_V2_S3_REGION", "us
 SESSION_RECORDING_V2_S3_BUCKET = os.getenv("SESSION_RECORDING_V2_S3_BUCKET", "posthog")
 SESSION_RECORDING_V2_S3_PREFIX = os.getenv("SESSION_RECORDING_V2_S3_PREFIX", "session_recordings_v2")
 SESSION_RECORDING_V2_S3_LTS_PREFIX = os.getenv("SESSION_RECORDING_V2_S3_LTS_PREFIX", "session_recordings_v2_lts")
+
+# How long the list of blocks of a finished recording is cached for, while its blocks are being loaded
+SESSION_RECORDING_V2_BLOCK_LIST_CACHE_TTL_SECONDS = get_from_env(
+    "SESSION_RECORDING_V2_BLOCK_LIST_CACHE_TTL_SECONDS", 120, type_cast=int
+)
+# When loading a block, fetch this many of the following blocks in the background. 0 turns prefetching off.
+SESSION_RECORDING_V2_BLOCK_PREFETCH_COUNT = get_from_env("SESSION_RECORDING_V2_BLOCK_PREFETCH_COUNT", 0, type_cast=int)
+# Upper bound for the decompressed blocks kept in memory by each process for prefetching
+SESSION_RECORDING_V2_BLOCK_CACHE_MAX_BYTES = get_from_env(
+    "SESSION_RECORDING_V2_BLOCK_CACHE_MAX_BYTES", 64 * 1024 * 1024, type_cast=int
+)
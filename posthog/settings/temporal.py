@@ -1,6 +1,6 @@
 import os
 
-from posthog.settings.utils import get_from_env, get_list
+from posthog.settings.utils import get_from_env, get_list, str_to_bool
 
 TEMPORAL_NAMESPACE: str = os.getenv("TEMPORAL_NAMESPACE", "default")
 TEMPORAL_TASK_QUEUE: str = os.getenv("TEMPORAL_TASK_QUEUE", "general-purpose-task-queue")
@@ -32,6 +32,18 @@ BATCH_EXPORT_POSTGRES_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
 BATCH_EXPORT_POSTGRES_RECORD_BATCH_QUEUE_MAX_SIZE_BYTES: int = get_from_env(
     "BATCH_EXPORT_POSTGRES_RECORD_BATCH_QUEUE_MAX_SIZE_BYTES", 1024 * 1024 * 300, type_cast=int
 )
+# Copy into PostgreSQL with binary COPY instead of TSV, when every column of the destination table has a supported type
+BATCH_EXPORT_POSTGRES_USE_BINARY_COPY: bool = get_from_env(
+    "BATCH_EXPORT_POSTGRES_USE_BINARY_COPY", False, type_cast=str_to_bool
+)
+# Binary COPYs of at least BATCH_EXPORT_POSTGRES_PARALLEL_COPY_MIN_BYTES are split over up to this many connections.
+# Each connection commits its part on its own, so a failed COPY can leave some of its parts in the destination table.
+BATCH_EXPORT_POSTGRES_COPY_MAX_CONNECTIONS: int = get_from_env(
+    "BATCH_EXPORT_POSTGRES_COPY_MAX_CONNECTIONS", 1, type_cast=int
+)
+BATCH_EXPORT_POSTGRES_PARALLEL_COPY_MIN_BYTES: int = get_from_env(
+    "BATCH_EXPORT_POSTGRES_PARALLEL_COPY_MIN_BYTES", 1024 * 1024 * 16, type_cast=int
+)
 
 BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 100  # 100MB
 BATCH_EXPORT_BIGQUERY_RECORD_BATCH_QUEUE_MAX_SIZE_BYTES: int = get_from_env(
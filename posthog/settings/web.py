@@ -399,6 +399,13 @@ DECIDE_SHORT_CIRCUITED_TEAM_IDS = [0]
 # Decide db settings
 DECIDE_SKIP_POSTGRES_FLAGS = get_from_env("DECIDE_SKIP_POSTGRES_FLAGS", False, type_cast=str_to_bool)
 
+# Per-project cache of compiled flag definitions, invalidated through a version counter in Redis
+DECIDE_COMPILED_FLAGS_CACHE_ENABLED = get_from_env(
+    "DECIDE_COMPILED_FLAGS_CACHE_ENABLED", not TEST, type_cast=str_to_bool
+)
+DECIDE_COMPILED_FLAGS_CACHE_MAX_SIZE = get_from_env("DECIDE_COMPILED_FLAGS_CACHE_MAX_SIZE", 1024, type_cast=int)
+DECIDE_COMPILED_FLAGS_CACHE_TTL_SECONDS = get_from_env("DECIDE_COMPILED_FLAGS_CACHE_TTL_SECONDS", 300, type_cast=int)
+
 # Decide billing analytics
 DECIDE_BILLING_SAMPLING_RATE = get_from_env("DECIDE_BILLING_SAMPLING_RATE", 0.1, type_cast=float)
 DECIDE_BILLING_ANALYTICS_TOKEN = get_from_env("DECIDE_BILLING_ANALYTICS_TOKEN", None, type_cast=str, optional=True)
@@ -1,14 +1,20 @@
 import abc
-from typing import Optional, Union
+from typing import IO, Optional, Union
 
 import structlog
 from boto3 import client
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from django.conf import settings
 from posthog.exceptions_capture import capture_exception
 
 logger = structlog.get_logger(__name__)
 
+# Files are uploaded in parts of this size, so only a few parts are in memory at once however big the file is
+MULTIPART_UPLOAD_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024, max_concurrency=4
+)
+
 
 class ObjectStorageError(Exception):
     pass
@@ -42,7 +48,8 @@ class ObjectStorageClient(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def write(self, bucket: str, key: str, content: Union[str, bytes], extras: dict | None) -> None:
+    def write(self, bucket: str, key: str, content: Union[str, bytes, IO[bytes]], extras: dict | None) -> None:
+        """Writes the content, uploading it in parts when it's a file."""
         pass
 
     @abc.abstractmethod
@@ -72,7 +79,7 @@ class UnavailableStorage(ObjectStorageClient):
     def tag(self, bucket: str, key: str, tags: dict[str, str]) -> None:
         pass
 
-    def write(self, bucket: str, key: str, content: Union[str, bytes], extras: dict | None) -> None:
+    def write(self, bucket: str, key: str, content: Union[str, bytes, IO[bytes]], extras: dict | None) -> None:
         pass
 
     def copy_objects(self, bucket: str, source_prefix: str, target_prefix: str) -> int | None:
@@ -155,10 +162,13 @@ class ObjectStorage(ObjectStorageClient):
             capture_exception(e)
             raise ObjectStorageError("tag failed") from e
 
-    def write(self, bucket: str, key: str, content: Union[str, bytes], extras: dict | None) -> None:
+    def write(self, bucket: str, key: str, content: Union[str, bytes, IO[bytes]], extras: dict | None) -> None:
         s3_response = {}
         try:
-            s3_response = self.aws_client.put_object(Bucket=bucket, Body=content, Key=key, **(extras or {}))
+            if isinstance(content, str | bytes):
+                s3_response = self.aws_client.put_object(Bucket=bucket, Body=content, Key=key, **(extras or {}))
+            else:
+                self.aws_client.upload_fileobj(content, bucket, key, ExtraArgs=extras, Config=MULTIPART_UPLOAD_CONFIG)
         except Exception as e:
             logger.exception(
                 "object_storage.write_failed",
@@ -218,7 +228,9 @@ def object_storage_client() -> ObjectStorageClient:
     return _client
 
 
-def write(file_name: str, content: Union[str, bytes], extras: dict | None = None, bucket: str | None = None) -> None:
+def write(
+    file_name: str, content: Union[str, bytes, IO[bytes]], extras: dict | None = None, bucket: str | None = None
+) -> None:
     return object_storage_client().write(
         bucket=bucket or settings.OBJECT_STORAGE_BUCKET,
         key=file_name,
@@ -1,7 +1,11 @@
+import csv
 import datetime
+import gzip
 import io
-from typing import Any, Optional
-from collections.abc import Generator
+import pickle
+import tempfile
+from typing import IO, Any, Optional
+from collections.abc import Generator, Iterator
 from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
 
 from pydantic import BaseModel
@@ -9,6 +13,7 @@ import requests
 import structlog
 from openpyxl import Workbook
 from django.http import QueryDict
+from django.utils.timezone import now
 from sentry_sdk import push_scope
 from requests.exceptions import HTTPError
 
@@ -17,7 +22,7 @@ from posthog.api.services.query import process_query_dict
 from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.jwt import PosthogJwtAudience, encode_jwt
 from posthog.models.exported_asset import ExportedAsset, save_content
-from posthog.utils import absolute_uri
+from posthog.utils import absolute_uri, relative_date_parse
 from .ordered_csv_renderer import OrderedCsvRenderer
 from ..exporter import (
     EXPORT_FAILED_COUNTER,
@@ -26,7 +31,13 @@ from ..exporter import (
     EXPORT_TIMER,
 )
 from ...exceptions import QuerySizeExceeded
-from ...hogql.constants import CSV_EXPORT_LIMIT, CSV_EXPORT_BREAKDOWN_LIMIT_INITIAL, CSV_EXPORT_BREAKDOWN_LIMIT_LOW
+from ...hogql.constants import (
+    CSV_EXPORT_LIMIT,
+    CSV_EXPORT_BREAKDOWN_LIMIT_INITIAL,
+    CSV_EXPORT_BREAKDOWN_LIMIT_LOW,
+    CSV_EXPORT_PAGE_SIZE,
+    get_max_limit_for_context,
+)
 from ...hogql.query import LimitContext
 
 logger = structlog.get_logger(__name__)
@@ -34,6 +45,12 @@ logger = structlog.get_logger(__name__)
 RESULT_LIMIT_KEYS = ("distinct_ids",)
 RESULT_LIMIT_LENGTH = 10
 
+# Queries that can return their results a page at a time, with the cursor of the previous page
+PAGINATED_QUERY_KINDS = ("EventsQuery", "ActorsQuery")
+
+# Exports are kept in memory up to this size, and in temporary files on disk after
+SPOOLED_FILE_MAX_MEMORY_SIZE = 8 * 1024 * 1024
+
 
 # SUPPORTED CSV TYPES
 
@@ -55,9 +72,10 @@ RESULT_LIMIT_LENGTH = 10
 # HOW DOES THIS WORK
 # 1. We receive an export task with a given resource uri (identical to the API)
 # 2. We call the actual API to load the data with the given params so that we receive a paginateable response
-# 3. We save the response to a chunk in object storage and then load the `next` page of results
+# 3. We write the rows of the response to a temporary file and then load the `next` page of results
 # 4. Repeat until exhausted or limit reached
-# 5. We save the final blob output and update the ExportedAsset
+# 5. We write the output from the temporary file, compressing CSVs as they're written, upload it to object storage in
+#    parts and update the ExportedAsset
 
 
 def add_query_params(url: str, params: dict[str, str]) -> str:
@@ -270,18 +288,70 @@ def get_from_insights_api(exported_asset: ExportedAsset, limit: int, resource: d
         next_url = data.get("next")
 
 
+def _process_export_query(exported_asset: ExportedAsset, query: dict) -> dict:
+    query_response = process_query_dict(
+        team=exported_asset.team,
+        query_json=query,
+        limit_context=LimitContext.EXPORT,
+        execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS,
+    )
+    if isinstance(query_response, BaseModel):
+        query_response = query_response.model_dump(by_alias=True)
+    return query_response
+
+
+def _with_absolute_dates(exported_asset: ExportedAsset, query: dict) -> dict:
+    """Resolves the relative dates of an events query once, so that all of its pages read the same range of events."""
+    if query.get("kind") != "EventsQuery":
+        return query
+    timezone_info = exported_asset.team.timezone_info
+    # The same defaults as the query runner
+    before = query.get("before") or (now() + datetime.timedelta(seconds=5)).isoformat()
+    after = query.get("after") or "-24h"
+    return {
+        **query,
+        "before": relative_date_parse(before, timezone_info).isoformat(),
+        "after": after if after == "all" else relative_date_parse(after, timezone_info).isoformat(),
+    }
+
+
+def get_from_paginated_hogql_query(exported_asset: ExportedAsset, query: dict) -> Generator[Any, None, None]:
+    """
+    Reads the results a page at a time, as long as each page has a cursor that points at the next one. If the query
+    can't return a cursor, all results are read with a single query instead, as an offset into results that are
+    calculated again for each page can skip or repeat rows.
+    """
+    query = _with_absolute_dates(exported_asset, query)
+    max_rows = get_max_limit_for_context(LimitContext.EXPORT)
+    remaining = min(query.get("limit") or max_rows, max_rows)
+    page_query = {**query, "limit": min(CSV_EXPORT_PAGE_SIZE, remaining)}
+    query_response = _process_export_query(exported_asset, page_query)
+    if query_response.get("hasMore") and not query_response.get("nextCursor") and remaining > page_query["limit"]:
+        query_response = _process_export_query(exported_asset, {**query, "limit": remaining})
+
+    while True:
+        results = query_response.get("results") or []
+        yield from _convert_response_to_csv_data(query_response)
+
+        remaining -= len(results)
+        cursor = query_response.get("nextCursor")
+        if remaining <= 0 or not query_response.get("hasMore") or not results or not cursor:
+            return
+        page_query = {**query, "limit": min(CSV_EXPORT_PAGE_SIZE, remaining), "cursor": cursor}
+        query_response = _process_export_query(exported_asset, page_query)
+
+
 def get_from_hogql_query(exported_asset: ExportedAsset, limit: int, resource: dict) -> Generator[Any, None, None]:
     query = resource.get("source")
     assert query is not None
 
+    if query.get("kind") in PAGINATED_QUERY_KINDS:
+        yield from get_from_paginated_hogql_query(exported_asset, query)
+        return
+
     while True:
         try:
-            query_response = process_query_dict(
-                team=exported_asset.team,
-                query_json=query,
-                limit_context=LimitContext.EXPORT,
-                execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS,
-            )
+            query_response = _process_export_query(exported_asset, query)
         except QuerySizeExceeded:
             if "breakdownFilter" not in query or limit <= CSV_EXPORT_BREAKDOWN_LIMIT_LOW:
                 raise
@@ -291,16 +361,51 @@ def get_from_hogql_query(exported_asset: ExportedAsset, limit: int, resource: di
             query["breakdownFilter"]["breakdown_limit"] = limit
             continue
 
-        if isinstance(query_response, BaseModel):
-            query_response = query_response.model_dump(by_alias=True)
         yield from _convert_response_to_csv_data(query_response)
         return
 
 
-def _export_to_dict(exported_asset: ExportedAsset, limit: int) -> Any:
+class SpooledRows:
+    """
+    The flattened rows of an export, written to a temporary file as they're fetched. The fields of the rows are
+    collected as they're written, so that the header can be built without keeping the rows in memory.
+    """
+
+    def __init__(self, renderer: OrderedCsvRenderer):
+        self.renderer = renderer
+        self.file = tempfile.SpooledTemporaryFile(max_size=SPOOLED_FILE_MAX_MEMORY_SIZE)
+        self.fields: dict[str, None] = {}
+        self.count = 0
+        # The keys of the first row, if none of its values are nested
+        self.first_row_keys: Optional[list[str]] = None
+
+    def append(self, row: Any) -> None:
+        if self.count == 0 and isinstance(row, dict):
+            if not any(isinstance(value, dict) or isinstance(value, list) for value in row.values()):
+                self.first_row_keys = list(row.keys())
+        flat_row = self.renderer.flatten_item(row)
+        self.fields.update(dict.fromkeys(flat_row.keys()))
+        pickle.dump(flat_row, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def __iter__(self) -> Iterator[dict]:
+        self.file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self.file)
+            except EOFError:
+                return
+
+    def tablize(self, header: Optional[list[str]]) -> Generator[list[Any], None, None]:
+        return self.renderer.tablize_flat(self, list(self.fields), header=header)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _export_to_rows(exported_asset: ExportedAsset, limit: int) -> SpooledRows:
     resource = exported_asset.export_context
 
-    columns: list[str] = resource.get("columns", [])
     returned_rows: Generator[Any, None, None]
 
     if resource.get("source"):
@@ -308,50 +413,64 @@ def _export_to_dict(exported_asset: ExportedAsset, limit: int) -> Any:
     else:
         returned_rows = get_from_insights_api(exported_asset, limit, resource)
 
-    all_csv_rows = list(returned_rows)
-    renderer = OrderedCsvRenderer()
-    render_context = {}
-    if columns:
-        render_context["header"] = columns
-
-    if len(all_csv_rows):
-        # NOTE: This is not ideal as some rows _could_ have different keys
-        # Ideally we would extend the csvrenderer to supported keeping the order in place
-        is_any_col_list_or_dict = [x for x in all_csv_rows[0].values() if isinstance(x, dict) or isinstance(x, list)]
-        if not is_any_col_list_or_dict:
-            # If values are serialised then keep the order of the keys, else allow it to be unordered
-            renderer.header = all_csv_rows[0].keys()
-    else:
-        # If we have no rows, that means we couldn't convert anything, so put something to avoid confusion
-        all_csv_rows = [{"error": "No data available or unable to format for export."}]
+    rows = SpooledRows(OrderedCsvRenderer())
+    try:
+        for row in returned_rows:
+            rows.append(row)
+        if not rows.count:
+            # If we have no rows, that means we couldn't convert anything, so put something to avoid confusion
+            rows.append({"error": "No data available or unable to format for export."})
+    except Exception:
+        rows.close()
+        raise
+    return rows
 
-    return renderer, all_csv_rows, render_context
+
+def _write_csv(rows: SpooledRows, header: Optional[list[str]], output: IO[bytes]) -> None:
+    with gzip.GzipFile(fileobj=output, mode="wb") as compressed_output:
+        with io.TextIOWrapper(compressed_output, encoding="utf-8", newline="") as text_output:
+            writer = csv.writer(text_output)
+            for row in rows.tablize(header):
+                writer.writerow(row)
 
 
 def _export_to_csv(exported_asset: ExportedAsset, limit: int) -> None:
-    renderer, all_csv_rows, render_context = _export_to_dict(exported_asset, limit)
+    columns: list[str] = exported_asset.export_context.get("columns", [])
+    rows = _export_to_rows(exported_asset, limit)
 
-    rendered_csv_content = renderer.render(all_csv_rows, renderer_context=render_context)
-    save_content(exported_asset, rendered_csv_content)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOLED_FILE_MAX_MEMORY_SIZE) as output:
+        try:
+            # NOTE: This is not ideal as some rows _could_ have different keys
+            # If values are serialised then keep the order of the keys, else allow it to be unordered
+            _write_csv(rows, columns or rows.first_row_keys, output)
+        finally:
+            rows.close()
+        output.seek(0)
+        save_content(exported_asset, output, content_encoding="gzip")
 
 
 def _export_to_excel(exported_asset: ExportedAsset, limit: int) -> None:
-    output = io.BytesIO()
-
-    workbook = Workbook()
-    worksheet = workbook.active
+    columns: list[str] = exported_asset.export_context.get("columns", [])
+    rows = _export_to_rows(exported_asset, limit)
 
-    renderer, all_csv_rows, render_context = _export_to_dict(exported_asset, limit)
-
-    for row_num, row_data in enumerate(renderer.tablize(all_csv_rows, header=render_context.get("header"))):
-        for col_num, value in enumerate(row_data):
-            if value is not None and not isinstance(value, str | int | float | bool):
-                value = str(value)
-            worksheet.cell(row=row_num + 1, column=col_num + 1, value=value)
+    # Write-only workbooks keep their rows in a temporary file instead of in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    try:
+        for row_data in rows.tablize(columns or None):
+            worksheet.append(
+                [
+                    str(value) if value is not None and not isinstance(value, str | int | float | bool) else value
+                    for value in row_data
+                ]
+            )
+    finally:
+        rows.close()
 
-    workbook.save(output)
-    output.seek(0)
-    save_content(exported_asset, output.getvalue())
+    with tempfile.SpooledTemporaryFile(max_size=SPOOLED_FILE_MAX_MEMORY_SIZE) as output:
+        workbook.save(output)
+        output.seek(0)
+        save_content(exported_asset, output)
 
 
 def get_limit_param_key(path: str) -> str:
@@ -1,7 +1,7 @@
 import itertools
 from collections import OrderedDict
 from typing import Any
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 from more_itertools import unique_everseen
 from rest_framework_csv.renderers import CSVRenderer
@@ -28,7 +28,35 @@ class OrderedCsvRenderer(
 
         # Get the set of all unique headers, and sort them.
         unique_fields = list(unique_everseen(itertools.chain(*(item.keys() for item in data))))
+        field_headers = self.order_fields(unique_fields, header)
 
+        # Return your "table", with the headers as the first row.
+        if labels:
+            yield [labels.get(x, x) for x in field_headers]
+        else:
+            yield field_headers
+
+        # Create a row for each dictionary, filling in columns for which the
+        # item has no data with None values.
+        for item in data:
+            yield [item.get(key, None) for key in field_headers]
+
+    def tablize_flat(self, data: Iterable[dict], unique_fields: list[str], header: Any = None) -> Generator:
+        """
+        Convert rows that are flattened already into a table, given every field
+        that they have in the order that they were first seen, so that the rows
+        can be read from a file instead of being kept in memory.
+        """
+        field_headers = self.order_fields(unique_fields, header)
+        yield field_headers
+        for item in data:
+            yield [item.get(key, None) for key in field_headers]
+
+    def order_fields(self, unique_fields: list[str], header: Any = None) -> list[str]:
+        """
+        Group the flattened fields of each column together, and expand the
+        columns of the header that were flattened into several fields.
+        """
         ordered_fields: dict[str, Any] = OrderedDict()
         for item in unique_fields:
             field = item.split(".")
@@ -40,24 +68,14 @@ class OrderedCsvRenderer(
 
         flat_ordered_fields = list(itertools.chain(*ordered_fields.values()))
         if not header:
-            field_headers = flat_ordered_fields
-        else:
-            field_headers = header
-            for single_header in field_headers:
-                if single_header in flat_ordered_fields or single_header not in ordered_fields:
-                    continue
+            return flat_ordered_fields
 
-                pos_single_header = field_headers.index(single_header)
-                field_headers.remove(single_header)
-                field_headers[pos_single_header:pos_single_header] = ordered_fields[single_header]
-
-        # Return your "table", with the headers as the first row.
-        if labels:
-            yield [labels.get(x, x) for x in field_headers]
-        else:
-            yield field_headers
+        field_headers = header
+        for single_header in field_headers:
+            if single_header in flat_ordered_fields or single_header not in ordered_fields:
+                continue
 
-        # Create a row for each dictionary, filling in columns for which the
-        # item has no data with None values.
-        for item in data:
-            yield [item.get(key, None) for key in field_headers]
+            pos_single_header = field_headers.index(single_header)
+            field_headers.remove(single_header)
+            field_headers[pos_single_header:pos_single_header] = ordered_fields[single_header]
+        return field_headers
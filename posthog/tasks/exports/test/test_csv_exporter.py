@@ -1,3 +1,4 @@
+import gzip
 from datetime import datetime
 from io import BytesIO
 from typing import Any, Optional
@@ -14,7 +15,7 @@ from freezegun import freeze_time
 from openpyxl import load_workbook
 from requests.exceptions import HTTPError
 
-from posthog.hogql.constants import CSV_EXPORT_BREAKDOWN_LIMIT_INITIAL
+from posthog.hogql.constants import CSV_EXPORT_BREAKDOWN_LIMIT_INITIAL, LimitContext, get_max_limit_for_context
 from posthog.models import ExportedAsset
 from posthog.models.utils import UUIDT
 from posthog.settings import (
@@ -37,6 +38,13 @@ from posthog.utils import absolute_uri
 
 TEST_PREFIX = "Test-Exports"
 
+
+def read_exported_content(exported_asset: ExportedAsset) -> str:
+    # CSVs are kept compressed in object storage
+    assert exported_asset.content_location is not None
+    return gzip.decompress(object_storage.read_bytes(exported_asset.content_location) or b"").decode("utf-8")
+
+
 # see GitHub issue #11204
 regression_11204 = "api/projects/6642/insights/trend/?events=%5B%7B%22id%22%3A%22product%20viewed%22%2C%22name%22%3A%22product%20viewed%22%2C%22type%22%3A%22events%22%2C%22order%22%3A0%7D%5D&actions=%5B%5D&display=ActionsTable&insight=TRENDS&interval=day&breakdown=productName&new_entity=%5B%5D&properties=%5B%5D&step_limit=5&funnel_filter=%7B%7D&breakdown_type=event&exclude_events=%5B%5D&path_groupings=%5B%5D&include_event_types=%5B%22%24pageview%22%5D&filter_test_accounts=false&local_path_cleaning_filters=%5B%5D&date_from=-14d&offset=50"
 
@@ -152,7 +160,7 @@ class TestCSVExporter(APIBaseTest):
                 == f"{TEST_PREFIX}/csv/team-{self.team.id}/task-{exported_asset.id}/a-guid"
             )
 
-            content = object_storage.read(exported_asset.content_location)
+            content = read_exported_content(exported_asset)
             assert (
                 content
                 == "id,distinct_id,properties.$browser,event,timestamp,person,elements_chain\r\ne9ca132e-400f-4854-a83c-16c151b2f145,2,Safari,event_name,2022-07-06T19:37:43.095295+00:00,,\r\n1624228e-a4f1-48cd-aabc-6baa3ddb22e4,2,Safari,event_name,2022-07-06T19:37:43.095279+00:00,,\r\n66d45914-bdf5-4980-a54a-7dc699bdcce9,2,Safari,event_name,2022-07-06T19:37:43.095262+00:00,,\r\n"
@@ -410,7 +418,7 @@ class TestCSVExporter(APIBaseTest):
                 == f"{TEST_PREFIX}/csv/team-{self.team.id}/task-{exported_asset.id}/a-guid"
             )
 
-            content = object_storage.read(exported_asset.content_location)
+            content = read_exported_content(exported_asset)
             assert (
                 content
                 == "event\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n$pageview\r\n"
@@ -448,7 +456,7 @@ class TestCSVExporter(APIBaseTest):
 
         with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
             csv_exporter.export_tabular(exported_asset)
-            content = object_storage.read(exported_asset.content_location)
+            content = read_exported_content(exported_asset)
             lines = (content or "").split("\r\n")
             self.assertEqual(len(lines), 12)
             self.assertEqual(
@@ -494,7 +502,7 @@ class TestCSVExporter(APIBaseTest):
 
         with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
             csv_exporter.export_tabular(exported_asset)
-            content = object_storage.read(exported_asset.content_location)
+            content = read_exported_content(exported_asset)
             lines = (content or "").split("\r\n")
             self.assertEqual(len(lines), 12)
             self.assertEqual(
@@ -506,6 +514,60 @@ class TestCSVExporter(APIBaseTest):
             self.assertEqual(first_row[1], "$pageview")
             self.assertEqual(first_row[4], str(self.team.pk))
 
+    def _process_paged_events_query(self, *, with_cursor: bool):
+        def process_query_dict(team, query_json, **kwargs):
+            start = int(query_json.get("cursor") or 0)
+            results = [[f"event_{i}", {"prop": i}] for i in range(start, min(start + query_json["limit"], 5))]
+            has_more = start + query_json["limit"] < 5
+            return {
+                "columns": ["event", "properties"],
+                "types": ["String", "String"],
+                "results": results,
+                "hasMore": has_more,
+                **({"nextCursor": str(start + query_json["limit"])} if has_more and with_cursor else {}),
+            }
+
+        return process_query_dict
+
+    @freeze_time("2024-03-22T13:46:00Z")
+    @patch("posthog.tasks.exports.csv_exporter.CSV_EXPORT_PAGE_SIZE", 2)
+    @patch("posthog.tasks.exports.csv_exporter.process_query_dict")
+    def test_csv_exporter_paginates_events_query(self, mocked_process_query_dict: Any) -> None:
+        mocked_process_query_dict.side_effect = self._process_paged_events_query(with_cursor=True)
+        exported_asset = self._create_asset(
+            {"source": {"kind": "EventsQuery", "select": ["event", "properties"], "after": "-1h"}}
+        )
+
+        with self.settings(OBJECT_STORAGE_ENABLED=False):
+            csv_exporter.export_tabular(exported_asset)
+
+        assert exported_asset.content == (
+            b"event,properties.prop\r\nevent_0,0\r\nevent_1,1\r\nevent_2,2\r\nevent_3,3\r\nevent_4,4\r\n"
+        )
+        pages = [call.kwargs["query_json"] for call in mocked_process_query_dict.call_args_list]
+        assert [page.get("cursor") for page in pages] == [None, "2", "4"]
+        # Every page reads the same range of events
+        assert {(page["after"], page["before"]) for page in pages} == {
+            ("2024-03-22T12:46:00+00:00", "2024-03-22T13:46:05+00:00")
+        }
+
+    @patch("posthog.tasks.exports.csv_exporter.CSV_EXPORT_PAGE_SIZE", 2)
+    @patch("posthog.tasks.exports.csv_exporter.process_query_dict")
+    def test_csv_exporter_reads_queries_without_a_cursor_at_once(self, mocked_process_query_dict: Any) -> None:
+        mocked_process_query_dict.side_effect = self._process_paged_events_query(with_cursor=False)
+        exported_asset = self._create_asset({"source": {"kind": "EventsQuery", "select": ["event", "properties"]}})
+
+        with self.settings(OBJECT_STORAGE_ENABLED=False):
+            csv_exporter.export_tabular(exported_asset)
+
+        assert exported_asset.content == (
+            b"event,properties.prop\r\nevent_0,0\r\nevent_1,1\r\nevent_2,2\r\nevent_3,3\r\nevent_4,4\r\n"
+        )
+        pages = [call.kwargs["query_json"] for call in mocked_process_query_dict.call_args_list]
+        # The first page has no cursor, so it's fetched again with the rest instead of paging with an offset
+        assert [page["limit"] for page in pages] == [2, get_max_limit_for_context(LimitContext.EXPORT)]
+        assert "offset" not in pages[1]
+
     @patch("posthog.hogql.constants.MAX_SELECT_RETURNED_ROWS", 10)
     @patch("posthog.models.exported_asset.UUIDT")
     def test_csv_exporter_funnels_query(self, mocked_uuidt: Any, MAX_SELECT_RETURNED_ROWS: int = 10) -> None:
@@ -553,7 +615,7 @@ class TestCSVExporter(APIBaseTest):
 
         with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
             csv_exporter.export_tabular(exported_asset)
-            content = object_storage.read(exported_asset.content_location)
+            content = read_exported_content(exported_asset)
             lines = (content or "").strip().split("\r\n")
             self.assertEqual(
                 lines,
@@ -632,7 +694,7 @@ class TestCSVExporter(APIBaseTest):
 
             with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
                 csv_exporter.export_tabular(exported_asset)
-                content = object_storage.read(exported_asset.content_location)
+                content = read_exported_content(exported_asset)
                 lines = (content or "").split("\r\n")
                 self.assertEqual(lines[0], "error")
                 self.assertEqual(lines[1], "No data available or unable to format for export.")
@@ -693,7 +755,7 @@ class TestCSVExporter(APIBaseTest):
 
         with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
             csv_exporter.export_tabular(exported_asset)
-            content = object_storage.read(exported_asset.content_location)
+            content = read_exported_content(exported_asset)
             lines = (content or "").strip().split("\r\n")
             self.assertEqual(
                 lines,
@@ -803,7 +865,7 @@ class TestCSVExporter(APIBaseTest):
 
         with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
             csv_exporter.export_tabular(exported_asset)
-            content = object_storage.read(exported_asset.content_location)  # type: ignore
+            content = read_exported_content(exported_asset)  # type: ignore
 
             lines = (content or "").strip().splitlines()
 
@@ -876,7 +938,7 @@ class TestCSVExporter(APIBaseTest):
 
         with self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"):
             csv_exporter.export_tabular(exported_asset)
-            content = object_storage.read(exported_asset.content_location)  # type: ignore
+            content = read_exported_content(exported_asset)  # type: ignore
             lines = (content or "").strip().split("\r\n")
             self.assertEqual(
                 lines,
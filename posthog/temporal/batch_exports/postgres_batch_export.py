@@ -4,6 +4,7 @@ import contextlib
 import csv
 import dataclasses
 import datetime as dt
+import io
 import json
 import typing
 
@@ -44,8 +45,12 @@ from posthog.temporal.batch_exports.spmc import (
     wait_for_schema_or_producer,
 )
 from posthog.temporal.batch_exports.temporary_file import (
+    POSTGRES_BINARY_COPY_HEADER,
+    POSTGRES_BINARY_COPY_TRAILER,
     BatchExportTemporaryFile,
     WriterFormat,
+    is_postgres_binary_copy_supported,
+    read_postgres_binary_copy_segments,
 )
 from posthog.temporal.batch_exports.utils import (
     JsonType,
@@ -105,6 +110,8 @@ class PostgreSQLClient:
         self.connection_timeout = connection_timeout
 
         self._connection: None | psycopg.AsyncConnection = None
+        self._extra_connections: list[psycopg.AsyncConnection] = []
+        self._extra_connections_stack: None | contextlib.AsyncExitStack = None
 
     @classmethod
     def from_inputs(cls, inputs: PostgresInsertInputs) -> typing.Self:
@@ -169,9 +176,37 @@ class PostgreSQLClient:
                 f"Failed to connect after {max_attempts} attempts. Please review connection configuration."
             ) from err
 
-        async with connection as connection:
+        async with connection as connection, contextlib.AsyncExitStack() as extra_connections_stack:
             self._connection = connection
-            yield self
+            self._extra_connections_stack = extra_connections_stack
+            try:
+                yield self
+            finally:
+                self._extra_connections = []
+                self._extra_connections_stack = None
+
+    async def aget_extra_connections(self, count: int) -> list[psycopg.AsyncConnection]:
+        """Get `count` connections besides the main one, connecting any that aren't connected yet.
+
+        Extra connections are kept open to be reused, and are closed together with the main one.
+        """
+        if self._extra_connections_stack is None:
+            raise PostgreSQLConnectionError("Not connected, open a connection by calling connect")
+
+        while len(self._extra_connections) < count:
+            client = PostgreSQLClient(
+                user=self.user,
+                password=self.password,
+                host=self.host,
+                port=self.port,
+                database=self.database,
+                has_self_signed_cert=self.has_self_signed_cert,
+                connection_timeout=self.connection_timeout,
+            )
+            await self._extra_connections_stack.enter_async_context(client.connect())
+            self._extra_connections.append(client.connection)
+
+        return self._extra_connections[:count]
 
     async def acreate_table(
         self,
@@ -247,6 +282,26 @@ class PostgreSQLClient:
 
                 await cursor.execute(sql.SQL(base_query).format(table=table_identifier))
 
+    async def aget_table_column_types(self, schema: str | None, table_name: str) -> dict[str, int]:
+        """Get the type OID of each column of a table in PostgreSQL.
+
+        Args:
+            schema: Name of the schema where the table is located.
+            table_name: Name of the table to get column types for.
+
+        Returns:
+            A mapping of column names to the OIDs of their types.
+        """
+        if schema:
+            table_identifier = sql.Identifier(schema, table_name)
+        else:
+            table_identifier = sql.Identifier(table_name)
+
+        async with self.connection.transaction():
+            async with self.connection.cursor() as cursor:
+                await cursor.execute(sql.SQL("SELECT * FROM {} WHERE 1=0").format(table_identifier))
+                return {column.name: column.type_code for column in cursor.description or []}
+
     async def aget_table_columns(self, schema: str | None, table_name: str) -> list[str]:
         """Get the column names for a table in PostgreSQL.
 
@@ -423,6 +478,103 @@ class PostgreSQLClient:
                         data = data.replace(b"\\u0000", b"")
                         await copy.write(data)
 
+    async def copy_binary_to_postgres(
+        self,
+        binary_file,
+        schema: str,
+        table_name: str,
+        schema_columns: list[str],
+        max_connections: int = 1,
+        parallel_min_bytes: int = 0,
+    ) -> None:
+        """Execute COPY FROM queries to copy the contents of binary_file in PostgreSQL's binary format.
+
+        The file is read one record batch at a time. Copies of at least `parallel_min_bytes` are
+        spread at record batch boundaries over up to `max_connections` connections, which take turns
+        reading the next record batch. Each of those connections commits in its own transaction, so
+        a failed copy may leave part of the rows copied: only copy over multiple connections into a
+        table that is started over when retrying, like a stage table.
+
+        Arguments:
+            binary_file: A file-like object written by `PostgreSQLBinaryCopyBatchExportWriter`.
+            schema: The schema where the table we are COPYing into exists.
+            table_name: The name of the table we are COPYing into.
+            schema_columns: The column names of the table we are COPYing into.
+            max_connections: The maximum number of connections to COPY over.
+            parallel_min_bytes: The size in bytes from which copies are split over multiple connections.
+        """
+        file_size = binary_file.seek(0, io.SEEK_END)
+        binary_file.seek(0)
+        segments = read_postgres_binary_copy_segments(binary_file)
+        lock = asyncio.Lock()
+
+        async def next_segment() -> bytes | None:
+            async with lock:
+                return await asyncio.to_thread(next, segments, None)
+
+        if max_connections <= 1 or file_size < parallel_min_bytes:
+            await self._acopy_binary(self.connection, next_segment, schema, table_name, schema_columns)
+            return
+
+        connections = [self.connection, *await self.aget_extra_connections(max_connections - 1)]
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for connection in connections:
+                    tg.create_task(self._acopy_binary(connection, next_segment, schema, table_name, schema_columns))
+        except ExceptionGroup as eg:
+            # Raise the first error, so that it's handled like errors of a single COPY
+            raise eg.exceptions[0]
+
+    async def _acopy_binary(
+        self,
+        connection: psycopg.AsyncConnection,
+        next_segment: collections.abc.Callable[[], collections.abc.Awaitable[bytes | None]],
+        schema: str,
+        table_name: str,
+        schema_columns: list[str],
+    ) -> None:
+        async with connection.transaction():
+            async with connection.cursor() as cursor:
+                if schema:
+                    await cursor.execute(sql.SQL("SET search_path TO {schema}").format(schema=sql.Identifier(schema)))
+
+                await cursor.execute("SET TRANSACTION READ WRITE")
+
+                async with cursor.copy(
+                    sql.SQL("COPY {table_name} ({fields}) FROM STDIN WITH (FORMAT BINARY)").format(
+                        table_name=sql.Identifier(table_name),
+                        fields=sql.SQL(",").join(sql.Identifier(column) for column in schema_columns),
+                    )
+                ) as copy:
+                    await copy.write(POSTGRES_BINARY_COPY_HEADER)
+                    while (segment := await next_segment()) is not None:
+                        await copy.write(segment)
+                    await copy.write(POSTGRES_BINARY_COPY_TRAILER)
+
+
+async def aget_binary_copy_column_types(
+    client: PostgreSQLClient,
+    schema: str,
+    table_name: str,
+    record_batch_schema: pa.Schema,
+    schema_columns: list[str],
+) -> dict[str, int] | None:
+    """Get the column types to encode records in PostgreSQL's binary format for, if all of them are supported."""
+    try:
+        column_types = await client.aget_table_column_types(schema, table_name)
+    except psycopg.errors.InsufficientPrivilege:
+        return None
+
+    for column in schema_columns:
+        if column not in column_types:
+            return None
+        if column in record_batch_schema.names and not is_postgres_binary_copy_supported(
+            record_batch_schema.field(column).type, column_types[column]
+        ):
+            return None
+
+    return column_types
+
 
 def postgres_default_fields() -> list[BatchExportField]:
     batch_export_fields = default_fields()
@@ -517,6 +669,7 @@ class PostgreSQLConsumer(Consumer):
         postgresql_table: str,
         postgresql_table_schema: str,
         postgresql_table_fields: list[str],
+        postgresql_table_is_stage: bool = False,
     ):
         super().__init__(
             heartbeater=heartbeater,
@@ -529,6 +682,7 @@ class PostgreSQLConsumer(Consumer):
         self.postgresql_table = postgresql_table
         self.postgresql_table_schema = postgresql_table_schema
         self.postgresql_table_fields = postgresql_table_fields
+        self.postgresql_table_is_stage = postgresql_table_is_stage
         self.postgresql_client = postgresql_client
 
     async def flush(
@@ -547,12 +701,25 @@ class PostgreSQLConsumer(Consumer):
             bytes_since_last_flush,
         )
 
-        await self.postgresql_client.copy_tsv_to_postgres(
-            batch_export_file,
-            self.postgresql_table_schema,
-            self.postgresql_table,
-            self.postgresql_table_fields,
-        )
+        if self.writer_format == WriterFormat.POSTGRES_BINARY:
+            await self.postgresql_client.copy_binary_to_postgres(
+                batch_export_file,
+                self.postgresql_table_schema,
+                self.postgresql_table,
+                self.postgresql_table_fields,
+                # Connections commit their part separately, which a retry would copy again into the final table
+                max_connections=settings.BATCH_EXPORT_POSTGRES_COPY_MAX_CONNECTIONS
+                if self.postgresql_table_is_stage
+                else 1,
+                parallel_min_bytes=settings.BATCH_EXPORT_POSTGRES_PARALLEL_COPY_MIN_BYTES,
+            )
+        else:
+            await self.postgresql_client.copy_tsv_to_postgres(
+                batch_export_file,
+                self.postgresql_table_schema,
+                self.postgresql_table,
+                self.postgresql_table_fields,
+            )
 
         await self.logger.ainfo("Copied %s to PostgreSQL table '%s'", records_since_last_flush, self.postgresql_table)
         self.rows_exported_counter.add(records_since_last_flush)
@@ -713,16 +880,38 @@ async def insert_into_postgres_activity(inputs: PostgresInsertInputs) -> Records
                     primary_key=primary_key,
                 ) as pg_stage_table,
             ):
+                writer_format = WriterFormat.CSV
+                writer_file_kwargs: dict[str, typing.Any] = {
+                    "delimiter": "\t",
+                    "quoting": csv.QUOTE_MINIMAL,
+                    "escape_char": None,
+                    "field_names": schema_columns,
+                }
+                if settings.BATCH_EXPORT_POSTGRES_USE_BINARY_COPY:
+                    column_types = await aget_binary_copy_column_types(
+                        pg_client,
+                        inputs.schema,
+                        pg_stage_table if requires_merge else pg_table,
+                        record_batch_schema,
+                        schema_columns,
+                    )
+                    if column_types is not None:
+                        writer_format = WriterFormat.POSTGRES_BINARY
+                        writer_file_kwargs = {"field_names": schema_columns, "column_types": column_types}
+                    else:
+                        await logger.ainfo("Table columns not supported by binary COPY, falling back to TSV")
+
                 consumer = PostgreSQLConsumer(
                     heartbeater=heartbeater,
                     heartbeat_details=details,
                     data_interval_end=data_interval_end,
                     data_interval_start=data_interval_start,
-                    writer_format=WriterFormat.CSV,
+                    writer_format=writer_format,
                     postgresql_client=pg_client,
                     postgresql_table=pg_stage_table if requires_merge else pg_table,
                     postgresql_table_schema=inputs.schema,
                     postgresql_table_fields=schema_columns,
+                    postgresql_table_is_stage=requires_merge,
                 )
                 try:
                     _ = await run_consumer(
@@ -732,12 +921,7 @@ async def insert_into_postgres_activity(inputs: PostgresInsertInputs) -> Records
                         schema=record_batch_schema,
                         max_bytes=settings.BATCH_EXPORT_POSTGRES_UPLOAD_CHUNK_SIZE_BYTES,
                         json_columns=(),
-                        writer_file_kwargs={
-                            "delimiter": "\t",
-                            "quoting": csv.QUOTE_MINIMAL,
-                            "escape_char": None,
-                            "field_names": schema_columns,
-                        },
+                        writer_file_kwargs=writer_file_kwargs,
                         multiple_files=True,
                     )
                 finally:
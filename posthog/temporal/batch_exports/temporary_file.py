@@ -7,15 +7,22 @@ import contextlib
 import csv
 import datetime as dt
 import enum
+import functools
 import gzip
+import io
+import itertools
 import json
+import struct
 import tempfile
 import typing
 
 import brotli
+import numpy as np
 import orjson
 import psycopg
+import psycopg.postgres
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import structlog
 from psycopg import sql
@@ -501,6 +508,7 @@ class WriterFormat(enum.StrEnum):
     PARQUET = enum.auto()
     CSV = enum.auto()
     REDSHIFT_INSERT = enum.auto()
+    POSTGRES_BINARY = enum.auto()
 
     @staticmethod
     def from_str(format_str: str, destination: str):
@@ -513,6 +521,8 @@ class WriterFormat(enum.StrEnum):
                 return WriterFormat.CSV
             case "REDSHIFT_INSERT":
                 return WriterFormat.REDSHIFT_INSERT
+            case "POSTGRES_BINARY":
+                return WriterFormat.POSTGRES_BINARY
             case _:
                 raise UnsupportedFileFormatError(format_str, destination)
 
@@ -552,6 +562,14 @@ def get_batch_export_writer(
                 **kwargs,
             )
 
+        case WriterFormat.POSTGRES_BINARY:
+            return PostgreSQLBinaryCopyBatchExportWriter(
+                max_bytes=max_bytes,
+                flush_callable=flush_callable,
+                max_file_size_bytes=max_file_size_bytes,
+                **kwargs,
+            )
+
 
 class JSONLBatchExportWriter(BatchExportWriter):
     """A `BatchExportWriter` for JSONLines format.
@@ -623,12 +641,69 @@ class JSONLBatchExportWriter(BatchExportWriter):
         return n
 
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
-        """Write records to a temporary file as JSONL."""
-        for record_dict in record_batch.to_pylist():
-            if not record_dict:
-                continue
+        """Write records to a temporary file as JSONL.
+
+        Records are encoded column by column, and the encoded values are then stitched together into lines,
+        which avoids building a dict for each record. The output is the same as dumping each record dict.
+        Records with values orjson can't encode go through `write_dict` instead.
+        """
+        if record_batch.num_columns == 0 or record_batch.num_rows == 0:
+            return
 
-            self.write_dict(record_dict)
+        dumps = functools.partial(orjson.dumps, default=str)
+        try:
+            encoded_columns = [list(map(dumps, column.to_pylist())) for column in record_batch.columns]
+        except orjson.JSONEncodeError:
+            self._write_record_batch_with_fallback(record_batch)
+            return
+
+        self.batch_export_file.write(self._join_encoded_columns(record_batch.column_names, encoded_columns))
+
+    @staticmethod
+    def _join_encoded_columns(
+        column_names: list[str], encoded_columns: collections.abc.Sequence[collections.abc.Iterable[bytes]]
+    ) -> bytes:
+        """Join already encoded column values into JSONL, keeping all of the per-record work in C."""
+        parts: list[collections.abc.Iterable[bytes]] = []
+        for index, (name, values) in enumerate(zip(column_names, encoded_columns)):
+            parts.append(itertools.repeat((b"{" if index == 0 else b",") + orjson.dumps(name) + b":"))
+            parts.append(values)
+        parts.append(itertools.repeat(b"}\n"))
+
+        return b"".join(itertools.chain.from_iterable(zip(*parts)))
+
+    def _write_record_batch_with_fallback(self, record_batch: pa.RecordBatch) -> None:
+        """Write records encoding them column by column, except for those that fail to encode.
+
+        Records that fail are written by `write_dict`, which handles broken unicode and deeply nested values.
+        """
+        failed_rows: set[int] = set()
+        encoded_columns: list[list[bytes]] = []
+        for column in record_batch.columns:
+            encoded_column = []
+            for index, value in enumerate(column.to_pylist()):
+                try:
+                    encoded_column.append(orjson.dumps(value, default=str))
+                except orjson.JSONEncodeError:
+                    encoded_column.append(b"")
+                    failed_rows.add(index)
+            encoded_columns.append(encoded_column)
+
+        start = 0
+        for failed_row in sorted(failed_rows):
+            if failed_row > start:
+                self.batch_export_file.write(
+                    self._join_encoded_columns(
+                        record_batch.column_names, [column[start:failed_row] for column in encoded_columns]
+                    )
+                )
+            self.write_dict(record_batch.slice(offset=failed_row, length=1).to_pylist()[0])
+            start = failed_row + 1
+
+        if start < record_batch.num_rows:
+            self.batch_export_file.write(
+                self._join_encoded_columns(record_batch.column_names, [column[start:] for column in encoded_columns])
+            )
 
 
 class CSVBatchExportWriter(BatchExportWriter):
@@ -663,44 +738,252 @@ class CSVBatchExportWriter(BatchExportWriter):
         self.line_terminator = line_terminator
         self.quoting = quoting
 
-        self._csv_writer: csv.DictWriter | None = None
-
-    @property
-    def csv_writer(self) -> csv.DictWriter:
-        if self._csv_writer is None:
-            self._csv_writer = csv.DictWriter(
-                self.batch_export_file,
-                fieldnames=self.field_names,
-                extrasaction=self.extras_action,
-                delimiter=self.delimiter,
-                quotechar=self.quote_char,
-                escapechar=self.escape_char,
-                quoting=self.quoting,
-                lineterminator=self.line_terminator,
-            )
-
-        return self._csv_writer
-
-    async def close_temporary_file(self):
-        """Ensure underlying `DictWriter` is closed before flushing and closing temporary file."""
-        if self._csv_writer is not None:
-            self._csv_writer = None
-
-        await super().close_temporary_file()
-
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
         """Write records to a temporary file as CSV.
 
         Since this writer is only used in the PostgreSQL batch export, we do a
         replacement of [] for {} to support PostgreSQL literal arrays when writing
         a list.
+
+        Rows are fed to the writer straight from the columns, and the whole batch
+        is written to the temporary file at once.
         """
-        rows = []
-        for record in record_batch.to_pylist():
-            rows.append(
-                {k: str(v).replace("[", "{").replace("]", "}") if isinstance(v, list) else v for k, v in record.items()}
-            )
-        self.csv_writer.writerows(rows)
+        if record_batch.num_rows == 0:
+            return
+
+        if self.extras_action == "raise":
+            wrong_fields = [name for name in record_batch.column_names if name not in self.field_names]
+            if wrong_fields:
+                raise ValueError("dict contains fields not in fieldnames: " + ", ".join(map(repr, wrong_fields)))
+
+        columns: list[list[typing.Any]] = []
+        for field_name in self.field_names:
+            if field_name not in record_batch.schema.names:
+                columns.append([None] * record_batch.num_rows)
+                continue
+
+            column = record_batch.column(field_name)
+            values = column.to_pylist()
+            if pa.types.is_nested(column.type):
+                values = [str(v).replace("[", "{").replace("]", "}") if isinstance(v, list) else v for v in values]
+            columns.append(values)
+
+        buffer = io.StringIO()
+        csv_writer = csv.writer(
+            buffer,
+            delimiter=self.delimiter,
+            quotechar=self.quote_char,
+            escapechar=self.escape_char,
+            quoting=self.quoting,
+            lineterminator=self.line_terminator,
+        )
+        csv_writer.writerows(zip(*columns))
+        self.batch_export_file.write(buffer.getvalue())
+
+
+POSTGRES_BINARY_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+POSTGRES_BINARY_COPY_TRAILER = struct.pack(">h", -1)
+POSTGRES_BINARY_COPY_NULL = struct.pack(">i", -1)
+
+# Microseconds from the Unix epoch to the PostgreSQL epoch (2000-01-01), which timestamps are encoded from
+POSTGRES_EPOCH_MICROSECONDS = 946_684_800_000_000
+
+_pg_types = psycopg.postgres.types
+POSTGRES_FIXED_WIDTH_TYPES: dict[int, tuple[pa.DataType, str]] = {
+    _pg_types["bool"].oid: (pa.bool_(), "?"),
+    _pg_types["int2"].oid: (pa.int16(), ">i2"),
+    _pg_types["int4"].oid: (pa.int32(), ">i4"),
+    _pg_types["int8"].oid: (pa.int64(), ">i8"),
+    _pg_types["float4"].oid: (pa.float32(), ">f4"),
+    _pg_types["float8"].oid: (pa.float64(), ">f8"),
+}
+POSTGRES_TEXT_TYPES = {_pg_types[name].oid for name in ("text", "varchar", "bpchar", "json")}
+POSTGRES_JSONB_TYPE = _pg_types["jsonb"].oid
+POSTGRES_TIMESTAMP_TYPES = {_pg_types["timestamp"].oid, _pg_types["timestamptz"].oid}
+# Array types mapped to the type of their elements
+POSTGRES_TEXT_ARRAY_TYPES = {_pg_types[name].array_oid: _pg_types[name].oid for name in ("text", "varchar")}
+
+_pack_length = struct.Struct(">i").pack
+# Dimensions, whether there are NULL elements, type of the elements, then the size and lower bound of each dimension
+_pack_array_header = struct.Struct(">iiiii").pack
+
+
+def is_postgres_binary_copy_supported(data_type: pa.DataType, oid: int) -> bool:
+    """Whether Arrow arrays of `data_type` can be encoded for a PostgreSQL column of type `oid`."""
+    if isinstance(data_type, pa.ExtensionType):
+        data_type = data_type.storage_type
+
+    is_string = pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+    if oid == _pg_types["bool"].oid:
+        return pa.types.is_boolean(data_type)
+    if oid in POSTGRES_FIXED_WIDTH_TYPES:
+        # Floating point values can't be truncated into integer columns
+        arrow_type = POSTGRES_FIXED_WIDTH_TYPES[oid][0]
+        return pa.types.is_integer(data_type) or (pa.types.is_floating(data_type) and pa.types.is_floating(arrow_type))
+    if oid in POSTGRES_TIMESTAMP_TYPES:
+        return pa.types.is_timestamp(data_type)
+    if oid == POSTGRES_JSONB_TYPE:
+        return is_string
+    if oid in POSTGRES_TEXT_TYPES:
+        return is_string or pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+    if oid in POSTGRES_TEXT_ARRAY_TYPES:
+        return pa.types.is_list(data_type) and pa.types.is_string(data_type.value_type)
+    return False
+
+
+def _encode_fixed_width_fields(values: pa.Array, dtype: np.dtype) -> list[bytes]:
+    """Encode fields of a fixed width, letting numpy lay out their lengths and big-endian values at once."""
+    fields = np.empty(len(values), dtype=[("length", ">i4"), ("value", dtype)])
+    fields["length"] = dtype.itemsize
+    fields["value"] = values.fill_null(False if pa.types.is_boolean(values.type) else 0).to_numpy(zero_copy_only=False)
+
+    buffer = fields.tobytes()
+    width = fields.itemsize
+    encoded = [buffer[offset : offset + width] for offset in range(0, len(buffer), width)]
+    if values.null_count:
+        for index in np.flatnonzero(~values.is_valid().to_numpy(zero_copy_only=False)):
+            encoded[index] = POSTGRES_BINARY_COPY_NULL
+    return encoded
+
+
+def _encode_variable_width_fields(values: pa.Array, prefix: bytes = b"") -> list[bytes]:
+    binary_type = pa.large_binary() if pa.types.is_large_string(values.type) else pa.binary()
+    return [
+        POSTGRES_BINARY_COPY_NULL if value is None else _pack_length(len(value) + len(prefix)) + prefix + value
+        for value in values.cast(binary_type).to_pylist()
+    ]
+
+
+def _encode_text_array_fields(column: pa.ListArray, element_oid: int) -> list[bytes]:
+    """Encode one-dimensional text arrays, encoding the elements of all of them at once."""
+    # Offsets index into the child values, where NULL arrays may still span elements, so they
+    # can't be used with `flatten()`, which drops the elements of NULL arrays.
+    offsets = column.offsets.to_numpy()
+    values = column.values[offsets[0] : offsets[-1]]
+    offsets = offsets - offsets[0]
+    elements = _encode_variable_width_fields(pc.replace_substring(values, "\x00", ""))
+
+    null_counts = np.concatenate(([0], np.cumsum(values.is_null().to_numpy(zero_copy_only=False))))
+    has_nulls = (null_counts[offsets[1:]] - null_counts[offsets[:-1]] > 0).tolist()
+    is_valid = column.is_valid().to_numpy(zero_copy_only=False).tolist()
+    offsets_list = offsets.tolist()
+
+    empty_array = struct.pack(">iii", 0, 0, element_oid)
+    encoded = []
+    for index, valid in enumerate(is_valid):
+        start, end = offsets_list[index], offsets_list[index + 1]
+        if not valid:
+            encoded.append(POSTGRES_BINARY_COPY_NULL)
+            continue
+
+        if start == end:
+            array = empty_array
+        else:
+            header = _pack_array_header(1, has_nulls[index], element_oid, end - start, 1)
+            array = header + b"".join(elements[start:end])
+        encoded.append(_pack_length(len(array)) + array)
+
+    return encoded
+
+
+def encode_postgres_binary_fields(column: pa.Array, oid: int) -> list[bytes]:
+    """Encode each value of `column` as a field of PostgreSQL's binary COPY format for a column of type `oid`.
+
+    Each field is the length of the value in bytes followed by the value, or a length of -1 for NULL.
+    """
+    if isinstance(column.type, pa.ExtensionType):
+        column = column.storage
+
+    if oid in POSTGRES_FIXED_WIDTH_TYPES:
+        arrow_type, dtype = POSTGRES_FIXED_WIDTH_TYPES[oid]
+        return _encode_fixed_width_fields(column.cast(arrow_type), np.dtype(dtype))
+
+    if oid in POSTGRES_TIMESTAMP_TYPES:
+        microseconds = column.cast(pa.timestamp("us", tz=column.type.tz)).cast(pa.int64())
+        return _encode_fixed_width_fields(pc.subtract(microseconds, POSTGRES_EPOCH_MICROSECONDS), np.dtype(">i8"))
+
+    if oid == POSTGRES_JSONB_TYPE:
+        # \u0000 cannot be present in PostgreSQL's jsonb type, and will cause an error.
+        # See: https://www.postgresql.org/docs/17/datatype-json.html
+        # The jsonb binary format is a version number, 1, followed by the JSON text.
+        return _encode_variable_width_fields(pc.replace_substring(column, "\\u0000", ""), prefix=b"\x01")
+
+    if oid in POSTGRES_TEXT_TYPES:
+        if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+            column = column.cast(pa.string())
+        # NUL characters cannot be present in PostgreSQL strings
+        return _encode_variable_width_fields(pc.replace_substring(column, "\x00", ""))
+
+    if oid in POSTGRES_TEXT_ARRAY_TYPES:
+        return _encode_text_array_fields(column, POSTGRES_TEXT_ARRAY_TYPES[oid])
+
+    raise TypeError(f"Cannot encode '{column.type}' values for PostgreSQL type with OID {oid}")
+
+
+def read_postgres_binary_copy_segments(binary_file) -> collections.abc.Iterator[bytes]:
+    """Read the tuples written by `PostgreSQLBinaryCopyBatchExportWriter`, one segment per record batch.
+
+    Segments are read as they are iterated over, so that the file is never held in memory as a whole.
+    """
+    while length := binary_file.read(8):
+        yield binary_file.read(struct.unpack(">q", length)[0])
+
+
+class PostgreSQLBinaryCopyBatchExportWriter(BatchExportWriter):
+    """A `BatchExportWriter` for PostgreSQL's binary COPY format.
+
+    Values are encoded for the type of the column they are copied into, as binary COPY requires
+    the exact representation of each type (for example, 4 bytes for an INTEGER and 8 bytes for a
+    BIGINT). Each record batch is encoded column by column, without building a dict per record.
+
+    The tuples of each record batch are written after their length in bytes, so that the data can
+    be split at tuple boundaries to be copied over multiple connections. The COPY header and trailer
+    are not written, as they are needed once per COPY. See `read_postgres_binary_copy_segments`.
+
+    Attributes:
+        field_names: The columns to copy into, in order. Fields missing from a record batch are
+            copied as NULL.
+        column_types: The type OID of each column to copy into.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        flush_callable: FlushCallable,
+        field_names: collections.abc.Sequence[str],
+        column_types: collections.abc.Mapping[str, int],
+        schema: pa.Schema | None = None,
+        max_file_size_bytes: int = 0,
+    ):
+        super().__init__(
+            max_bytes=max_bytes,
+            flush_callable=flush_callable,
+            file_kwargs={"compression": None},
+            max_file_size_bytes=max_file_size_bytes,
+        )
+        self.field_names = field_names
+        self.column_types = column_types
+        self.field_count = struct.pack(">h", len(field_names))
+
+    def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
+        """Write records to a temporary file as PostgreSQL binary COPY tuples."""
+        if record_batch.num_rows == 0:
+            return
+
+        columns: list[collections.abc.Iterable[bytes]] = []
+        for field_name in self.field_names:
+            if field_name not in record_batch.schema.names:
+                columns.append(itertools.repeat(POSTGRES_BINARY_COPY_NULL, record_batch.num_rows))
+            else:
+                columns.append(
+                    encode_postgres_binary_fields(record_batch.column(field_name), self.column_types[field_name])
+                )
+
+        tuples = b"".join(
+            itertools.chain.from_iterable(zip(itertools.repeat(self.field_count, record_batch.num_rows), *columns))
+        )
+        self.batch_export_file.write(struct.pack(">q", len(tuples)))
+        self.batch_export_file.write(tuples)
 
 
 class ParquetBatchExportWriter(BatchExportWriter):
@@ -1,5 +1,5 @@
-from temporalio import workflow
-from temporalio.common import MetricCounter
+from temporalio import activity, workflow
+from temporalio.common import MetricCounter, MetricHistogram
 
 
 def get_data_import_finished_metric(source_type: str | None, status: str) -> MetricCounter:
@@ -9,3 +9,16 @@ def get_data_import_finished_metric(source_type: str | None, status: str) -> Met
         .with_additional_attributes({"source_type": source_type, "status": status})
         .create_counter("data_import_finished", "Number of data imports finished, for any reason (including failure).")
     )
+
+
+def get_pipeline_stage_duration_metric(stage: str) -> MetricHistogram:
+    return (
+        activity.metric_meter()
+        .with_additional_attributes({"stage": stage})
+        .create_histogram(
+            "data_import_pipeline_stage_duration",
+            "Time spent in each stage of a data import pipeline run: reading the source, converting rows to Arrow, "
+            "waiting on the source, writing to Delta, and collecting garbage.",
+            unit="ms",
+        )
+    )
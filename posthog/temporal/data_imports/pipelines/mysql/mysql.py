@@ -22,6 +22,7 @@ from posthog.temporal.data_imports.pipelines.pipeline.utils import (
     DEFAULT_NUMERIC_SCALE,
     DEFAULT_PARTITION_TARGET_SIZE_IN_BYTES,
     build_pyarrow_decimal_type,
+    ColumnTypeCache,
     table_from_iterator,
 )
 from posthog.temporal.data_imports.pipelines.source.sql import Column, Table
@@ -361,12 +362,15 @@ def mysql_source(
 
                 column_names = [column[0] for column in cursor.description or []]
 
+                column_type_cache = ColumnTypeCache()
                 while True:
                     rows = cursor.fetchmany(DEFAULT_CHUNK_SIZE)
                     if not rows:
                         break
 
-                    yield table_from_iterator((dict(zip(column_names, row)) for row in rows), arrow_schema)
+                    yield table_from_iterator(
+                        (dict(zip(column_names, row)) for row in rows), arrow_schema, column_type_cache
+                    )
 
     name = NamingConvention().normalize_identifier(table_name)
 
@@ -1,16 +1,25 @@
+import collections
+import contextlib
 import gc
+import queue
+import threading
 import time
+from collections.abc import Generator, Iterator
 from typing import Any
 
 import deltalake as deltalake
 import pyarrow as pa
+from django import db
+from django.conf import settings
 from dlt.sources import DltSource
+from temporalio import activity
 
 from posthog.temporal.common.logger import FilteringBoundLogger
 from posthog.temporal.common.shutdown import ShutdownMonitor
 from posthog.temporal.data_imports.deltalake_compaction_job import (
     trigger_compaction_job,
 )
+from posthog.temporal.data_imports.metrics import get_pipeline_stage_duration_metric
 from posthog.temporal.data_imports.pipelines.pipeline.delta_table_helper import (
     DeltaTableHelper,
 )
@@ -29,6 +38,7 @@ from posthog.temporal.data_imports.pipelines.pipeline.utils import (
     append_partition_key_to_table,
     normalize_table_column_names,
     should_partition_table,
+    ColumnTypeCache,
     table_from_py_list,
 )
 from posthog.temporal.data_imports.pipelines.pipeline_sync import (
@@ -41,6 +51,43 @@ from posthog.warehouse.models import (
     ExternalDataSchema,
 )
 
+# Marks the end of the resource's items, which can include `None`
+_END_OF_ITEMS = object()
+
+# How long to wait for the source reading thread to notice it was stopped. It can't be interrupted while it waits for
+# the source, so it's left behind (as a daemon thread) after that
+_PRODUCER_JOIN_TIMEOUT_SECONDS = 30
+
+
+class TableQueue(queue.Queue):
+    """A queue of pyarrow tables limited by bytes, like `RecordBatchQueue` for batch exports. `None` marks the end."""
+
+    def __init__(self, max_size_bytes: int = 0) -> None:
+        super().__init__(maxsize=max_size_bytes)
+        self._bytes_size = 0
+        # This is set by `queue.Queue.__init__` calling `_init`
+        self.queue: collections.deque
+
+    def _get(self) -> pa.Table | None:
+        """Override parent `_get` to keep track of bytes."""
+        item = self.queue.popleft()
+        if item is not None:
+            self._bytes_size -= item.get_total_buffer_size()
+        return item
+
+    def _put(self, item: pa.Table | None) -> None:
+        """Override parent `_put` to keep track of bytes."""
+        if item is not None:
+            self._bytes_size += item.get_total_buffer_size()
+        self.queue.append(item)
+
+    def _qsize(self) -> int:
+        """
+        Size in bytes of the tables in the queue, used to determine when the queue is full.
+        Never 0 while there are items left, as it's also used to determine when the queue is empty.
+        """
+        return max(self._bytes_size, len(self.queue))
+
 
 class PipelineNonDLT:
     _resource: SourceResponse
@@ -95,9 +142,12 @@ class PipelineNonDLT:
         self._internal_schema = HogQLSchema()
         self._shutdown_monitor = shutdown_monitor
         self._last_incremental_field_value: Any = None
+        self._column_type_cache = ColumnTypeCache()
+        self._stage_durations: collections.defaultdict[str, float] = collections.defaultdict(float)
 
     def run(self):
         pa_memory_pool = pa.default_memory_pool()
+        tables: Generator[pa.Table, None, None] | None = None
 
         try:
             # Reset the rows_synced count - this may not be 0 if the job restarted due to a heartbeat timeout
@@ -109,8 +159,6 @@ class PipelineNonDLT:
                 self._job.rows_synced = 0
                 self._job.save()
 
-            buffer: list[Any] = []
-            py_table = None
             row_count = 0
             chunk_index = 0
 
@@ -124,56 +172,33 @@ class PipelineNonDLT:
                 self._delta_table_helper.reset_table()
                 self._schema.update_sync_type_config_for_reset_pipeline()
 
-            for item in self._resource.items:
-                py_table = None
-
-                if isinstance(item, list):
-                    if len(buffer) > 0:
-                        buffer.extend(item)
-                        if len(buffer) >= self._chunk_size:
-                            py_table = table_from_py_list(buffer)
-                            buffer = []
-                    else:
-                        if len(item) >= self._chunk_size:
-                            py_table = table_from_py_list(item)
-                        else:
-                            buffer.extend(item)
-                            continue
-                elif isinstance(item, dict):
-                    buffer.append(item)
-                    if len(buffer) < self._chunk_size:
-                        continue
-
-                    py_table = table_from_py_list(buffer)
-                    buffer = []
-                elif isinstance(item, pa.Table):
-                    py_table = item
-                else:
-                    raise Exception(f"Unhandled item type: {item.__class__.__name__}")
-
-                assert py_table is not None
+            if settings.DATA_IMPORT_PIPELINED_WRITES:
+                tables = self._iter_tables_pipelined()
+            else:
+                tables = self._iter_tables()
 
-                self._process_pa_table(pa_table=py_table, index=chunk_index)
+            for py_table in tables:
+                with self._time_stage("write"):
+                    self._process_pa_table(pa_table=py_table, index=chunk_index)
 
                 row_count += py_table.num_rows
                 chunk_index += 1
 
                 # Cleanup
-                if "py_table" in locals() and py_table is not None:
-                    del py_table
+                del py_table
                 pa_memory_pool.release_unused()
-                gc.collect()
+                self._maybe_collect_garbage(pa_memory_pool)
 
                 if self._is_incremental:
                     self._shutdown_monitor.raise_if_is_worker_shutdown()
 
-            if len(buffer) > 0:
-                py_table = table_from_py_list(buffer)
-                self._process_pa_table(pa_table=py_table, index=chunk_index)
-                row_count += py_table.num_rows
-
             self._post_run_operations(row_count=row_count)
         finally:
+            if tables is not None:
+                # Stops reading from the source if the pipeline failed
+                tables.close()
+            self._report_stage_durations()
+
             # Help reduce the memory footprint of each job
             delta_table = self._delta_table_helper.get_delta_table()
             self._delta_table_helper.get_delta_table.cache_clear()
@@ -183,13 +208,138 @@ class PipelineNonDLT:
             del self._resource
             del self._delta_table_helper
 
-            if "buffer" in locals() and buffer is not None:
-                del buffer
-            if "py_table" in locals() and py_table is not None:
+            pa_memory_pool.release_unused()
+            gc.collect()
+
+    def _iter_tables(self) -> Generator[pa.Table, None, None]:
+        """Reads the items of the resource into tables of at least `_chunk_size` rows, except for the last one."""
+        buffer: list[Any] = []
+        items = iter(self._resource.items)
+
+        while True:
+            with self._time_stage("source"):
+                item = next(items, _END_OF_ITEMS)
+            if item is _END_OF_ITEMS:
+                break
+
+            if isinstance(item, list):
+                if len(buffer) > 0:
+                    buffer.extend(item)
+                    if len(buffer) < self._chunk_size:
+                        continue
+                    py_table = self._table_from_py_list(buffer)
+                    buffer = []
+                elif len(item) >= self._chunk_size:
+                    py_table = self._table_from_py_list(item)
+                else:
+                    buffer.extend(item)
+                    continue
+            elif isinstance(item, dict):
+                buffer.append(item)
+                if len(buffer) < self._chunk_size:
+                    continue
+
+                py_table = self._table_from_py_list(buffer)
+                buffer = []
+            elif isinstance(item, pa.Table):
+                py_table = item
+            else:
+                raise Exception(f"Unhandled item type: {item.__class__.__name__}")
+
+            yield py_table
+            # Don't keep the table alive while reading the next item, so that the caller can free it
+            del py_table, item
+
+        if len(buffer) > 0:
+            yield self._table_from_py_list(buffer)
+
+    def _table_from_py_list(self, rows: list[Any]) -> pa.Table:
+        with self._time_stage("convert"):
+            return table_from_py_list(rows, type_cache=self._column_type_cache)
+
+    def _iter_tables_pipelined(self) -> Generator[pa.Table, None, None]:
+        """
+        Same as `_iter_tables`, but reads from the source in a separate thread, so that it doesn't wait for the
+        previous table to be written. The tables read ahead are limited by their size in bytes.
+        """
+        table_queue = TableQueue(max_size_bytes=settings.DATA_IMPORT_PIPELINE_QUEUE_MAX_BYTES)
+        stop = threading.Event()
+        producer_error: list[BaseException] = []
+
+        def put(item: pa.Table | None) -> bool:
+            while not stop.is_set():
+                try:
+                    table_queue.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                tables = self._iter_tables()
+                for py_table in tables:
+                    queued = put(py_table)
+                    del py_table
+                    if not queued:
+                        tables.close()
+                        return
+            except BaseException as e:
+                producer_error.append(e)
+            finally:
+                put(None)
+                # The source may have used the database in this thread
+                db.connections.close_all()
+
+        producer = threading.Thread(target=produce, name=f"data-import-producer-{self._job.id}", daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                with self._time_stage("queue_wait"):
+                    py_table = table_queue.get()
+                if py_table is None:
+                    break
+                yield py_table
                 del py_table
 
-            pa_memory_pool.release_unused()
+            if producer_error:
+                raise producer_error[0]
+        finally:
+            stop.set()
+            producer.join(timeout=_PRODUCER_JOIN_TIMEOUT_SECONDS)
+            if producer.is_alive():
+                self._logger.warning(
+                    f"Source reading thread didn't stop within {_PRODUCER_JOIN_TIMEOUT_SECONDS} seconds, leaving it behind"
+                )
+
+    def _maybe_collect_garbage(self, pa_memory_pool: pa.MemoryPool) -> None:
+        """Collecting garbage takes a while on big heaps, so it's only done once enough memory is allocated."""
+        if pa_memory_pool.bytes_allocated() < settings.DATA_IMPORT_GC_THRESHOLD_BYTES:
+            return
+
+        with self._time_stage("gc"):
             gc.collect()
+            pa_memory_pool.release_unused()
+
+    @contextlib.contextmanager
+    def _time_stage(self, stage: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._stage_durations[stage] += time.monotonic() - start
+
+    def _report_stage_durations(self) -> None:
+        durations = dict(self._stage_durations)
+        self._logger.debug(
+            "Pipeline stage durations", **{f"{stage}_seconds": round(value, 3) for stage, value in durations.items()}
+        )
+        if not activity.in_activity():
+            return
+
+        for stage, duration in durations.items():
+            get_pipeline_stage_duration_metric(stage).record(int(duration * 1000))
 
     def _process_pa_table(self, pa_table: pa.Table, index: int):
         delta_table = self._delta_table_helper.get_delta_table()
@@ -0,0 +1,97 @@
+import collections
+import queue
+import threading
+import weakref
+from unittest import mock
+
+import pyarrow as pa
+import pytest
+
+from posthog.temporal.data_imports.pipelines.pipeline.pipeline import PipelineNonDLT, TableQueue
+from posthog.temporal.data_imports.pipelines.pipeline.utils import ColumnTypeCache
+
+
+def _table(num_rows: int) -> pa.Table:
+    return pa.table({"id": list(range(num_rows))})
+
+
+def test_table_queue_keeps_track_of_bytes():
+    table_queue = TableQueue()
+    table = _table(100)
+
+    table_queue.put(table)
+    table_queue.put(table)
+    assert table_queue.qsize() == 2 * table.get_total_buffer_size()
+
+    assert table_queue.get() is table
+    assert table_queue.qsize() == table.get_total_buffer_size()
+
+
+def test_table_queue_is_bounded_by_bytes():
+    table = _table(100)
+    table_queue = TableQueue(max_size_bytes=table.get_total_buffer_size())
+
+    table_queue.put(table)
+    with pytest.raises(queue.Full):
+        table_queue.put(table, timeout=0.1)
+
+    # A consumer frees up space for the producer
+    threading.Timer(0.1, table_queue.get).start()
+    table_queue.put(table, timeout=5)
+    assert table_queue.qsize() == table.get_total_buffer_size()
+
+
+def test_table_queue_returns_empty_tables_and_end_marker():
+    table_queue = TableQueue(max_size_bytes=1024)
+    empty_table = pa.table({"id": pa.array([], type=pa.int64())})
+
+    table_queue.put(empty_table, timeout=1)
+    table_queue.put(None, timeout=1)
+
+    assert table_queue.get(timeout=1) is empty_table
+    assert table_queue.get(timeout=1) is None
+    assert table_queue.empty()
+
+
+def _pipeline(items) -> PipelineNonDLT:
+    pipeline = PipelineNonDLT.__new__(PipelineNonDLT)
+    pipeline._resource = mock.MagicMock(items=items)
+    pipeline._job = mock.MagicMock(id="job")
+    pipeline._logger = mock.MagicMock()
+    pipeline._chunk_size = 2
+    pipeline._column_type_cache = ColumnTypeCache()
+    pipeline._stage_durations = collections.defaultdict(float)
+    return pipeline
+
+
+def test_iter_tables_drops_the_table_before_reading_the_next_item():
+    table_refs: list[weakref.ref] = []
+
+    def items():
+        yield _table(2)
+        # The previous table was already handed over to the caller, which dropped it
+        yield [{"id": 1 if table_refs[0]() is None else None}]
+
+    tables = _pipeline(items())._iter_tables()
+    table_refs.append(weakref.ref(next(tables)))
+
+    assert next(tables).column("id").to_pylist() == [1]
+
+
+def test_iter_tables_pipelined_stops_waiting_for_a_stuck_source():
+    source_blocked = threading.Event()
+
+    def items():
+        yield _table(2)
+        source_blocked.wait(timeout=10)
+        yield _table(2)
+
+    pipeline = _pipeline(items())
+    tables = pipeline._iter_tables_pipelined()
+    assert next(tables).num_rows == 2
+
+    with mock.patch("posthog.temporal.data_imports.pipelines.pipeline.pipeline._PRODUCER_JOIN_TIMEOUT_SECONDS", 0.1):
+        tables.close()
+
+    pipeline._logger.warning.assert_called_once()
+    source_blocked.set()
@@ -10,6 +10,7 @@ from dateutil import parser
 from posthog.temporal.data_imports.pipelines.pipeline.consts import PARTITION_KEY
 from posthog.temporal.data_imports.pipelines.pipeline.typings import SourceResponse
 from posthog.temporal.data_imports.pipelines.pipeline.utils import (
+    ColumnTypeCache,
     _get_max_decimal_type,
     should_partition_table,
     table_from_py_list,
@@ -109,6 +110,37 @@ def test_table_from_py_list_with_nan():
     )
 
 
+def test_table_from_py_list_with_nan_and_ints():
+    # The schema is inferred from the values before NaNs are removed
+    table = table_from_py_list([{"column": 1}, {"column": float("NaN")}])
+
+    assert table.equals(pa.table({"column": [1.0, None]}))
+    assert table.schema.equals(
+        pa.schema(
+            [
+                ("column", pa.float64()),
+            ]
+        )
+    )
+
+
+def test_table_from_py_list_with_type_cache():
+    type_cache = ColumnTypeCache()
+
+    first = table_from_py_list([{"id": 1, "name": "a", "json": {"a": 1}}], type_cache=type_cache)
+    assert type_cache.get("id", frozenset({int})) == pa.int64()
+    assert type_cache.get("name", frozenset({str})) == pa.string()
+    assert type_cache.get("json", frozenset({dict})) is None
+
+    second = table_from_py_list([{"id": 2, "name": "b", "json": {"b": 2}}], type_cache=type_cache)
+    assert second.schema.equals(first.schema)
+    assert second.equals(pa.table({"id": [2], "name": ["b"], "json": ['{"b":2}']}))
+
+    # A column with different types isn't converted with the cached type
+    third = table_from_py_list([{"id": 1.5, "name": "c", "json": None}], type_cache=type_cache)
+    assert third.column("id").type == pa.float64()
+
+
 def test_table_from_py_list_with_inf():
     table = table_from_py_list([{"column": 1.0}, {"column": float("Inf")}])
 
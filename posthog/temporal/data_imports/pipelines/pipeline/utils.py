@@ -449,22 +449,53 @@ def _json_dumps(obj: Any) -> str:
         raise TypeError(e)
 
 
-def table_from_iterator(data_iterator: Iterator[dict], schema: Optional[pa.Schema] = None) -> pa.Table:
+# Python types Arrow always infers the same type for, which makes the inferred type safe to reuse for later chunks.
+# Not datetimes, as the inferred timezone depends on the values.
+_REUSABLE_PYTHON_TYPES = frozenset({int, float, str, bool, datetime.date})
+
+
+class ColumnTypeCache:
+    """
+    Arrow types inferred for the columns of a resource, keyed by the Python types of the column's values.
+    Passed along with every chunk of the same resource, so Arrow can skip inferring the types again.
+    """
+
+    def __init__(self) -> None:
+        self._types: dict[str, tuple[frozenset[type], pa.DataType]] = {}
+
+    def get(self, column: str, value_types: frozenset[type]) -> pa.DataType | None:
+        cached = self._types.get(column)
+        if cached is None or cached[0] != value_types:
+            return None
+        return cached[1]
+
+    def set(self, column: str, value_types: frozenset[type], arrow_type: pa.DataType) -> None:
+        if value_types and value_types <= _REUSABLE_PYTHON_TYPES:
+            self._types[column] = (value_types, arrow_type)
+
+
+def table_from_iterator(
+    data_iterator: Iterator[dict],
+    schema: Optional[pa.Schema] = None,
+    type_cache: Optional[ColumnTypeCache] = None,
+) -> pa.Table:
     batch = list(data_iterator)
     if not batch:
         return pa.Table.from_pylist([])
 
-    processed_batch = _process_batch(list(batch), schema)
+    processed_batch = _process_batch(list(batch), schema, type_cache)
 
     return processed_batch
 
 
-def table_from_py_list(table_data: list[Any], schema: Optional[pa.Schema] = None) -> pa.Table:
+def table_from_py_list(
+    table_data: list[Any], schema: Optional[pa.Schema] = None, type_cache: Optional[ColumnTypeCache] = None
+) -> pa.Table:
     """
     Convert a list of Python dictionaries to a PyArrow Table.
     This is a wrapper around table_from_iterator for backward compatibility.
     """
-    return table_from_iterator(iter(table_data), schema=schema)
+    return table_from_iterator(iter(table_data), schema=schema, type_cache=type_cache)
 
 
 def build_pyarrow_decimal_type(precision: int, scale: int) -> pa.Decimal128Type | pa.Decimal256Type:
@@ -560,43 +591,89 @@ def _python_type_to_pyarrow_type(type_: type, value: Any):
     raise ValueError(f"Python type {type_} has no pyarrow mapping")
 
 
-def _process_batch(table_data: list[dict], schema: Optional[pa.Schema] = None) -> pa.Table:
-    # Support both given schemas and inferred schemas
-    if schema is None:
-        try:
-            arrow_schema = pa.Table.from_pylist(table_data).schema
-        except:
-            arrow_schema = None
-    else:
-        arrow_schema = schema
+def _arrow_array_value_types(array: pa.Array) -> set[type]:
+    """Returns the Python types of the non-null values in `array`, as `array.tolist()` would, without converting it."""
+    if array.null_count == len(array):
+        return set()
+
+    first_valid = array[0] if array.null_count == 0 else array.drop_null()[0]
+    return {type(first_valid.as_py())}
 
+
+def _process_batch(
+    table_data: list[dict], schema: Optional[pa.Schema] = None, type_cache: Optional[ColumnTypeCache] = None
+) -> pa.Table:
     drop_column_names: set[str] = set()
 
     column_names = set(table_data[0].keys())
     columnar_table_data: dict[str, pa.Array | np.ndarray[Any, np.dtype[Any]]] = {}
+    column_value_types: dict[str, set[type]] = {}
+    first_values: dict[str, Any] = {}
+    # Only needed to infer a schema when none is given. Same as `pa.Table.from_pylist(table_data).schema`, that is
+    # from the values before NaNs are replaced, and `None` if any of the columns can't be converted.
+    inferred_types: Optional[dict[str, pa.DataType]] = {} if schema is None else None
 
     for col in column_names:
-        values = [
-            None if isinstance(row.get(col, None), float) and np.isnan(row.get(col, None)) else row.get(col, None)
-            for row in table_data
-        ]
+        raw_values = [row.get(col, None) for row in table_data]
+        value_types = set(map(type, raw_values))
+        value_types.discard(type(None))
+        first_values[col] = next((value for value in raw_values if value is not None), None)
+
+        values = raw_values
+        if any(issubclass(value_type, float) for value_type in value_types):
+            values = [None if isinstance(value, float) and math.isnan(value) else value for value in raw_values]
+
+        frozen_value_types = frozenset(value_types)
+        array: pa.Array | None = None
+        cached_type = type_cache.get(col, frozen_value_types) if type_cache is not None else None
+        if cached_type is not None:
+            try:
+                array = pa.array(values, type=cached_type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                array = None
 
-        try:
-            # We want to use pyarrow arrays where possible to optimise on memory usage
-            columnar_table_data[col] = pa.array(values)
-        except:
+        if array is None:
+            try:
+                # We want to use pyarrow arrays where possible to optimise on memory usage
+                array = pa.array(values)
+            except:
+                array = None
+
+        if array is not None:
+            columnar_table_data[col] = array
+            column_value_types[col] = _arrow_array_value_types(array)
+            if type_cache is not None:
+                type_cache.set(col, frozen_value_types, array.type)
+        else:
             # Some values can't be interpreted by pyarrows directly
-            columnar_table_data[col] = np.array(values, dtype=object)
+            object_array = np.array(values, dtype=object)
+            columnar_table_data[col] = object_array
+            column_value_types[col] = {type(item) for item in object_array.tolist() if item is not None}
+
+        if inferred_types is not None:
+            if values is not raw_values:
+                try:
+                    inferred_types[col] = pa.array(raw_values).type
+                except:
+                    inferred_types = None
+            elif array is not None:
+                inferred_types[col] = array.type
+            else:
+                inferred_types = None
+
+    # Support both given schemas and inferred schemas
+    arrow_schema: Optional[pa.Schema]
+    if schema is not None:
+        arrow_schema = schema
+    elif inferred_types is not None:
+        arrow_schema = pa.schema([pa.field(name, inferred_types[name]) for name in table_data[0].keys()])
+    else:
+        arrow_schema = None
 
     for field_name in columnar_table_data.keys():
-        py_type: type = type(None)
-        unique_types_in_column = {type(item) for item in columnar_table_data[field_name].tolist() if item is not None}
-
-        for row in table_data:
-            val = row.get(field_name, None)
-            if val is not None:
-                py_type = type(val)
-                break
+        unique_types_in_column = column_value_types[field_name]
+        val = first_values[field_name]
+        py_type: type = type(val)
 
         # If a schema is present:
         if arrow_schema:
@@ -3,6 +3,7 @@ from posthog.temporal.data_modeling.run_workflow import (
     build_dag_activity,
     create_table_activity,
     finish_run_activity,
+    plan_dag_activity,
     run_dag_activity,
     start_run_activity,
     cancel_jobs_activity,
@@ -14,6 +15,7 @@ ACTIVITIES = [
     start_run_activity,
     build_dag_activity,
     run_dag_activity,
+    plan_dag_activity,
     create_table_activity,
     cancel_jobs_activity,
 ]
@@ -1,5 +1,5 @@
-from temporalio import workflow
-from temporalio.common import MetricCounter
+from temporalio import activity, workflow
+from temporalio.common import MetricCounter, MetricHistogram
 
 
 def get_data_modeling_finished_metric(status: str) -> MetricCounter:
@@ -10,3 +10,10 @@ def get_data_modeling_finished_metric(status: str) -> MetricCounter:
             "data_modeling_finished", "Number of data modeling runs finished, for any reason (including failure)."
         )
     )
+
+
+def get_data_modeling_rows_per_second_metric() -> MetricHistogram:
+    return activity.metric_meter().create_histogram(
+        "data_modeling_materialization_rows_per_second",
+        "Rows per second written to Delta when materializing a model by streaming it from ClickHouse.",
+    )
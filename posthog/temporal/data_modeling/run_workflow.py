@@ -6,6 +6,7 @@ import enum
 import itertools
 import json
 import re
+import time
 import typing
 import uuid
 
@@ -13,26 +14,39 @@ import os
 import dlt
 import dlt.common.data_types as dlt_data_types
 import dlt.common.schema.typing as dlt_typing
+import pyarrow as pa
+import pyarrow.compute as pc
 import structlog
 import temporalio.activity
 import temporalio.common
 import temporalio.exceptions
 import temporalio.workflow
-from deltalake import DeltaTable
+from deltalake import DeltaTable, write_deltalake
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from dlt.common.libs.deltalake import get_delta_tables
 
 from posthog.clickhouse.client.connection import Workload
 from posthog.exceptions_capture import capture_exception
+from posthog.hogql import ast
 from posthog.hogql.constants import HogQLGlobalSettings, LimitContext
+from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.database import create_hogql_database
-from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.parser import parse_select
+from posthog.hogql.query import HogQLQueryExecutor, execute_hogql_query
 from posthog.models import Team
 from posthog.settings.base_variables import TEST
 from posthog.temporal.common.base import PostHogWorkflow
+from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.heartbeat import Heartbeater
 from posthog.temporal.data_imports.util import prepare_s3_files_for_querying
-from posthog.temporal.data_modeling.metrics import get_data_modeling_finished_metric
+from posthog.temporal.data_modeling.metrics import (
+    get_data_modeling_finished_metric,
+    get_data_modeling_rows_per_second_metric,
+)
+from posthog.temporal.data_modeling.scheduler import ModelScheduler, plan_schedule
 from posthog.warehouse.data_load.create_table import create_table_from_saved_query
 from posthog.warehouse.models import DataWarehouseModelPath, DataWarehouseSavedQuery, DataWarehouseTable
 from posthog.warehouse.models.data_modeling_job import DataModelingJob
@@ -72,11 +86,23 @@ CLICKHOUSE_DLT_MAPPING: dict[str, dlt_data_types.TDataType] = {
 }
 
 
+# Column types that incremental models can be filtered by
+WATERMARK_DATA_TYPES = ("timestamp", "date", "bigint", "double")
+
+WriteDisposition = typing.Literal["replace", "append", "merge"]
+
+
 class EmptyHogQLResponseColumnsError(Exception):
     def __init__(self):
         super().__init__("After running a HogQL query, no columns where returned")
 
 
+class InvalidWatermarkColumnException(Exception):
+    """Exception raised when the watermark column of an incremental model can't be used."""
+
+    pass
+
+
 class DataModelingCancelledException(Exception):
     """Exception raised when a data modeling job is cancelled."""
 
@@ -150,6 +176,9 @@ Results = collections.namedtuple("Results", ("completed", "failed", "ancestor_fa
 
 NullablePattern = re.compile(r"Nullable\((.*)\)")
 
+# Number of the latest completed jobs of a model that its expected runtime is averaged over
+HISTORICAL_RUNTIME_JOBS = 5
+
 
 @temporalio.activity.defn
 async def run_dag_activity(inputs: RunDagActivityInputs) -> Results:
@@ -167,20 +196,24 @@ async def run_dag_activity(inputs: RunDagActivityInputs) -> Results:
 
     This activity runs the following algorithm:
     1. Initialize 3 sets: completed, failed, and ancestor failed.
-    2. Initialize a queue for models and statuses.
-    3. Populate it with any models without parents set to status `ModelStatus.READY`.
+    2. Initialize a queue for models and statuses, and a scheduler for models ready to run.
+    3. Populate the scheduler with any models without parents.
     4. Start a loop.
-    5. Pop an item from the queue and check the status:
-       a. If it's `ModelStatus.READY`, schedule a task to run the model. Once the task is
-          done, report back results by putting the same model with a
-          `ModelStatus.COMPLETED` or `ModelStatus.FAILED` in the queue.
+    5. Schedule a task to run each of the ready models that the scheduler lets start. The
+       scheduler limits how many models of the team run at the same time and the ClickHouse
+       memory they can use, and starts the models with the longest critical paths first.
+       See `ModelScheduler` for more details. Once a task is done, it reports back results
+       by putting the same model with a `ModelStatus.COMPLETED` or `ModelStatus.FAILED` in
+       the queue.
+    6. Pop an item from the queue and check the status:
+       a. If it's `ModelStatus.READY`, add the model to the scheduler.
        b. If it's `ModelStatus.COMPLETED`, add the model to the completed set. Also, check
           if any of the model's children have become ready to run, by checking if all of
-          their parents are in the completed set. Put any children that pass this check in
-          status `ModelStatus.READY` in the queue.
+          their parents are in the completed set. Add any children that pass this check to
+          the scheduler.
        c. If it's `ModelStatus.FAILED`, add the model to the failed set. Also, add all
           descendants of the model that just failed to the ancestor failed set.
-    6. If the number of models in the completed, failed, and ancestor failed sets is equal
+    7. If the number of models in the completed, failed, and ancestor failed sets is equal
        to the total number of models passed to this activity, exit the loop. Else, goto 5.
     """
     completed = set()
@@ -188,45 +221,47 @@ async def run_dag_activity(inputs: RunDagActivityInputs) -> Results:
     failed = set()
     queue: asyncio.Queue[QueueMessage] = asyncio.Queue()
 
-    for node in inputs.dag.values():
-        if not node.parents:
-            queue.put_nowait(QueueMessage(status=ModelStatus.READY, label=node.label))
-
-    if queue.empty():
+    roots = [node.label for node in inputs.dag.values() if not node.parents]
+    if not roots:
         raise asyncio.QueueEmpty()
 
     running_tasks = set()
 
     async with Heartbeater():
+        scheduler = await build_model_scheduler(inputs.team_id, inputs.dag)
+        for label in roots:
+            scheduler.add_ready(label)
+
         while True:
+            for label in scheduler.pop_runnable():
+                task = asyncio.create_task(handle_model_ready(inputs.dag[label], inputs.team_id, queue))
+                running_tasks.add(task)
+                task.add_done_callback(running_tasks.discard)
+
             message = await queue.get()
             match message:
                 case QueueMessage(status=ModelStatus.READY, label=label):
-                    model = inputs.dag[label]
-                    task = asyncio.create_task(handle_model_ready(model, inputs.team_id, queue))
-                    running_tasks.add(task)
-                    task.add_done_callback(running_tasks.discard)
+                    scheduler.add_ready(label)
+
+                    queue.task_done()
 
                 case QueueMessage(status=ModelStatus.COMPLETED, label=label):
                     node = inputs.dag[label]
                     completed.add(node.label)
+                    scheduler.finish(node.label)
 
-                    to_queue = []
                     for child_label in node.children:
                         child_node = inputs.dag[child_label]
 
                         if completed >= child_node.parents:
-                            to_queue.append(child_node)
-
-                    task = asyncio.create_task(put_models_in_queue(to_queue, queue))
-                    running_tasks.add(task)
-                    task.add_done_callback(running_tasks.discard)
+                            scheduler.add_ready(child_node.label)
 
                     queue.task_done()
 
                 case QueueMessage(status=ModelStatus.FAILED, label=label):
                     node = inputs.dag[label]
                     failed.add(node.label)
+                    scheduler.finish(node.label)
 
                     to_mark_as_ancestor_failed = list(node.children)
                     marked = set()
@@ -253,16 +288,56 @@ async def run_dag_activity(inputs: RunDagActivityInputs) -> Results:
         return Results(completed, failed, ancestor_failed)
 
 
-async def put_models_in_queue(models: collections.abc.Iterable[ModelNode], queue: asyncio.Queue[QueueMessage]) -> None:
-    """Put models in queue.
+def get_max_concurrent_models(team_id: int) -> int:
+    return settings.DATA_MODELING_MAX_CONCURRENT_MODELS_OVERRIDES.get(
+        team_id, settings.DATA_MODELING_MAX_CONCURRENT_MODELS
+    )
+
+
+async def get_historical_runtimes(team_id: int, labels: collections.abc.Iterable[str]) -> dict[str, float]:
+    """Get the average runtime in seconds of the latest completed jobs of each model.
 
-    Intended to handle the queue put calls in the background to avoid blocking the main thread.
-    We wait for all models to be put into the queue, concurrently, in a `asyncio.TaskGroup`.
+    Jobs are created when a model starts running and their `last_run_at` is set when it
+    finishes, so the time between both is how long the model took to run. Models that
+    haven't completed a run yet are left out.
     """
+    labels_by_id: dict[uuid.UUID, str] = {}
+    labels_by_name: dict[str, str] = {}
+    for label in labels:
+        try:
+            labels_by_id[uuid.UUID(label)] = label
+        except ValueError:
+            labels_by_name[label] = label
+
+    def get_runtimes() -> dict[str, float]:
+        # The latest jobs of all the models at once, numbered from the latest within each model
+        jobs = (
+            DataModelingJob.objects.filter(team_id=team_id, status=DataModelingJob.Status.COMPLETED)
+            .filter(Q(saved_query_id__in=labels_by_id) | Q(saved_query__name__in=labels_by_name))
+            .exclude(saved_query__deleted=True)
+            .annotate(recency=Window(RowNumber(), partition_by=[F("saved_query_id")], order_by=F("created_at").desc()))
+            .filter(recency__lte=HISTORICAL_RUNTIME_JOBS)
+            .values_list("saved_query_id", "saved_query__name", "created_at", "last_run_at")
+        )
 
-    async with asyncio.TaskGroup() as tg:
-        for model in models:
-            tg.create_task(queue.put(QueueMessage(status=ModelStatus.READY, label=model.label)))
+        durations: dict[str, list[float]] = collections.defaultdict(list)
+        for saved_query_id, name, created_at, last_run_at in jobs:
+            label = labels_by_id.get(saved_query_id) or labels_by_name[name]
+            durations[label].append((last_run_at - created_at).total_seconds())
+        return {label: sum(label_durations) / len(label_durations) for label, label_durations in durations.items()}
+
+    return await database_sync_to_async(get_runtimes)()
+
+
+async def build_model_scheduler(team_id: int, dag: DAG) -> ModelScheduler:
+    runtimes = await get_historical_runtimes(team_id, [label for label, node in dag.items() if node.selected])
+    return ModelScheduler(
+        dag,
+        runtimes,
+        max_concurrency=get_max_concurrent_models(team_id),
+        memory_per_model=settings.DATA_MODELING_MAX_MEMORY_USAGE,
+        memory_budget=settings.DATA_MODELING_MEMORY_BUDGET,
+    )
 
 
 class CHQueryErrorMemoryLimitExceeded(Exception):
@@ -303,6 +378,8 @@ async def handle_model_ready(model: ModelNode, team_id: int, queue: asyncio.Queu
         await handle_error(job, model, queue, err, "Memory limit exceeded for model %s: %s")
     except CannotCoerceColumnException as err:
         await handle_error(job, model, queue, err, "Type coercion error for model %s: %s")
+    except InvalidWatermarkColumnException as err:
+        await handle_error(job, model, queue, err, "Invalid watermark column for model %s: %s")
     except DataModelingCancelledException as err:
         await handle_cancelled(job, model, queue, err, "Data modeling run was cancelled for model %s: %s")
     except Exception as err:
@@ -310,8 +387,6 @@ async def handle_model_ready(model: ModelNode, team_id: int, queue: asyncio.Queu
     else:
         await logger.ainfo("Materialized model %s", model.label)
         await queue.put(QueueMessage(status=ModelStatus.COMPLETED, label=model.label))
-    finally:
-        queue.task_done()
 
 
 async def handle_error(
@@ -369,7 +444,8 @@ async def get_saved_query(team: Team, model_label: str) -> DataWarehouseSavedQue
 async def materialize_model(
     model_label: str, team: Team, saved_query: DataWarehouseSavedQuery, job: DataModelingJob
 ) -> tuple[str, DeltaTable, uuid.UUID]:
-    """Materialize a given model by running its query in a dlt pipeline.
+    """Materialize a given model by running its query in a dlt pipeline, or by streaming it into a
+    Delta table when `DATA_MODELING_STREAMING_MATERIALIZATION` is enabled.
 
     Arguments:
         model_label: A label representing the ID or the name of the model to materialize.
@@ -402,17 +478,51 @@ async def materialize_model(
         }
         table_columns[column_name] = column_schema
 
-    hogql_query = saved_query.query["query"]
-    destination = get_dlt_destination()
-    pipeline = dlt.pipeline(
-        pipeline_name=f"materialize_model_{model_label}",
-        destination=destination,
-        dataset_name=f"team_{team.pk}_model_{model_label}",
-        refresh="drop_sources",
-    )
+    now = dt.datetime.now(dt.UTC)
+    full_rebuild = saved_query.is_full_rebuild_due(now)
+    watermark_column = saved_query.watermark_column
+    last_watermark = None
+
+    if saved_query.is_incremental and (
+        watermark_column not in table_columns
+        or table_columns[watermark_column]["data_type"] not in WATERMARK_DATA_TYPES
+    ):
+        error_message = f"Watermark column {watermark_column} must be a date, timestamp or numeric column of the model"
+        saved_query.latest_error = error_message
+        await database_sync_to_async(saved_query.save)()
+        await mark_job_as_failed(job, error_message)
+        raise InvalidWatermarkColumnException(f"Invalid watermark column for model {model_label}: {error_message}")
+
+    hogql_query: str | ast.SelectQuery = saved_query.query["query"]
+    write_disposition: WriteDisposition = "replace"
+    if not full_rebuild:
+        assert watermark_column is not None
+        last_watermark = decode_watermark(saved_query.last_watermark, table_columns[watermark_column])
+        hogql_query = build_incremental_query(saved_query.query["query"], watermark_column, last_watermark)
+        write_disposition = "merge" if saved_query.unique_key else "append"
+
+    pipeline: dlt.Pipeline | None = None
+    tables: dict[str, DeltaTable] = {}
+    row_count = 0
 
     try:
-        _ = await asyncio.to_thread(pipeline.run, hogql_table(hogql_query, team, saved_query.name, table_columns))
+        if settings.DATA_MODELING_STREAMING_MATERIALIZATION:
+            delta_table, row_count = await stream_model_to_delta_table(
+                hogql_query, team, saved_query, table_columns, write_disposition
+            )
+            tables[saved_query.name] = delta_table
+        else:
+            destination = get_dlt_destination()
+            pipeline = dlt.pipeline(
+                pipeline_name=f"materialize_model_{model_label}",
+                destination=destination,
+                dataset_name=f"team_{team.pk}_model_{model_label}",
+                refresh="drop_sources" if write_disposition == "replace" else None,
+            )
+            source = hogql_table(
+                hogql_query, team, saved_query.name, table_columns, write_disposition, saved_query.unique_key
+            )
+            _ = await asyncio.to_thread(pipeline.run, source)
     except Exception as e:
         error_message = str(e)
         if "Query exceeds memory limits" in error_message:
@@ -440,7 +550,8 @@ async def materialize_model(
     if data_modeling_job.status == DataModelingJob.Status.CANCELLED:
         raise DataModelingCancelledException("Data modeling run was cancelled")
 
-    tables = get_delta_tables(pipeline)
+    if pipeline is not None:
+        tables = get_delta_tables(pipeline)
     for table in tables.values():
         table.optimize.compact()
         table.vacuum(retention_hours=24, enforce_retention_duration=False, dry_run=False)
@@ -457,8 +568,15 @@ async def materialize_model(
     key, delta_table = tables.popitem()
 
     # Count rows and update both DataWarehouseTable and DataModelingJob
-    row_count = count_pipeline_rows(pipeline)
-    await update_table_row_count(saved_query, row_count)
+    if pipeline is not None:
+        row_count = count_pipeline_rows(pipeline)
+    await update_table_row_count(saved_query, row_count if full_rebuild else count_delta_table_rows(delta_table))
+
+    watermark = None
+    if saved_query.is_incremental:
+        assert watermark_column is not None
+        watermark = get_watermark(delta_table, watermark_column, last_watermark)
+    await database_sync_to_async(save_watermark)(saved_query, watermark, full_rebuild, now)
 
     # Update the job record with the row count and completed status
     job.rows_materialized = row_count
@@ -469,6 +587,44 @@ async def materialize_model(
     return (key, delta_table, job.id)
 
 
+def save_watermark(
+    saved_query: DataWarehouseSavedQuery, watermark: typing.Any, full_rebuild: bool, now: dt.datetime
+) -> None:
+    """Save the watermark of a run on the current state of the saved query.
+
+    The saved query may have been edited through the API while the model ran, so its row is locked and re-read, and
+    the watermark is dropped when the query or the materialization settings it was computed with have changed.
+    """
+    with transaction.atomic():
+        current = DataWarehouseSavedQuery.objects.select_for_update().get(id=saved_query.id)
+
+        if (
+            current.query != saved_query.query
+            or current.materialization_mode != saved_query.materialization_mode
+            or _without_watermark(current.materialization_config)
+            != _without_watermark(saved_query.materialization_config)
+        ):
+            saved_query.materialization_mode = current.materialization_mode
+            saved_query.materialization_config = current.materialization_config
+            return
+
+        if current.is_incremental:
+            current.update_watermark(watermark, full_rebuild, now)
+        else:
+            current.reset_watermark()
+        current.save(update_fields=["materialization_config"])
+
+    saved_query.materialization_config = current.materialization_config
+
+
+def _without_watermark(materialization_config: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    return {
+        key: value
+        for key, value in materialization_config.items()
+        if key not in ("last_watermark", "last_full_rebuild_at")
+    }
+
+
 async def mark_job_as_failed(job: DataModelingJob, error_message: str) -> None:
     """
     Mark DataModelingJob as failed
@@ -478,6 +634,35 @@ async def mark_job_as_failed(job: DataModelingJob, error_message: str) -> None:
     await database_sync_to_async(job.save)()
 
 
+def count_delta_table_rows(delta_table: DeltaTable) -> int:
+    """Count the rows of a Delta table from the statistics of its files, without reading them."""
+    return sum(delta_table.get_add_actions().column("num_records").to_pylist())
+
+
+def decode_watermark(watermark: typing.Any, column_schema: dlt_typing.TColumnSchema) -> typing.Any:
+    """Watermarks of date and timestamp columns are stored in ISO format."""
+    if watermark is None:
+        return None
+    if column_schema["data_type"] == "timestamp":
+        return dt.datetime.fromisoformat(watermark)
+    if column_schema["data_type"] == "date":
+        return dt.date.fromisoformat(watermark)
+    return watermark
+
+
+def get_watermark(delta_table: DeltaTable, watermark_column: str, last_watermark: typing.Any) -> typing.Any:
+    """The highest value of the watermark column in a Delta table, as stored in the saved query, or None if no
+    rows were added past the last watermark.
+
+    Only rows past the last watermark are read, which the statistics of the older files let us skip."""
+    dataset = delta_table.to_pyarrow_dataset()
+    filter = pc.field(watermark_column) > last_watermark if last_watermark is not None else None
+    watermark = pc.max(dataset.to_table(columns=[watermark_column], filter=filter)[watermark_column]).as_py()
+    if isinstance(watermark, dt.date):
+        return watermark.isoformat()
+    return watermark
+
+
 def count_pipeline_rows(pipeline: dlt.Pipeline) -> int:
     """
     Count the number of rows written in a dlt pipeline
@@ -508,13 +693,21 @@ async def update_table_row_count(saved_query: DataWarehouseSavedQuery, row_count
 
 
 @dlt.source(max_table_nesting=0)
-def hogql_table(query: str, team: Team, table_name: str, table_columns: dlt_typing.TTableSchemaColumns):
+def hogql_table(
+    query: str | ast.SelectQuery,
+    team: Team,
+    table_name: str,
+    table_columns: dlt_typing.TTableSchemaColumns,
+    write_disposition: WriteDisposition = "replace",
+    primary_key: list[str] | None = None,
+):
     """A dlt source representing a HogQL table given by a HogQL query."""
+    max_memory_usage = settings.DATA_MODELING_MAX_MEMORY_USAGE
 
     async def get_hogql_rows():
         settings = HogQLGlobalSettings(
-            max_execution_time=60 * 20, max_memory_usage=180 * 1000 * 1000 * 1000
-        )  # 20 mins, 180gb, 2x execution_time, 4x max_memory_usage as the /query endpoint async workers
+            max_execution_time=60 * 20, max_memory_usage=max_memory_usage
+        )  # 20 mins, 2x execution_time as the /query endpoint async workers
 
         # Pass the query_type parameter to influence tags in a thread safe way
         response = await asyncio.to_thread(
@@ -540,7 +733,10 @@ def hogql_table(query: str, team: Team, table_name: str, table_columns: dlt_typi
         name="hogql_table",
         table_name=table_name,
         table_format="delta",
-        write_disposition="replace",
+        write_disposition=(
+            {"disposition": "merge", "strategy": "upsert"} if write_disposition == "merge" else write_disposition
+        ),
+        primary_key=primary_key or (),
         columns=table_columns,
     )
 
@@ -570,6 +766,190 @@ def get_dlt_destination():
     )
 
 
+# Arrow types that columns are written to Delta as, matching what dlt writes for the same columns. Columns of other
+# types are streamed and written as strings
+DLT_ARROW_MAPPING: dict[str, pa.DataType] = {
+    "text": pa.string(),
+    "timestamp": pa.timestamp("us", tz="UTC"),
+    "date": pa.date32(),
+    "bigint": pa.int64(),
+    "double": pa.float64(),
+    "complex": pa.string(),
+    "bool": pa.bool_(),
+    "decimal": pa.decimal128(38, 9),
+}
+
+
+def get_delta_storage_options() -> dict[str, str]:
+    storage_options = {
+        "aws_access_key_id": settings.AIRBYTE_BUCKET_KEY,
+        "aws_secret_access_key": settings.AIRBYTE_BUCKET_SECRET,
+        "region_name": settings.AIRBYTE_BUCKET_REGION,
+        "AWS_DEFAULT_REGION": settings.AIRBYTE_BUCKET_REGION,
+        "AWS_S3_ALLOW_UNSAFE_RENAME": "true",
+    }
+    if TEST:
+        storage_options["endpoint_url"] = settings.OBJECT_STORAGE_ENDPOINT
+        storage_options["AWS_ALLOW_HTTP"] = "true"
+    return storage_options
+
+
+def build_incremental_query(query: str, watermark_column: str, last_watermark: typing.Any) -> ast.SelectQuery:
+    """Select only the rows of a HogQL query past the last watermark. ClickHouse pushes the condition down into the
+    query, so tables that are filtered or sorted by the watermark column only read the new rows."""
+    return ast.SelectQuery(
+        select=[ast.Field(chain=["*"])],
+        select_from=ast.JoinExpr(table=parse_select(query)),
+        where=ast.CompareOperation(
+            op=ast.CompareOperationOp.Gt,
+            left=ast.Field(chain=[watermark_column]),
+            right=ast.Constant(value=last_watermark),
+        ),
+    )
+
+
+def build_streaming_query(
+    query: str | ast.SelectQuery, table_columns: dlt_typing.TTableSchemaColumns
+) -> ast.SelectQuery:
+    """Select the columns of a HogQL query in the order of `table_columns`, converting the types that ClickHouse
+    doesn't send as the Arrow types we write: UUIDs are sent as binary, arrays, maps and tuples as nested types
+    where dlt writes JSON, and types without an Arrow type are written as strings."""
+    select: list[ast.Expr] = []
+    for index, (column_name, column_schema) in enumerate(table_columns.items()):
+        field = ast.Field(chain=[column_name])
+        data_type = column_schema.get("data_type")
+        if data_type == "complex":
+            select.append(ast.Alias(alias=f"streamed_column_{index}", expr=ast.Call(name="toJSONString", args=[field])))
+        elif data_type == "text" or data_type not in DLT_ARROW_MAPPING:
+            select.append(ast.Alias(alias=f"streamed_column_{index}", expr=ast.Call(name="toString", args=[field])))
+        else:
+            select.append(field)
+
+    table = parse_select(query) if isinstance(query, str) else query
+    return ast.SelectQuery(select=select, select_from=ast.JoinExpr(table=table))
+
+
+def cast_record_batch(record_batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """Cast the columns of a record batch streamed from ClickHouse, by position, to the types of `schema`."""
+    columns = []
+    for column, field in zip(record_batch.columns, schema):
+        if pa.types.is_timestamp(field.type) and pa.types.is_integer(column.type):
+            # DateTime columns are sent as seconds since the epoch
+            column = column.cast(pa.int64()).cast(pa.timestamp("s", tz="UTC"))
+        elif pa.types.is_date(field.type) and pa.types.is_integer(column.type):
+            # Date columns are sent as days since the epoch
+            column = column.cast(pa.int32()).cast(pa.date32())
+        columns.append(column.cast(field.type))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def merge_into_delta_table(
+    table_uri: str, storage_options: dict[str, str], data: pa.RecordBatchReader, unique_key: list[str]
+) -> None:
+    predicate = " AND ".join(f'target."{column}" = source."{column}"' for column in unique_key)
+    (
+        DeltaTable(table_uri, storage_options=storage_options)
+        .merge(source=data, predicate=predicate, source_alias="source", target_alias="target", streamed_exec=True)
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute()
+    )
+
+
+async def stream_model_to_delta_table(
+    query: str | ast.SelectQuery,
+    team: Team,
+    saved_query: DataWarehouseSavedQuery,
+    table_columns: dlt_typing.TTableSchemaColumns,
+    write_disposition: WriteDisposition = "replace",
+) -> tuple[DeltaTable, int]:
+    """Materialize a HogQL query by streaming its results from ClickHouse as Arrow record batches, and writing
+    them to the Delta table of the saved query as they arrive.
+
+    The results replace the table, are appended to it, or are merged into it on the unique key of the saved query,
+    in a single Delta commit, so readers never see a partially written table. Only the record batches being
+    written are held in memory, instead of the whole result set.
+
+    Returns:
+        The Delta table, and the number of rows written to it.
+    """
+    if not table_columns:
+        raise EmptyHogQLResponseColumnsError()
+
+    schema = pa.schema(
+        [
+            pa.field(
+                column_name,
+                DLT_ARROW_MAPPING.get(column_schema.get("data_type", "text"), pa.string()),
+                column_schema.get("nullable", True),
+            )
+            for column_name, column_schema in table_columns.items()
+        ]
+    )
+    executor = HogQLQueryExecutor(
+        query=build_streaming_query(query, table_columns),
+        team=team,
+        settings=HogQLGlobalSettings(
+            max_execution_time=60 * 20, max_memory_usage=settings.DATA_MODELING_MAX_MEMORY_USAGE
+        ),
+        limit_context=LimitContext.SAVED_QUERY,
+        workload=Workload.OFFLINE,
+        query_type="materialization",
+        context=HogQLContext(team_id=team.pk, output_format="ArrowStream"),
+    )
+    clickhouse_sql, context = await database_sync_to_async(executor.generate_clickhouse_sql)()
+
+    table_uri = f"{settings.BUCKET_URL}/{saved_query.folder_path}/{saved_query.name}"
+    storage_options = get_delta_storage_options()
+    loop = asyncio.get_running_loop()
+    row_count = 0
+    start_time = time.monotonic()
+
+    async with get_client(team_id=team.pk) as client:
+        record_batches = client.astream_query_as_arrow(clickhouse_sql, query_parameters=context.values)
+
+        async def next_record_batch() -> pa.RecordBatch | None:
+            return await anext(record_batches, None)
+
+        def iter_record_batches() -> collections.abc.Iterator[pa.RecordBatch]:
+            # Delta is written to in a separate thread, which pulls record batches from the event loop one at a time
+            nonlocal row_count
+            while (record_batch := asyncio.run_coroutine_threadsafe(next_record_batch(), loop).result()) is not None:
+                row_count += record_batch.num_rows
+                yield cast_record_batch(record_batch, schema)
+
+        record_batch_reader = pa.RecordBatchReader.from_batches(schema, iter_record_batches())
+        if write_disposition == "merge":
+            await asyncio.to_thread(
+                merge_into_delta_table, table_uri, storage_options, record_batch_reader, saved_query.unique_key
+            )
+        else:
+            await asyncio.to_thread(
+                write_deltalake,
+                table_uri,
+                record_batch_reader,
+                mode="overwrite" if write_disposition == "replace" else "append",
+                schema_mode="overwrite" if write_disposition == "replace" else "merge",
+                storage_options=storage_options,
+                engine="rust",
+            )
+
+    duration = time.monotonic() - start_time
+    rows_per_second = row_count / duration if duration > 0 else 0.0
+    if temporalio.activity.in_activity():
+        get_data_modeling_rows_per_second_metric().record(int(rows_per_second))
+    await logger.ainfo(
+        "Streamed %d rows to Delta table for model %s in %.1fs (%.0f rows/s)",
+        row_count,
+        saved_query.name,
+        duration,
+        rows_per_second,
+    )
+
+    return DeltaTable(table_uri, storage_options=storage_options), row_count
+
+
 @dataclasses.dataclass(frozen=True)
 class Selector:
     """A selector represents the models to select from a set of paths.
@@ -715,6 +1095,39 @@ async def get_posthog_tables(team_id: int) -> list[str]:
     return posthog_tables
 
 
+@dataclasses.dataclass
+class PlanDagActivityInputs:
+    team_id: int
+    dag: DAG
+
+    @property
+    def properties_to_log(self) -> dict[str, typing.Any]:
+        return {
+            "team_id": self.team_id,
+        }
+
+
+@temporalio.activity.defn
+async def plan_dag_activity(inputs: PlanDagActivityInputs) -> str:
+    """Plan the order models of a DAG would run in, without running them.
+
+    The plan uses the same scheduler as `run_dag_activity`, with the historical runtime of
+    each model, and assumes that all of them complete.
+    """
+    async with Heartbeater():
+        scheduler = await build_model_scheduler(inputs.team_id, inputs.dag)
+        plan = plan_schedule(scheduler)
+        formatted_plan = plan.format()
+
+        await logger.ainfo(
+            "Planned schedule for %s models with an estimated makespan of %.1fs:\n%s",
+            len(plan.models),
+            plan.makespan,
+            formatted_plan,
+        )
+        return formatted_plan
+
+
 @dataclasses.dataclass
 class StartRunActivityInputs:
     dag: DAG
@@ -866,10 +1279,13 @@ class RunWorkflowInputs:
     Attributes:
         team_id: The ID of the team we are running this for.
         select: A list of model selectors to define the models to run.
+        dry_run: Only log the order the models would run in and the estimated time to
+            run all of them, without running any.
     """
 
     team_id: int
     select: list[Selector] = dataclasses.field(default_factory=list)
+    dry_run: bool = False
 
     @property
     def properties_to_log(self) -> dict[str, typing.Any]:
@@ -907,6 +1323,19 @@ class RunWorkflow(PostHogWorkflow):
             ),
         )
 
+        if inputs.dry_run:
+            plan = await temporalio.workflow.execute_activity(
+                plan_dag_activity,
+                PlanDagActivityInputs(team_id=inputs.team_id, dag=dag),
+                start_to_close_timeout=dt.timedelta(minutes=5),
+                heartbeat_timeout=dt.timedelta(minutes=1),
+                retry_policy=temporalio.common.RetryPolicy(
+                    maximum_attempts=1,
+                ),
+            )
+            temporalio.workflow.logger.info(f"Dry run of data modeling DAG:\n{plan}")
+            return Results(set(), set(), set())
+
         run_at = dt.datetime.now(dt.UTC).isoformat()
 
         start_run_activity_inputs = StartRunActivityInputs(dag=dag, run_at=run_at, team_id=inputs.team_id)
@@ -0,0 +1,140 @@
+import collections.abc
+import dataclasses
+import heapq
+import typing
+
+if typing.TYPE_CHECKING:
+    from posthog.temporal.data_modeling.run_workflow import DAG
+
+# Runtime assumed for models that haven't completed a run yet
+DEFAULT_RUNTIME_SECONDS = 60.0
+
+
+def critical_path_lengths(dag: "DAG", runtimes: collections.abc.Mapping[str, float]) -> dict[str, float]:
+    """The time it takes to run each model and the longest chain of its descendants after it.
+
+    Models with the longest critical paths hold back the end of the run the most, so they are started first.
+    """
+    lengths: dict[str, float] = {}
+
+    def length(label: str) -> float:
+        if label not in lengths:
+            # The DAG is shallow enough to recurse, and it has no cycles, which `build_dag_activity` checks
+            children = [length(child) for child in dag[label].children if child in dag]
+            lengths[label] = runtimes.get(label, 0.0) + max(children, default=0.0)
+        return lengths[label]
+
+    for label in dag:
+        length(label)
+    return lengths
+
+
+class ModelScheduler:
+    """Decides which of the models that are ready to run to start next.
+
+    At most `max_concurrency` selected models run at the same time, and the ClickHouse memory they can use together is
+    kept under `memory_budget`, although a model always starts when nothing else is running. Ready models are started
+    in order of their critical path length, then their own runtime. Models that aren't selected aren't materialized,
+    so they are started right away.
+    """
+
+    def __init__(
+        self,
+        dag: "DAG",
+        runtimes: collections.abc.Mapping[str, float],
+        *,
+        max_concurrency: int,
+        memory_per_model: int,
+        memory_budget: int,
+    ):
+        self.dag = dag
+        self.runtimes = {
+            label: runtimes.get(label, DEFAULT_RUNTIME_SECONDS) if node.selected else 0.0 for label, node in dag.items()
+        }
+        self.priorities = critical_path_lengths(dag, self.runtimes)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.memory_per_model = memory_per_model
+        self.memory_budget = memory_budget
+        self.running: set[str] = set()
+        self.memory_in_use = 0
+        self._ready: list[tuple[float, float, str]] = []
+
+    def add_ready(self, label: str) -> None:
+        heapq.heappush(self._ready, (-self.priorities[label], -self.runtimes[label], label))
+
+    def has_ready(self) -> bool:
+        return len(self._ready) > 0
+
+    def pop_runnable(self) -> list[str]:
+        """Take the ready models that fit in the budget, in the order they should start."""
+        runnable = []
+        while self._ready:
+            label = self._ready[0][2]
+            if self.dag[label].selected:
+                if len(self.running) >= self.max_concurrency:
+                    break
+                if self.running and self.memory_in_use + self.memory_per_model > self.memory_budget:
+                    break
+                self.running.add(label)
+                self.memory_in_use += self.memory_per_model
+
+            heapq.heappop(self._ready)
+            runnable.append(label)
+        return runnable
+
+    def finish(self, label: str) -> None:
+        if label in self.running:
+            self.running.remove(label)
+            self.memory_in_use -= self.memory_per_model
+
+
+@dataclasses.dataclass(frozen=True)
+class ScheduledModel:
+    label: str
+    start: float
+    end: float
+
+
+@dataclasses.dataclass(frozen=True)
+class SchedulePlan:
+    """The order and times, in seconds since the start of the run, that models are expected to run at."""
+
+    models: list[ScheduledModel]
+    makespan: float
+
+    def format(self) -> str:
+        lines = [f"{model.start:>10.1f}s {model.end:>10.1f}s  {model.label}" for model in self.models]
+        lines.append(f"Estimated makespan: {self.makespan:.1f}s")
+        return "\n".join(lines)
+
+
+def plan_schedule(scheduler: ModelScheduler) -> SchedulePlan:
+    """Simulate running the DAG of a scheduler with the runtimes it expects, assuming no model fails."""
+    dag = scheduler.dag
+    completed: set[str] = set()
+    running: list[tuple[float, str]] = []
+    models: list[ScheduledModel] = []
+    now = 0.0
+
+    for label, node in dag.items():
+        if not node.parents:
+            scheduler.add_ready(label)
+
+    while scheduler.has_ready() or running:
+        for label in scheduler.pop_runnable():
+            end = now + scheduler.runtimes[label]
+            heapq.heappush(running, (end, label))
+            if dag[label].selected:
+                models.append(ScheduledModel(label=label, start=now, end=end))
+
+        # Finish every model that ends at the same time before starting more, so they all compete for the budget
+        now = running[0][0]
+        while running and running[0][0] == now:
+            _, label = heapq.heappop(running)
+            scheduler.finish(label)
+            completed.add(label)
+            for child in sorted(dag[label].children):
+                if child in dag and completed >= dag[child].parents:
+                    scheduler.add_ready(child)
+
+    return SchedulePlan(models=models, makespan=max((model.end for model in models), default=0.0))
@@ -366,6 +366,67 @@ async def test_insert_into_postgres_activity_inserts_data_into_postgres_table(
     )
 
 
+@pytest.mark.parametrize("model", TEST_MODELS)
+async def test_insert_into_postgres_activity_inserts_data_with_binary_copy(
+    clickhouse_client,
+    activity_environment,
+    postgres_connection,
+    postgres_config,
+    model: BatchExportModel | BatchExportSchema | None,
+    generate_test_data,
+    data_interval_start,
+    data_interval_end,
+    ateam,
+):
+    """Test that the insert_into_postgres_activity function inserts data with binary COPY.
+
+    Models that are merged are copied into their stage table over multiple connections.
+    """
+    batch_export_schema: BatchExportSchema | None = None
+    batch_export_model: BatchExportModel | None = None
+    if isinstance(model, BatchExportModel):
+        batch_export_model = model
+    elif model is not None:
+        batch_export_schema = model
+
+    insert_inputs = PostgresInsertInputs(
+        team_id=ateam.pk,
+        table_name="test_table",
+        data_interval_start=data_interval_start.isoformat(),
+        data_interval_end=data_interval_end.isoformat(),
+        batch_export_schema=batch_export_schema,
+        batch_export_model=batch_export_model,
+        **postgres_config,
+    )
+
+    with override_settings(
+        BATCH_EXPORT_POSTGRES_UPLOAD_CHUNK_SIZE_BYTES=5 * 1024**2,
+        BATCH_EXPORT_POSTGRES_USE_BINARY_COPY=True,
+        BATCH_EXPORT_POSTGRES_COPY_MAX_CONNECTIONS=2,
+        BATCH_EXPORT_POSTGRES_PARALLEL_COPY_MIN_BYTES=0,
+    ):
+        await activity_environment.run(insert_into_postgres_activity, insert_inputs)
+
+    sort_key = "event"
+    if batch_export_model is not None:
+        if batch_export_model.name == "persons":
+            sort_key = "person_id"
+        elif batch_export_model.name == "sessions":
+            sort_key = "session_id"
+
+    await assert_clickhouse_records_in_postgres(
+        postgres_connection=postgres_connection,
+        clickhouse_client=clickhouse_client,
+        schema_name=postgres_config["schema"],
+        table_name="test_table",
+        team_id=ateam.pk,
+        data_interval_start=data_interval_start,
+        data_interval_end=data_interval_end,
+        batch_export_model=model,
+        sort_key=sort_key,
+    )
+
+
 async def test_insert_into_postgres_activity_merges_persons_data_in_follow_up_runs(
     clickhouse_client,
     activity_environment,
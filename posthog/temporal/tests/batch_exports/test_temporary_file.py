@@ -2,10 +2,15 @@ import csv
 import datetime as dt
 import io
 import json
+import struct
 
+import orjson
+import psycopg.postgres
 import pyarrow as pa
 import pyarrow.parquet as pq
 import pytest
+from psycopg.adapt import Transformer
+from psycopg.pq import Format
 
 from posthog.temporal.batch_exports.temporary_file import (
     BatchExportTemporaryFile,
@@ -13,7 +18,10 @@ from posthog.temporal.batch_exports.temporary_file import (
     JSONLBatchExportWriter,
     DateRange,
     ParquetBatchExportWriter,
+    PostgreSQLBinaryCopyBatchExportWriter,
+    encode_postgres_binary_fields,
     json_dumps_bytes,
+    read_postgres_binary_copy_segments,
 )
 
 
@@ -536,3 +544,176 @@ async def test_jsonl_writer_deals_with_nested_user_events():
     assert date_ranges_seen == [
         (record_batch.column("_inserted_at")[0].as_py(), record_batch.column("_inserted_at")[-1].as_py())
     ]
+
+
+async def _write_and_read_back(writer, record_batch) -> bytes:
+    in_memory_file_obj = io.BytesIO()
+
+    async def store_in_memory_on_flush(batch_export_file, *args):
+        in_memory_file_obj.write(batch_export_file.read())
+
+    writer.flush_callable = store_in_memory_on_flush
+    async with writer.open_temporary_file():
+        await writer.write_record_batch(record_batch)
+
+    return in_memory_file_obj.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_jsonl_writer_output_matches_dumping_each_record():
+    """Test the columnar JSONL encoding produces the same bytes as dumping each record dict."""
+    record_batch = pa.RecordBatch.from_pydict(
+        {
+            "event": pa.array(["test-event-0", "test-event-1", None]),
+            "properties": pa.array([{"prop": "a", "list": [1, 2]}, {"prop": None, "list": []}, None]),
+            "elements": pa.array([["a", "b"], [], None]),
+            "timestamp": pa.array([dt.datetime(2024, 1, 1, tzinfo=dt.UTC)] * 3),
+            "count": pa.array([1, None, 3]),
+            "_inserted_at": pa.array([dt.datetime.fromtimestamp(i) for i in range(3)]),
+        }
+    )
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=None)  # type: ignore
+
+    written = await _write_and_read_back(writer, record_batch)
+
+    expected = b"".join(
+        orjson.dumps({k: v for k, v in record.items() if k != "_inserted_at"}, default=str) + b"\n"
+        for record in record_batch.to_pylist()
+    )
+    assert written == expected
+
+
+@pytest.mark.asyncio
+async def test_jsonl_writer_falls_back_only_for_failing_records():
+    """Test records that orjson can't encode are written in order, without affecting the others."""
+    too_deep = json.loads("[" * 256 + "]" * 256)
+    record_batch = pa.RecordBatch.from_pydict(
+        {
+            "event": pa.array(["test-event-0", "test-event-1", "test-event-2"]),
+            "properties": pa.array([{"deep": []}, {"deep": too_deep}, {"deep": []}]),
+            "_inserted_at": pa.array([dt.datetime.fromtimestamp(i) for i in range(3)]),
+        }
+    )
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=None)  # type: ignore
+
+    written = await _write_and_read_back(writer, record_batch)
+
+    assert [json.loads(line) for line in written.splitlines()] == [
+        {"event": "test-event-0", "properties": {"deep": []}},
+        {"event": "test-event-1", "properties": {"deep": too_deep}},
+        {"event": "test-event-2", "properties": {"deep": []}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_writer_writes_lists_as_postgres_arrays_and_fills_missing_fields():
+    record_batch = pa.RecordBatch.from_pydict(
+        {
+            "event": pa.array(["test-event-0", "test-event,1"]),
+            "elements": pa.array([["a", "b"], None]),
+            "_inserted_at": pa.array([dt.datetime.fromtimestamp(i) for i in range(2)]),
+        }
+    )
+    writer = CSVBatchExportWriter(
+        max_bytes=1,
+        field_names=["event", "elements", "missing"],
+        flush_callable=None,  # type: ignore
+    )
+
+    written = await _write_and_read_back(writer, record_batch)
+
+    assert written.decode("utf-8") == "test-event-0,{'a'\\, 'b'},\ntest-event\\,1,,\n"
+
+
+def _read_postgres_binary_copy_tuples(written: bytes, column_types: dict[str, int]) -> list[list]:
+    """Decode binary COPY tuples with psycopg's own binary loaders."""
+    transformer = Transformer()
+    rows = []
+
+    for segment in read_postgres_binary_copy_segments(io.BytesIO(written)):
+        view = memoryview(segment)
+        position = 0
+        while position < len(segment):
+            assert int.from_bytes(view[position : position + 2], "big") == len(column_types)
+            position += 2
+
+            row = []
+            for oid in column_types.values():
+                length = int.from_bytes(view[position : position + 4], "big", signed=True)
+                position += 4
+                if length == -1:
+                    row.append(None)
+                    continue
+
+                row.append(transformer.get_loader(oid, Format.BINARY).load(view[position : position + length]))
+                position += length
+            rows.append(row)
+
+    return rows
+
+
+def test_read_postgres_binary_copy_segments_reads_one_segment_at_a_time():
+    binary_file = io.BytesIO(struct.pack(">q", 3) + b"abc" + struct.pack(">q", 2) + b"de")
+
+    segments = read_postgres_binary_copy_segments(binary_file)
+
+    assert next(segments) == b"abc"
+    assert binary_file.tell() == 11
+    assert list(segments) == [b"de"]
+
+
+@pytest.mark.asyncio
+async def test_postgres_binary_copy_writer_encodes_values_for_column_types():
+    timestamp = dt.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt.UTC)
+    record_batch = pa.RecordBatch.from_pydict(
+        {
+            "team_id": pa.array([1, None], type=pa.int64()),
+            "count": pa.array([2**40, None], type=pa.uint64()),
+            "value": pa.array([1.5, None]),
+            "is_identified": pa.array([True, None]),
+            "event": pa.array(["test\x00-event", None]),
+            "properties": pa.array(['{"prop": "a\\u0000b", "list": [1]}', None]),
+            "timestamp": pa.array([timestamp, None]),
+            "elements": pa.array([["a", None], []]),
+            "_inserted_at": pa.array([dt.datetime.fromtimestamp(i) for i in range(2)]),
+        }
+    )
+    pg_types = psycopg.postgres.types
+    column_types = {
+        "team_id": pg_types["int4"].oid,
+        "count": pg_types["int8"].oid,
+        "value": pg_types["float8"].oid,
+        "is_identified": pg_types["bool"].oid,
+        "event": pg_types["varchar"].oid,
+        "properties": pg_types["jsonb"].oid,
+        "timestamp": pg_types["timestamptz"].oid,
+        "elements": pg_types["text"].array_oid,
+        "missing": pg_types["text"].oid,
+    }
+    writer = PostgreSQLBinaryCopyBatchExportWriter(
+        max_bytes=1,
+        field_names=list(column_types),
+        column_types=column_types,
+        flush_callable=None,  # type: ignore
+    )
+
+    written = await _write_and_read_back(writer, record_batch)
+
+    assert _read_postgres_binary_copy_tuples(written, column_types) == [
+        [1, 2**40, 1.5, True, "test-event", {"prop": "ab", "list": [1]}, timestamp, ["a", None], None],
+        [None, None, None, None, None, None, None, [], None],
+    ]
+
+
+def test_encode_postgres_binary_fields_encodes_text_arrays_with_null_arrays_spanning_elements():
+    """Test arrays are encoded from their offsets when NULL arrays span elements and the column is sliced."""
+    elements = pa.ListArray.from_arrays(
+        pa.array([0, 1, 3, 4, 6], type=pa.int32()),
+        pa.array(["a", "b", "c", "d", "e", None]),
+        mask=pa.array([False, True, False, False]),
+    ).slice(1)
+    text_array_oid = psycopg.postgres.types["text"].array_oid
+
+    assert encode_postgres_binary_fields(elements, text_array_oid) == encode_postgres_binary_fields(
+        pa.array([None, ["d"], ["e", None]]), text_array_oid
+    )
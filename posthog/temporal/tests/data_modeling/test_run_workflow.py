@@ -20,6 +20,7 @@ from dlt.common.normalizers.naming.snake_case import NamingConvention
 from freezegun.api import freeze_time
 
 from posthog import constants
+from posthog.hogql import ast
 from posthog.hogql.database.database import create_hogql_database
 from posthog.hogql.query import execute_hogql_query
 from posthog.models import Team
@@ -27,18 +28,24 @@ from posthog.warehouse.models.data_modeling_job import DataModelingJob
 from posthog.temporal.data_modeling.run_workflow import (
     BuildDagActivityInputs,
     CreateTableActivityInputs,
+    EmptyHogQLResponseColumnsError,
     ModelNode,
+    PlanDagActivityInputs,
     RunDagActivityInputs,
     RunWorkflow,
     RunWorkflowInputs,
     Selector,
     build_dag_activity,
+    build_streaming_query,
     create_table_activity,
     finish_run_activity,
     get_dlt_destination,
     materialize_model,
+    plan_dag_activity,
     run_dag_activity,
+    save_watermark,
     start_run_activity,
+    stream_model_to_delta_table,
 )
 from posthog.temporal.tests.utils.events import generate_test_events_in_clickhouse
 from posthog.warehouse.models.datawarehouse_saved_query import DataWarehouseSavedQuery
@@ -110,6 +117,74 @@ async def test_run_dag_activity_activity_materialize_mocked(activity_environment
     assert results.completed == set(dag.keys())
 
 
+async def test_run_dag_activity_activity_limits_concurrent_models(activity_environment, ateam):
+    """Test models that are ready at the same time don't run concurrently beyond the team's limit."""
+    dag = {
+        "events": ModelNode(label="events", children={f"my_model_{i}" for i in range(4)}),
+        **{f"my_model_{i}": ModelNode(label=f"my_model_{i}", parents={"events"}, selected=True) for i in range(4)},
+    }
+    for model_label in dag.keys():
+        if model_label != "events":
+            await DataWarehouseSavedQuery.objects.acreate(
+                team=ateam,
+                name=model_label,
+                query={"query": "SELECT * FROM events LIMIT 10", "kind": "HogQLQuery"},
+            )
+
+    running = 0
+    max_running = 0
+
+    async def materialize(*args, **kwargs):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+        return ("test_key", unittest.mock.MagicMock(), uuid.uuid4())
+
+    with (
+        override_settings(DATA_MODELING_MAX_CONCURRENT_MODELS_OVERRIDES={ateam.pk: 2}),
+        unittest.mock.patch("posthog.temporal.data_modeling.run_workflow.materialize_model", new=materialize),
+    ):
+        async with asyncio.timeout(10):
+            results = await activity_environment.run(run_dag_activity, RunDagActivityInputs(team_id=ateam.pk, dag=dag))
+
+    assert results.completed == set(dag.keys())
+    assert max_running == 2
+
+
+async def test_plan_dag_activity(activity_environment, ateam):
+    dag = {
+        "events": ModelNode(label="events", children={"my_events_model"}),
+        "my_events_model": ModelNode(
+            label="my_events_model", children={"my_joined_model"}, parents={"events"}, selected=True
+        ),
+        "my_joined_model": ModelNode(label="my_joined_model", parents={"my_events_model"}, selected=True),
+    }
+    saved_query = await DataWarehouseSavedQuery.objects.acreate(
+        team=ateam,
+        name="my_events_model",
+        query={"query": "SELECT * FROM events LIMIT 10", "kind": "HogQLQuery"},
+    )
+    for runtime in (100, 200):
+        job = await DataModelingJob.objects.acreate(
+            team=ateam,
+            saved_query=saved_query,
+            status=DataModelingJob.Status.COMPLETED,
+            last_run_at=TEST_TIME + dt.timedelta(seconds=runtime),
+        )
+        await DataModelingJob.objects.filter(id=job.id).aupdate(created_at=TEST_TIME)
+
+    plan = await activity_environment.run(plan_dag_activity, PlanDagActivityInputs(team_id=ateam.pk, dag=dag))
+
+    # `my_joined_model` has never ran, so it's assumed to take the default 60 seconds
+    assert plan.splitlines() == [
+        "       0.0s      150.0s  my_events_model",
+        "     150.0s      210.0s  my_joined_model",
+        "Estimated makespan: 210.0s",
+    ]
+
+
 async def test_create_table_activity(activity_environment, ateam):
     query = """\
     select
@@ -313,7 +388,8 @@ async def pageview_events(clickhouse_client, ateam):
     return (events, events_from_other_team)
 
 
-async def test_materialize_model(ateam, bucket_name, minio_client, pageview_events):
+@pytest.mark.parametrize("streaming", [False, True])
+async def test_materialize_model(ateam, bucket_name, minio_client, pageview_events, streaming):
     query = """\
     select
       event as event,
@@ -335,6 +411,7 @@ async def test_materialize_model(ateam, bucket_name, minio_client, pageview_even
             AIRBYTE_BUCKET_SECRET=settings.OBJECT_STORAGE_SECRET_ACCESS_KEY,
             AIRBYTE_BUCKET_REGION="us-east-1",
             AIRBYTE_BUCKET_DOMAIN="objectstorage:19000",
+            DATA_MODELING_STREAMING_MATERIALIZATION=streaming,
         ),
         unittest.mock.patch.object(AwsCredentials, "to_session_credentials", mock_to_session_credentials),
         unittest.mock.patch.object(
@@ -455,6 +532,142 @@ async def test_materialize_model_with_pascal_cased_name(ateam, bucket_name, mini
     await sync_to_async(execute_hogql_query)(f"SELECT * FROM {saved_query.name}", ateam)
 
 
+@pytest.mark.parametrize("streaming", [False, True])
+async def test_materialize_model_incremental(
+    ateam, bucket_name, minio_client, clickhouse_client, pageview_events, streaming
+):
+    query = """\
+    select
+      event as event,
+      distinct_id as distinct_id,
+      timestamp as timestamp
+    from events
+    where event = '$pageview'
+    """
+    saved_query = await DataWarehouseSavedQuery.objects.acreate(
+        team=ateam,
+        name="my_incremental_model",
+        query={"query": query, "kind": "HogQLQuery"},
+        materialization_mode=DataWarehouseSavedQuery.MaterializationMode.INCREMENTAL,
+        materialization_config={"watermark_column": "timestamp"},
+    )
+
+    with (
+        override_settings(
+            BUCKET_URL=f"s3://{bucket_name}",
+            AIRBYTE_BUCKET_KEY=settings.OBJECT_STORAGE_ACCESS_KEY_ID,
+            AIRBYTE_BUCKET_SECRET=settings.OBJECT_STORAGE_SECRET_ACCESS_KEY,
+            AIRBYTE_BUCKET_REGION="us-east-1",
+            AIRBYTE_BUCKET_DOMAIN="objectstorage:19000",
+            DATA_MODELING_STREAMING_MATERIALIZATION=streaming,
+        ),
+        unittest.mock.patch.object(AwsCredentials, "to_session_credentials", mock_to_session_credentials),
+        unittest.mock.patch.object(
+            AwsCredentials, "to_object_store_rs_credentials", mock_to_object_store_rs_credentials
+        ),
+    ):
+        job = await database_sync_to_async(DataModelingJob.objects.create)(
+            team=ateam, status=DataModelingJob.Status.RUNNING, workflow_id="test_workflow"
+        )
+        _, delta_table, _ = await materialize_model(saved_query.id.hex, ateam, saved_query, job)
+
+        events, _ = pageview_events
+        assert delta_table.to_pyarrow_table().num_rows == len(events)
+        assert (
+            saved_query.last_watermark
+            == max(dt.datetime.fromisoformat(event["timestamp"]).replace(tzinfo=dt.UTC) for event in events).isoformat()
+        )
+
+        start_time = dt.datetime.now(dt.UTC) + dt.timedelta(hours=1)
+        new_events, _, _ = await generate_test_events_in_clickhouse(
+            clickhouse_client,
+            ateam.pk,
+            start_time,
+            start_time + dt.timedelta(hours=1),
+            event_name="$pageview",
+            count=10,
+            count_outside_range=0,
+            count_other_team=0,
+            distinct_ids=["a", "b"],
+            table="sharded_events",
+        )
+
+        job = await database_sync_to_async(DataModelingJob.objects.create)(
+            team=ateam, status=DataModelingJob.Status.RUNNING, workflow_id="test_workflow"
+        )
+        _, delta_table, _ = await materialize_model(saved_query.id.hex, ateam, saved_query, job)
+
+    # Only the new events were queried and appended to the table
+    assert job.rows_materialized == len(new_events)
+    assert delta_table.to_pyarrow_table().num_rows == len(events) + len(new_events)
+    assert (
+        saved_query.last_watermark
+        == max(dt.datetime.fromisoformat(event["timestamp"]).replace(tzinfo=dt.UTC) for event in new_events).isoformat()
+    )
+
+
+async def test_build_streaming_query_selects_types_without_an_arrow_type_as_strings():
+    query = build_streaming_query(
+        "select id, ip from my_table",
+        {"id": {"data_type": "bigint", "nullable": False}, "ip": {"data_type": "wei", "nullable": True}},
+    )
+
+    assert query.select[0] == ast.Field(chain=["id"])
+    assert query.select[1] == ast.Alias(
+        alias="streamed_column_1", expr=ast.Call(name="toString", args=[ast.Field(chain=["ip"])])
+    )
+
+
+async def test_stream_model_to_delta_table_requires_columns(ateam):
+    saved_query = DataWarehouseSavedQuery(
+        team=ateam, name="my_model", query={"query": "select 1", "kind": "HogQLQuery"}
+    )
+
+    with pytest.raises(EmptyHogQLResponseColumnsError):
+        await stream_model_to_delta_table("select 1", ateam, saved_query, {})
+
+
+async def test_save_watermark_keeps_concurrent_edits(ateam):
+    saved_query = await DataWarehouseSavedQuery.objects.acreate(
+        team=ateam,
+        name="my_incremental_model",
+        query={"query": "select timestamp from events", "kind": "HogQLQuery"},
+        materialization_mode=DataWarehouseSavedQuery.MaterializationMode.INCREMENTAL,
+        materialization_config={"watermark_column": "timestamp"},
+    )
+    now = dt.datetime(2025, 1, 1, tzinfo=dt.UTC)
+
+    await database_sync_to_async(save_watermark)(saved_query, "2024-12-31T00:00:00+00:00", True, now)
+
+    await saved_query.arefresh_from_db()
+    assert saved_query.materialization_config == {
+        "watermark_column": "timestamp",
+        "last_watermark": "2024-12-31T00:00:00+00:00",
+        "last_full_rebuild_at": now.isoformat(),
+    }
+
+    # The watermark column is changed through the API while the next run is materializing
+    await DataWarehouseSavedQuery.objects.filter(id=saved_query.id).aupdate(
+        materialization_config={"watermark_column": "created_at"}
+    )
+
+    await database_sync_to_async(save_watermark)(saved_query, "2025-01-01T00:00:00+00:00", False, now)
+
+    await saved_query.arefresh_from_db()
+    assert saved_query.materialization_config == {"watermark_column": "created_at"}
+
+    # The query is changed through the API while the next run is materializing
+    await database_sync_to_async(save_watermark)(saved_query, "2025-01-01T00:00:00+00:00", True, now)
+    await DataWarehouseSavedQuery.objects.filter(id=saved_query.id).aupdate(
+        query={"query": "select created_at from events where event = 'signup'", "kind": "HogQLQuery"}
+    )
+
+    await database_sync_to_async(save_watermark)(saved_query, "2025-01-02T00:00:00+00:00", False, now)
+
+    await saved_query.arefresh_from_db()
+    assert saved_query.last_watermark == "2025-01-01T00:00:00+00:00"
+
+
 @pytest_asyncio.fixture
 async def saved_queries(ateam):
     parent_query = """\
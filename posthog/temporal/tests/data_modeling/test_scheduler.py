@@ -0,0 +1,113 @@
+import pytest
+
+from posthog.temporal.data_modeling.run_workflow import ModelNode
+from posthog.temporal.data_modeling.scheduler import (
+    DEFAULT_RUNTIME_SECONDS,
+    ModelScheduler,
+    ScheduledModel,
+    critical_path_lengths,
+    plan_schedule,
+)
+
+GB = 1000 * 1000 * 1000
+
+
+@pytest.fixture
+def dag():
+    """A DAG with a long chain of models under `events` and two short models under `persons`."""
+    return {
+        "events": ModelNode(label="events", children={"slow_model", "fast_model"}),
+        "persons": ModelNode(label="persons", children={"persons_model", "other_persons_model"}),
+        "slow_model": ModelNode(label="slow_model", children={"joined_model"}, parents={"events"}, selected=True),
+        "fast_model": ModelNode(label="fast_model", parents={"events"}, selected=True),
+        "persons_model": ModelNode(label="persons_model", parents={"persons"}, selected=True),
+        "other_persons_model": ModelNode(label="other_persons_model", parents={"persons"}, selected=True),
+        "joined_model": ModelNode(label="joined_model", parents={"slow_model"}, selected=True),
+    }
+
+
+RUNTIMES = {
+    "slow_model": 100.0,
+    "fast_model": 10.0,
+    "persons_model": 20.0,
+    "other_persons_model": 30.0,
+    "joined_model": 50.0,
+}
+
+
+def test_critical_path_lengths(dag):
+    lengths = critical_path_lengths(dag, RUNTIMES)
+
+    assert lengths["joined_model"] == 50.0
+    assert lengths["slow_model"] == 150.0
+    assert lengths["events"] == 150.0
+    assert lengths["persons"] == 30.0
+
+
+def test_scheduler_starts_longest_critical_paths_first(dag):
+    scheduler = ModelScheduler(dag, RUNTIMES, max_concurrency=2, memory_per_model=GB, memory_budget=10 * GB)
+    for label in ("slow_model", "fast_model", "persons_model", "other_persons_model"):
+        scheduler.add_ready(label)
+
+    assert scheduler.pop_runnable() == ["slow_model", "other_persons_model"]
+    assert scheduler.pop_runnable() == []
+
+    scheduler.finish("other_persons_model")
+    assert scheduler.pop_runnable() == ["persons_model"]
+
+
+def test_scheduler_keeps_memory_under_budget(dag):
+    scheduler = ModelScheduler(dag, RUNTIMES, max_concurrency=10, memory_per_model=3 * GB, memory_budget=7 * GB)
+    for label in ("slow_model", "fast_model", "persons_model"):
+        scheduler.add_ready(label)
+
+    assert scheduler.pop_runnable() == ["slow_model", "persons_model"]
+    assert scheduler.memory_in_use == 6 * GB
+
+    scheduler.finish("slow_model")
+    assert scheduler.pop_runnable() == ["fast_model"]
+
+
+def test_scheduler_always_starts_a_model_when_nothing_is_running(dag):
+    scheduler = ModelScheduler(dag, RUNTIMES, max_concurrency=4, memory_per_model=3 * GB, memory_budget=GB)
+    scheduler.add_ready("fast_model")
+    scheduler.add_ready("slow_model")
+
+    assert scheduler.pop_runnable() == ["slow_model"]
+    assert scheduler.pop_runnable() == []
+
+
+def test_scheduler_starts_models_that_are_not_selected_right_away(dag):
+    scheduler = ModelScheduler(dag, RUNTIMES, max_concurrency=1, memory_per_model=GB, memory_budget=GB)
+    scheduler.add_ready("slow_model")
+    assert scheduler.pop_runnable() == ["slow_model"]
+
+    scheduler.add_ready("events")
+    scheduler.add_ready("persons")
+    assert scheduler.pop_runnable() == ["events", "persons"]
+    assert scheduler.running == {"slow_model"}
+
+
+def test_plan_schedule(dag):
+    scheduler = ModelScheduler(dag, RUNTIMES, max_concurrency=2, memory_per_model=GB, memory_budget=10 * GB)
+
+    plan = plan_schedule(scheduler)
+
+    assert plan.models == [
+        ScheduledModel(label="slow_model", start=0.0, end=100.0),
+        ScheduledModel(label="other_persons_model", start=0.0, end=30.0),
+        ScheduledModel(label="persons_model", start=30.0, end=50.0),
+        ScheduledModel(label="fast_model", start=50.0, end=60.0),
+        ScheduledModel(label="joined_model", start=100.0, end=150.0),
+    ]
+    assert plan.makespan == 150.0
+    assert plan.format().endswith("Estimated makespan: 150.0s")
+
+
+def test_plan_schedule_uses_default_runtime_for_models_without_history(dag):
+    scheduler = ModelScheduler(dag, {}, max_concurrency=1, memory_per_model=GB, memory_budget=GB)
+
+    plan = plan_schedule(scheduler)
+
+    assert len(plan.models) == 5
+    assert plan.makespan == 5 * DEFAULT_RUNTIME_SECONDS
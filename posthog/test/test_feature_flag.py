@@ -1,10 +1,12 @@
 import concurrent.futures
 from datetime import datetime
 from typing import cast
+from unittest.mock import patch
 
 from django.core.cache import cache
 from django.db import IntegrityError, connection
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 from parameterized import parameterized
@@ -12,6 +14,7 @@ import pytest
 
 from posthog.models import Cohort, FeatureFlag, GroupTypeMapping, Person
 from posthog.models.feature_flag import get_feature_flags_for_team_in_cache
+from posthog.models.feature_flag.compiled_flags import clear_compiled_flags_cache
 from posthog.models.feature_flag.flag_matching import (
     FeatureFlagHashKeyOverride,
     FeatureFlagMatch,
@@ -19,6 +22,7 @@ from posthog.models.feature_flag.flag_matching import (
     FeatureFlagMatchReason,
     FlagsMatcherCache,
     get_all_feature_flags,
+    get_all_feature_flags_for_distinct_ids,
     get_feature_flag_hash_key_overrides,
     set_feature_flag_hash_key_overrides,
 )
@@ -757,6 +761,78 @@ class TestModelCache(BaseTest):
         self.assertEqual(0, len(cached_flags))
 
 
+@override_settings(DECIDE_COMPILED_FLAGS_CACHE_ENABLED=True)
+class TestCompiledFlagsCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        clear_compiled_flags_cache()
+
+    def test_second_evaluation_uses_compiled_flags(self):
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "email", "value": "a@posthog.com", "type": "person"}]}]},
+        )
+        get_all_feature_flags(self.team, "example_id", property_value_overrides={"email": "a@posthog.com"})
+
+        with (
+            patch("posthog.models.feature_flag.flag_matching.get_feature_flags_for_team_in_cache") as mock_get_flags,
+            patch("posthog.models.feature_flag.compiled_flags.Filter") as mock_filter,
+        ):
+            flags, _, _, errors = get_all_feature_flags(
+                self.team, "example_id", property_value_overrides={"email": "a@posthog.com"}
+            )
+
+        self.assertEqual(flags, {"beta-feature": True})
+        self.assertFalse(errors)
+        mock_get_flags.assert_not_called()
+        mock_filter.assert_not_called()
+
+    def test_saving_a_flag_invalidates_compiled_flags(self):
+        flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 100}]},
+        )
+        self.assertEqual(get_all_feature_flags(self.team, "example_id")[0], {"beta-feature": True})
+
+        flag.filters = {"groups": [{"properties": [], "rollout_percentage": 0}]}
+        flag.save()
+        self.assertEqual(get_all_feature_flags(self.team, "example_id")[0], {"beta-feature": False})
+
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="other-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 100}]},
+        )
+        self.assertEqual(
+            get_all_feature_flags(self.team, "example_id")[0], {"beta-feature": False, "other-feature": True}
+        )
+
+    def test_invalid_flag_only_fails_itself(self):
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 100}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="broken-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": []}], "multivariate": {"variants": [{"key": "test"}]}},
+        )
+
+        flags, _, _, errors = get_all_feature_flags(self.team, "example_id")
+
+        self.assertEqual(flags, {"beta-feature": True})
+        self.assertTrue(errors)
+
+
 class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
     maxDiff = None
 
@@ -6074,6 +6150,128 @@ class TestFeatureFlagHashKeyOverrides(BaseTest, QueryMatchingTest):
         self.assertEqual(payloads, {})
 
 
+class TestFeatureFlagBatchMatching(BaseTest, QueryMatchingTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        GroupTypeMapping.objects.create(
+            team=self.team, project_id=self.team.project_id, group_type="organization", group_type_index=0
+        )
+        Group.objects.create(
+            team=self.team, group_type_index=0, group_key="foo", group_properties={"name": "foo.inc"}, version=1
+        )
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "team", "value": "posthog", "type": "person", "operator": "exact"}]}],
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            created_by=self.user,
+            key="email-flag",
+            filters={
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "email", "value": "@posthog.com", "type": "person", "operator": "icontains"}
+                        ],
+                        "rollout_percentage": 50,
+                    }
+                ]
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            created_by=self.user,
+            key="cohort-flag",
+            filters={"groups": [{"properties": [{"key": "id", "value": cohort.pk, "type": "cohort"}]}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            created_by=self.user,
+            key="no-email-flag",
+            filters={"groups": [{"properties": [{"key": "email", "type": "person", "operator": "is_not_set"}]}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            created_by=self.user,
+            key="group-flag",
+            filters={
+                "aggregation_group_type_index": 0,
+                "groups": [
+                    {"properties": [{"key": "name", "value": "foo.inc", "type": "group", "group_type_index": 0}]}
+                ],
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            created_by=self.user,
+            key="continuity-flag",
+            ensure_experience_continuity=True,
+            filters={
+                "groups": [{"properties": [], "rollout_percentage": None}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first-variant", "rollout_percentage": 50},
+                        {"key": "second-variant", "rollout_percentage": 50},
+                    ]
+                },
+            },
+        )
+
+        self.distinct_ids = ["unknown_id"]
+        for i in range(10):
+            Person.objects.create(
+                team=self.team,
+                distinct_ids=[f"user_{i}", f"user_{i}_alias"],
+                properties={"email": f"user_{i}@posthog.com", "team": "posthog" if i % 2 else "other"} if i % 3 else {},
+            )
+            self.distinct_ids.extend([f"user_{i}", f"user_{i}_alias"])
+        set_feature_flag_hash_key_overrides(self.team, ["user_0"], "anonymous_id")
+
+    def test_matches_evaluating_each_distinct_id(self):
+        groups = {"organization": "foo"}
+        results = get_all_feature_flags_for_distinct_ids(self.team, self.distinct_ids, groups, chunk_size=7)
+
+        assert list(results.keys()) == self.distinct_ids
+        for distinct_id in self.distinct_ids:
+            assert results[distinct_id] == get_all_feature_flags(self.team, distinct_id, groups), distinct_id
+        assert results["user_3"][0]["no-email-flag"] is True
+        assert results["user_1"][0]["cohort-flag"] is True
+
+    def test_queries_per_chunk(self):
+        get_all_feature_flags_for_distinct_ids(self.team, self.distinct_ids)
+
+        with CaptureQueriesContext(connection) as one_chunk:
+            get_all_feature_flags_for_distinct_ids(self.team, self.distinct_ids)
+        with CaptureQueriesContext(connection) as three_chunks:
+            get_all_feature_flags_for_distinct_ids(self.team, self.distinct_ids, chunk_size=7)
+
+        # Persons and hash key overrides are fetched once per chunk, everything else once
+        assert len(three_chunks.captured_queries) == len(one_chunk.captured_queries) + 4
+
+    def test_uses_overrides_of_the_distinct_id(self):
+        FeatureFlag.objects.create(
+            team=self.team,
+            created_by=self.user,
+            key="distinct-id-flag",
+            filters={
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "distinct_id", "value": "user_1", "type": "person", "operator": "exact"},
+                            {"key": "email", "type": "person", "operator": "is_set"},
+                        ]
+                    }
+                ]
+            },
+        )
+
+        results = get_all_feature_flags_for_distinct_ids(self.team, ["user_1", "user_2"])
+
+        assert results["user_1"][0]["distinct-id-flag"] is True
+        assert results["user_2"][0]["distinct-id-flag"] is False
+
+
 class TestHashKeyOverridesRaceConditions(TransactionTestCase, QueryMatchingTest):
     def setUp(self) -> None:
         return super().setUp()
@@ -53,6 +53,9 @@ import uuid
 
 logger = structlog.get_logger(__name__)
 
+# Keys of `materialization_config` that users set, the rest is kept by the materialization runs
+MATERIALIZATION_CONFIG_USER_KEYS = ("watermark_column", "unique_key", "full_rebuild_interval_hours")
+
 
 class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
     created_by = UserBasicSerializer(read_only=True)
@@ -78,6 +81,8 @@ class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
             "latest_error",
             "edited_history_id",
             "latest_history_id",
+            "materialization_mode",
+            "materialization_config",
         ]
         read_only_fields = [
             "id",
@@ -242,8 +247,25 @@ class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
                 was_sync_frequency_updated = True
                 locked_instance.sync_frequency_interval = sync_frequency_interval
 
+            if "materialization_config" in validated_data:
+                validated_data["materialization_config"] = {
+                    **locked_instance.materialization_config,
+                    **validated_data["materialization_config"],
+                }
+
             view: DataWarehouseSavedQuery = super().update(locked_instance, validated_data)
 
+            # Rows materialized so far may not match the new query or refresh settings, so rebuild on the next run
+            if before_update is None or (
+                view.query != before_update.query
+                or view.name != before_update.name
+                or view.materialization_mode != before_update.materialization_mode
+                or view.watermark_column != before_update.watermark_column
+                or view.unique_key != before_update.unique_key
+            ):
+                view.reset_watermark()
+                view.save(update_fields=["materialization_config"])
+
             # Only update columns and status if the query has changed
             if "query" in validated_data:
                 try:
@@ -300,6 +322,51 @@ class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
 
         return view
 
+    def validate_materialization_config(self, materialization_config):
+        if not isinstance(materialization_config, dict):
+            raise exceptions.ValidationError(detail="Materialization config must be an object")
+
+        unknown_keys = set(materialization_config.keys()) - set(MATERIALIZATION_CONFIG_USER_KEYS)
+        if unknown_keys:
+            raise exceptions.ValidationError(
+                detail=f"Unknown materialization config keys: {', '.join(sorted(unknown_keys))}"
+            )
+
+        watermark_column = materialization_config.get("watermark_column", None)
+        if watermark_column is not None and not isinstance(watermark_column, str):
+            raise exceptions.ValidationError(detail="The watermark column must be a column name")
+
+        unique_key = materialization_config.get("unique_key", None)
+        if unique_key is not None and (
+            not isinstance(unique_key, list) or not all(isinstance(column, str) for column in unique_key)
+        ):
+            raise exceptions.ValidationError(detail="The unique key must be a list of column names")
+
+        full_rebuild_interval_hours = materialization_config.get("full_rebuild_interval_hours", None)
+        if full_rebuild_interval_hours is not None and (
+            not isinstance(full_rebuild_interval_hours, int) or full_rebuild_interval_hours <= 0
+        ):
+            raise exceptions.ValidationError(detail="The full rebuild interval must be a positive number of hours")
+
+        return materialization_config
+
+    def validate(self, attrs):
+        materialization_mode = attrs.get(
+            "materialization_mode",
+            self.instance.materialization_mode if self.instance else DataWarehouseSavedQuery.MaterializationMode.FULL,
+        )
+        materialization_config = {
+            **(self.instance.materialization_config if self.instance else {}),
+            **attrs.get("materialization_config", {}),
+        }
+        if (
+            materialization_mode == DataWarehouseSavedQuery.MaterializationMode.INCREMENTAL
+            and not materialization_config.get("watermark_column")
+        ):
+            raise exceptions.ValidationError(detail="Incremental materialization requires a watermark column")
+
+        return attrs
+
     def validate_query(self, query):
         team_id = self.context["team_id"]
 
@@ -640,6 +640,97 @@ class TestSavedQuery(APIBaseTest):
             # Verify get_columns was called
             mock_get_columns.assert_called_once()
 
+    def test_incremental_materialization_requires_a_watermark_column(self):
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/warehouse_saved_queries/",
+            {
+                "name": "event_view",
+                "query": {
+                    "kind": "HogQLQuery",
+                    "query": "select event as event, timestamp as timestamp from events LIMIT 100",
+                },
+                "materialization_mode": "incremental",
+            },
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/warehouse_saved_queries/",
+            {
+                "name": "event_view",
+                "query": {
+                    "kind": "HogQLQuery",
+                    "query": "select event as event, timestamp as timestamp from events LIMIT 100",
+                },
+                "materialization_mode": "incremental",
+                "materialization_config": {"watermark_column": "timestamp", "full_rebuild_interval_hours": 24},
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["materialization_mode"], "incremental")
+        self.assertEqual(
+            response.json()["materialization_config"],
+            {"watermark_column": "timestamp", "full_rebuild_interval_hours": 24},
+        )
+
+    def test_update_resets_the_watermark_when_the_query_changes(self):
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/warehouse_saved_queries/",
+            {
+                "name": "event_view",
+                "query": {
+                    "kind": "HogQLQuery",
+                    "query": "select event as event, timestamp as timestamp from events LIMIT 100",
+                },
+                "materialization_mode": "incremental",
+                "materialization_config": {"watermark_column": "timestamp"},
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        saved_query = DataWarehouseSavedQuery.objects.get(id=response.json()["id"])
+        saved_query.materialization_config["last_watermark"] = "2025-01-01T00:00:00+00:00"
+        saved_query.materialization_config["last_full_rebuild_at"] = "2025-01-01T00:00:00+00:00"
+        saved_query.save()
+
+        response = self.client.patch(
+            f"/api/environments/{self.team.id}/warehouse_saved_queries/{saved_query.id}",
+            {"materialization_config": {"full_rebuild_interval_hours": 12}},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        saved_query.refresh_from_db()
+        self.assertEqual(saved_query.last_watermark, "2025-01-01T00:00:00+00:00")
+        self.assertEqual(saved_query.materialization_config["full_rebuild_interval_hours"], 12)
+
+        # Saving the query unchanged keeps the watermark
+        response = self.client.patch(
+            f"/api/environments/{self.team.id}/warehouse_saved_queries/{saved_query.id}",
+            {
+                "query": {
+                    "kind": "HogQLQuery",
+                    "query": "select event as event, timestamp as timestamp from events LIMIT 100",
+                },
+                "edited_history_id": response.json()["latest_history_id"],
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        saved_query.refresh_from_db()
+        self.assertEqual(saved_query.last_watermark, "2025-01-01T00:00:00+00:00")
+
+        response = self.client.patch(
+            f"/api/environments/{self.team.id}/warehouse_saved_queries/{saved_query.id}",
+            {
+                "query": {
+                    "kind": "HogQLQuery",
+                    "query": "select event as event, timestamp as timestamp from events LIMIT 10",
+                },
+                "edited_history_id": response.json()["latest_history_id"],
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        saved_query.refresh_from_db()
+        self.assertIsNone(saved_query.last_watermark)
+        self.assertEqual(saved_query.watermark_column, "timestamp")
+
     def test_create_with_activity_log(self):
         response = self.client.post(
             f"/api/environments/{self.team.id}/warehouse_saved_queries/",
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
 from typing import Any, Optional, Union
 import uuid
@@ -53,6 +53,12 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
         FAILED = "Failed"
         RUNNING = "Running"
 
+    class MaterializationMode(models.TextChoices):
+        """How the table of this SavedQuery is refreshed."""
+
+        FULL = "full", "full"  # the whole query is run and replaces the table every time
+        INCREMENTAL = "incremental", "incremental"  # only rows past the watermark are run and appended or merged
+
     name = models.CharField(max_length=128, validators=[validate_saved_query_name])
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     latest_error = models.TextField(default=None, null=True, blank=True)
@@ -72,6 +78,11 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
         help_text="The timestamp of this SavedQuery's last run (if any).",
     )
     sync_frequency_interval = models.DurationField(default=None, null=True, blank=True)
+    materialization_mode = models.CharField(
+        max_length=128, choices=MaterializationMode.choices, default=MaterializationMode.FULL
+    )
+    # { "watermark_column": str, "unique_key": list[str], "full_rebuild_interval_hours": int, "last_watermark": any, "last_full_rebuild_at": str }
+    materialization_config = models.JSONField(default=dict, blank=True)
 
     table = models.ForeignKey("posthog.DataWarehouseTable", on_delete=models.SET_NULL, null=True, blank=True)
     # The name of the view at the time of soft deletion
@@ -97,6 +108,44 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
 
         self.save()
 
+    @property
+    def is_incremental(self) -> bool:
+        return self.materialization_mode == self.MaterializationMode.INCREMENTAL
+
+    @property
+    def watermark_column(self) -> str | None:
+        return self.materialization_config.get("watermark_column", None)
+
+    @property
+    def unique_key(self) -> list[str]:
+        return self.materialization_config.get("unique_key", None) or []
+
+    @property
+    def last_watermark(self) -> Any:
+        return self.materialization_config.get("last_watermark", None)
+
+    def is_full_rebuild_due(self, now: datetime) -> bool:
+        """Incremental runs need a previous watermark, and are replaced by a full rebuild every so often to pick up
+        late arriving and updated rows that are behind the watermark."""
+        last_full_rebuild_at = self.materialization_config.get("last_full_rebuild_at", None)
+        if not self.is_incremental or self.last_watermark is None or last_full_rebuild_at is None:
+            return True
+
+        interval_hours = self.materialization_config.get(
+            "full_rebuild_interval_hours", settings.DATA_MODELING_FULL_REBUILD_INTERVAL_HOURS
+        )
+        return now - datetime.fromisoformat(last_full_rebuild_at) >= timedelta(hours=interval_hours)
+
+    def update_watermark(self, watermark: Any, full_rebuild: bool, now: datetime) -> None:
+        if watermark is not None:
+            self.materialization_config["last_watermark"] = watermark
+        if full_rebuild:
+            self.materialization_config["last_full_rebuild_at"] = now.isoformat()
+
+    def reset_watermark(self) -> None:
+        self.materialization_config.pop("last_watermark", None)
+        self.materialization_config.pop("last_full_rebuild_at", None)
+
     def get_columns(self) -> dict[str, dict[str, Any]]:
         from posthog.api.services.query import process_query_dict
         from posthog.hogql_queries.query_runner import ExecutionMode